@@ -8,6 +8,7 @@ import json
 import os
 import shutil
 import tarfile
+import time
 from datetime import datetime
 from tempfile import NamedTemporaryFile, mkdtemp
 
@@ -60,6 +61,9 @@ LOGGER = get_task_logger(__name__)
 FILE_READ_CHUNK = 1024  # bytes
 FULL_COURSE_REINDEX_THRESHOLD = 1
 
+# How often, at most, the progress of exporting the static assets is recorded in the export task status.
+EXPORT_PROGRESS_INTERVAL_SECONDS = 5
+
 
 def clone_instance(instance, field_values):
     """ Clones a Django model instance.
@@ -287,18 +291,27 @@ def create_export_tarball(course_module, course_key, context, status=None):
     name = course_module.url_name
     export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
     root_dir = path(mkdtemp())
+    progress_callback = _export_progress_callback(status) if status else None
 
     try:
-        if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
-        else:
-            export_course_to_xml(modulestore(), contentstore(), course_module.id, root_dir, name)
-
-        if status:
-            status.set_state(u'Compressing')
-            status.increment_completed_steps()
+        # The static assets are streamed into the tarball as they are exported, and the exported XML
+        # is added once it's complete.
         LOGGER.debug(u'tar file being generated at %s', export_file.name)
         with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
+            if isinstance(course_key, LibraryLocator):
+                export_library_to_xml(
+                    modulestore(), contentstore(), course_key, root_dir, name,
+                    tar_file=tar_file, progress_callback=progress_callback,
+                )
+            else:
+                export_course_to_xml(
+                    modulestore(), contentstore(), course_module.id, root_dir, name,
+                    tar_file=tar_file, progress_callback=progress_callback,
+                )
+
+            if status:
+                status.set_state(u'Compressing')
+                status.increment_completed_steps()
             tar_file.add(root_dir / name, arcname=name)
 
     except SerializationError as exc:
@@ -339,6 +352,22 @@ def create_export_tarball(course_module, course_key, context, status=None):
     return export_file
 
 
+def _export_progress_callback(status):
+    """
+    Returns a callback which records the progress of exporting the static assets in the state of the
+    given export task status, every EXPORT_PROGRESS_INTERVAL_SECONDS at most.
+    """
+    last_recorded_at = [0]
+
+    def record_progress(exported, total):
+        now = time.time()
+        if exported == total or now - last_recorded_at[0] >= EXPORT_PROGRESS_INTERVAL_SECONDS:
+            last_recorded_at[0] = now
+            status.set_state(u'Exporting ({exported}/{total} files)'.format(exported=exported, total=total))
+
+    return record_progress
+
+
 class CourseImportTask(UserTask):  # pylint: disable=abstract-method
     """
     Base class for course and library import tasks.
@@ -5,6 +5,7 @@ Unit tests for course import and export Celery tasks
 
 import copy
 import json
+import tarfile
 from uuid import uuid4
 
 import mock
@@ -21,6 +22,8 @@ from cms.djangoapps.contentstore.tests.test_libraries import LibraryTestCase
 from cms.djangoapps.contentstore.tests.utils import CourseTestCase
 from common.djangoapps.course_action_state.models import CourseRerunState
 from openedx.core.djangoapps.embargo.models import Country, CountryAccessRule, RestrictedCourse
+from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore
 
 TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
@@ -53,6 +56,24 @@ class ExportCourseTestCase(CourseTestCase):
         output = artifacts[0]
         self.assertEqual(output.name, 'Output')
 
+    def test_success_with_assets(self):
+        """
+        Verify that the static assets of the course are exported into the tarball
+        """
+        asset_key = self.course.id.make_asset_key('asset', 'sample.txt')
+        contentstore().save(StaticContent(asset_key, 'sample.txt', 'text/plain', b'Sample asset'))
+        key = str(self.course.location.course_key)
+        result = export_olx.delay(self.user.id, key, u'en')
+        status = UserTaskStatus.objects.get(task_id=result.id)
+        self.assertEqual(status.state, UserTaskStatus.SUCCEEDED)
+        output = UserTaskArtifact.objects.get(status=status, name='Output')
+        with tarfile.open(fileobj=output.file, mode='r:gz') as tar_file:
+            names = tar_file.getnames()
+            asset_names = [name for name in names if name.endswith('/static/sample.txt')]
+            self.assertEqual(len(asset_names), 1)
+            self.assertEqual(tar_file.extractfile(asset_names[0]).read(), b'Sample asset')
+            self.assertTrue(any(name.endswith('/policies/assets.json') for name in names))
+
     @mock.patch('cms.djangoapps.contentstore.tasks.export_course_to_xml', side_effect=side_effect_exception)
     def test_exception(self, mock_export):  # pylint: disable=unused-argument
         """
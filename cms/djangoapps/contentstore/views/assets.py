@@ -333,7 +333,7 @@ def _get_assets_for_page(course_key, options):
     sort = options['sort']
     filter_params = options['filter_params'] if options['filter_params'] else None
     start = current_page * page_size
-    return contentstore().get_all_content_for_course(
+    return contentstore().get_asset_index_for_course(
         course_key, start=start, maxresults=page_size, sort=sort, filter_params=filter_params
     )
 
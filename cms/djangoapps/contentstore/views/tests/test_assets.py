@@ -209,8 +209,8 @@ class PaginationTestCase(AssetsTestCase):
         self.assert_correct_asset_response(
             self.url + "?page_size=1&page=5&asset_type=Images", 5, 0, 0)
 
-    @mock.patch('xmodule.contentstore.mongo.MongoContentStore.get_all_content_for_course')
-    def test_mocked_filtered_response(self, mock_get_all_content_for_course):
+    @mock.patch('xmodule.contentstore.mongo.MongoContentStore.get_asset_index_for_course')
+    def test_mocked_filtered_response(self, mock_get_asset_index_for_course):
         """
         Test the ajax asset interfaces
         """
@@ -220,7 +220,7 @@ class PaginationTestCase(AssetsTestCase):
         thumbnail_location = [
             'c4x', 'edX', 'toy', 'thumbnail', 'test_thumb.jpg', None]
 
-        mock_get_all_content_for_course.return_value = [
+        mock_get_asset_index_for_course.return_value = [
             [
                 {
                     "asset_key": asset_key,
@@ -149,6 +149,22 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Compression codec for serialized block structures: 'zlib', 'lz4'
+    # or 'zstd'. Falls back to 'zlib' if the codec's library (lz4 or
+    # zstandard) is not installed.
+    COMPRESSION='zlib',
+
+    # Names of the registered transformers from other packages that don't
+    # declare INCREMENTAL_COLLECT, but whose collected data only depends on
+    # each block's own xBlock.  See BlockStructureTransformer.INCREMENTAL_COLLECT.
+    INCREMENTAL_COLLECT_TRANSFORMERS=['load_date_data'],
+
+    # Whether collected block structures keep their relations compact
+    # (as integer block indexes), which makes traversals and filtering
+    # of each per-user copy cheaper.  Relations are compacted once, when
+    # the structure is collected or read from the store.
+    COMPACT_RELATIONS=False,
 )
 
 ############################ FEATURE CONFIGURATION #############################
@@ -707,6 +723,7 @@ MIDDLEWARE = [
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'capa.safe_exec.django_integration.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -816,6 +833,20 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# The local disk cache of the course assets served by the contentserver which are too large for the
+# content cache, see openedx.core.djangoapps.contentserver.disk_cache.  It is disabled unless DIRECTORY
+# is set, to a directory shared by all of the processes of the node.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+    'MIN_ASSET_SIZE': 1024 * 1024,
+}
+
+# The directory of the on-disk cache of the courses loaded by the XMLModuleStore, so that the processes
+# loading an unchanged xml course skip parsing it, see xmodule.modulestore.xml_parse_cache.  It is disabled
+# unless set.
+XML_MODULESTORE_PARSE_CACHE_DIR = None
+
 MODULESTORE_BRANCH = 'draft-preferred'
 
 MODULESTORE = {
@@ -916,6 +947,18 @@ CODE_JAIL = {
     # Keys should be course run ids.
     # Values should be dictionaries that look like 'limits'.
     "limit_overrides": {},
+
+    # Pool of warm sandboxes used by capa's safe_exec (see capa.safe_exec.pool).
+    'pool': {
+        # How many sandbox workers each process keeps.  0 disables the pool.
+        'size': 0,
+        # After how many executions a worker is replaced.
+        'max_executions': 100,
+        # The sandbox users which workers run as, set up like the sandbox user above, each used by one worker at a
+        # time across all of the processes of the host.  When codejail uses a sandbox user, the pool is only used
+        # with users of its own.
+        'users': [],
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1933,6 +1976,13 @@ CACHES = {
     },
 }
 
+# .. setting_name: COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES
+# .. setting_default: 128 * 1024 * 1024
+# .. setting_description: Byte budget of the process-local LRU that sits in front of the
+#   'course_structure_cache' and holds deserialized split modulestore structures, keyed by
+#   structure version. Set to 0 to disable the local tier.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
 ############################ OAUTH2 Provider ###################################
 
 
@@ -170,6 +170,8 @@ ALLOWED_HOSTS = [
 
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 DATA_DIR = path(ENV_TOKENS.get('DATA_DIR', DATA_DIR))
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
+XML_MODULESTORE_PARSE_CACHE_DIR = ENV_TOKENS.get('XML_MODULESTORE_PARSE_CACHE_DIR', XML_MODULESTORE_PARSE_CACHE_DIR)
 
 CACHES = ENV_TOKENS['CACHES']
 
@@ -177,6 +177,9 @@ CACHES = {
     },
 }
 
+# Keep split structure reads observable in tests (e.g. with check_mongo_calls)
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 0
+
 ############################### BLOCKSTORE #####################################
 # Blockstore tests
 RUN_BLOCKSTORE_TESTS = os.environ.get('EDXAPP_RUN_BLOCKSTORE_TESTS', 'no').lower() in ('true', 'yes', '1')
@@ -7,6 +7,9 @@ import six
 from django.conf import settings
 from django.contrib.staticfiles import finders
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from django.utils.lru_cache import lru_cache
 from opaque_keys.edx.locator import AssetLocator
 from six import text_type
 
@@ -15,6 +18,9 @@ from xmodule.contentstore.content import StaticContent
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
 
+# The maximum number of staticfiles_storage lookups to memoize.
+STATICFILES_LOOKUP_CACHE_SIZE = 4096
+
 
 def _url_replace_regex(prefix):
     """
@@ -31,6 +37,72 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache(maxsize=64)
+def _compiled_url_replace_regex(static_url, data_dir, replace_jump_to_id):
+    """
+    Return the compiled regex matching, in a single scan, the static urls
+    matched by process_static_urls, the /course/ urls matched by
+    replace_course_urls and, if `replace_jump_to_id`, the /jump_to_id/ urls
+    matched by replace_jump_to_id_urls.  The named group matching the prefix
+    of a url ('static', 'course' or 'jump_to_id') tells what kind it is.
+    """
+    prefixes = [
+        u'(?P<static>(?:{static_url}|/static/)(?!{data_dir}))'.format(static_url=static_url, data_dir=data_dir),
+        u'(?P<course>/course/)',
+    ]
+    if replace_jump_to_id:
+        prefixes.append(u'(?P<jump_to_id>/jump_to_id/)')
+    return re.compile(_url_replace_regex(u'|'.join(prefixes)))
+
+
+@lru_cache(maxsize=STATICFILES_LOOKUP_CACHE_SIZE)
+def _staticfiles_url_if_exists(storage, path):
+    """
+    Return the url of `path` in the staticfiles `storage`, or None if it
+    doesn't exist there.  Memoized, since the collected static files don't
+    change while the process runs, and static urls are replaced in every
+    rendered block.
+    """
+    if storage.exists(path):
+        return storage.url(path)
+    return None
+
+
+@lru_cache(maxsize=STATICFILES_LOOKUP_CACHE_SIZE)
+def _staticfiles_url(storage, path):
+    """
+    Return the url of `path` in the staticfiles `storage`.  Memoized, like
+    _staticfiles_url_if_exists.
+    """
+    return storage.url(path)
+
+
+@receiver(setting_changed)
+def _clear_staticfiles_lookups(setting, **kwargs):  # pylint: disable=unused-argument
+    """
+    Forget the memoized staticfiles_storage lookups when the static files
+    settings are overridden (e.g. by tests).
+    """
+    if setting in ('STATICFILES_STORAGE', 'STATIC_ROOT', 'STATIC_URL'):
+        _staticfiles_url_if_exists.cache_clear()
+        _staticfiles_url.cache_clear()
+
+
+def _is_xblock_resource_url(prefix, rest):
+    """
+    Return whether the static url made of `prefix` and `rest` links to an
+    XBlock resource, rather than to a static asset.
+    """
+    # Probably wasn't a good idea that /static works for actual static assets
+    # and for magical course asset URLs....
+    full_url = prefix + rest
+
+    starts_with_static_url = full_url.startswith(six.text_type(settings.STATIC_URL))
+    starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
+    contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
+    return starts_with_prefix or (starts_with_static_url and contains_prefix)
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -110,14 +182,8 @@ def process_static_urls(text, replacement_function, data_dir=None):
         quote = match.group('quote')
         rest = match.group('rest')
 
-        # Don't rewrite XBlock resource links.  Probably wasn't a good idea that /static
-        # works for actual static assets and for magical course asset URLs....
-        full_url = prefix + rest
-
-        starts_with_static_url = full_url.startswith(six.text_type(settings.STATIC_URL))
-        starts_with_prefix = full_url.startswith(XBLOCK_STATIC_RESOURCE_PREFIX)
-        contains_prefix = XBLOCK_STATIC_RESOURCE_PREFIX in full_url
-        if starts_with_prefix or (starts_with_static_url and contains_prefix):
+        # Don't rewrite XBlock resource links.
+        if _is_xblock_resource_url(prefix, rest):
             return original
 
         return replacement_function(original, prefix, quote, rest)
@@ -165,6 +231,56 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
       * the updated static URI (will match the original if unchanged)
     """
 
+    replace_static_url = _static_url_replacer(data_directory, course_id, static_asset_path, static_paths_out)
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+
+
+def replace_all_urls(text, course_id, data_directory=None, static_asset_path='', jump_to_id_base_url=None,
+                     static_paths_out=None):
+    """
+    Replace /static/$stuff urls as replace_static_urls does, /course/$stuff
+    urls as replace_course_urls does and, if `jump_to_id_base_url` is given,
+    /jump_to_id/$id urls as replace_jump_to_id_urls does, in a single scan of
+    `text`, with a regex compiled once per course data directory.
+
+    text: The source text to do the substitutions in
+    course_id: The course identifier, as for replace_static_urls and replace_course_urls
+    data_directory, static_asset_path, static_paths_out: See replace_static_urls
+    jump_to_id_base_url: See replace_jump_to_id_urls
+    """
+    replace_static_url = _static_url_replacer(data_directory, course_id, static_asset_path, static_paths_out)
+    course_url_prefix = u'/courses/{}/'.format(text_type(course_id))
+
+    def replace_url(match):
+        """
+        Replace a single matched url, according to its kind.
+        """
+        original = match.group(0)
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+
+        if match.group('static') is not None:
+            # Don't rewrite XBlock resource links.
+            if _is_xblock_resource_url(prefix, rest):
+                return original
+            return replace_static_url(original, prefix, quote, rest)
+        elif match.group('course') is not None:
+            return "".join([quote, course_url_prefix, rest, quote])
+        else:
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+
+    url_regex = _compiled_url_replace_regex(
+        settings.STATIC_URL, static_asset_path or data_directory, jump_to_id_base_url is not None,
+    )
+    return url_regex.sub(replace_url, text)
+
+
+def _static_url_replacer(data_directory, course_id, static_asset_path, static_paths_out):
+    """
+    Return the function replacing a single static url matched by
+    process_static_urls, for replace_static_urls.
+    """
     if static_paths_out is None:
         static_paths_out = []
 
@@ -188,16 +304,14 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
-            exists_in_staticfiles_storage = False
+            url = None
             try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
+                url = _staticfiles_url_if_exists(staticfiles_storage, rest)
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
                     rest, str(err)))
 
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
+            if url is None:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
                 # Import is placed here to avoid model import at project startup.
@@ -214,10 +328,9 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
             course_path = "/".join((static_asset_path or data_directory, rest))
 
             try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
+                url = _staticfiles_url_if_exists(staticfiles_storage, rest)
+                if url is None:
+                    url = _staticfiles_url(staticfiles_storage, course_path)
             # And if that fails, assume that it's course content, and add manually data directory
             except Exception as err:
                 log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
@@ -227,4 +340,4 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         static_paths_out.append((original_uri, url))
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    return replace_static_url
@@ -0,0 +1,81 @@
+"""
+Django management command to benchmark the rewriting of urls in course HTML.
+"""
+
+
+import os
+import timeit
+from textwrap import dedent
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.keys import CourseKey
+
+from common.djangoapps.static_replace import (
+    replace_all_urls,
+    replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_static_urls
+)
+
+
+class Command(BaseCommand):
+    """
+    Times the rewriting of the /static/, /course/ and /jump_to_id/ urls of
+    every HTML file in a directory of course data (by default, the test
+    courses in common/test/data), as done for every rendered block: once by
+    applying replace_static_urls, replace_course_urls and
+    replace_jump_to_id_urls in turn, and once with replace_all_urls.
+
+    Example:
+        ./manage.py lms benchmark_static_replace --iterations 100
+    """
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course-dir',
+            default=os.path.join(settings.COMMON_ROOT, 'test', 'data'),
+            help='Directory to read the course HTML files from'
+        )
+        parser.add_argument(
+            '--course-id',
+            default='course-v1:edX+Benchmark+run',
+            help='Course the HTML is rewritten for'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=100,
+            help='How many times to rewrite all of the HTML files'
+        )
+
+    def handle(self, *args, **options):
+        html_texts = []
+        for dir_path, __, file_names in os.walk(options['course_dir']):
+            for file_name in sorted(file_names):
+                if file_name.endswith('.html'):
+                    with open(os.path.join(dir_path, file_name), 'rb') as html_file:
+                        html_texts.append(html_file.read().decode('utf-8', 'replace'))
+
+        course_key = CourseKey.from_string(options['course_id'])
+        jump_to_id_base_url = u'/courses/{}/jump_to_id/'.format(course_key)
+
+        def rewrite_in_turn():
+            for text in html_texts:
+                text = replace_static_urls(text, None, course_key)
+                text = replace_course_urls(text, course_key)
+                replace_jump_to_id_urls(text, course_key, jump_to_id_base_url)
+
+        def rewrite_in_single_pass():
+            for text in html_texts:
+                replace_all_urls(text, course_key, jump_to_id_base_url=jump_to_id_base_url)
+
+        self.stdout.write(u'Rewriting {} HTML files ({} characters), {} times.'.format(
+            len(html_texts), sum(len(text) for text in html_texts), options['iterations'],
+        ))
+        for name, rewrite in [('In turn', rewrite_in_turn), ('Single pass', rewrite_in_single_pass)]:
+            # Warm up the caches (e.g. the asset configuration) before timing.
+            rewrite()
+            duration = timeit.timeit(rewrite, number=options['iterations'])
+            self.stdout.write(u'{}: {:.2f} ms per iteration'.format(name, duration * 1000 / options['iterations']))
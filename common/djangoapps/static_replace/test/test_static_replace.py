@@ -18,7 +18,9 @@ from common.djangoapps.static_replace import (
     _url_replace_regex,
     make_static_urls_absolute,
     process_static_urls,
+    replace_all_urls,
     replace_course_urls,
+    replace_jump_to_id_urls,
     replace_static_urls
 )
 from xmodule.assetstore.assetmgr import AssetManager
@@ -201,6 +203,54 @@ def test_static_paths_out(mock_modulestore, mock_storage):
     assert static_paths == [(static_url, static_course_url), (raw_url, raw_url)]
 
 
+@patch('common.djangoapps.static_replace.staticfiles_storage', autospec=True)
+def test_replace_all_urls(mock_storage):
+    mock_storage.exists.side_effect = lambda path: path == 'file.png'
+    mock_storage.url.side_effect = lambda path: '/static/hashed/' + path
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+    # xss-lint: disable=python-wrap-html
+    text = (
+        '<img src="/static/file.png"/><a href=\'/static/other.pdf\'>/static/not_quoted.png</a>'
+        '<a href="/course/info">Info</a><a href="/jump_to_id/block_id">Block</a>'
+        '<img src="/static/xblock/resources/some.xblock/public/image.png"/><a href="/static/file.png?raw">Raw</a>'
+    )
+
+    expected_paths = []
+    expected_text = replace_jump_to_id_urls(
+        replace_course_urls(
+            replace_static_urls(
+                text, None, COURSE_KEY, static_asset_path=DATA_DIRECTORY, static_paths_out=expected_paths,
+            ),
+            COURSE_KEY,
+        ),
+        COURSE_KEY,
+        jump_to_id_base_url,
+    )
+    static_paths = []
+    assert replace_all_urls(
+        text,
+        COURSE_KEY,
+        static_asset_path=DATA_DIRECTORY,
+        jump_to_id_base_url=jump_to_id_base_url,
+        static_paths_out=static_paths,
+    ) == expected_text
+    assert static_paths == expected_paths
+    assert replace_all_urls(text, COURSE_KEY, static_asset_path=DATA_DIRECTORY) == replace_course_urls(
+        replace_static_urls(text, None, COURSE_KEY, static_asset_path=DATA_DIRECTORY), COURSE_KEY,
+    )
+
+
+@patch('common.djangoapps.static_replace.staticfiles_storage', autospec=True)
+def test_staticfiles_lookups_memoized(mock_storage):
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.png'
+
+    for __ in range(2):
+        assert replace_all_urls(STATIC_SOURCE, COURSE_KEY, static_asset_path=DATA_DIRECTORY) == '"/static/file.png"'
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_storage.url.assert_called_once_with('file.png')
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
@@ -0,0 +1,42 @@
+"""
+Django integration for capa's pool of codejail sandboxes.
+
+Like `codejail.django_integration`, this configures the pool from the
+`CODE_JAIL` setting, when Django starts.  Processes which don't use the
+middleware, such as celery workers, configure the pool from the setting when
+it is first used.
+"""
+
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import pool
+
+
+class ConfigureSandboxPoolMiddleware(object):
+    """
+    Configures the sandbox pool from `settings.CODE_JAIL['pool']`, a dict with
+    the `size` of the pool of each process (0 disables the pool), the
+    `max_executions` after which a worker is replaced, and the sandbox `users`
+    which workers run as.
+
+    This middleware is only used for its configuration side effect, and is
+    then removed from the middleware stack.
+    """
+
+    def __init__(self, get_response=None):
+        configure_from_settings()
+        raise MiddlewareNotUsed
+
+
+def configure_from_settings():
+    """
+    Configures the sandbox pool from `settings.CODE_JAIL['pool']`.
+    """
+    pool_settings = getattr(settings, 'CODE_JAIL', {}).get('pool') or {}
+    pool.configure(
+        pool_settings.get('size', 0),
+        pool_settings.get('max_executions', pool.MAX_EXECUTIONS),
+        pool_settings.get('users', ()),
+    )
@@ -0,0 +1,623 @@
+"""
+A pool of warm codejail sandboxes, for running capa's Python code without
+starting a new sandboxed interpreter, and importing its modules, each time.
+
+Each worker of the pool is a long-lived process, started with the same
+command as codejail's sandboxed processes, but as a sandbox user of its own,
+taken from the `users` the pool is configured with.  A user is only used by
+one worker at a time, across all of the processes of the host (see
+`lease_user`), so that all of the processes of the user are those of the
+worker and of its current execution.  The worker imports the modules of
+capa's `ASSUMED_IMPORTS` once, then reads requests (the code to run, its
+globals, its files and its limits) from its stdin.  It runs each request in a
+process of its own, forked from the worker, which:
+
+* reads and parses the request itself, so that the worker never holds the
+  data of an execution, which later executions could find in its memory,
+* has the codejail limits of the request applied to it (CPU, VMEM, FSIZE
+  and NPROC as resource limits, REALTIME by being killed by the worker),
+* runs in a temporary directory of its own, containing the request's files,
+* can't read the requests of other executions, or write to the worker's
+  responses, as its stdin, stdout and stderr are /dev/null,
+* can't change the state of the worker, or of later executions: the worker
+  can't be traced by it, since the worker doesn't start if it can't make
+  itself undumpable, and once the execution is done, the worker kills every
+  process of its user, including the processes which left the execution's
+  process group.  If the execution kills or stops the worker instead, the
+  pool kills every process of the user, and runs the code with codejail.
+
+Workers are recycled after `max_executions` executions, and after any
+execution that breached its limits.  Anything the pool can't run (code
+using the PROXY limit, or a `python_path` with files that aren't in
+`extra_files`), or couldn't run because of a broken worker, is run by
+codejail as usual.
+
+The pool is configured by `configure`.  Unless it was configured explicitly,
+it is configured from the `CODE_JAIL` setting when it is first used, see
+`capa.safe_exec.django_integration`.  When codejail runs its processes as a
+sandbox user, the pool is only used if it is configured with sandbox users of
+its own, which must be set up like codejail's sandbox user, and allowed to
+send signals to their own processes.
+"""
+
+
+import base64
+import fcntl
+import json
+import logging
+import os
+import select
+import subprocess
+import tempfile
+import textwrap
+import threading
+
+import six
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+log = logging.getLogger(__name__)
+
+# The number of workers to keep per process.  0 disables the pool.
+POOL_SIZE = 0
+# The number of executions after which a worker is replaced by a new one.
+MAX_EXECUTIONS = 100
+# The sandbox users which workers run as, one worker per user at a time.
+USERS = ()
+# The modules imported by workers when they start, in addition to the
+# modules of `ASSUMED_IMPORTS`.
+PRELOADED_MODULES = ["random2", "six", "six.moves"]
+# How many seconds to wait for a worker's response in addition to the
+# REALTIME limit of the execution, which the worker enforces itself.
+RESPONSE_GRACE_PERIOD = 5
+# How many seconds to wait for a new worker to be ready.
+START_TIMEOUT = 30
+# The code killing every process of the user it runs as, other than itself.
+KILL_ALL_CODE = "import os, signal; os.kill(-1, signal.SIGKILL)"
+
+# The program run by workers, in the sandbox.  Its arguments are "own-user" if
+# it runs as a sandbox user of its own, or "shared-user" if not, followed by
+# the modules to import.  Once it is ready, it writes a "ready" line to its
+# stdout.  For each request, it reads a line with the request's REALTIME
+# limit from its stdin, and forks the execution, which reads the JSON request
+# from the next line itself.  It then writes the execution's JSON response as
+# a line to its stdout.
+WORKER_CODE = textwrap.dedent(r"""
+    import base64
+    import json
+    import os
+    import resource
+    import select
+    import shutil
+    import signal
+    import sys
+    import tempfile
+    import time
+    import traceback
+
+    # Whether all of the processes of the user are the worker's.
+    OWN_USER = sys.argv[1] == "own-user"
+
+    sys.path[:] = [path for path in sys.path if path]
+    os.environ["OPENBLAS_NUM_THREADS"] = "1"
+    for modname in sys.argv[2:]:
+        try:
+            __import__(modname)
+        except ImportError:
+            pass
+
+    # Keep executions, which run as the same user, from tracing the worker, and
+    # don't run any if that fails.
+    import ctypes
+    if ctypes.CDLL(None).prctl(4, 0, 0, 0, 0) != 0:  # PR_SET_DUMPABLE
+        sys.exit("Cannot make the worker undumpable")
+
+    OK_TYPES = (type(None), int, float, bytes, str, list, tuple, dict)
+
+
+    def jsonable(value):
+        if not isinstance(value, OK_TYPES):
+            return False
+        try:
+            json.dumps(value)
+        except Exception:
+            return False
+        return True
+
+
+    def read_line(fd, size):
+        # Reads a line from fd, in reads of at most the given size, without
+        # reading anything after the line.
+        chunks = []
+        while not chunks or not chunks[-1].endswith(b"\n"):
+            chunk = os.read(fd, size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+    def run(tmpdir, result_fd):
+        # The request is only read, and parsed, by the execution's own
+        # process, so that nothing of it is left in the worker's memory for
+        # later executions to find.
+        request = json.loads(read_line(0, 65536).decode("utf-8"))
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        result = {}
+        try:
+            os.chdir(tmpdir)
+            for name, contents in request["extra_files"]:
+                with open(name, "wb") as extra_file:
+                    extra_file.write(base64.b64decode(contents))
+            sys.path.extend(request["python_path"])
+
+            limits = request["limits"]
+            if limits.get("CPU"):
+                resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"] + 1))
+            if limits.get("VMEM"):
+                resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+            resource.setrlimit(resource.RLIMIT_FSIZE, (limits.get("FSIZE", 0), limits.get("FSIZE", 0)))
+            if limits.get("NPROC"):
+                # The worker is a process of the user too.
+                nproc = limits["NPROC"] + 1 if OWN_USER else limits["NPROC"]
+                resource.setrlimit(resource.RLIMIT_NPROC, (nproc, nproc))
+
+            g_dict = request["globals"]
+            exec(request["code"], g_dict)
+            result["globals"] = {
+                name: value for name, value in g_dict.items() if jsonable(value) and not name.startswith("__")
+            }
+        except BaseException as exc:
+            result["error"] = traceback.format_exc()
+            result["limit_breach"] = isinstance(exc, MemoryError)
+        with os.fdopen(result_fd, "w") as result_file:
+            json.dump(result, result_file)
+
+
+    # The responses of executions are relayed through this buffer, without
+    # being parsed by the worker, and it is cleared after each of them.
+    response = bytearray(65536)
+
+
+    def relay(read_fd, deadline):
+        # Reads the response of an execution into the response buffer, until
+        # the execution closes read_fd.  Returns the size of the response, or
+        # None if the deadline passed first.
+        global response
+        size = 0
+        while True:
+            timeout = max(deadline - time.time(), 0) if deadline else None
+            if not select.select([read_fd], [], [], timeout)[0]:
+                return None
+            if size == len(response):
+                larger_response = bytearray(2 * size)
+                larger_response[:size] = response
+                response[:] = bytes(size)
+                response = larger_response
+            read_size = os.readv(read_fd, [memoryview(response)[size:]])
+            if not read_size:
+                return size
+            size += read_size
+
+
+    def write_all(data):
+        while data:
+            data = data[os.write(1, data):]
+
+
+    def execute(realtime):
+        tmpdir = tempfile.mkdtemp(prefix="codejail-")
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                run(tmpdir, write_fd)
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+
+        size = relay(read_fd, time.time() + realtime if realtime else None)
+        os.close(read_fd)
+
+        # Also kill anything the execution started, even the processes which
+        # left its process group when the worker has a user of its own.
+        kills = [(os.killpg, pid), (os.kill, pid)]
+        if OWN_USER:
+            kills.append((os.kill, -1))
+        for kill, kill_pid in kills:
+            try:
+                kill(kill_pid, signal.SIGKILL)
+            except OSError:
+                pass
+        __, status = os.waitpid(pid, 0)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if size is None:
+            error = {"error": "Exceeded the REALTIME limit of {:g} seconds".format(realtime), "limit_breach": True}
+        elif size and response.find(b"\n", 0, size) == -1:
+            write_all(memoryview(response)[:size])
+            write_all(b"\n")
+            response[:size] = bytes(size)
+            return
+        elif os.WIFSIGNALED(status):
+            error = {"error": "Killed by signal {}".format(os.WTERMSIG(status)), "limit_breach": True}
+        else:
+            error = {"error": "Exited with status {}".format(status), "limit_breach": True}
+        response[:] = bytes(len(response))
+        write_all((json.dumps(error) + "\n").encode("utf-8"))
+
+
+    write_all(b"ready\n")
+
+    # Each request is sent as a line with its REALTIME limit, read by the
+    # worker, followed by the request itself, read by its execution.
+    while True:
+        header = read_line(0, 1)
+        if not header:
+            break
+        execute(float(header))
+""")
+
+
+class SandboxWorkerError(Exception):
+    """
+    A worker of the pool failed, rather than the code it ran.
+    """
+
+
+def configure(size, max_executions=MAX_EXECUTIONS, users=()):
+    """
+    Configures the pool used by `safe_exec`: how many workers to keep per
+    process, after how many executions to replace a worker, and the sandbox
+    users which workers run as.
+    """
+    global POOL_SIZE, MAX_EXECUTIONS, USERS, _configured  # pylint: disable=global-statement
+    POOL_SIZE = size
+    MAX_EXECUTIONS = max_executions
+    USERS = tuple(users)
+    _configured = True
+
+
+def _configure_from_settings():
+    """
+    Configures the pool from the Django settings, once they are available,
+    for processes that didn't configure it, such as celery workers.
+    """
+    try:
+        from django.conf import settings
+    except ImportError:
+        configure(POOL_SIZE, MAX_EXECUTIONS, USERS)
+        return
+    if settings.configured:
+        from .django_integration import configure_from_settings
+        configure_from_settings()
+
+
+def python_command(user, code, *args):
+    """
+    Returns the command running the Python `code` with the given arguments,
+    as `user` if any, as codejail starts its sandboxed Python processes.
+    """
+    cmd = []
+    if user:
+        cmd.extend(["sudo", "-u", user])
+    cmd.extend(jail_code.COMMANDS["python"]["cmdline_start"])
+    cmd.extend(["-c", code])
+    cmd.extend(args)
+    return cmd
+
+
+def worker_command(user=None):
+    """
+    Returns the command starting a worker, as the sandbox user `user` if any,
+    and as the current user if not.
+    """
+    from .safe_exec import ASSUMED_IMPORTS
+
+    return python_command(
+        user,
+        WORKER_CODE,
+        "own-user" if user else "shared-user",
+        *([modname for __, modname in ASSUMED_IMPORTS] + PRELOADED_MODULES)
+    )
+
+
+def kill_user_processes(user):
+    """
+    Kills every process of the sandbox user `user`, including stopped ones,
+    by sending SIGKILL to all of them as that user.
+    """
+    try:
+        subprocess.call(
+            python_command(user, KILL_ALL_CODE),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+            env={},
+            timeout=RESPONSE_GRACE_PERIOD,
+        )
+    except (EnvironmentError, subprocess.TimeoutExpired):
+        log.exception("Couldn't kill the processes of the sandbox user %s", user)
+
+
+def lease_user(users):
+    """
+    Returns one of the sandbox `users` which no worker of any process of the
+    host runs as, along with the file descriptor of its lock, which keeps it
+    for the caller until it is closed.  Returns (None, None) if all of the
+    users are taken.
+    """
+    for user in users:
+        lock_path = os.path.join(tempfile.gettempdir(), "capa-sandbox-pool-{}.lock".format(user))
+        lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except EnvironmentError:
+            os.close(lock_fd)
+            continue
+        return user, lock_fd
+    return None, None
+
+
+class SandboxWorker(object):
+    """
+    A long-lived sandboxed process, running the executions sent to it.
+    """
+
+    def __init__(self, users=()):
+        """
+        Starts a worker as one of the sandbox `users`, or as the current user
+        if there are none and codejail doesn't use a sandbox user either.
+
+        Raises SandboxWorkerError if the worker can't be started.
+        """
+        self.executions = 0
+        self.process = None
+        self.user = self._user_lock = None
+        if users:
+            self.user, self._user_lock = lease_user(users)
+            if self.user is None:
+                raise SandboxWorkerError("All of the sandbox users are taken")
+            # Kill anything left by an earlier worker of the user.
+            kill_user_processes(self.user)
+        elif jail_code.COMMANDS["python"]["user"]:
+            raise SandboxWorkerError("The pool has no sandbox users")
+
+        try:
+            self.process = subprocess.Popen(
+                worker_command(self.user),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=tempfile.gettempdir(),
+                env={},
+                universal_newlines=True,
+            )
+            ready = select.select([self.process.stdout], [], [], START_TIMEOUT)[0]
+            if not ready or self.process.stdout.readline() != "ready\n":
+                raise SandboxWorkerError("Exited with status {}".format(self.process.poll()))
+        except (EnvironmentError, SandboxWorkerError) as exc:
+            self.close(kill=True)
+            raise SandboxWorkerError("Couldn't start a sandbox worker: {}".format(exc))
+
+    def execute(self, code, globals_dict, python_path, extra_files, limits):
+        """
+        Runs `code` with the given globals, files and limits, and returns
+        the worker's response: a dict with either the resulting `globals`,
+        or the `error` of the execution, and whether it breached its limits.
+        """
+        request = {
+            "code": code,
+            "globals": json_safe(globals_dict),
+            "python_path": list(python_path),
+            "extra_files": [
+                (name, base64.b64encode(six.ensure_binary(contents)).decode("ascii"))
+                for name, contents in extra_files
+            ],
+            "limits": limits,
+        }
+        self.executions += 1
+        try:
+            self.process.stdin.write(u"{}\n{}\n".format(limits.get("REALTIME") or 0, json.dumps(request)))
+            self.process.stdin.flush()
+            timeout = limits["REALTIME"] + RESPONSE_GRACE_PERIOD if limits.get("REALTIME") else None
+            if not select.select([self.process.stdout], [], [], timeout)[0]:
+                raise SandboxWorkerError("No response in {} seconds".format(timeout))
+            response = self.process.stdout.readline()
+        except EnvironmentError as exc:
+            raise SandboxWorkerError(six.text_type(exc))
+        if not response:
+            raise SandboxWorkerError("Exited with status {}".format(self.process.poll()))
+        try:
+            return json.loads(response)
+        except ValueError:
+            return {"error": "Invalid response", "limit_breach": True}
+
+    def close(self, kill=False):
+        """
+        Stops the worker, which exits when its stdin is closed.  If `kill`,
+        such as when the worker failed, also kills every process of its
+        sandbox user, right away.
+        """
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except EnvironmentError:
+                pass
+            if self.process.poll() is None:
+                try:
+                    self.process.terminate()
+                except EnvironmentError:
+                    pass
+        if kill and self.user:
+            kill_user_processes(self.user)
+        self.forget()
+
+    def forget(self):
+        """
+        Gives up the sandbox user of the worker, such as in a forked process
+        which doesn't own the worker.
+        """
+        if self._user_lock is not None:
+            os.close(self._user_lock)
+            self._user_lock = None
+
+
+class SandboxPool(object):
+    """
+    The workers of a process.  Workers are started when the pool is created,
+    and replaced in the background when they are recycled.  When all of the
+    workers are busy, executions start workers of their own, which are kept
+    only if the pool is not full when they are done.
+    """
+
+    def __init__(self, size, max_executions, users=()):
+        self.size = size
+        self.max_executions = max_executions
+        self.users = tuple(users)
+        self.pid = os.getpid()
+        self._idle_workers = []
+        self._lock = threading.Lock()
+        self._start_workers(size)
+
+    def execute(self, code, globals_dict, python_path, extra_files, limits, slug=None):
+        """
+        Runs `code` on a worker of the pool, updating `globals_dict` with
+        its results, as `codejail.safe_exec.safe_exec` does.
+
+        Raises SandboxWorkerError if the worker failed.
+        """
+        worker = self._acquire()
+        try:
+            response = worker.execute(code, globals_dict, python_path, extra_files, limits)
+        except SandboxWorkerError:
+            worker.close(kill=True)
+            self._start_workers_in_background()
+            raise
+
+        if response.get("limit_breach") or worker.executions >= self.max_executions:
+            if response.get("limit_breach"):
+                log.info("Recycling sandbox worker after a limit breach running %s", slug)
+            worker.close()
+            self._start_workers_in_background()
+        else:
+            self._release(worker)
+
+        if "error" in response:
+            raise SafeExecException("Couldn't execute jailed code: {}".format(response["error"]))
+        globals_dict.update(response["globals"])
+
+    def close(self):
+        """
+        Stops the idle workers of the pool.
+        """
+        with self._lock:
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.close()
+
+    def forget(self):
+        """
+        Gives up the sandbox users of the idle workers of the pool, in a
+        process forked from the one which owns them.
+        """
+        with self._lock:
+            workers, self._idle_workers = self._idle_workers, []
+        for worker in workers:
+            worker.forget()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        return SandboxWorker(self.users)
+
+    def _release(self, worker):
+        with self._lock:
+            if len(self._idle_workers) < self.size:
+                self._idle_workers.append(worker)
+                return
+        worker.close()
+
+    def _start_workers(self, count):
+        for __ in range(count):
+            try:
+                self._release(SandboxWorker(self.users))
+            except SandboxWorkerError as exc:
+                log.warning("%s", exc)
+                return
+
+    def _start_workers_in_background(self):
+        with self._lock:
+            missing = self.size - len(self._idle_workers)
+        if missing > 0:
+            thread = threading.Thread(target=self._start_workers, args=(missing,))
+            thread.daemon = True
+            thread.start()
+
+
+_configured = False
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the pool of the current process, or None if the pool is disabled.
+    """
+    global _pool  # pylint: disable=global-statement
+    if not _configured:
+        _configure_from_settings()
+    if not POOL_SIZE or not jail_code.is_configured("python"):
+        return None
+    if jail_code.COMMANDS["python"]["user"] and not USERS:
+        # Running executions as codejail's sandbox user wouldn't isolate them.
+        return None
+    with _pool_lock:
+        # The workers of a pool can't be shared with forked processes.
+        if _pool is None or _pool.pid != os.getpid():
+            if _pool is not None:
+                _pool.forget()
+            _pool = SandboxPool(POOL_SIZE, MAX_EXECUTIONS, USERS)
+        return _pool
+
+
+def safe_exec(code, globals_dict, python_path=None, extra_files=None, limit_overrides_context=None, slug=None):
+    """
+    Executes python code safely, as `codejail.safe_exec.safe_exec` does, on
+    a worker of the pool when possible.
+    """
+    python_path = python_path or ()
+    extra_files = extra_files or ()
+    limits = jail_code.get_effective_limits(limit_overrides_context)
+    extra_names = set(name for name, __ in extra_files)
+
+    pool = get_pool()
+    if pool and not limits.get("PROXY") and all(os.path.basename(path) in extra_names for path in python_path):
+        try:
+            pool.execute(
+                code,
+                globals_dict,
+                [os.path.basename(path) for path in python_path],
+                extra_files,
+                limits,
+                slug=slug,
+            )
+            return
+        except SandboxWorkerError as exc:
+            log.warning("Sandbox worker failed running %s, running it with codejail: %s", slug, exc)
+
+    codejail_safe_exec(
+        code,
+        globals_dict,
+        python_path=python_path,
+        extra_files=extra_files,
+        limit_overrides_context=limit_overrides_context,
+        slug=slug,
+    )
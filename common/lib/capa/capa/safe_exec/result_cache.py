@@ -0,0 +1,183 @@
+"""
+A cache of safe_exec results, shared by all of the processes using the same
+underlying cache.
+
+Compared to passing a plain cache to `safe_exec`, `SafeExecResultCache`:
+
+* Computes keys with a single hash of the canonical JSON of the code, the
+  random seed, the globals and the extra files, rather than by walking the
+  globals in Python.
+* Leaves the globals which are specific to the learner (see
+  `LEARNER_GLOBALS`) out of the key when the code can't use them, so that
+  the results are shared by every learner with the same seed.  Code which
+  runs with extra files or a python path, such as the helpers of the
+  course's python_lib.zip, may use them without naming them, so they always
+  stay in its key.
+* Only stores the globals that the execution changed, compressed.
+* Doesn't store results larger than `max_result_size`, and stores results
+  larger than `large_result_size` for `large_result_timeout` seconds only.
+* Reports each hit, miss, execution and set, with its latency, as New Relic
+  custom parameters of the current transaction (e.g. `safe_exec.cache.hits`
+  and `safe_exec.cache.hits_seconds`), and counts them for the
+  `max_stats_slugs` most recently used slugs, see `get_stats`.
+"""
+
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+
+import six
+
+try:
+    import newrelic.agent
+except ImportError:
+    newrelic = None  # pylint: disable=invalid-name
+
+log = logging.getLogger(__name__)
+
+KEY_PREFIX = "safe_exec.v2"
+
+# Globals which are specific to the learner, and aren't used by most code.
+LEARNER_GLOBALS = ("anonymous_student_id",)
+
+# Code with any of these words may read globals without naming them.
+DYNAMIC_ACCESS_RE = re.compile(
+    r"globals|locals|vars|eval|exec|__dict__|_getframe|inspect|getattr|__main__|__import__|__builtins__|"
+    r"importlib|\bsys\b|\bmodules\b"
+)
+
+
+class SafeExecResultCache(object):
+    """
+    A safe_exec result cache backend over a cache with `get(key)` and
+    `set(key, value, timeout)` methods, such as a Django cache.
+    """
+
+    def __init__(
+        self,
+        cache,
+        timeout=None,
+        large_result_size=64 * 1024,
+        large_result_timeout=60 * 60,
+        max_result_size=512 * 1024,
+        max_stats_slugs=1000,
+    ):
+        """
+        `timeout` is how many seconds results are stored for, None using the
+        default timeout of the cache.  The result sizes are in bytes, once
+        compressed.  `max_stats_slugs` is how many slugs to keep counters for.
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.large_result_size = large_result_size
+        self.large_result_timeout = large_result_timeout
+        self.max_result_size = max_result_size
+        self.max_stats_slugs = max_stats_slugs
+        self._stats = OrderedDict()
+        self._stats_lock = threading.Lock()
+
+    def make_key(self, code, safe_globals, random_seed, extra_files=None, python_path=None):
+        """
+        Returns the key of the result of running `code`, with the JSON-safe
+        globals `safe_globals` and the random seed `random_seed`, and with
+        `extra_files` and `python_path`.
+        """
+        if not extra_files and not python_path and not DYNAMIC_ACCESS_RE.search(code):
+            safe_globals = {
+                name: value for name, value in six.iteritems(safe_globals)
+                if name not in LEARNER_GLOBALS or name in code
+            }
+        hasher = hashlib.md5(json.dumps(
+            [code, repr(random_seed), safe_globals],
+            sort_keys=True,
+            separators=(',', ':'),
+        ).encode('utf-8'))
+        for name, contents in extra_files or ():
+            hasher.update(six.ensure_binary(name))
+            hasher.update(six.ensure_binary(contents))
+        for path in python_path or ():
+            hasher.update(b'\0' + six.ensure_binary(path))
+        return "{}.{}".format(KEY_PREFIX, hasher.hexdigest())
+
+    def get(self, key, slug=None):
+        """
+        Returns the cached (error message, changed globals) result of `key`,
+        or None.
+        """
+        start = time.time()
+        compressed = self.cache.get(key)
+        result = None
+        if compressed is not None:
+            try:
+                result = tuple(json.loads(zlib.decompress(compressed).decode('utf-8')))
+            except (zlib.error, ValueError):
+                log.warning("Ignoring undecodable safe_exec result cached as %s", key)
+        self._count(slug, 'hits' if result is not None else 'misses', time.time() - start)
+        return result
+
+    def set(self, key, value, slug=None):
+        """
+        Stores the (error message, changed globals) result `value` as `key`,
+        unless it is too large.
+        """
+        start = time.time()
+        compressed = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+        if len(compressed) > self.max_result_size:
+            self._count(slug, 'skipped_sets', time.time() - start, len(compressed))
+            return
+
+        timeout = self.timeout
+        if len(compressed) > self.large_result_size:
+            timeout = min(timeout or self.large_result_timeout, self.large_result_timeout)
+        if timeout is None:
+            self.cache.set(key, compressed)
+        else:
+            self.cache.set(key, compressed, timeout)
+        self._count(slug, 'sets', time.time() - start, len(compressed))
+
+    def count_execution(self, slug, duration):
+        """
+        Counts the execution of code whose result wasn't cached.
+        """
+        self._count(slug, 'executions', duration)
+
+    def get_stats(self, slug=None):
+        """
+        Returns the counters of `slug`, or of all slugs by slug: the number
+        of `hits`, `misses`, `executions`, `sets` and `skipped_sets`, and for
+        each the total number of `seconds` it took (e.g. `hits_seconds`) and
+        for sets the total number of `bytes` stored (e.g. `sets_bytes`).
+
+        Only the counters of the `max_stats_slugs` most recently counted slugs
+        are kept.
+        """
+        with self._stats_lock:
+            if slug is not None:
+                return dict(self._stats.get(slug, {}))
+            return {stats_slug: dict(stats) for stats_slug, stats in six.iteritems(self._stats)}
+
+    def _count(self, slug, name, duration, size=None):
+        if newrelic:
+            newrelic.agent.add_custom_parameter('safe_exec.cache.slug', slug)
+            newrelic.agent.add_custom_parameter('safe_exec.cache.' + name, True)
+            newrelic.agent.add_custom_parameter('safe_exec.cache.' + name + '_seconds', duration)
+            if size is not None:
+                newrelic.agent.add_custom_parameter('safe_exec.cache.' + name + '_bytes', size)
+
+        with self._stats_lock:
+            stats = self._stats.pop(slug, None)
+            if stats is None:
+                stats = defaultdict(int)
+                if len(self._stats) >= self.max_stats_slugs:
+                    self._stats.popitem(last=False)
+            self._stats[slug] = stats
+            stats[name] += 1
+            stats[name + '_seconds'] += duration
+            if size is not None:
+                stats[name + '_bytes'] += size
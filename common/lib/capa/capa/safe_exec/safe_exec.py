@@ -2,14 +2,15 @@
 
 
 import hashlib
+import time
 
 from codejail.safe_exec import SafeExecException, json_safe
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
-from codejail.safe_exec import safe_exec as codejail_safe_exec
 import six
 from six import text_type
 
-from . import lazymod
+from . import lazymod, pool
+from .result_cache import SafeExecResultCache
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -108,7 +109,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  It can also be a `SafeExecResultCache`, which shares results
+    between learners, and keeps statistics of them.
 
     `limit_overrides_context` is an optional string to be used as a key on
     the `settings.CODE_JAIL['limit_overrides']` dictionary in order to apply
@@ -120,9 +122,21 @@ def safe_exec(
     caller, that will be used in log messages.
 
     If `unsafely` is true, then the code will actually be executed without sandboxing.
+    Otherwise, it is executed on a warm sandbox of the pool when the pool is
+    enabled (see `capa.safe_exec.pool`), and in a new codejail sandbox if not.
     """
     # Check the cache for a previous result.
-    if cache:
+    if isinstance(cache, SafeExecResultCache):
+        input_globals = dict(globals_dict)
+        key = cache.make_key(code, json_safe(globals_dict), random_seed, extra_files, python_path)
+        cached = cache.get(key, slug=slug)
+        if cached is not None:
+            emsg, changed_globals = cached
+            globals_dict.update(changed_globals)
+            if emsg:
+                raise SafeExecException(emsg)
+            return
+    elif cache:
         safe_globals = json_safe(globals_dict)
         md5er = hashlib.md5()
         md5er.update(repr(code).encode('utf-8'))
@@ -145,9 +159,10 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        exec_fn = pool.safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code,
@@ -166,7 +181,14 @@ def safe_exec(
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
-    if cache:
+    if isinstance(cache, SafeExecResultCache):
+        cache.count_execution(slug, time.time() - start)
+        changed_globals = {
+            name: value for name, value in six.iteritems(json_safe(globals_dict))
+            if name not in input_globals or input_globals[name] != value
+        }
+        cache.set(key, (emsg, changed_globals), slug=slug)
+    elif cache:
         cleaned_results = json_safe(globals_dict)
         cache.set(key, (emsg, cleaned_results))
 
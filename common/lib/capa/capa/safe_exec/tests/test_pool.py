@@ -0,0 +1,185 @@
+"""Test pool.py"""
+
+
+import io
+import os
+import sys
+import textwrap
+import unittest
+import zipfile
+
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+from mock import patch
+
+from capa.safe_exec import pool
+
+LIMITS = {'CPU': 0, 'VMEM': 0, 'REALTIME': 0, 'FSIZE': 1048576, 'NPROC': 0, 'PROXY': 0}
+
+
+class TestSandboxPool(unittest.TestCase):
+    """
+    Test the pool, with workers run by the current Python, as the current user.
+    """
+
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        commands_patcher = patch.dict(jail_code.COMMANDS, {
+            'python': {'cmdline_start': [sys.executable, '-E', '-B'], 'user': None},
+        })
+        commands_patcher.start()
+        self.addCleanup(commands_patcher.stop)
+        self.pool = pool.SandboxPool(size=1, max_executions=3)
+        self.addCleanup(self.pool.close)
+
+    def execute(self, code, globals_dict=None, python_path=(), extra_files=(), **limits):
+        """
+        Runs `code` on the pool, and returns its resulting globals.
+        """
+        globals_dict = globals_dict if globals_dict is not None else {}
+        self.pool.execute(code, globals_dict, python_path, extra_files, dict(LIMITS, **limits))
+        return globals_dict
+
+    def test_set_values(self):
+        g = self.execute("a = b + 1", {'b': 16})
+        self.assertEqual(g['a'], 17)
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.execute("1/0")
+        self.assertIn("ZeroDivisionError", str(cm.exception))
+
+    def test_python_lib(self):
+        lib_zip = io.BytesIO()
+        with zipfile.ZipFile(lib_zip, 'w') as zipf:
+            zipf.writestr('constants.py', 'SEVENTEEN = 17\n')
+        g = self.execute(
+            "import constants\na = constants.SEVENTEEN",
+            python_path=['python_lib.zip'],
+            extra_files=[('python_lib.zip', lib_zip.getvalue())],
+        )
+        self.assertEqual(g['a'], 17)
+
+    def test_executions_dont_share_state(self):
+        self.execute("import sys\nsys.leaked = True")
+        g = self.execute("import sys\nleaked = hasattr(sys, 'leaked')")
+        self.assertFalse(g['leaked'])
+
+    def test_executions_cant_read_earlier_requests(self):
+        self.execute("a = 1", {'secret': 'zq-leak-marker'})
+        # Scan the memory of the next execution for the secret, with a
+        # pattern which doesn't contain it.
+        code = textwrap.dedent("""
+            import ctypes
+            import re
+            pattern = re.compile(b"zq-leak-m(?:a)rker")
+            leaked = False
+            with open("/proc/self/maps") as maps:
+                regions = [line.split() for line in maps]
+            for region in regions:
+                if not region[1].startswith("rw") or region[-1] in ("[vvar]", "[vsyscall]"):
+                    continue
+                start, end = (int(address, 16) for address in region[0].split("-"))
+                for offset in range(start, end, 1 << 20):
+                    if pattern.search(ctypes.string_at(offset, min((1 << 20) + 64, end - offset))):
+                        leaked = True
+        """)
+        self.assertFalse(self.execute(code)['leaked'])
+
+    def test_recycled_after_max_executions(self):
+        code = "import os\nworker_pid = os.getppid()"
+        worker_pids = [self.execute(code)['worker_pid'] for __ in range(4)]
+        self.assertEqual(len(set(worker_pids[:3])), 1)
+        self.assertNotEqual(worker_pids[3], worker_pids[0])
+
+    def test_recycled_after_limit_breach(self):
+        code = "import os\nworker_pid = os.getppid()"
+        worker_pid = self.execute(code)['worker_pid']
+        with self.assertRaises(SafeExecException) as cm:
+            self.execute("while True: pass", REALTIME=1)
+        self.assertIn("REALTIME", str(cm.exception))
+        self.assertNotEqual(self.execute(code)['worker_pid'], worker_pid)
+
+    @patch('capa.safe_exec.pool.WORKER_CODE', 'import sys; sys.exit("Cannot make the worker undumpable")')
+    def test_worker_not_ready(self):
+        with self.assertRaises(pool.SandboxWorkerError):
+            pool.SandboxWorker()
+
+    def test_sandbox_user_required(self):
+        with patch.dict(jail_code.COMMANDS['python'], {'user': 'sandbox'}):
+            with self.assertRaises(pool.SandboxWorkerError):
+                pool.SandboxWorker()
+
+    @patch('capa.safe_exec.pool.kill_user_processes')
+    @patch('capa.safe_exec.pool.lease_user')
+    def test_user_processes_killed_when_worker_killed(self, mock_lease_user, mock_kill_user_processes):
+        # The worker runs as the current user, as if it were the sandbox user.
+        worker_command = pool.worker_command
+        worker_command_patcher = patch('capa.safe_exec.pool.worker_command', lambda user: worker_command())
+        worker_command_patcher.start()
+        self.addCleanup(worker_command_patcher.stop)
+        mock_lease_user.side_effect = lambda users: ('sandbox1', os.open(os.devnull, os.O_RDONLY))
+        self.pool = pool.SandboxPool(size=1, max_executions=3, users=['sandbox1'])
+        self.addCleanup(self.pool.close)
+        mock_kill_user_processes.reset_mock()
+        with self.assertRaises(pool.SandboxWorkerError):
+            self.execute("import os, signal\nos.kill(os.getppid(), signal.SIGKILL)")
+        mock_kill_user_processes.assert_any_call('sandbox1')
+
+    def test_users_leased_once(self):
+        users = ['capa-test-user-{}'.format(os.getpid()), 'capa-test-user-{}-2'.format(os.getpid())]
+        user1, lock1 = pool.lease_user(users)
+        user2, lock2 = pool.lease_user(users)
+        self.assertEqual((user1, user2), tuple(users))
+        self.assertEqual(pool.lease_user(users), (None, None))
+        os.close(lock1)
+        user3, lock3 = pool.lease_user(users)
+        self.assertEqual(user3, users[0])
+        for lock_fd in (lock2, lock3):
+            os.close(lock_fd)
+
+
+class TestPooledSafeExec(unittest.TestCase):
+    """
+    Test when safe_exec uses the pool.
+    """
+
+    @patch('capa.safe_exec.pool.codejail_safe_exec')
+    @patch('capa.safe_exec.pool.get_pool')
+    def test_uses_pool(self, mock_get_pool, mock_codejail_safe_exec):
+        pool.safe_exec("a = 1", {})
+        self.assertTrue(mock_get_pool.return_value.execute.called)
+        self.assertFalse(mock_codejail_safe_exec.called)
+
+    @patch('capa.safe_exec.pool.codejail_safe_exec')
+    @patch('capa.safe_exec.pool.get_pool')
+    def test_python_path_not_in_extra_files(self, mock_get_pool, mock_codejail_safe_exec):
+        pool.safe_exec("a = 1", {}, python_path=['/path/to/lib.zip'])
+        self.assertFalse(mock_get_pool.return_value.execute.called)
+        self.assertTrue(mock_codejail_safe_exec.called)
+
+    @patch('capa.safe_exec.pool.codejail_safe_exec')
+    @patch('capa.safe_exec.pool.get_pool')
+    def test_falls_back_when_worker_fails(self, mock_get_pool, mock_codejail_safe_exec):
+        mock_get_pool.return_value.execute.side_effect = pool.SandboxWorkerError
+        pool.safe_exec("a = 1", {})
+        self.assertTrue(mock_codejail_safe_exec.called)
+
+    @patch('capa.safe_exec.pool._configured', False)
+    @patch('capa.safe_exec.django_integration.configure_from_settings')
+    def test_configured_from_settings(self, mock_configure_from_settings):
+        pool.get_pool()
+        self.assertTrue(mock_configure_from_settings.called)
+
+    @patch('capa.safe_exec.pool._configured', True)
+    @patch('capa.safe_exec.pool.POOL_SIZE', 1)
+    @patch('capa.safe_exec.pool.USERS', ())
+    def test_disabled_without_users(self):
+        with patch.dict(jail_code.COMMANDS, {'python': {'cmdline_start': [sys.executable], 'user': 'sandbox'}}):
+            self.assertIsNone(pool.get_pool())
+
+    @patch('capa.safe_exec.pool.codejail_safe_exec')
+    def test_disabled_by_default(self, mock_codejail_safe_exec):
+        self.assertIsNone(pool.get_pool())
+        pool.safe_exec("a = 1", {})
+        self.assertTrue(mock_codejail_safe_exec.called)
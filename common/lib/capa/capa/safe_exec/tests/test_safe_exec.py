@@ -2,10 +2,12 @@
 
 
 import hashlib
+import json
 import os
 import os.path
 import textwrap
 import unittest
+import zlib
 
 import pytest
 import random2 as random
@@ -16,10 +18,12 @@ from codejail.safe_exec import SafeExecException
 from django.conf import settings
 from django.core.exceptions import MiddlewareNotUsed
 from django.test import override_settings
+from mock import ANY, patch
 from six import text_type, unichr
 from six.moves import range
 
 from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec.result_cache import SafeExecResultCache
 
 
 class TestSafeExec(unittest.TestCase):
@@ -260,6 +264,106 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test safe_exec with a SafeExecResultCache."""
+
+    def setUp(self):
+        super(TestSafeExecResultCache, self).setUp()
+        self.cache = {}
+        self.result_cache = SafeExecResultCache(DictCache(self.cache))
+
+    def test_cache_miss_then_hit(self):
+        g = {'b': 1}
+        safe_exec("a = b + int(math.pi)", g, cache=self.result_cache, slug='problem')
+        self.assertEqual(g['a'], 4)
+        # Only the changed globals are cached, compressed.
+        cached = list(self.cache.values())[0]
+        self.assertEqual(json.loads(zlib.decompress(cached).decode('utf-8')), [None, {'a': 4}])
+
+        g = {'b': 1}
+        with patch('capa.safe_exec.pool.safe_exec') as mock_safe_exec:
+            safe_exec("a = b + int(math.pi)", g, cache=self.result_cache, slug='problem')
+        self.assertFalse(mock_safe_exec.called)
+        self.assertEqual(g, {'a': 4, 'b': 1})
+
+        stats = self.result_cache.get_stats('problem')
+        self.assertEqual((stats['hits'], stats['misses'], stats['executions'], stats['sets']), (1, 1, 1, 1))
+
+    @patch('capa.safe_exec.result_cache.newrelic')
+    def test_reported_to_newrelic(self, mock_newrelic):
+        safe_exec("a = 1", {}, cache=self.result_cache, slug='problem')
+        mock_newrelic.agent.add_custom_parameter.assert_any_call('safe_exec.cache.slug', 'problem')
+        mock_newrelic.agent.add_custom_parameter.assert_any_call('safe_exec.cache.misses', True)
+        mock_newrelic.agent.add_custom_parameter.assert_any_call('safe_exec.cache.sets_bytes', ANY)
+
+    def test_stats_slugs_bounded(self):
+        self.result_cache = SafeExecResultCache(DictCache(self.cache), max_stats_slugs=2)
+        for slug in ['problem1', 'problem2', 'problem1', 'problem3']:
+            safe_exec("a = 1", {}, cache=self.result_cache, slug=slug)
+        self.assertEqual(set(self.result_cache.get_stats()), {'problem1', 'problem3'})
+        self.assertEqual(self.result_cache.get_stats('problem1')['hits'], 1)
+        self.assertEqual(self.result_cache.get_stats('problem2'), {})
+
+    def test_cache_exceptions(self):
+        for __ in range(2):
+            with self.assertRaises(SafeExecException) as cm:
+                safe_exec("1/0", {}, cache=self.result_cache)
+            self.assertIn("ZeroDivisionError", text_type(cm.exception))
+        self.assertEqual(self.result_cache.get_stats()[None]['hits'], 1)
+
+    def test_shared_between_learners(self):
+        code = "a = random.randint(0, 999)"
+        g = {'anonymous_student_id': 'learner1', 'seed': 17}
+        safe_exec(code, g, random_seed=17, cache=self.result_cache)
+        g2 = {'anonymous_student_id': 'learner2', 'seed': 17}
+        safe_exec(code, g2, random_seed=17, cache=self.result_cache)
+        self.assertEqual(g2, {'anonymous_student_id': 'learner2', 'seed': 17, 'a': g['a']})
+        self.assertEqual(len(self.cache), 1)
+
+        # Another seed is another result.
+        safe_exec(code, {'anonymous_student_id': 'learner3', 'seed': 18}, random_seed=18, cache=self.result_cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_not_shared_when_learner_globals_are_used(self):
+        for code in [
+            "a = anonymous_student_id",
+            "a = globals()['anonymous_student_id']",
+            "import __main__\na = __main__.g_dict['anonymous_student_id']",
+            "import sys\na = sys.modules['__main__'].g_dict['anonymous_student_id']",
+        ]:
+            self.cache.clear()
+            for learner in ['learner1', 'learner2']:
+                g = {'anonymous_student_id': learner}
+                safe_exec(code, g, cache=self.result_cache)
+                self.assertEqual(g['a'], learner)
+            self.assertEqual(len(self.cache), 2)
+
+    def test_learner_globals_kept_with_extra_files(self):
+        # The helpers in the extra files may read the learner globals.
+        lib_files = [('python_lib.zip', b'helpers')]
+        for extra_files, python_path in [(lib_files, None), (None, ['python_lib.zip'])]:
+            keys = set(
+                self.result_cache.make_key(
+                    "a = 1", {'anonymous_student_id': learner}, 1, extra_files, python_path,
+                )
+                for learner in ['learner1', 'learner2']
+            )
+            self.assertEqual(len(keys), 2)
+
+    def test_extra_files_in_key(self):
+        keys = set(
+            self.result_cache.make_key("a = 1", {}, 1, [('python_lib.zip', contents)])
+            for contents in [b'version 1', b'version 2']
+        )
+        self.assertEqual(len(keys), 2)
+
+    def test_large_results(self):
+        self.result_cache = SafeExecResultCache(DictCache(self.cache), max_result_size=100)
+        safe_exec("import os\na = os.urandom(1000).hex()", {}, cache=self.result_cache)
+        self.assertEqual(self.cache, {})
+        self.assertEqual(self.result_cache.get_stats()[None]['skipped_sets'], 1)
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
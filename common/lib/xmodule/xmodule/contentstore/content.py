@@ -316,6 +316,10 @@ class StaticContentStream(StaticContent):
         self._stream = stream
 
     def stream_data(self):
+        """
+        Stream the data from its first byte, so that it can be streamed more than once
+        """
+        self._stream.seek(0)
         while True:
             chunk = self._stream.read(STREAM_DATA_CHUNK_SIZE)
             if len(chunk) == 0:
@@ -374,6 +378,13 @@ class ContentStore(object):
         '''
         raise NotImplementedError
 
+    def get_asset_index_for_course(self, course_key, start=0, maxresults=-1, sort=None, filter_params=None):
+        """
+        Like get_all_content_for_course, but only reads the fields needed to list the assets,
+        from an index of the assets which the contentstore keeps.
+        """
+        raise NotImplementedError
+
     def delete_all_course_assets(self, course_key):
         """
         Delete all of the assets which use this course_key as an identifier
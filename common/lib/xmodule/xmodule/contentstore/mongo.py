@@ -3,8 +3,17 @@ MongoDB/GridFS-level code for the contentstore.
 """
 
 
+import calendar
 import json
 import os
+import posixpath
+import re
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+from io import BytesIO
 
 import gridfs
 import pymongo
@@ -14,6 +23,7 @@ from fs.osfs import OSFS
 from gridfs.errors import NoFile, FileExists
 from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import AssetKey
+from pymongo import ReplaceOne
 
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 from xmodule.exceptions import NotFoundError
@@ -23,6 +33,17 @@ from xmodule.util.misc import escape_invalid_characters
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+# The fields of the assets kept in the asset index, which are the ones needed to list them.
+ASSET_INDEX_FIELDS = ('displayname', 'contentType', 'uploadDate', 'length', 'locked', 'thumbnail_location', 'md5')
+
+# How many assets are written to, or read from, the asset index at once when building it or exporting a course.
+ASSET_INDEX_BATCH_SIZE = 1000
+
+# How many threads read the assets of a course exported to a tarball, and the size in bytes of the assets which
+# they read into memory, see `export_all_for_course_to_tarball`.
+ASSET_EXPORT_WORKERS = 4
+ASSET_EXPORT_BUFFER_SIZE = 1024 * 1024
+
 
 class MongoContentStore(ContentStore):
     """
@@ -52,6 +73,13 @@ class MongoContentStore(ContentStore):
         self.fs_files = mongo_db[bucket + ".files"]  # the underlying collection GridFS uses
         self.chunks = mongo_db[bucket + ".chunks"]
 
+        # The asset index keeps the listing fields of each asset of fs_files, so that the assets of a
+        # course can be listed, sorted and filtered without reading their whole documents.  It is kept
+        # in sync by the writes below, and built for a course the first time its assets are listed, which
+        # is recorded in asset_index_courses.
+        self.asset_index = mongo_db[bucket + ".asset_index"]
+        self.asset_index_courses = mongo_db[bucket + ".asset_index_courses"]
+
     def close_connections(self):
         """
         Closes any open connections to the underlying databases
@@ -77,9 +105,13 @@ class MongoContentStore(ContentStore):
         elif collections:
             self.fs_files.drop()
             self.chunks.drop()
+            self.asset_index.drop()
+            self.asset_index_courses.drop()
         else:
             self.fs_files.remove({})
             self.chunks.remove({})
+            self.asset_index.remove({})
+            self.asset_index_courses.remove({})
 
         if connections:
             self.close_connections()
@@ -115,6 +147,7 @@ class MongoContentStore(ContentStore):
                 else:
                     fp.write(content.data)
 
+        self._index_assets([fp._file])  # pylint: disable=protected-access
         return content
 
     def delete(self, location_or_id):
@@ -125,6 +158,7 @@ class MongoContentStore(ContentStore):
             location_or_id, _ = self.asset_db_key(location_or_id)
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        self.asset_index.delete_one({'_id': location_or_id})
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -205,9 +239,7 @@ class MongoContentStore(ContentStore):
                 directory as the other policy files.
         """
         policy = {}
-        assets, __ = self.get_all_content_for_course(course_key)
-
-        for asset in assets:
+        for asset in self._iter_assets_for_export(course_key):
             # TODO: On 6/19/14, I had to put a try/except around this
             # to export a course. The course failed on JSON files in
             # the /static/ directory placed in it with an import.
@@ -217,13 +249,101 @@ class MongoContentStore(ContentStore):
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
             self.export(asset['asset_key'], output_directory)
-            for attr, value in six.iteritems(asset):
-                if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
-                    policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+            _add_asset_to_policy(policy, asset)
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
+    def export_all_for_course_to_tarball(
+        self, course_key, tar_file, static_dir, assets_policy_file, progress_callback=None
+    ):
+        """
+        Like export_all_for_course, but streams the assets from GridFS into the open tarfile
+        `tar_file`, under the `static_dir` directory of the archive, rather than writing them to disk.
+
+        A bounded pool of threads reads the assets ahead of the one being added to the archive, so
+        that the archive isn't waiting for each asset to be read in turn.  The assets of at most
+        ASSET_EXPORT_BUFFER_SIZE bytes are read into memory by the pool, the larger ones are only
+        opened by the pool and read as they are added.
+
+        Args:
+            progress_callback: if given, called with the number of assets exported so far and the
+                total number of assets, after each asset.
+        """
+        policy = {}
+        # Build the index first, so the total counts the assets of a course which wasn't indexed yet.
+        self._ensure_asset_index(course_key)
+        total = self.asset_index.count_documents(self._asset_index_query(course_key))
+        exported = [0]
+
+        def add_asset(asset, future):
+            self._add_asset_to_tarball(tar_file, static_dir, asset, future.result())
+            _add_asset_to_policy(policy, asset)
+            exported[0] += 1
+            if progress_callback:
+                progress_callback(exported[0], max(exported[0], total))
+
+        with ThreadPoolExecutor(max_workers=ASSET_EXPORT_WORKERS) as executor:
+            pending = deque()
+            for asset in self._iter_assets_for_export(course_key):
+                pending.append((asset, executor.submit(self._open_asset_for_export, asset)))
+                # Add the assets read already, and bound how many assets are read ahead.
+                while pending and (len(pending) > 2 * ASSET_EXPORT_WORKERS or pending[0][1].done()):
+                    add_asset(*pending.popleft())
+            while pending:
+                add_asset(*pending.popleft())
 
         with open(assets_policy_file, 'w') as f:
             json.dump(policy, f, sort_keys=True, indent=4)
 
+    def _iter_assets_for_export(self, course_key):
+        """
+        Yields the fs_files entries of the assets of the course, along with their asset_key, reading
+        them from the asset index a page at a time rather than aggregating all of them at once.
+        """
+        after = None
+        while True:
+            index_entries, after = self.get_asset_index_page(course_key, ASSET_INDEX_BATCH_SIZE, after=after)
+            assets = self.fs_files.find({'_id': {'$in': [index_entry['_id'] for index_entry in index_entries]}})
+            for asset in assets:
+                asset['asset_key'] = self._make_asset_key(course_key, asset)
+                yield asset
+            if after is None:
+                return
+
+    def _open_asset_for_export(self, asset):
+        """
+        Returns a file-like object of the content of the given fs_files entry, read into memory if it
+        is small enough.
+        """
+        asset_id = self.make_id_son(asset)
+        asset_file = self.fs.get(asset_id)
+        # Need to replace dict IDs with SON for chunk lookup to work under Python 3
+        # because field order can be different and mongo cares about the order
+        if isinstance(asset_file._id, dict):
+            asset_file._file['_id'] = asset_id
+        if asset_file.length <= ASSET_EXPORT_BUFFER_SIZE:
+            with asset_file:
+                return BytesIO(asset_file.read())
+        return asset_file
+
+    @staticmethod
+    def _add_asset_to_tarball(tar_file, static_dir, asset, asset_file):
+        """
+        Adds the content of the asset, read from asset_file, to the tarball, where export would write it.
+        """
+        import_path = asset.get('import_path')
+        asset_dir = os.path.dirname(import_path) if import_path is not None else ''
+        # Escape invalid char from filename.
+        export_name = escape_invalid_characters(name=asset['displayname'], invalid_char_list=['/', '\\'])
+
+        tar_info = tarfile.TarInfo(posixpath.join(static_dir, asset_dir, export_name))
+        tar_info.size = asset['length']
+        tar_info.mtime = calendar.timegm(asset['uploadDate'].utctimetuple())
+        tar_info.mode = 0o644
+        with closing(asset_file):
+            tar_file.addfile(tar_info, asset_file)
+
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
 
@@ -232,6 +352,151 @@ class MongoContentStore(ContentStore):
             course_key, start=start, maxresults=maxresults, get_thumbnails=False, sort=sort, filter_params=filter_params
         )
 
+    @autoretry_read()
+    def get_asset_index_for_course(self, course_key, start=0, maxresults=-1, sort=None, filter_params=None):
+        """
+        Like get_all_content_for_course, but reads the assets from the asset index, so the asset data
+        dictionaries only have the fields of ASSET_INDEX_FIELDS, along with _id and asset_key.
+
+        The sorts on uploadDate and displayname (which is sorted case insensitively) and the filters on
+        contentType and displayname are supported.
+        """
+        self._ensure_asset_index(course_key)
+        query = self._asset_index_query(course_key)
+        if filter_params:
+            query.update(filter_params)
+
+        projection = dict.fromkeys(ASSET_INDEX_FIELDS + ('category', 'name'), True)
+        cursor = self.asset_index.find(query, projection=projection)
+        cursor.sort(self._asset_index_sort(sort or [('uploadDate', pymongo.ASCENDING)]))
+        if start:
+            cursor.skip(start)
+        if maxresults > 0:
+            cursor.limit(maxresults)
+        assets = list(cursor)
+
+        # Only count the assets when the page doesn't tell how many there are.
+        if (assets or not start) and (maxresults <= 0 or len(assets) < maxresults):
+            count = start + len(assets)
+        else:
+            count = self.asset_index.count_documents(query)
+
+        for asset in assets:
+            asset['asset_key'] = course_key.make_asset_key(asset['category'], asset['name'])
+        return assets, count
+
+    @autoretry_read()
+    def get_asset_index_page(
+        self, course_key, maxresults, sort='uploadDate', direction=pymongo.ASCENDING, after=None,
+        content_types=None, displayname_prefix=None
+    ):
+        """
+        Returns a page of at most `maxresults` assets of the course from the asset index, and the
+        cursor of the next page, or None if it is the last page.
+
+        Unlike the pages of get_asset_index_for_course, a page is found with the indexes of the asset
+        index rather than by skipping the assets of the previous pages, however deep it is.
+
+        Arguments:
+            sort: 'uploadDate' or 'displayname' (which is sorted case insensitively).
+            direction: pymongo.ASCENDING or pymongo.DESCENDING.
+            after: the cursor of the page, as returned with the previous page, or None for the first page.
+            content_types: only the assets with one of these content types are listed, if given.
+            displayname_prefix: only the assets whose display name starts with this prefix, case
+                insensitively, are listed, if given.
+        """
+        self._ensure_asset_index(course_key)
+        query = self._asset_index_query(course_key)
+        if content_types is not None:
+            query['contentType'] = {'$in': list(content_types)}
+        if displayname_prefix:
+            query['insensitive_displayname'] = {'$regex': '^' + re.escape(displayname_prefix.lower())}
+
+        sort = self._asset_index_sort([(sort, direction)])
+        sort_field = sort[0][0]
+        if after is not None:
+            after_value, after_id = after
+            operator = '$gt' if direction == pymongo.ASCENDING else '$lt'
+            query = {'$and': [query, {'$or': [
+                {sort_field: {operator: after_value}},
+                {sort_field: after_value, '_id': {operator: after_id}},
+            ]}]}
+
+        projection = dict.fromkeys(ASSET_INDEX_FIELDS + ('category', 'name', 'insensitive_displayname'), True)
+        assets = list(self.asset_index.find(query, projection=projection).sort(sort).limit(maxresults))
+        for asset in assets:
+            asset['asset_key'] = course_key.make_asset_key(asset['category'], asset['name'])
+
+        next_cursor = None
+        if len(assets) == maxresults:
+            next_cursor = (assets[-1].get(sort_field), assets[-1]['_id'])
+        return assets, next_cursor
+
+    def rebuild_asset_index(self, course_key):
+        """
+        Rebuilds the asset index of the course from its assets.
+        """
+        self.asset_index_courses.delete_one({'_id': asset_index_course_id(course_key)})
+        self.asset_index.delete_many({'course': asset_index_course_id(course_key)})
+        self._ensure_asset_index(course_key)
+
+    def _ensure_asset_index(self, course_key):
+        """
+        Builds the asset index of the course, unless it is built already.
+        """
+        index_course_id = asset_index_course_id(course_key)
+        if self.asset_index_courses.find_one({'_id': index_course_id}) is not None:
+            return
+
+        projection = dict.fromkeys(ASSET_INDEX_FIELDS + ('content_son',), True)
+        fs_entries = []
+        for fs_entry in self.fs_files.find(query_for_course(course_key), projection=projection):
+            fs_entries.append(fs_entry)
+            if len(fs_entries) == ASSET_INDEX_BATCH_SIZE:
+                self._index_assets(fs_entries)
+                fs_entries = []
+        self._index_assets(fs_entries)
+        self.asset_index_courses.update_one(
+            {'_id': index_course_id}, {'$set': {'built_at': datetime.utcnow()}}, upsert=True
+        )
+
+    def _index_assets(self, fs_entries):
+        """
+        Adds the given fs_files entries to the asset index, or updates their index entries.
+        """
+        if fs_entries:
+            self.asset_index.bulk_write([
+                ReplaceOne({'_id': fs_entry['_id']}, asset_index_entry(fs_entry), upsert=True)
+                for fs_entry in fs_entries
+            ], ordered=False)
+
+    @staticmethod
+    def _asset_index_query(course_key, category='asset'):
+        """
+        Returns the query of the assets of the course in the asset index.
+        """
+        return SON([('course', asset_index_course_id(course_key)), ('category', category)])
+
+    @staticmethod
+    def _asset_index_sort(sort):
+        """
+        Returns the asset index sort of the given sort of assets, as a list of (field, direction).
+        Ties are sorted by _id, so that the order of the assets is stable.
+        """
+        index_sort = [
+            ('insensitive_displayname' if field == 'displayname' else field, direction)
+            for field, direction in sort
+        ]
+        return index_sort + [('_id', index_sort[-1][1])]
+
+    @staticmethod
+    def _make_asset_key(course_key, asset):
+        """
+        Returns the asset key of the given fs_files entry.
+        """
+        asset_id = asset.get('content_son', asset['_id'])
+        return course_key.make_asset_key(asset_id['category'], asset_id['name'])
+
     def remove_redundant_content_for_courses(self):
         """
         Finds and removes all redundant files (Mac OS metadata files with filename ".DS_Store"
@@ -250,6 +515,7 @@ class MongoContentStore(ContentStore):
                 assets_to_delete += 1
 
             self.fs_files.remove(query)
+        self.asset_index.delete_many({'category': 'asset', 'name': {'$regex': ASSET_IGNORE_REGEX}})
         return assets_to_delete
 
     @autoretry_read()
@@ -336,8 +602,7 @@ class MongoContentStore(ContentStore):
         # We're constructing the asset key immediately after retrieval from the database so that
         # callers are insulated from knowing how our identifiers are stored.
         for asset in assets:
-            asset_id = asset.get('content_son', asset['_id'])
-            asset['asset_key'] = course_key.make_asset_key(asset_id['category'], asset_id['name'])
+            asset['asset_key'] = self._make_asset_key(course_key, asset)
         return assets, count
 
     def set_attr(self, asset_key, attr, value=True):
@@ -384,6 +649,12 @@ class MongoContentStore(ContentStore):
         if result.matched_count == 0:
             raise NotFoundError(asset_db_key)
 
+        index_attrs = {attr: value for attr, value in six.iteritems(attr_dict) if attr in ASSET_INDEX_FIELDS}
+        if 'displayname' in index_attrs:
+            index_attrs['insensitive_displayname'] = index_attrs['displayname'].lower()
+        if index_attrs:
+            self.asset_index.update_one({'_id': asset_db_key}, {"$set": index_attrs})
+
     @autoretry_read()
     def get_attrs(self, location):
         """
@@ -457,6 +728,7 @@ class MongoContentStore(ContentStore):
             # getattr b/c caching may mean some pickled instances don't have attr
             locked=asset.get('locked', False)
         )
+        self._index_assets([self.fs_files.find_one({'_id': asset_id})])
 
     def delete_all_course_assets(self, course_key):
         """
@@ -469,6 +741,9 @@ class MongoContentStore(ContentStore):
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
             self.fs.delete(asset_key)
+        # Forget that the index was built too, so that assets later added another way are indexed again.
+        self.asset_index_courses.delete_one({'_id': asset_index_course_id(course_key)})
+        self.asset_index.delete_many({'course': asset_index_course_id(course_key)})
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -601,6 +876,27 @@ class MongoContentStore(ContentStore):
             sparse=True,
             background=True
         )
+        # Indexes needed by the listings of the asset index, with their sorts and keyset pagination.
+        create_collection_index(
+            self.asset_index,
+            [
+                ('course', pymongo.ASCENDING),
+                ('category', pymongo.ASCENDING),
+                ('uploadDate', pymongo.ASCENDING),
+                ('_id', pymongo.ASCENDING)
+            ],
+            background=True
+        )
+        create_collection_index(
+            self.asset_index,
+            [
+                ('course', pymongo.ASCENDING),
+                ('category', pymongo.ASCENDING),
+                ('insensitive_displayname', pymongo.ASCENDING),
+                ('_id', pymongo.ASCENDING)
+            ],
+            background=True
+        )
 
 
 def query_for_course(course_key, category=None):
@@ -624,3 +920,41 @@ def query_for_course(course_key, category=None):
     else:
         dbkey['{}.run'.format(prefix)] = course_key.run
     return dbkey
+
+
+def _add_asset_to_policy(policy, asset):
+    """
+    Adds the attributes of the given fs_files entry to the assets policy of its course.
+    """
+    for attr, value in six.iteritems(asset):
+        if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
+            policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
+
+
+def asset_index_course_id(course_key):
+    """
+    Returns the identifier of the course in the asset index.
+    """
+    run = None if getattr(course_key, 'deprecated', False) else course_key.run
+    return _asset_index_course_id(course_key.org, course_key.course, run)
+
+
+def asset_index_entry(fs_entry):
+    """
+    Returns the asset index entry of the given fs_files entry.
+    """
+    asset_id = fs_entry.get('content_son', fs_entry['_id'])
+    entry = {field: fs_entry[field] for field in ASSET_INDEX_FIELDS if field in fs_entry}
+    entry.update({
+        '_id': fs_entry['_id'],
+        'course': _asset_index_course_id(asset_id['org'], asset_id['course'], asset_id.get('run')),
+        'category': asset_id['category'],
+        'name': asset_id['name'],
+        'insensitive_displayname': (fs_entry.get('displayname') or u'').lower(),
+    })
+    return entry
+
+
+def _asset_index_course_id(org, course, run):
+    # Assets of deprecated courses don't have a run.
+    return u'/'.join([org, course, run or u''])
@@ -85,7 +85,7 @@ class HtmlBlockMixin(
 
     ENABLE_HTML_XBLOCK_STUDENT_VIEW_DATA = 'ENABLE_HTML_XBLOCK_STUDENT_VIEW_DATA'
 
-    @XBlock.supports("multi_device")
+    @XBlock.supports("multi_device", "user_state_independent")
     def student_view(self, _context):
         """
         Return a fragment that contains the html for the student view
@@ -95,7 +95,7 @@ class HtmlBlockMixin(
         shim_xmodule_js(fragment, 'HTMLModule')
         return fragment
 
-    @XBlock.supports("multi_device")
+    @XBlock.supports("multi_device", "user_state_independent")
     def public_view(self, context):
         """
         Returns a fragment that contains the html for the preview view
@@ -646,6 +646,18 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except NotImplementedError:
             return None, None
 
+    def get_changed_blocks(self, course_key, previous_version):
+        """
+        Returns the set of usage keys of the blocks of the given course which
+        changed (or were added) since ``previous_version`` of the course, or
+        None if the course's store can't tell.
+        """
+        try:
+            store = self._verify_modulestore_support(course_key, 'get_changed_blocks')
+            return store.get_changed_blocks(course_key, previous_version)
+        except NotImplementedError:
+            return None
+
     def get_modulestore_type(self, course_id):
         """
         Returns a type which identifies which modulestore is servicing the given course_id.
@@ -1,5 +1,6 @@
 
 
+import functools
 import logging
 import sys
 
@@ -9,7 +10,7 @@ from fs.osfs import OSFS
 from lazy import lazy
 from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator, DefinitionLocator, LibraryLocator, LocalId
 from xblock.core import XBlock
-from xblock.fields import ScopeIds
+from xblock.fields import Scope, ScopeIds
 from xblock.runtime import KeyValueStore, KvsFieldData
 
 from xmodule.error_module import ErrorDescriptor
@@ -21,7 +22,9 @@ from xmodule.modulestore.edit_info import EditInfoRuntimeMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin, inheriting_field_data
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.columnar_blocks import iter_block_children
 from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
+from xmodule.modulestore.split_mongo.definition_prefetch import DefinitionPrefetchPlanner
 from xmodule.modulestore.split_mongo.id_manager import SplitMongoIdManager
 from xmodule.modulestore.split_mongo.split_mongo_kvs import SplitMongoKVS
 from xmodule.x_module import XModuleMixin
@@ -86,13 +89,17 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore, user_id=None)
+        # definitions loaded in batches for this runtime, by definition id
+        self._prefetched_definitions = {}
+        # BlockKey -> the set of BlockKeys whose definitions should be loaded along with its own
+        self._definition_prefetch_groups = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
     def _parent_map(self):
         parent_map = {}
-        for block_key, block in six.iteritems(self.course_entry.structure['blocks']):
-            for child in block.fields.get('children', []):
+        for block_key, children in iter_block_children(self.course_entry.structure['blocks']):
+            for child in children:
                 parent_map[child] = block_key
         return parent_map
 
@@ -154,14 +161,85 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         """
         json_data = self.module_data.get(block_key)
         if json_data is None:
-            # deeper than initial descendant fetch or doesn't exist
-            self.modulestore.cache_items(self, [block_key], course_key, lazy=self.lazy)
+            # deeper than initial descendant fetch or doesn't exist. When prefetching, cache the
+            # whole subtree, so that its definitions are loaded together rather than block by block.
+            depth = None if self.modulestore.prefetch_definitions else 0
+            self.modulestore.cache_items(self, [block_key], course_key, depth=depth, lazy=self.lazy)
+            if self.lazy and self.modulestore.prefetch_definitions:
+                self.add_definition_prefetch_group(
+                    self.modulestore.descendants(self.course_entry.structure['blocks'], block_key, None, {})
+                )
             json_data = self.module_data.get(block_key)
             if json_data is None:
                 raise ItemNotFoundError(block_key)
 
         return json_data
 
+    def prefetch_definitions(self, course_key, blocks, block_types=None):
+        """
+        Load the definitions needed by ``blocks`` (an iterable of BlockData) in as few
+        queries as the modulestore's chunk size allows, and return all of the
+        definitions loaded by this runtime so far, keyed by definition id.
+
+        Arguments:
+            course_key: the course the definitions are loaded for (to respect bulk operations)
+            blocks: the BlockData whose definitions should be loaded
+            block_types: if given, only load the definitions of blocks of these types
+        """
+        planner = DefinitionPrefetchPlanner(self.modulestore.definition_prefetch_chunk_size, block_types)
+        for definition_ids in planner.plan(blocks, exclude=self._prefetched_definitions):
+            for definition in self.modulestore.get_definitions(course_key, definition_ids):
+                self._prefetched_definitions[definition['_id']] = definition
+        return self._prefetched_definitions
+
+    def add_definition_prefetch_group(self, block_keys):
+        """
+        Record that the definitions of all of ``block_keys`` should be loaded in one
+        batch, as soon as a lazily loaded definition of any of them is needed.
+        """
+        group = set(block_keys)
+        for block_key in group:
+            self._definition_prefetch_groups.setdefault(block_key, group)
+
+    def _get_definition(self, block_key, course_key, definition_id):
+        """
+        Return the definition with ``definition_id`` for the block ``block_key``, first
+        prefetching the definitions of the other blocks in its prefetch group.
+        """
+        group = self._definition_prefetch_groups.get(block_key)
+        if definition_id not in self._prefetched_definitions and group:
+            blocks = self.course_entry.structure['blocks']
+            group_blocks = [
+                self.module_data[key] if key in self.module_data else blocks[key]
+                for key in group
+                if key in self.module_data or key in blocks
+            ]
+            for key in group:
+                # each block only triggers a batch once
+                self._definition_prefetch_groups.pop(key, None)
+            self.prefetch_definitions(course_key, group_blocks, self._content_block_types(group_blocks))
+
+        definition = self._prefetched_definitions.get(definition_id)
+        if definition is None:
+            definition = self.modulestore.get_definition(course_key, definition_id)
+        return definition
+
+    def _content_block_types(self, blocks):
+        """
+        Return the block types among ``blocks`` which declare any Scope.content fields,
+        since only those ever need their definitions loaded lazily for field access.
+        """
+        block_types = set()
+        for block_type in {block_data.block_type for block_data in blocks}:
+            try:
+                class_ = self.load_block_type(block_type)
+            except Exception:  # pylint: disable=broad-except
+                block_types.add(block_type)
+                continue
+            if any(field.scope == Scope.content for field in six.itervalues(class_.fields)):
+                block_types.add(block_type)
+        return block_types
+
     # xblock's runtime does not always pass enough contextual information to figure out
     # which named container (course x branch) or which parent is requesting an item. Because split allows
     # a many:1 mapping from named containers to structures and because item's identities encode
@@ -201,6 +279,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 block_key.type,
                 definition_id,
                 convert_fields,
+                definition_getter=functools.partial(self._get_definition, block_key),
             )
         else:
             definition_loader = None
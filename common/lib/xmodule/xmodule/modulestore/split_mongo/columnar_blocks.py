@@ -0,0 +1,243 @@
+"""
+A compact, lazily-decoded representation of the 'blocks' of a split modulestore structure.
+
+:func:`~xmodule.modulestore.split_mongo.mongo_connection.structure_from_mongo`
+normally converts every stored block into a :class:`~xmodule.modulestore.BlockData`
+keyed by :class:`~xmodule.modulestore.split_mongo.BlockKey` as soon as a structure
+is loaded, even when the request only ever touches a handful of blocks.
+:class:`ColumnarBlocks` instead keeps the block types, block ids, children and
+remaining stored fields in parallel arrays, and only builds the ``BlockData`` for
+a block the first time it is accessed. It is a drop-in mapping, so code which
+reads or edits ``structure['blocks']`` does not need to know which representation
+it is dealing with.
+"""
+
+
+from array import array
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # Python 2
+    from collections import MutableMapping
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+
+
+class ColumnarBlocks(MutableMapping):
+    """
+    A mapping of BlockKey -> BlockData backed by parallel arrays of raw block documents.
+
+    Position ``i`` of each array describes the same block:
+
+    * ``_types``: index into ``_type_names`` of the block type
+    * ``_ids``: the block id
+    * ``_children``: the stored ``[[block_type, block_id], ...]`` children, or None
+    * ``_documents``: the rest of the stored block document (without 'block_id'
+      and without 'children' in its 'fields')
+
+    Decoded ``BlockData`` objects are kept in ``_decoded`` and always win over
+    the raw arrays, so edits made to them (or blocks assigned through
+    ``__setitem__``) are what gets iterated, compared and written back to mongo.
+    """
+    def __init__(self, block_documents=()):
+        self._type_names = []
+        self._type_indexes = {}
+        self._types = array('I')
+        self._ids = []
+        self._children = []
+        self._documents = []
+        self._decoded = {}
+        self._removed = set()
+        self._positions = None
+
+        for document in block_documents:
+            self._append_document(document)
+
+    def _append_document(self, document):
+        """
+        Add a raw, mongo-stored block document to the end of the arrays.
+        """
+        document = dict(document)
+        block_id = document.pop('block_id')
+        fields = document.get('fields', {})
+        children = fields.get('children')
+        if children is not None:
+            fields = dict(fields)
+            del fields['children']
+            document['fields'] = fields
+        self._types.append(self._type_index(document['block_type']))
+        self._ids.append(block_id)
+        self._children.append(children)
+        self._documents.append(document)
+
+    def _type_index(self, block_type):
+        """
+        Return the interned index of ``block_type``.
+        """
+        index = self._type_indexes.get(block_type)
+        if index is None:
+            index = self._type_indexes[block_type] = len(self._type_names)
+            self._type_names.append(block_type)
+        return index
+
+    def _key_at(self, position):
+        """
+        Return the BlockKey of the block at ``position``.
+        """
+        return BlockKey(self._type_names[self._types[position]], self._ids[position])
+
+    def _position(self, key):
+        """
+        Return the position of ``key`` in the arrays, or None if it isn't present.
+        """
+        if self._positions is None:
+            type_names = self._type_names
+            self._positions = {
+                (type_names[type_index], block_id): position
+                for position, (type_index, block_id) in enumerate(zip(self._types, self._ids))
+            }
+        position = self._positions.get(tuple(key))
+        if position is None or position in self._removed:
+            return None
+        return position
+
+    def _decode(self, position):
+        """
+        Build (and remember) the BlockData for the block at ``position``.
+        """
+        block = self._decoded.get(position)
+        if block is None:
+            document = dict(self._documents[position])
+            fields = dict(document.get('fields', {}))
+            children = self._children[position]
+            if children is not None:
+                fields['children'] = [BlockKey(*child) for child in children]
+            document['fields'] = fields
+            block = self._decoded[position] = BlockData(**document)
+        return block
+
+    def _live_positions(self):
+        """
+        Iterate over the positions of all blocks which haven't been removed.
+        """
+        removed = self._removed
+        for position in range(len(self._ids)):
+            if position not in removed:
+                yield position
+
+    def __getitem__(self, key):
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        return self._decode(position)
+
+    def __setitem__(self, key, block):
+        position = self._position(key)
+        if position is None:
+            self._position(key)  # make sure the position index exists
+            position = len(self._ids)
+            self._types.append(self._type_index(key.type))
+            self._ids.append(key.id)
+            self._children.append(None)
+            self._documents.append(None)
+            self._positions[(key.type, key.id)] = position
+        self._decoded[position] = block
+
+    def __delitem__(self, key):
+        position = self._position(key)
+        if position is None:
+            raise KeyError(key)
+        self._removed.add(position)
+        self._decoded.pop(position, None)
+
+    def __contains__(self, key):
+        try:
+            return self._position(key) is not None
+        except TypeError:
+            return False
+
+    def __iter__(self):
+        for position in self._live_positions():
+            yield self._key_at(position)
+
+    def __len__(self):
+        return len(self._ids) - len(self._removed)
+
+    def __repr__(self):
+        return '{}({} blocks, {} decoded)'.format(self.__class__.__name__, len(self), len(self._decoded))
+
+    @property
+    def decoded_count(self):
+        """
+        The number of blocks whose BlockData has been built so far.
+        """
+        return len(self._decoded)
+
+    def iter_children(self):
+        """
+        Iterate over (BlockKey, [child BlockKey, ...]) for every block, without decoding any block.
+        """
+        for position in self._live_positions():
+            block = self._decoded.get(position)
+            if block is not None:
+                children = block.fields.get('children', [])
+            else:
+                children = [BlockKey(*child) for child in self._children[position] or ()]
+            yield self._key_at(position), children
+
+    def keys_of_type(self, block_type):
+        """
+        Iterate over the BlockKeys of all blocks of ``block_type``, without decoding any block.
+        """
+        type_index = self._type_indexes.get(block_type)
+        if type_index is None:
+            return
+        for position in self._live_positions():
+            if self._types[position] == type_index:
+                yield self._key_at(position)
+
+    def to_mongo(self):
+        """
+        Return the list of mongo-storable block documents, reusing the raw
+        documents of blocks which were never decoded.
+        """
+        documents = []
+        for position in self._live_positions():
+            block = self._decoded.get(position)
+            if block is not None:
+                document = dict(block.to_storable())
+                document.setdefault('block_type', self._type_names[self._types[position]])
+            else:
+                document = dict(self._documents[position])
+                children = self._children[position]
+                if children is not None:
+                    document['fields'] = dict(document['fields'], children=children)
+            document['block_id'] = self._ids[position]
+            documents.append(document)
+        return documents
+
+
+def iter_block_children(blocks):
+    """
+    Iterate over (BlockKey, [child BlockKey, ...]) for all of ``blocks``.
+
+    Uses the non-decoding fast path when ``blocks`` is a :class:`ColumnarBlocks`.
+    """
+    if isinstance(blocks, ColumnarBlocks):
+        return blocks.iter_children()
+    return (
+        (block_key, block.fields.get('children', []))
+        for block_key, block in blocks.items()
+    )
+
+
+def iter_block_keys_of_type(blocks, block_type):
+    """
+    Iterate over the BlockKeys in ``blocks`` whose type is ``block_type``.
+
+    Uses the non-decoding fast path when ``blocks`` is a :class:`ColumnarBlocks`.
+    """
+    if isinstance(blocks, ColumnarBlocks):
+        return blocks.keys_of_type(block_type)
+    return (block_key for block_key in blocks if block_key.type == block_type)
@@ -12,16 +12,19 @@ class DefinitionLazyLoader(object):
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
+    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter, definition_getter=None):
         """
         Simple placeholder for yet-to-be-fetched data
         :param modulestore: the pymongo db connection with the definitions
         :param definition_locator: the id of the record in the above to fetch
+        :param definition_getter: an optional callable with the signature of the modulestore's
+            get_definition to use instead of it (e.g. one which prefetches definitions in batches)
         """
         self.modulestore = modulestore
         self.course_key = course_key
         self.definition_locator = DefinitionLocator(block_type, definition_id)
         self.field_converter = field_converter
+        self.definition_getter = definition_getter or modulestore.get_definition
 
     def fetch(self):
         """
@@ -31,5 +34,5 @@ class DefinitionLazyLoader(object):
         # get_definition may return a cached value perhaps from another course or code path
         # so, we copy the result here so that updates don't cross-pollinate nor change the cached
         # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
+        definition = self.definition_getter(self.course_key, self.definition_locator.definition_id)
         return copy.deepcopy(definition)
@@ -0,0 +1,61 @@
+"""
+Planning of batched definition loads for split modulestore.
+
+Descriptors in split are built from structure blocks, while their content
+(Scope.content) fields live in separate definition documents. Loading those
+definitions one block at a time costs one mongo round trip per block; the
+:class:`DefinitionPrefetchPlanner` turns the set of blocks a caller asked for
+into a small number of ``$in`` queries instead.
+"""
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class DefinitionPrefetchPlanner(object):
+    """
+    Decides which definitions to fetch for a set of blocks, and in which batches.
+
+    Arguments:
+        chunk_size (int): The maximum number of definition ids in a single query.
+        block_types (set): If given, only the definitions of blocks of these types
+            are planned (e.g. only the types which have Scope.content fields).
+    """
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, block_types=None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+        self.chunk_size = chunk_size
+        self.block_types = block_types
+
+    def needs_definition(self, block_data):
+        """
+        Return whether the definition of the BlockData ``block_data`` should be loaded.
+        """
+        return (
+            block_data.definition is not None and
+            not block_data.definition_loaded and
+            (self.block_types is None or block_data.block_type in self.block_types)
+        )
+
+    def definition_ids(self, blocks, exclude=()):
+        """
+        Return the distinct definition ids needed by ``blocks`` (an iterable of
+        BlockData), in the order they are first encountered, skipping any in ``exclude``.
+        """
+        seen = set(exclude)
+        definition_ids = []
+        for block_data in blocks:
+            if self.needs_definition(block_data) and block_data.definition not in seen:
+                seen.add(block_data.definition)
+                definition_ids.append(block_data.definition)
+        return definition_ids
+
+    def plan(self, blocks, exclude=()):
+        """
+        Return the list of batches (lists of definition ids) to query for ``blocks``.
+        """
+        definition_ids = self.definition_ids(blocks, exclude)
+        return [
+            definition_ids[index:index + self.chunk_size]
+            for index in range(0, len(definition_ids), self.chunk_size)
+        ]
@@ -7,7 +7,9 @@ import datetime
 import logging
 import math
 import re
+import threading
 import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -18,14 +20,16 @@ from six.moves import cPickle as pickle
 from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
 # Import this just to export it
-from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.columnar_blocks import ColumnarBlocks
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -44,6 +48,17 @@ def get_cache(alias):
     return caches[alias]
 
 
+def get_local_structure_cache_max_bytes():
+    """
+    Return the byte budget for the process-local structure cache tier.
+
+    A value of 0 (the default outside of Django) disables the local tier.
+    """
+    if not DJANGO_AVAILABLE:
+        return 0
+    return getattr(settings, 'COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES', 0)
+
+
 def round_power_2(value):
     """
     Return value rounded up to the nearest power of 2.
@@ -142,7 +157,7 @@ class QueryTimer(object):
 TIMER = QueryTimer(__name__, 0.01)
 
 
-def structure_from_mongo(structure, course_context=None):
+def structure_from_mongo(structure, course_context=None, columnar=False):
     """
     Converts the 'blocks' key from a list [block_data] to a map
         {BlockKey: block_data}.
@@ -154,9 +169,13 @@ def structure_from_mongo(structure, course_context=None):
         structure: The document structure to convert
         course_context (CourseKey): For metrics gathering, the CourseKey
             for the course that this data is being processed for.
+        columnar (bool): If True, 'blocks' becomes a :class:`.ColumnarBlocks`, which
+            defers building each BlockData (and converting its children) until
+            the block is first accessed.
     """
     with TIMER.timer('structure_from_mongo', course_context) as tagger:
         tagger.measure('blocks', len(structure['blocks']))
+        tagger.tag(columnar=str(columnar).lower())
 
         check('seq[2]', structure['root'])
         check('list(dict)', structure['blocks'])
@@ -165,6 +184,10 @@ def structure_from_mongo(structure, course_context=None):
                 check('list(list[2])', block['fields']['children'])
 
         structure['root'] = BlockKey(*structure['root'])
+        if columnar:
+            structure['blocks'] = ColumnarBlocks(structure['blocks'])
+            return structure
+
         new_blocks = {}
         for block in structure['blocks']:
             if 'children' in block['fields']:
@@ -187,12 +210,19 @@ def structure_to_mongo(structure, course_context=None):
         tagger.measure('blocks', len(structure['blocks']))
 
         check('BlockKey', structure['root'])
-        check('dict(BlockKey: BlockData)', structure['blocks'])
+        check('map(BlockKey: BlockData)', structure['blocks'])
+
+        new_structure = dict(structure)
+        if isinstance(structure['blocks'], ColumnarBlocks):
+            # Blocks which were never decoded can't have been changed, so their
+            # stored documents are reused as they are.
+            new_structure['blocks'] = structure['blocks'].to_mongo()
+            return new_structure
+
         for block in six.itervalues(structure['blocks']):
             if 'children' in block.fields:
                 check('list(BlockKey)', block.fields['children'])
 
-        new_structure = dict(structure)
         new_structure['blocks'] = []
 
         for block_key, block in six.iteritems(structure['blocks']):
@@ -204,21 +234,136 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class LocalStructureCache(object):
+    """
+    A bounded, size-aware LRU of pickled course structures, local to this process.
+
+    Structures are immutable once written (split always copies a structure
+    before versioning it), so entries are keyed by structure version id and
+    never need to be invalidated; they only fall out when the byte budget is
+    exceeded. Entries are held pickled rather than deserialized because the
+    modulestore mutates the structures it is handed (e.g. when decoding
+    blocks), so every read must get its own copy.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def enabled(self):
+        """
+        Whether this tier will hold anything at all.
+        """
+        return self.max_bytes > 0
+
+    def get(self, key):
+        """
+        Return the pickled structure cached under ``key`` (marking it as most recently used), or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, pickled_data):
+        """
+        Store the ``pickled_data`` of a structure under ``key``.
+
+        Returns the number of entries evicted to make room. Structures larger
+        than the whole budget are not stored.
+        """
+        size = len(pickled_data)
+        if size > self.max_bytes:
+            return 0
+
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                __, (__, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                evicted += 1
+            self._entries[key] = (pickled_data, size)
+            self.current_bytes += size
+            self.evictions += evicted
+        return evicted
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def measure(self, tagger):
+        """
+        Record the counters of this tier on ``tagger``.
+        """
+        tagger.measure('local_cache_hits', self.hits)
+        tagger.measure('local_cache_misses', self.misses)
+        tagger.measure('local_cache_evictions', self.evictions)
+        tagger.measure('local_cache_bytes', self.current_bytes)
+        tagger.measure('local_cache_entries', len(self._entries))
+
+
+_LOCAL_STRUCTURE_CACHE = None
+
+
+def get_local_structure_cache():
+    """
+    Return the process-wide :class:`LocalStructureCache`, creating it on first use.
+    """
+    global _LOCAL_STRUCTURE_CACHE  # pylint: disable=global-statement
+    max_bytes = get_local_structure_cache_max_bytes()
+    if _LOCAL_STRUCTURE_CACHE is None or _LOCAL_STRUCTURE_CACHE.max_bytes != max_bytes:
+        _LOCAL_STRUCTURE_CACHE = LocalStructureCache(max_bytes)
+    return _LOCAL_STRUCTURE_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Pickled structures are also kept in a process-local
+    :class:`LocalStructureCache` tier (sized by the
+    ``COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES`` setting), so that repeated
+    reads of the same structure version skip the cache round trip and
+    decompressing.  Each read still unpickles its own copy of the structure.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
     def __init__(self):
         self.cache = None
+        self.local_cache = None
         if DJANGO_AVAILABLE:
             try:
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+        if self.cache is not None:
+            local_cache = get_local_structure_cache()
+            if local_cache.enabled:
+                self.local_cache = local_cache
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
@@ -226,30 +371,50 @@ class CourseStructureCache(object):
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
+            local_pickled_data = None
+            if self.local_cache is not None:
+                local_pickled_data = self.local_cache.get(key)
+                tagger.tag(from_local_cache=str(local_pickled_data is not None).lower())
+            pickled_data = local_pickled_data
+
             try:
-                compressed_pickled_data = self.cache.get(key)
-                tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+                if pickled_data is None:
+                    compressed_pickled_data = self.cache.get(key)
+                    tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
-                if compressed_pickled_data is None:
-                    # Always log cache misses, because they are unexpected
-                    tagger.sample_rate = 1
-                    return None
+                    if compressed_pickled_data is None:
+                        # Always log cache misses, because they are unexpected
+                        tagger.sample_rate = 1
+                        return None
 
-                tagger.measure('compressed_size', len(compressed_pickled_data))
+                    tagger.measure('compressed_size', len(compressed_pickled_data))
 
-                pickled_data = zlib.decompress(compressed_pickled_data)
-                tagger.measure('uncompressed_size', len(pickled_data))
+                    pickled_data = zlib.decompress(compressed_pickled_data)
+                    tagger.measure('uncompressed_size', len(pickled_data))
 
                 if six.PY2:
-                    return pickle.loads(pickled_data)
+                    structure = pickle.loads(pickled_data)
                 else:
-                    return pickle.loads(pickled_data, encoding='latin-1')
+                    structure = pickle.loads(pickled_data, encoding='latin-1')
             except Exception:
                 # The cached data is corrupt in some way, get rid of it.
                 log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
                 self.cache.delete(key)
                 return None
 
+            if local_pickled_data is None:
+                self._set_local(key, pickled_data, tagger)
+            return structure
+
+    def _set_local(self, key, pickled_data, tagger):
+        """
+        Store a pickled structure in the process-local tier, if it is enabled.
+        """
+        if self.local_cache is None:
+            return
+        tagger.measure('local_cache_evicted', self.local_cache.set(key, pickled_data))
+        self.local_cache.measure(tagger)
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
         if self.cache is None:
@@ -266,6 +431,39 @@ class CourseStructureCache(object):
             # Stuctures are immutable, so we set a timeout of "never"
             self.cache.set(key, compressed_pickled_data, None)
 
+            self._set_local(key, pickled_data, tagger)
+
+
+# The code of the error reported for a document whose _id is taken already.
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+
+def _insert_all(collection, documents):
+    """
+    Inserts the given documents into `collection`, and returns the _ids of the
+    documents which were in it already.  The other documents are inserted all
+    the same.
+    """
+    if not documents:
+        return []
+    if len(documents) == 1:
+        try:
+            collection.insert_one(documents[0])
+        except DuplicateKeyError:
+            return [documents[0]['_id']]
+        return []
+
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as error:
+        write_errors = error.details.get('writeErrors', [])
+        if not write_errors or any(
+            write_error['code'] != DUPLICATE_KEY_ERROR_CODE for write_error in write_errors
+        ):
+            raise
+        return [documents[write_error['index']]['_id'] for write_error in write_errors]
+    return []
+
 
 class MongoConnection(object):
     """
@@ -273,11 +471,16 @@ class MongoConnection(object):
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, columnar_structures=False, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        If `columnar_structures` is True, structures are loaded with their blocks held
+        in a lazily-decoded :class:`.ColumnarBlocks` rather than a dict of BlockData.
         """
+        self.columnar_structures = columnar_structures
+
         # Set a write concern of 1, which makes writes complete successfully to the primary
         # only before returning. Also makes pymongo report write errors.
         kwargs['w'] = 1
@@ -327,7 +530,7 @@ class MongoConnection(object):
                         )
                         return None
                     tagger_find_one.measure("blocks", len(doc['blocks']))
-                    structure = structure_from_mongo(doc, course_context)
+                    structure = structure_from_mongo(doc, course_context, self.columnar_structures)
                     tagger_find_one.sample_rate = 1
 
                 cache.set(key, structure, course_context)
@@ -345,7 +548,7 @@ class MongoConnection(object):
         with TIMER.timer("find_structures_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(structure, course_context, self.columnar_structures)
                 for structure in self.structures.find({'_id': {'$in': ids}})
             ]
             tagger.measure("structures", len(docs))
@@ -363,7 +566,7 @@ class MongoConnection(object):
         with TIMER.timer("find_courselike_blocks_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(structure, course_context, self.columnar_structures)
                 for structure in self.structures.find(
                     {'_id': {'$in': ids}},
                     {'blocks': {'$elemMatch': {'block_type': block_type}}, 'root': 1}
@@ -383,7 +586,7 @@ class MongoConnection(object):
         with TIMER.timer("find_structures_derived_from", course_context) as tagger:
             tagger.measure("base_ids", len(ids))
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(structure, course_context, self.columnar_structures)
                 for structure in self.structures.find({'previous_version': {'$in': ids}})
             ]
             tagger.measure("structures", len(docs))
@@ -400,7 +603,7 @@ class MongoConnection(object):
         """
         with TIMER.timer("find_ancestor_structures", course_context) as tagger:
             docs = [
-                structure_from_mongo(structure, course_context)
+                structure_from_mongo(structure, course_context, self.columnar_structures)
                 for structure in self.structures.find({
                     'original_version': original_version,
                     'blocks': {
@@ -425,6 +628,21 @@ class MongoConnection(object):
             tagger.measure("blocks", len(structure["blocks"]))
             self.structures.insert_one(structure_to_mongo(structure, course_context))
 
+    def insert_structures(self, structures, course_context=None):
+        """
+        Insert the given new structures into the database, with a single write
+        when there are several of them.
+
+        Returns the ids of the structures which were in the database already.
+        """
+        with TIMER.timer("insert_structures", course_context) as tagger:
+            tagger.measure("structures", len(structures))
+            tagger.measure("blocks", sum(len(structure["blocks"]) for structure in structures))
+            return _insert_all(
+                self.structures,
+                [structure_to_mongo(structure, course_context) for structure in structures],
+            )
+
     def get_course_index(self, key, ignore_case=False):
         """
         Get the course_index from the persistence mechanism whose id is the given key
@@ -568,6 +786,17 @@ class MongoConnection(object):
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert_one(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create the given definitions in the db, with a single write when there
+        are several of them.
+
+        Returns the ids of the definitions which were in the db already.
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            return _insert_all(self.definitions, definitions)
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
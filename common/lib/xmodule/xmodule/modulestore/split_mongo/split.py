@@ -60,6 +60,7 @@ import datetime
 import hashlib
 import logging
 from collections import defaultdict
+from functools import lru_cache
 from importlib import import_module
 
 import six
@@ -67,6 +68,7 @@ from bson.objectid import ObjectId
 from ccx_keys.locator import CCXBlockUsageLocator, CCXLocator
 from contracts import contract, new_contract
 from mongodb_proxy import autoretry_read
+from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import (
     BlockUsageLocator,
@@ -104,7 +106,9 @@ from xmodule.modulestore.exceptions import (
     VersionConflictError
 )
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
-from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, MongoConnection
+from xmodule.modulestore.split_mongo.columnar_blocks import iter_block_children, iter_block_keys_of_type
+from xmodule.modulestore.split_mongo.definition_prefetch import DEFAULT_CHUNK_SIZE
+from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
 
@@ -134,6 +138,23 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# Number of course keys whose bulk operations record key is remembered
+BULK_OPS_RECORD_KEY_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=BULK_OPS_RECORD_KEY_CACHE_SIZE)
+def _bulk_ops_record_key(course_key):
+    """
+    Returns the key of the bulk operations record of `course_key`: its version when it only
+    identifies a version, else the course without branch or version.
+
+    The record is looked up for every read and write made within a bulk operation, so the keys
+    are remembered rather than rebuilt each time.
+    """
+    if course_key.org is None or course_key.course is None or course_key.run is None:
+        return course_key.replace(org=None, course=None, run=None, branch=None)
+    return course_key.replace(branch=None, version_guid=None)
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -221,16 +242,13 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         if not isinstance(course_key, (CourseLocator, LibraryLocator)):
             raise TypeError(u'{!r} is not a CourseLocator or LibraryLocator'.format(course_key))
-        # handle version_guid based retrieval locally
-        if course_key.org is None or course_key.course is None or course_key.run is None:
-            return self._active_bulk_ops.records[
-                course_key.replace(org=None, course=None, run=None, branch=None)
-            ]
+        record_key = _bulk_ops_record_key(course_key)
+        # handle version_guid based retrieval and general use locally
+        if record_key.org is None or not ignore_case:
+            return self._active_bulk_ops.records[record_key]
 
-        # handle ignore case and general use
-        return super(SplitBulkWriteMixin, self)._get_bulk_ops_record(
-            course_key.replace(branch=None, version_guid=None), ignore_case
-        )
+        # handle ignore case
+        return super(SplitBulkWriteMixin, self)._get_bulk_ops_record(record_key, ignore_case)
 
     def _clear_bulk_ops_record(self, course_key):
         """
@@ -262,24 +280,27 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         dirty = False
 
-        # If the content is dirty, then update the database
-        for _id in six.viewkeys(bulk_write_record.structures) - bulk_write_record.structures_in_db:
+        # If the content is dirty, then update the database, writing all the new structures, and
+        # then all the new definitions, at once.
+        new_structures = [
+            bulk_write_record.structures[_id]
+            for _id in six.viewkeys(bulk_write_record.structures) - bulk_write_record.structures_in_db
+        ]
+        if new_structures:
             dirty = True
-
-            try:
-                self.db_connection.insert_structure(bulk_write_record.structures[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
+            for _id in self.db_connection.insert_structures(new_structures, bulk_write_record.course_key):
                 # We may not have looked up this structure inside this bulk operation, and thus
                 # didn't realize that it was already in the database. That's OK, the store is
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in six.viewkeys(bulk_write_record.definitions) - bulk_write_record.definitions_in_db:
+        new_definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in six.viewkeys(bulk_write_record.definitions) - bulk_write_record.definitions_in_db
+        ]
+        if new_definitions:
             dirty = True
-
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
+            for _id in self.db_connection.insert_definitions(new_definitions, bulk_write_record.course_key):
                 # We may not have looked up this definition inside this bulk operation, and thus
                 # didn't realize that it was already in the database. That's OK, the store is
                 # append only, so if it's already been written, we can just keep going.
@@ -713,14 +734,22 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  i18n_service=None, fs_service=None, user_service=None,
-                 services=None, signal_handler=None, **kwargs):
+                 services=None, signal_handler=None, columnar_structures=False,
+                 prefetch_definitions=False, definition_prefetch_chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param columnar_structures: if True, load structures with lazily-decoded, columnar blocks
+            (see :class:`.ColumnarBlocks`), to lower the memory and time spent loading large courses.
+        :param prefetch_definitions: if True, lazily loaded definitions are fetched in batches covering
+            the depth or subtree the caller requested, rather than one block at a time.
+        :param definition_prefetch_chunk_size: the maximum number of definitions fetched per query.
         """
 
         super(SplitMongoModuleStore, self).__init__(contentstore, **kwargs)
 
-        self.db_connection = MongoConnection(**doc_store_config)
+        self.db_connection = MongoConnection(columnar_structures=columnar_structures, **doc_store_config)
+        self.prefetch_definitions = prefetch_definitions
+        self.definition_prefetch_chunk_size = definition_prefetch_chunk_size
 
         if default_class is not None:
             module_path, __, class_name = default_class.rpartition('.')
@@ -794,24 +823,24 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             # This method supports lazy loading, where the descendent definitions aren't loaded
             # until they're actually needed.
             if not lazy:
-                # Non-lazy loading: Load all descendants by id.
-                descendent_definitions = self.get_definitions(
-                    course_key,
-                    [
-                        block.definition
-                        for block in six.itervalues(new_module_data)
-                    ]
-                )
-                # Turn definitions into a map.
-                definitions = {definition['_id']: definition
-                               for definition in descendent_definitions}
+                # Keep blocks whose definitions this runtime already loaded.
+                for block_key, block in six.iteritems(system.module_data):
+                    if block.definition_loaded and block_key in new_module_data:
+                        new_module_data[block_key] = block
+
+                # Non-lazy loading: Load all descendants' definitions, in batches.
+                definitions = system.prefetch_definitions(course_key, six.itervalues(new_module_data))
 
-                for block in six.itervalues(new_module_data):
-                    if block.definition in definitions:
+                for block_key, block in list(new_module_data.items()):
+                    if not block.definition_loaded and block.definition in definitions:
                         definition = definitions[block.definition]
+                        # Load the definition into a copy of the block, so that the (possibly
+                        # shared and cached) structure isn't changed.
                         # convert_fields gets done later in the runtime's xblock_from_json
-                        block.fields.update(definition.get('fields'))
+                        block = copy.copy(block)
+                        block.fields = dict(block.fields, **definition.get('fields'))
                         block.definition_loaded = True
+                        new_module_data[block_key] = block
 
             system.module_data.update(new_module_data)
             return system.module_data
@@ -836,6 +865,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if should_cache_items:
             self.cache_items(runtime, block_keys, course_entry.course_key, depth, lazy)
 
+        if lazy and self.prefetch_definitions:
+            # Load the definitions of everything the caller asked for together, once any is needed.
+            requested_blocks = {}
+            for block_key in block_keys:
+                requested_blocks = self.descendants(
+                    course_entry.structure['blocks'], block_key, depth, requested_blocks
+                )
+            runtime.add_definition_prefetch_group(requested_blocks)
+
         with self.bulk_operations(course_entry.course_key, emit_signals=False):
             return [runtime.load_item(block_key, course_entry, **kwargs) for block_key in block_keys]
 
@@ -1321,7 +1359,18 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             path_cache = {}
             parents_cache = self.build_block_key_to_parents_mapping(course.structure)
 
-        for block_id, value in six.iteritems(course.structure['blocks']):
+        blocks = course.structure['blocks']
+        if isinstance(qualifiers.get('block_type'), six.string_types):
+            # Only look at blocks of the requested type, so that lazily-decoded
+            # structures don't have to build every other block to answer.
+            candidates = (
+                (block_id, blocks[block_id])
+                for block_id in iter_block_keys_of_type(blocks, qualifiers['block_type'])
+            )
+        else:
+            candidates = six.iteritems(blocks)
+
+        for block_id, value in candidates:
             if _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
@@ -1347,8 +1396,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         :return dict: a dictionary containing mapping of block_keys against their parents.
         """
         children_to_parents = defaultdict(list)
-        for parent_key, value in six.iteritems(structure['blocks']):
-            for child_key in value.fields.get('children', []):
+        for parent_key, children in iter_block_children(structure['blocks']):
+            for child_key in children:
                 children_to_parents[child_key].append(parent_key)
 
         return children_to_parents
@@ -1624,6 +1673,34 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return usage_key, block.edit_info.original_usage_version
         return None, None
 
+    def get_changed_blocks(self, course_key, previous_version):
+        """
+        Compares the current structure of the given course with its structure at
+        ``previous_version``, without loading any xblocks.
+
+        Returns the set of usage keys (without version and branch) of the blocks
+        whose stored data (fields, definition, edit info) differs between the two
+        versions, including the blocks which didn't exist in the previous version;
+        or None if the previous version isn't available.
+        """
+        current_structure = self._lookup_course(course_key).structure
+        try:
+            previous_version = course_key.as_object_id(previous_version)
+        except InvalidKeyError:
+            return None
+        previous_structure = self.get_structure(course_key, previous_version)
+        if previous_structure is None:
+            return None
+
+        previous_blocks = previous_structure['blocks']
+        usage_course_key = course_key.version_agnostic().for_branch(None)
+        changed = set()
+        for block_key, block in six.iteritems(current_structure['blocks']):
+            previous_block = previous_blocks.get(block_key)
+            if previous_block is None or previous_block.to_storable() != block.to_storable():
+                changed.add(usage_course_key.make_usage_key(block_key.type, block_key.id))
+        return changed
+
     def create_definition_from_data(self, course_key, new_def_data, category, user_id):
         """
         Pull the definition fields out of descriptor and save to the db as a new definition
@@ -2711,7 +2788,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
             return result
 
-    @contract(root_block_key=BlockKey, blocks='dict(BlockKey: BlockData)')
+    @contract(root_block_key=BlockKey, blocks='map(BlockKey: BlockData)')
     def _remove_subtree(self, root_block_key, blocks):
         """
         Remove the subtree rooted at root_block_key
@@ -3237,8 +3314,8 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
     @contract(
         block_key=BlockKey,
-        source_blocks="dict(BlockKey: *)",
-        destination_blocks="dict(BlockKey: *)",
+        source_blocks="map(BlockKey: *)",
+        destination_blocks="map(BlockKey: *)",
         blacklist="list(BlockKey) | str",
     )
     def _copy_subdag(self, user_id, destination_version, block_key, source_blocks, destination_blocks, blacklist):
@@ -317,6 +317,13 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         usage_key = self._map_revision_to_branch(usage_key)
         return super(DraftVersioningModuleStore, self).get_block_original_usage(usage_key)
 
+    def get_changed_blocks(self, course_key, previous_version):
+        """
+        See :py:meth `xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.get_changed_blocks`
+        """
+        course_key = self._map_revision_to_branch(course_key)
+        return super(DraftVersioningModuleStore, self).get_changed_blocks(course_key, previous_version)
+
     def get_orphans(self, course_key, **kwargs):
         course_key = self._map_revision_to_branch(course_key)
         return super(DraftVersioningModuleStore, self).get_orphans(course_key, **kwargs)
@@ -126,6 +126,8 @@ def split_mongo_store_config(data_dir):
         'default_class': 'xmodule.raw_module.RawDescriptor',
         'fs_root': data_dir,
         'render_template': 'common.djangoapps.edxmako.shortcuts.render_to_string',
+        # Exercise the columnar structures in all the tests of split courses.
+        'columnar_structures': True,
     }
 
     store = {
@@ -3,20 +3,25 @@
 """
 
 
+import io
+import json
 import logging
 import mimetypes
 import shutil
+import tarfile
 import unittest
 from tempfile import mkdtemp
 from uuid import uuid4
 
 import ddt
 import path
+import pymongo
+from mock import patch
 from opaque_keys.edx.keys import AssetKey
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
 from xmodule.contentstore.content import StaticContent
-from xmodule.contentstore.mongo import MongoContentStore
+from xmodule.contentstore.mongo import MongoContentStore, asset_index_course_id
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
 from xmodule.tests import DATA_DIR
@@ -148,6 +153,56 @@ class TestContentstore(unittest.TestCase):
         finally:
             shutil.rmtree(root_dir)
 
+    @ddt.data(True, False)
+    def test_export_for_course_to_tarball(self, deprecated):
+        """
+        Test exporting the assets of a course into a tarball
+        """
+        self.set_up_assets(deprecated)
+        root_dir = path.Path(mkdtemp())
+        self.addCleanup(shutil.rmtree, root_dir)
+        tar_buffer = io.BytesIO()
+        progress = []
+        with patch('xmodule.contentstore.mongo.ASSET_EXPORT_BUFFER_SIZE', 1024):
+            with tarfile.open(fileobj=tar_buffer, mode='w:gz') as tar_file:
+                self.contentstore.export_all_for_course_to_tarball(
+                    self.course1_key, tar_file, 'course/static', root_dir / 'assets.json',
+                    progress_callback=lambda exported, total: progress.append((exported, total)),
+                )
+
+        tar_buffer.seek(0)
+        with tarfile.open(fileobj=tar_buffer, mode='r:gz') as tar_file:
+            self.assertEqual(
+                sorted(tar_file.getnames()),
+                sorted('course/static/' + filename for filename in self.course1_files),
+            )
+            for filename in self.course1_files:
+                with open("{}/static/{}".format(DATA_DIR, filename), "rb") as f:
+                    self.assertEqual(tar_file.extractfile('course/static/' + filename).read(), f.read())
+        with open(root_dir / 'assets.json') as f:
+            self.assertEqual(sorted(json.load(f)), sorted(self.course1_files))
+        self.assertEqual(progress[-1], (len(self.course1_files), len(self.course1_files)))
+
+    @ddt.data(True, False)
+    def test_export_for_course_to_tarball_builds_asset_index(self, deprecated):
+        """
+        Test that the progress of exporting the assets of a course which isn't indexed yet has the right total
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.asset_index.remove({})
+        self.contentstore.asset_index_courses.remove({})
+        root_dir = path.Path(mkdtemp())
+        self.addCleanup(shutil.rmtree, root_dir)
+        progress = []
+        with tarfile.open(fileobj=io.BytesIO(), mode='w') as tar_file:
+            self.contentstore.export_all_for_course_to_tarball(
+                self.course1_key, tar_file, 'course/static', root_dir / 'assets.json',
+                progress_callback=lambda exported, total: progress.append((exported, total)),
+            )
+
+        total = len(self.course1_files)
+        self.assertEqual(progress, [(exported, total) for exported in range(1, total + 1)])
+
     @ddt.data(True, False)
     def test_get_all_content(self, deprecated):
         """
@@ -168,6 +223,73 @@ class TestContentstore(unittest.TestCase):
         self.assertEqual(count, 0)
         self.assertEqual(course_assets, [])
 
+    @ddt.data(True, False)
+    def test_get_asset_index(self, deprecated):
+        """
+        Test get_asset_index_for_course
+        """
+        self.set_up_assets(deprecated)
+        course1_assets, count = self.contentstore.get_asset_index_for_course(
+            self.course1_key, sort=[('displayname', pymongo.DESCENDING)]
+        )
+        self.assertEqual(count, len(self.course1_files))
+        self.assertEqual(
+            [asset['asset_key'].block_id for asset in course1_assets],
+            sorted(self.course1_files, reverse=True),
+        )
+
+        course1_assets, count = self.contentstore.get_asset_index_for_course(
+            self.course1_key, start=1, maxresults=1, filter_params={'contentType': 'image/jpeg'}
+        )
+        self.assertEqual(count, 2)
+        self.assertEqual(len(course1_assets), 1)
+
+        asset_key = self.course1_key.make_asset_key('asset', self.course1_files[0])
+        self.contentstore.set_attr(asset_key, 'displayname', 'Renamed')
+        self.contentstore.delete(self.course1_key.make_asset_key('asset', self.course1_files[1]))
+        course1_assets, count = self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.assertEqual(count, len(self.course1_files) - 1)
+        self.assertIn('Renamed', [asset['displayname'] for asset in course1_assets])
+
+    @ddt.data(True, False)
+    def test_get_asset_index_page(self, deprecated):
+        """
+        Test the keyset pagination of get_asset_index_page
+        """
+        self.set_up_assets(deprecated)
+        block_ids = []
+        after = None
+        while True:
+            assets, after = self.contentstore.get_asset_index_page(
+                self.course2_key, 1, sort='displayname', direction=pymongo.ASCENDING, after=after
+            )
+            block_ids.extend(asset['asset_key'].block_id for asset in assets)
+            if after is None:
+                break
+        self.assertEqual(block_ids, sorted(self.course2_files))
+
+        assets, __ = self.contentstore.get_asset_index_page(self.course2_key, 10, displayname_prefix='PICT')
+        self.assertEqual(len(assets), 2)
+        assets, __ = self.contentstore.get_asset_index_page(self.course2_key, 10, content_types=['image/jpeg'])
+        self.assertEqual(len(assets), 2)
+
+    @ddt.data(True, False)
+    def test_asset_index_built_for_existing_assets(self, deprecated):
+        """
+        Test that the asset index of a course is built from its existing assets
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.asset_index.remove({})
+        self.contentstore.asset_index_courses.remove({})
+
+        __, count = self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.assertEqual(count, len(self.course1_files))
+
+        self.contentstore.asset_index.remove({})
+        self.contentstore.rebuild_asset_index(self.course1_key)
+        __, count = self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.assertEqual(count, len(self.course1_files))
+
     @ddt.data(True, False)
     def test_attrs(self, deprecated):
         """
@@ -217,9 +339,34 @@ class TestContentstore(unittest.TestCase):
         delete_all_course_assets
         """
         self.set_up_assets(deprecated)
+        for course_key in [self.course1_key, self.course2_key]:
+            self.contentstore.get_asset_index_for_course(course_key)
         self.contentstore.delete_all_course_assets(self.course1_key)
         __, count = self.contentstore.get_all_content_for_course(self.course1_key)
         self.assertEqual(count, 0)
+        __, count = self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.assertEqual(count, 0)
         # ensure it didn't remove any from other course
         __, count = self.contentstore.get_all_content_for_course(self.course2_key)
         self.assertEqual(count, len(self.course2_files))
+        __, count = self.contentstore.get_asset_index_for_course(self.course2_key)
+        self.assertEqual(count, len(self.course2_files))
+
+    @ddt.data(True, False)
+    def test_delete_assets_forgets_asset_index(self, deprecated):
+        """
+        delete_all_course_assets removes the record of the course's built asset index
+        """
+        self.set_up_assets(deprecated)
+        self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.contentstore.delete_all_course_assets(self.course1_key)
+        self.assertIsNone(
+            self.contentstore.asset_index_courses.find_one({'_id': asset_index_course_id(self.course1_key)})
+        )
+
+        # Assets which are missing from the index (e.g. restored directly into GridFS) are indexed again.
+        for filename in self.course1_files:
+            self.save_asset(filename, self.course1_key.make_asset_key('asset', filename), filename, False)
+        self.contentstore.asset_index.delete_many({})
+        __, count = self.contentstore.get_asset_index_for_course(self.course1_key)
+        self.assertEqual(count, len(self.course1_files))
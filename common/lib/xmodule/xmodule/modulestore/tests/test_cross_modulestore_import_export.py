@@ -23,6 +23,8 @@ from mock import patch
 from path import Path as path
 
 from openedx.core.lib.tests import attr
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.split_mongo.columnar_blocks import ColumnarBlocks
 from xmodule.modulestore.tests.utils import (
     CONTENTSTORE_SETUPS,
     MODULESTORE_SETUPS,
@@ -81,79 +83,106 @@ class CrossStoreXMLRoundtrip(CourseComparisonTest, PartitionTestCase):
                 with dest_content_builder.build() as dest_content:
                     # Construct the modulestore for storing the second import (using the second contentstore)
                     with dest_builder.build(contentstore=dest_content) as dest_store:
-                        source_course_key = source_store.make_course_key('a', 'course', 'course')
-                        dest_course_key = dest_store.make_course_key('a', 'course', 'course')
+                        self._round_trip(source_store, source_content, dest_store, dest_content, course_data_name)
 
-                        import_course_from_xml(
-                            source_store,
-                            'test_user',
-                            TEST_DATA_DIR,
-                            source_dirs=[course_data_name],
-                            static_content_store=source_content,
-                            target_id=source_course_key,
-                            raise_on_failure=True,
-                            create_if_not_present=True,
-                        )
-
-                        export_course_to_xml(
-                            source_store,
-                            source_content,
-                            source_course_key,
-                            self.export_dir,
-                            EXPORTED_COURSE_DIR_NAME,
-                        )
-
-                        import_course_from_xml(
-                            dest_store,
-                            'test_user',
-                            self.export_dir,
-                            source_dirs=[EXPORTED_COURSE_DIR_NAME],
-                            static_content_store=dest_content,
-                            target_id=dest_course_key,
-                            raise_on_failure=True,
-                            create_if_not_present=True,
-                        )
-
-                        # NOT CURRENTLY USED
-                        # export_course_to_xml(
-                        #     dest_store,
-                        #     dest_content,
-                        #     dest_course_key,
-                        #     self.export_dir,
-                        #     'exported_dest_course',
-                        # )
-
-                        self.exclude_field(None, 'wiki_slug')
-                        self.exclude_field(None, 'xml_attributes')
-                        self.exclude_field(None, 'parent')
-                        # discussion_ids are auto-generated based on usage_id, so they should change across
-                        # modulestores - see TNL-5001
-                        self.exclude_field(None, 'discussion_id')
-                        self.ignore_asset_key('_id')
-                        self.ignore_asset_key('uploadDate')
-                        self.ignore_asset_key('content_son')
-                        self.ignore_asset_key('thumbnail_location')
-
-                        self.assertCoursesEqual(
-                            source_store,
-                            source_course_key,
-                            dest_store,
-                            dest_course_key,
-                        )
-
-                        self.assertAssetsEqual(
-                            source_content,
-                            source_course_key,
-                            dest_content,
-                            dest_course_key,
-                        )
-
-                        self.assertAssetsMetadataEqual(
-                            source_store,
-                            source_course_key,
-                            dest_store,
-                            dest_course_key,
+    @patch('xmodule.video_module.video_module.edxval_api', None)
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    @ddt.data(*COURSE_DATA_NAMES)
+    def test_round_trip_columnar_structures(self, course_data_name, _mock_tab_from_json):
+        """
+        Test a round trip from a split modulestore which loads its structures with columnar blocks
+        """
+        with MongoContentstoreBuilder().build() as source_content:
+            with SPLIT_MODULESTORE_SETUP.build(contentstore=source_content, columnar_structures=True) as source_store:
+                with MongoContentstoreBuilder().build() as dest_content:
+                    with SPLIT_MODULESTORE_SETUP.build(contentstore=dest_content) as dest_store:
+                        self._round_trip(source_store, source_content, dest_store, dest_content, course_data_name)
+                        # The source course was exported from, and compared as, columnar structures.
+                        split_store = source_store._get_modulestore_by_type(ModuleStoreEnum.Type.split)
+                        course_key = source_store.make_course_key('a', 'course', 'course')
+                        course = split_store._lookup_course(  # pylint: disable=protected-access
+                            course_key.for_branch(ModuleStoreEnum.BranchName.published)
                         )
+                        self.assertIsInstance(course.structure['blocks'], ColumnarBlocks)
+
+    def _round_trip(self, source_store, source_content, dest_store, dest_content, course_data_name):
+        """
+        Imports the given course into the source store, exports it and imports the export into the
+        destination store, then verifies that both courses are the same.
+        """
+        source_course_key = source_store.make_course_key('a', 'course', 'course')
+        dest_course_key = dest_store.make_course_key('a', 'course', 'course')
+
+        import_course_from_xml(
+            source_store,
+            'test_user',
+            TEST_DATA_DIR,
+            source_dirs=[course_data_name],
+            static_content_store=source_content,
+            target_id=source_course_key,
+            raise_on_failure=True,
+            create_if_not_present=True,
+        )
+
+        export_course_to_xml(
+            source_store,
+            source_content,
+            source_course_key,
+            self.export_dir,
+            EXPORTED_COURSE_DIR_NAME,
+        )
+
+        import_course_from_xml(
+            dest_store,
+            'test_user',
+            self.export_dir,
+            source_dirs=[EXPORTED_COURSE_DIR_NAME],
+            static_content_store=dest_content,
+            target_id=dest_course_key,
+            raise_on_failure=True,
+            create_if_not_present=True,
+        )
+
+        # NOT CURRENTLY USED
+        # export_course_to_xml(
+        #     dest_store,
+        #     dest_content,
+        #     dest_course_key,
+        #     self.export_dir,
+        #     'exported_dest_course',
+        # )
+
+        self.exclude_field(None, 'wiki_slug')
+        self.exclude_field(None, 'xml_attributes')
+        self.exclude_field(None, 'parent')
+        # discussion_ids are auto-generated based on usage_id, so they should change across
+        # modulestores - see TNL-5001
+        self.exclude_field(None, 'discussion_id')
+        self.ignore_asset_key('_id')
+        self.ignore_asset_key('uploadDate')
+        self.ignore_asset_key('content_son')
+        self.ignore_asset_key('thumbnail_location')
+
+        self.assertCoursesEqual(
+            source_store,
+            source_course_key,
+            dest_store,
+            dest_course_key,
+        )
+
+        self.assertAssetsEqual(
+            source_content,
+            source_course_key,
+            dest_content,
+            dest_course_key,
+        )
+
+        self.assertAssetsMetadataEqual(
+            source_store,
+            source_course_key,
+            dest_store,
+            dest_course_key,
+        )
 
     def test_split_course_export_import(self):
         # Construct the contentstore for storing the first import
@@ -6,13 +6,12 @@ when using the Split modulestore.
 
 from shutil import rmtree
 from tempfile import mkdtemp
-from unittest import TestCase, skip
 
 import ddt
 import six
 from django.test import TestCase
 
-from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.factories import check_mongo_calls, check_mongo_calls_range
 from xmodule.modulestore.tests.utils import (
     TEST_DATA_DIR,
     MemoryCache,
@@ -28,7 +27,6 @@ MIXED_SPLIT_MODULESTORE_BUILDER = MixedModulestoreBuilder([('split', VersioningM
 
 
 @ddt.ddt
-@skip("Fix call counts below - sometimes the counts are off by 1.")
 class CountMongoCallsXMLRoundtrip(TestCase):
     """
     This class exists to test XML import and export to/from Split.
@@ -39,12 +37,17 @@ class CountMongoCallsXMLRoundtrip(TestCase):
         self.export_dir = mkdtemp()
         self.addCleanup(rmtree, self.export_dir, ignore_errors=True)
 
+    # Split writes all the structures and definitions of an import with a few insert_many calls,
+    # when the import's outermost bulk operation ends.
     @ddt.data(
-        (MIXED_OLD_MONGO_MODULESTORE_BUILDER, 287, 779, 702, 702),
-        (MIXED_SPLIT_MODULESTORE_BUILDER, 37, 16, 190, 189),
+        (MIXED_OLD_MONGO_MODULESTORE_BUILDER, 270, 719, 692, 655, 648),
+        (MIXED_SPLIT_MODULESTORE_BUILDER, 38, 22, 64, 33, 29),
     )
     @ddt.unpack
-    def test_import_export(self, store_builder, export_reads, import_reads, first_import_writes, second_import_writes):
+    def test_import_export(
+        self, store_builder, export_reads, first_import_reads, second_import_reads, first_import_writes,
+        second_import_writes,
+    ):
         with store_builder.build() as (source_content, source_store):
             with store_builder.build() as (dest_content, dest_store):
                 source_course_key = source_store.make_course_key('a', 'course', 'course')
@@ -53,7 +56,7 @@ class CountMongoCallsXMLRoundtrip(TestCase):
                 # An extra import write occurs in the first Split import due to the mismatch between
                 # the course id and the wiki_slug in the test XML course. The course must be updated
                 # with the correct wiki_slug during import.
-                with check_mongo_calls(import_reads, first_import_writes):
+                with check_mongo_calls(first_import_reads, first_import_writes):
                     import_course_from_xml(
                         source_store,
                         'test_user',
@@ -74,7 +77,7 @@ class CountMongoCallsXMLRoundtrip(TestCase):
                         'exported_source_course',
                     )
 
-                with check_mongo_calls(import_reads, second_import_writes):
+                with check_mongo_calls(second_import_reads, second_import_writes):
                     import_course_from_xml(
                         dest_store,
                         'test_user',
@@ -176,6 +179,27 @@ class CountMongoCallsCourseTraversal(TestCase):
                     start_block = modulestore.get_course(course_key, depth=depth, lazy=lazy)
                     self._traverse_blocks_in_course(start_block, access_all_block_fields)
 
+    # With definition prefetching, the lazy traversal which reads every field (38 calls above)
+    # loads all the definitions it needs in batches of definition_prefetch_chunk_size.
+    @ddt.data(
+        (1000, 5),
+        (10, 8),
+    )
+    @ddt.unpack
+    def test_number_mongo_calls_with_prefetched_definitions(self, chunk_size, max_mongo_calls):
+        request_cache = MemoryCache()
+        with MIXED_SPLIT_MODULESTORE_BUILDER.build(
+            request_cache=request_cache,
+            prefetch_definitions=True,
+            definition_prefetch_chunk_size=chunk_size,
+        ) as (content_store, modulestore):
+            course_key = self._import_course(content_store, modulestore)
+
+            with check_mongo_calls_range(max_finds=max_mongo_calls):
+                with modulestore.bulk_operations(course_key):
+                    start_block = modulestore.get_course(course_key, depth=None, lazy=True)
+                    self._traverse_blocks_in_course(start_block, access_all_block_fields=True)
+
     @ddt.data(
         (MIXED_OLD_MONGO_MODULESTORE_BUILDER, 176),
         (MIXED_SPLIT_MODULESTORE_BUILDER, 4),
@@ -0,0 +1,134 @@
+""" Tests for the lazily-decoded, columnar representation of split structure blocks """
+
+
+import copy
+import pickle
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.columnar_blocks import (
+    ColumnarBlocks,
+    iter_block_children,
+    iter_block_keys_of_type
+)
+from xmodule.modulestore.split_mongo.mongo_connection import structure_from_mongo, structure_to_mongo
+
+
+def _block_documents():
+    """
+    Return the stored form of a tiny course: a course with two chapters.
+    """
+    return [
+        {
+            'block_type': 'course',
+            'block_id': 'course',
+            'definition': ObjectId(),
+            'fields': {'children': [['chapter', 'one'], ['chapter', 'two']], 'display_name': 'Course'},
+            'defaults': {},
+            'edit_info': {'edited_by': 1},
+        },
+        {
+            'block_type': 'chapter',
+            'block_id': 'one',
+            'definition': ObjectId(),
+            'fields': {'display_name': 'One'},
+            'defaults': {},
+            'edit_info': {'edited_by': 1},
+        },
+        {
+            'block_type': 'chapter',
+            'block_id': 'two',
+            'definition': ObjectId(),
+            'fields': {},
+            'defaults': {},
+            'edit_info': {'edited_by': 2},
+        },
+    ]
+
+
+def _structure_document(blocks):
+    """
+    Return a stored structure document containing ``blocks``.
+    """
+    return {'_id': ObjectId(), 'root': ['course', 'course'], 'blocks': blocks}
+
+
+class TestColumnarBlocks(unittest.TestCase):
+    """ Test ColumnarBlocks, and its use by structure_from_mongo/structure_to_mongo """
+
+    def setUp(self):
+        super(TestColumnarBlocks, self).setUp()
+        self.documents = _block_documents()
+        self.blocks = ColumnarBlocks(copy.deepcopy(self.documents))
+        self.course_key = BlockKey('course', 'course')
+
+    def test_matches_eager_structure(self):
+        eager = structure_from_mongo(_structure_document(copy.deepcopy(self.documents)))
+        self.assertEqual(self.blocks, eager['blocks'])
+        self.assertEqual(list(self.blocks), list(eager['blocks']))
+
+    def test_decodes_on_access(self):
+        self.assertEqual(self.blocks.decoded_count, 0)
+        block = self.blocks[self.course_key]
+        self.assertIsInstance(block, BlockData)
+        self.assertEqual(block.fields['children'], [BlockKey('chapter', 'one'), BlockKey('chapter', 'two')])
+        self.assertIs(self.blocks[self.course_key], block)
+        self.assertEqual(self.blocks.decoded_count, 1)
+
+    def test_lookups(self):
+        self.assertEqual(len(self.blocks), 3)
+        self.assertIn(BlockKey('chapter', 'one'), self.blocks)
+        self.assertNotIn(BlockKey('chapter', 'three'), self.blocks)
+        self.assertIsNone(self.blocks.get(BlockKey('chapter', 'three')))
+        with self.assertRaises(KeyError):
+            self.blocks[BlockKey('html', 'one')]  # pylint: disable=pointless-statement
+
+    def test_iteration_does_not_decode(self):
+        self.assertEqual(
+            dict(iter_block_children(self.blocks)),
+            {
+                self.course_key: [BlockKey('chapter', 'one'), BlockKey('chapter', 'two')],
+                BlockKey('chapter', 'one'): [],
+                BlockKey('chapter', 'two'): [],
+            }
+        )
+        self.assertEqual(
+            list(iter_block_keys_of_type(self.blocks, 'chapter')),
+            [BlockKey('chapter', 'one'), BlockKey('chapter', 'two')]
+        )
+        self.assertEqual(list(iter_block_keys_of_type(self.blocks, 'html')), [])
+        self.assertEqual(self.blocks.decoded_count, 0)
+
+    def test_edits(self):
+        self.blocks[self.course_key].fields['children'] = [BlockKey('chapter', 'two')]
+        del self.blocks[BlockKey('chapter', 'one')]
+        self.blocks[BlockKey('html', 'new')] = BlockData(block_type='html', fields={})
+
+        self.assertEqual(
+            list(self.blocks),
+            [self.course_key, BlockKey('chapter', 'two'), BlockKey('html', 'new')]
+        )
+        self.assertEqual(dict(iter_block_children(self.blocks))[self.course_key], [BlockKey('chapter', 'two')])
+
+        stored = {(block['block_type'], block['block_id']): block for block in self.blocks.to_mongo()}
+        self.assertEqual(set(stored), {('course', 'course'), ('chapter', 'two'), ('html', 'new')})
+        self.assertEqual(stored[('course', 'course')]['fields']['children'], [BlockKey('chapter', 'two')])
+
+    def test_copy_and_pickle(self):
+        self.blocks[self.course_key]  # pylint: disable=pointless-statement
+        self.assertEqual(copy.deepcopy(self.blocks), self.blocks)
+        self.assertEqual(pickle.loads(pickle.dumps(self.blocks)), self.blocks)
+
+    def test_round_trip(self):
+        structure = structure_from_mongo(_structure_document(copy.deepcopy(self.documents)), columnar=True)
+        self.assertIsInstance(structure['blocks'], ColumnarBlocks)
+        self.assertEqual(structure['root'], self.course_key)
+
+        stored = structure_to_mongo(structure)
+        self.assertEqual(
+            sorted(stored['blocks'], key=lambda block: block['block_id']),
+            sorted(self.documents, key=lambda block: block['block_id'])
+        )
@@ -0,0 +1,51 @@
+""" Tests for planning batched definition loads in split modulestore """
+
+
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo.definition_prefetch import DefinitionPrefetchPlanner
+
+
+class TestDefinitionPrefetchPlanner(unittest.TestCase):
+    """ Test DefinitionPrefetchPlanner """
+
+    def setUp(self):
+        super(TestDefinitionPrefetchPlanner, self).setUp()
+        self.problems = [BlockData(block_type='problem', definition=ObjectId()) for __ in range(5)]
+        self.vertical = BlockData(block_type='vertical', definition=ObjectId())
+        self.blocks = self.problems + [self.vertical]
+
+    def test_plan_in_chunks(self):
+        plan = DefinitionPrefetchPlanner(chunk_size=4).plan(self.blocks)
+        self.assertEqual([len(chunk) for chunk in plan], [4, 2])
+        self.assertEqual(sum(plan, []), [block.definition for block in self.blocks])
+
+    def test_plan_empty(self):
+        self.assertEqual(DefinitionPrefetchPlanner().plan([]), [])
+
+    def test_skips_loaded_missing_and_duplicate_definitions(self):
+        self.problems[0].definition_loaded = True
+        self.problems[1].definition = None
+        self.problems[2].definition = self.problems[3].definition
+        self.assertEqual(
+            DefinitionPrefetchPlanner().definition_ids(self.blocks),
+            [self.problems[3].definition, self.problems[4].definition, self.vertical.definition]
+        )
+
+    def test_exclude(self):
+        excluded = {self.problems[0].definition: {}}
+        self.assertNotIn(
+            self.problems[0].definition,
+            DefinitionPrefetchPlanner().definition_ids(self.blocks, exclude=excluded)
+        )
+
+    def test_block_types(self):
+        planner = DefinitionPrefetchPlanner(block_types={'vertical'})
+        self.assertEqual(planner.plan(self.blocks), [[self.vertical.definition]])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            DefinitionPrefetchPlanner(chunk_size=0)
@@ -12,6 +12,7 @@ from importlib import import_module
 
 import ddt
 import six
+from bson.objectid import ObjectId
 from ccx_keys.locator import CCXBlockUsageLocator
 from contracts import contract
 from django.core.cache import InvalidCacheBackendError, caches
@@ -36,6 +37,7 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import get_local_structure_cache
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
@@ -1013,6 +1015,30 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_local_structure_cache_max_bytes')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache(self, mock_get_cache, mock_max_bytes):
+        mock_get_cache.return_value = self.cache
+        mock_max_bytes.return_value = 1024 * 1024
+        local_cache = get_local_structure_cache()
+        self.addCleanup(local_cache.clear)
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(len(local_cache), 1)
+
+        # Drop the shared cache entry, so that only the local tier can serve the structure
+        self.cache.clear()
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        # The local tier hands back a copy of the structure, which its caller may change
+        self.assertEqual(cached_structure, not_cached_structure)
+        self.assertIsNot(cached_structure, not_cached_structure)
+        self.assertEqual(local_cache.hits, 1)
+        cached_structure['blocks'].clear()
+        self.assertEqual(self._get_structure(self.new_course), not_cached_structure)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1583,6 +1609,31 @@ class TestItemCrud(SplitModuleTest):
         self.assertEqual(history_info['previous_version'], pre_version_guid)
         self.assertEqual(history_info['edited_by'], self.user_id)
 
+    def test_get_changed_blocks(self):
+        """
+        test comparing the blocks of two versions of a course
+        """
+        locator = BlockUsageLocator(
+            CourseLocator(org="testx", course="GreekHero", run="run", branch=BRANCH_NAME_DRAFT),
+            'problem', block_id="problem3_2"
+        )
+        problem = modulestore().get_item(locator)
+        pre_version_guid = problem.location.version_guid
+        self.assertEqual(modulestore().get_changed_blocks(locator.course_key, pre_version_guid), set())
+
+        problem.max_attempts = 4
+        problem.save()  # decache above setting into the kvs
+        modulestore().update_item(problem, self.user_id)
+        self.assertEqual(
+            modulestore().get_changed_blocks(locator.course_key, pre_version_guid),
+            {locator.for_branch(None)},
+        )
+        self.assertEqual(
+            modulestore().get_changed_blocks(locator.course_key, six.text_type(pre_version_guid)),
+            {locator.for_branch(None)},
+        )
+        self.assertIsNone(modulestore().get_changed_blocks(locator.course_key, ObjectId()))
+
     def test_update_children(self):
         """
         test updating an item's children ensuring the definition doesn't version but the course does if it should
@@ -34,6 +34,9 @@ class TestBulkWriteMixin(unittest.TestCase):
         self.clear_cache = self.bulk._clear_cache = Mock(name='_clear_cache')
         self.conn = self.bulk.db_connection = MagicMock(name='db_connection', spec=MongoConnection)
         self.conn.get_course_index.return_value = {'initial': 'index'}
+        # No document is in the database already
+        self.conn.insert_structures.return_value = []
+        self.conn.insert_definitions.return_value = []
 
         self.course_key = CourseLocator('org', 'course', 'run-a', branch='test')
         self.course_key_b = CourseLocator('org', 'course', 'run-b', branch='test')
@@ -44,6 +47,14 @@ class TestBulkWriteMixin(unittest.TestCase):
     def assertConnCalls(self, *calls):
         self.assertEqual(list(calls), self.conn.mock_calls)
 
+    def assertInsertedAtOnce(self, method_name, documents):
+        """
+        Asserts that the given documents were inserted, in any order, by a single call to `method_name`.
+        """
+        method = getattr(self.conn, method_name)
+        method.assert_called_once_with(method.call_args[0][0], self.course_key)
+        six.assertCountEqual(self, documents, method.call_args[0][0])
+
     def assertCacheNotCleared(self):
         self.assertFalse(self.clear_cache.called)
 
@@ -159,7 +170,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key, self.structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_structure(self.structure, self.course_key))
+        self.assertConnCalls(call.insert_structures([self.structure], self.course_key))
 
     def test_write_multiple_structures_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -170,14 +181,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        six.assertCountEqual(
-            self,
-            [
-                call.insert_structure(self.structure, self.course_key),
-                call.insert_structure(other_structure, self.course_key)
-            ],
-            self.conn.mock_calls
-        )
+        self.assertInsertedAtOnce('insert_structures', [self.structure, other_structure])
+        self.assertEqual(1, len(self.conn.mock_calls))
 
     def test_write_index_and_definition_on_close(self):
         original_index = {'versions': {}}
@@ -189,7 +194,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_definition(self.definition, self.course_key),
+            call.insert_definitions([self.definition], self.course_key),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.definition['_id']}},
                 from_index=original_index,
@@ -207,11 +212,11 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
+        self.assertInsertedAtOnce('insert_definitions', [self.definition, other_definition])
         six.assertCountEqual(
             self,
             [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key),
+                call.insert_definitions(self.conn.insert_definitions.call_args[0][0], self.course_key),
                 call.update_course_index(
                     {'versions': {'a': self.definition['_id'], 'b': other_definition['_id']}},
                     from_index=original_index,
@@ -228,7 +233,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key, self.definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertConnCalls(call.insert_definition(self.definition, self.course_key))
+        self.assertConnCalls(call.insert_definitions([self.definition], self.course_key))
 
     def test_write_multiple_definitions_on_close(self):
         self.conn.get_course_index.return_value = None
@@ -239,14 +244,8 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_definition(self.course_key.replace(branch='b'), other_definition)
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
-        six.assertCountEqual(
-            self,
-            [
-                call.insert_definition(self.definition, self.course_key),
-                call.insert_definition(other_definition, self.course_key)
-            ],
-            self.conn.mock_calls
-        )
+        self.assertInsertedAtOnce('insert_definitions', [self.definition, other_definition])
+        self.assertEqual(1, len(self.conn.mock_calls))
 
     def test_write_index_and_structure_on_close(self):
         original_index = {'versions': {}}
@@ -258,7 +257,7 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.assertConnCalls()
         self.bulk._end_bulk_operation(self.course_key)
         self.assertConnCalls(
-            call.insert_structure(self.structure, self.course_key),
+            call.insert_structures([self.structure], self.course_key),
             call.update_course_index(
                 {'versions': {self.course_key.branch: self.structure['_id']}},
                 from_index=original_index,
@@ -276,11 +275,11 @@ class TestBulkWriteMixinClosed(TestBulkWriteMixin):
         self.bulk.update_structure(self.course_key.replace(branch='b'), other_structure)
         self.bulk.insert_course_index(self.course_key, {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}})
         self.bulk._end_bulk_operation(self.course_key)
+        self.assertInsertedAtOnce('insert_structures', [self.structure, other_structure])
         six.assertCountEqual(
             self,
             [
-                call.insert_structure(self.structure, self.course_key),
-                call.insert_structure(other_structure, self.course_key),
+                call.insert_structures(self.conn.insert_structures.call_args[0][0], self.course_key),
                 call.update_course_index(
                     {'versions': {'a': self.structure['_id'], 'b': other_structure['_id']}},
                     from_index=original_index,
@@ -484,7 +483,7 @@ class TestBulkWriteMixinFindMethods(TestBulkWriteMixin):
         self.bulk._begin_bulk_operation(self.course_key)
         self.bulk.get_definitions(self.course_key, test_ids)
         self.bulk._end_bulk_operation(self.course_key)
-        self.assertFalse(self.conn.insert_definition.called)
+        self.assertFalse(self.conn.insert_definitions.called)
 
     def test_no_bulk_find_structures_derived_from(self):
         ids = [Mock(name='id')]
@@ -749,7 +748,7 @@ class TestBulkWriteMixinOpen(TestBulkWriteMixin):
         index_copy['versions']['draft'] = index['versions']['published']
         self.bulk.update_course_index(self.course_key, index_copy)
         self.bulk._end_bulk_operation(self.course_key)
-        self.conn.insert_structure.assert_called_once_with(published_structure, self.course_key)
+        self.conn.insert_structures.assert_called_once_with([published_structure], self.course_key)
         self.conn.update_course_index.assert_called_once_with(
             index_copy,
             from_index=self.conn.get_course_index.return_value,
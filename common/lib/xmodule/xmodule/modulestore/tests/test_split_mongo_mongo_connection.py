@@ -3,11 +3,17 @@
 
 import unittest
 
-from mock import patch
-from pymongo.errors import ConnectionFailure
+from mock import Mock, patch
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError
 
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    DUPLICATE_KEY_ERROR_CODE,
+    LocalStructureCache,
+    MongoConnection,
+    Tagger,
+    _insert_all
+)
 
 
 class TestHeartbeatFailureException(unittest.TestCase):
@@ -23,3 +29,96 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestInsertAll(unittest.TestCase):
+    """ Test the insertion of new structures and definitions at the end of a bulk operation """
+
+    def setUp(self):
+        super(TestInsertAll, self).setUp()
+        self.collection = Mock(name='collection')
+        self.documents = [{'_id': 'a'}, {'_id': 'b'}, {'_id': 'c'}]
+
+    def bulk_write_error(self, *codes):
+        return BulkWriteError({
+            'writeErrors': [{'index': index, 'code': code} for index, code in codes],
+        })
+
+    def test_nothing_to_insert(self):
+        self.assertEqual(_insert_all(self.collection, []), [])
+        self.assertFalse(self.collection.method_calls)
+
+    def test_single_document(self):
+        self.assertEqual(_insert_all(self.collection, self.documents[:1]), [])
+        self.collection.insert_one.assert_called_once_with(self.documents[0])
+
+    def test_single_duplicate_document(self):
+        self.collection.insert_one.side_effect = DuplicateKeyError('duplicate')
+        self.assertEqual(_insert_all(self.collection, self.documents[:1]), ['a'])
+
+    def test_several_documents(self):
+        self.assertEqual(_insert_all(self.collection, self.documents), [])
+        self.collection.insert_many.assert_called_once_with(self.documents, ordered=False)
+        self.assertFalse(self.collection.insert_one.called)
+
+    def test_duplicate_documents(self):
+        self.collection.insert_many.side_effect = self.bulk_write_error(
+            (0, DUPLICATE_KEY_ERROR_CODE), (2, DUPLICATE_KEY_ERROR_CODE)
+        )
+        self.assertEqual(_insert_all(self.collection, self.documents), ['a', 'c'])
+
+    def test_other_write_error(self):
+        self.collection.insert_many.side_effect = self.bulk_write_error((0, DUPLICATE_KEY_ERROR_CODE), (1, 2))
+        with self.assertRaises(BulkWriteError):
+            _insert_all(self.collection, self.documents)
+
+
+class TestLocalStructureCache(unittest.TestCase):
+    """ Test the process-local LRU tier of the course structure cache """
+
+    def test_disabled(self):
+        cache = LocalStructureCache(0)
+        self.assertFalse(cache.enabled)
+        cache.set('a', b'a')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_hit_and_miss(self):
+        cache = LocalStructureCache(100)
+        cache.set('a', b'a' * 10)
+        self.assertEqual(cache.get('a'), b'a' * 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.hits, cache.misses, cache.current_bytes), (1, 1, 10))
+
+    def test_evicts_least_recently_used(self):
+        cache = LocalStructureCache(100)
+        cache.set('a', b'a' * 40)
+        cache.set('b', b'b' * 40)
+        cache.get('a')
+        self.assertEqual(cache.set('c', b'c' * 40), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'a' * 40)
+        self.assertEqual(cache.get('c'), b'c' * 40)
+        self.assertEqual((cache.evictions, cache.current_bytes), (1, 80))
+
+    def test_oversized_structure_is_not_stored(self):
+        cache = LocalStructureCache(100)
+        cache.set('a', b'a' * 40)
+        self.assertEqual(cache.set('b', b'b' * 101), 0)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'a' * 40)
+
+    def test_replacing_an_entry_updates_size(self):
+        cache = LocalStructureCache(100)
+        cache.set('a', b'a' * 40)
+        cache.set('a', b'a' * 60)
+        self.assertEqual((len(cache), cache.current_bytes), (1, 60))
+
+    def test_measure(self):
+        cache = LocalStructureCache(100)
+        cache.set('a', b'a' * 40)
+        cache.get('a')
+        tagger = Tagger(1)
+        cache.measure(tagger)
+        self.assertIn(('local_cache_hits', 1), tagger.measures)
+        self.assertIn(('local_cache_bytes', 40), tagger.measures)
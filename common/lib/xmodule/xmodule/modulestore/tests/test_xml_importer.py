@@ -8,6 +8,7 @@ import os
 import unittest
 from uuid import uuid4
 
+import ddt
 import mock
 import six
 from opaque_keys.edx.keys import CourseKey
@@ -346,6 +347,7 @@ class UpdateLocationTest(ModuleStoreNoSettings):
             self.assertTrue(new_version.fields[field].is_set_on(new_version))
 
 
+@ddt.ddt
 class StaticContentImporterTest(unittest.TestCase):
 
     def setUp(self):
@@ -392,3 +394,28 @@ class StaticContentImporterTest(unittest.TestCase):
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.generate_thumbnail.assert_called_once()
+
+    @ddt.data(1, 4)
+    def test_import_static_content_directory_remapping(self, workers):
+        self.static_content_importer.workers = workers
+        mocked_os_walk_yield = [
+            ('static', None, ['file1.txt', 'file2.txt', '._file3.txt']),
+            ('static/inner', None, ['file1.txt']),
+        ]
+
+        def import_static_file(full_file_path, base_dir):  # pylint: disable=unused-argument
+            return full_file_path, u'asset-for-' + full_file_path
+
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=mocked_os_walk_yield
+        ), mock.patch.object(
+            self.static_content_importer, 'import_static_file', side_effect=import_static_file
+        ):
+            remap_dict = self.static_content_importer.import_static_content_directory('static')
+
+        self.assertEqual(remap_dict, {
+            'static/file1.txt': u'asset-for-static/file1.txt',
+            'static/file2.txt': u'asset-for-static/file2.txt',
+            'static/inner/file1.txt': u'asset-for-static/inner/file1.txt',
+        })
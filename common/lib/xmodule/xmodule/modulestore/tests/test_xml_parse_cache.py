@@ -0,0 +1,122 @@
+"""
+Tests for the on-disk cache of the courses loaded by the XMLModuleStore.
+"""
+
+
+import os
+import shutil
+import tempfile
+
+import six
+from django.test import TestCase
+from mock import patch
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.xml import XMLModuleStore
+from xmodule.modulestore.xml_parse_cache import XMLParseCache
+from xmodule.tests import DATA_DIR
+from xmodule.x_module import XModuleMixin
+
+COURSE_KEY = CourseKey.from_string('testX/dag/2012_Fall')
+
+
+class TestXMLParseCache(TestCase):
+    """
+    Tests for loading xml courses through the XMLParseCache.
+    """
+
+    def setUp(self):
+        super(TestXMLParseCache, self).setUp()
+        self.parse_cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.parse_cache_dir)
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        shutil.copytree(DATA_DIR / 'xml_dag', os.path.join(self.data_dir, 'xml_dag'))
+
+    def load(self, parse_cache_dir, **kwargs):
+        return XMLModuleStore(
+            self.data_dir,
+            default_class='xmodule.hidden_module.HiddenDescriptor',
+            source_dirs=['xml_dag'],
+            xblock_mixins=(InheritanceMixin, XModuleMixin),
+            parse_cache_dir=parse_cache_dir,
+            **kwargs
+        )
+
+    def assertSameBlocks(self, expected_store, actual_store):
+        expected_modules = expected_store.modules[COURSE_KEY]
+        actual_modules = actual_store.modules[COURSE_KEY]
+        self.assertEqual(list(expected_modules), list(actual_modules))
+        for location, expected_block in six.iteritems(expected_modules):
+            actual_block = actual_modules[location]
+            self.assertIs(type(expected_block), type(actual_block))
+            for field in six.itervalues(expected_block.fields):
+                self.assertEqual(
+                    (field.is_set_on(expected_block), field.read_json(expected_block)),
+                    (field.is_set_on(actual_block), field.read_json(actual_block)),
+                )
+
+    def test_load_from_cache(self):
+        uncached = self.load('')
+        self.load(self.parse_cache_dir)
+        self.assertEqual(len(os.listdir(self.parse_cache_dir)), 1)
+
+        with patch.object(XMLParseCache, 'store') as mock_store:
+            cached = self.load(self.parse_cache_dir)
+        mock_store.assert_not_called()
+        self.assertSameBlocks(uncached, cached)
+        self.assertEqual(
+            uncached.get_course_errors(COURSE_KEY), cached.get_course_errors(COURSE_KEY)
+        )
+        self.assertEqual(cached.get_course(COURSE_KEY).location, COURSE_KEY.make_usage_key('course', '2012_Fall'))
+
+    def test_changed_course_misses_cache(self):
+        self.load(self.parse_cache_dir)
+        with open(os.path.join(self.data_dir, 'xml_dag', 'html', 'toyhtml.html'), 'a') as html_file:
+            html_file.write('<p>Changed</p>')
+
+        with patch.object(XMLParseCache, 'store') as mock_store:
+            store = self.load(self.parse_cache_dir)
+        mock_store.assert_called_once()
+        self.assertIn('Changed', store.get_item(COURSE_KEY.make_usage_key('html', 'toyhtml')).data)
+
+    def test_changed_classes_miss_cache(self):
+        self.load(self.parse_cache_dir)
+        with patch.object(XMLParseCache, '_classes_digest', return_value='changed'):
+            with patch.object(XMLParseCache, 'store') as mock_store:
+                self.load(self.parse_cache_dir)
+        mock_store.assert_called_once()
+
+    def test_changed_xblock_version_misses_cache(self):
+        self.load(self.parse_cache_dir)
+        with patch('xblock.__version__', '0.0.0'):
+            with patch.object(XMLParseCache, 'store') as mock_store:
+                self.load(self.parse_cache_dir)
+        mock_store.assert_called_once()
+
+    def test_private_cache(self):
+        parse_cache_dir = os.path.join(self.parse_cache_dir, 'xml')
+        self.load(parse_cache_dir)
+        self.assertEqual(os.stat(parse_cache_dir).st_mode & 0o777, 0o700)
+        for entry_name in os.listdir(parse_cache_dir):
+            self.assertEqual(os.stat(os.path.join(parse_cache_dir, entry_name)).st_mode & 0o777, 0o600)
+
+    def test_entry_of_other_user_ignored(self):
+        self.load(self.parse_cache_dir)
+        with patch('os.getuid', return_value=os.getuid() + 1):
+            with patch.object(XMLParseCache, 'store') as mock_store:
+                self.load(self.parse_cache_dir)
+        mock_store.assert_called_once()
+
+    def test_static_files_ignored(self):
+        parse_cache = XMLParseCache(self.parse_cache_dir)
+        course_path = os.path.join(self.data_dir, 'xml_dag')
+        key = parse_cache.course_key(course_path)
+        with open(os.path.join(course_path, 'static', 'new_asset.txt'), 'w') as asset_file:
+            asset_file.write('asset')
+        self.assertEqual(parse_cache.course_key(course_path), key)
+
+    def test_import_not_cached(self):
+        self.load(self.parse_cache_dir, target_course_id=CourseKey.from_string('testX/dag/imported'))
+        self.assertEqual(os.listdir(self.parse_cache_dir), [])
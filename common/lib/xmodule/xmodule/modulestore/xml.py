@@ -15,6 +15,7 @@ from contextlib import contextmanager
 from importlib import import_module
 
 import six
+from django.conf import settings
 from django.utils.encoding import python_2_unicode_compatible
 from fs.osfs import OSFS
 from lazy import lazy
@@ -42,6 +43,7 @@ from xmodule.x_module import (
 
 from .exceptions import ItemNotFoundError
 from .inheritance import InheritanceKeyValueStore, compute_inherited_metadata, inheriting_field_data
+from .xml_parse_cache import XMLParseCache
 
 edx_xml_parser = etree.XMLParser(dtd_validation=False, load_dtd=False,
                                  remove_comments=True, remove_blank_text=True)
@@ -313,7 +315,8 @@ class XMLModuleStore(ModuleStoreReadBase):
     def __init__(
             self, data_dir, default_class=None, source_dirs=None, course_ids=None,
             load_error_modules=True, i18n_service=None, fs_service=None, user_service=None,
-            signal_handler=None, target_course_id=None, **kwargs   # pylint: disable=unused-argument
+            signal_handler=None, target_course_id=None, parse_cache_dir=None,
+            **kwargs   # pylint: disable=unused-argument
     ):
         """
         Initialize an XMLModuleStore from data_dir
@@ -326,6 +329,10 @@ class XMLModuleStore(ModuleStoreReadBase):
 
             source_dirs or course_ids (list of str): If specified, the list of source_dirs or course_ids to load.
                 Otherwise, load all courses. Note, providing both
+
+            parse_cache_dir (str): the directory of the on-disk cache of the loaded courses (see
+                xml_parse_cache.py).  Defaults to the XML_MODULESTORE_PARSE_CACHE_DIR setting, and
+                courses aren't cached if neither is set.
         """
         super(XMLModuleStore, self).__init__(**kwargs)
 
@@ -339,6 +346,10 @@ class XMLModuleStore(ModuleStoreReadBase):
 
         self.load_error_modules = load_error_modules
 
+        if parse_cache_dir is None:
+            parse_cache_dir = getattr(settings, 'XML_MODULESTORE_PARSE_CACHE_DIR', None)
+        self.parse_cache = XMLParseCache(parse_cache_dir) if parse_cache_dir else None
+
         if default_class is None:
             self.default_class = None
         else:
@@ -377,7 +388,9 @@ class XMLModuleStore(ModuleStoreReadBase):
         errorlog = make_error_tracker()
         course_descriptor = None
         try:
-            course_descriptor = self.load_course(course_dir, course_ids, errorlog.tracker, target_course_id)
+            course_descriptor = self.load_course(
+                course_dir, course_ids, errorlog.tracker, target_course_id, errors=errorlog.errors
+            )
         except Exception as exc:  # pylint: disable=broad-except
             msg = "ERROR: Failed to load courselike '{0}': {1}".format(
                 course_dir.encode("utf-8"), six.text_type(exc)
@@ -430,10 +443,11 @@ class XMLModuleStore(ModuleStoreReadBase):
             log.warning(msg + " " + str(err))
         return {}
 
-    def load_course(self, course_dir, course_ids, tracker, target_course_id=None):
+    def load_course(self, course_dir, course_ids, tracker, target_course_id=None, errors=None):
         """
         Load a course into this module store
         course_path: Course directory name
+        errors: the list of the errors logged by tracker, which lets the course be cached along with its errors
 
         returns a CourseDescriptor for the course
         """
@@ -525,6 +539,28 @@ class XMLModuleStore(ModuleStoreReadBase):
                 services=services,
                 target_course_id=target_course_id,
             )
+
+            # The course can only be cached if none of its blocks were loaded before.  Imports
+            # always parse the course, for the side effects of parsing some blocks (such as
+            # importing videos into VAL) to happen in their target course.
+            parse_cache_key = None
+            if (
+                    self.parse_cache is not None and errors is not None and target_course_id is None and
+                    not self.modules.get(course_id)
+            ):
+                parse_cache_key = self.parse_cache.course_key(
+                    self.data_dir / course_dir, self.parent_xml, self.load_error_modules
+                )
+                cached = self.parse_cache.load(parse_cache_key, system)
+                if cached is not None:
+                    errors.extend(cached['errors'])
+                    for block in cached['blocks']:
+                        block.data_dir = course_dir
+                        self.modules[course_id][block.scope_ids.usage_id] = block
+                    log.debug('========> Loaded courselike import from %s from the parse cache', course_dir)
+                    return self.modules[course_id][cached['course_location']]
+            errors_before = len(errors) if errors is not None else 0
+
             course_descriptor = system.process_xml(etree.tostring(course_data, encoding='unicode'))
             # If we fail to load the course, then skip the rest of the loading steps
             if isinstance(course_descriptor, ErrorDescriptor):
@@ -532,6 +568,14 @@ class XMLModuleStore(ModuleStoreReadBase):
 
             self.content_importers(system, course_descriptor, course_dir, url_name)
 
+            if parse_cache_key is not None:
+                self.parse_cache.store(
+                    parse_cache_key,
+                    course_descriptor.scope_ids.usage_id,
+                    errors[errors_before:],
+                    list(self.modules[course_id].values()),
+                )
+
             log.debug('========> Done with courselike import from %s', course_dir)
             return course_descriptor
 
@@ -107,7 +107,9 @@ class ExportManager(object):
     """
     Manages XML exporting for courselike objects.
     """
-    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir):
+    def __init__(
+        self, modulestore, contentstore, courselike_key, root_dir, target_dir, tar_file=None, progress_callback=None
+    ):
         """
         Export all modules from `modulestore` and content from `contentstore` as xml to `root_dir`.
 
@@ -116,12 +118,18 @@ class ExportManager(object):
         `courselike_key`: The Locator of the Descriptor to export
         `root_dir`: The directory to write the exported xml to
         `target_dir`: The name of the directory inside `root_dir` to write the content to
+        `tar_file`: An open `tarfile.TarFile` to stream the static assets into, under `target_dir`,
+            rather than writing them to `root_dir`, or None
+        `progress_callback`: Called with the number of static assets exported so far and the total
+            number of static assets, when streaming them into `tar_file`
         """
         self.modulestore = modulestore
         self.contentstore = contentstore
         self.courselike_key = courselike_key
         self.root_dir = root_dir
         self.target_dir = text_type(target_dir)
+        self.tar_file = tar_file
+        self.progress_callback = progress_callback
 
     @abstractmethod
     def get_key(self):
@@ -151,6 +159,25 @@ class ExportManager(object):
         Get the target courselike object for this export.
         """
 
+    def export_static_assets(self, root_courselike_dir):
+        """
+        Export the static assets and their policy, into the tarball if there is one.
+        """
+        if self.tar_file is not None:
+            self.contentstore.export_all_for_course_to_tarball(
+                self.courselike_key,
+                self.tar_file,
+                self.target_dir + '/static',
+                root_courselike_dir + '/policies/assets.json',
+                progress_callback=self.progress_callback,
+            )
+        else:
+            self.contentstore.export_all_for_course(
+                self.courselike_key,
+                root_courselike_dir + '/static/',
+                root_courselike_dir + '/policies/assets.json',
+            )
+
     def export(self):
         """
         Perform the export given the parameters handed to this class at init.
@@ -220,11 +247,7 @@ class CourseExportManager(ExportManager):
         # export the static assets
         policies_dir = export_fs.makedir('policies', recreate=True)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(root_courselike_dir)
 
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
@@ -319,11 +342,7 @@ class LibraryExportManager(ExportManager):
         export_fs.makedir('policies', recreate=True)
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(root_courselike_dir)
 
     def post_process(self, root, export_fs):
         """
@@ -338,18 +357,28 @@ class LibraryExportManager(ExportManager):
         xml_file.close()
 
 
-def export_course_to_xml(modulestore, contentstore, course_key, root_dir, course_dir):
+def export_course_to_xml(
+    modulestore, contentstore, course_key, root_dir, course_dir, tar_file=None, progress_callback=None
+):
     """
     Thin wrapper for the Course Export Manager. See ExportManager for details.
     """
-    CourseExportManager(modulestore, contentstore, course_key, root_dir, course_dir).export()
+    CourseExportManager(
+        modulestore, contentstore, course_key, root_dir, course_dir,
+        tar_file=tar_file, progress_callback=progress_callback,
+    ).export()
 
 
-def export_library_to_xml(modulestore, contentstore, library_key, root_dir, library_dir):
+def export_library_to_xml(
+    modulestore, contentstore, library_key, root_dir, library_dir, tar_file=None, progress_callback=None
+):
     """
     Thin wrapper for the Library Export Manager. See ExportManager for details.
     """
-    LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
+    LibraryExportManager(
+        modulestore, contentstore, library_key, root_dir, library_dir,
+        tar_file=tar_file, progress_callback=progress_callback,
+    ).export()
 
 
 def adapt_references(subtree, destination_course_key, export_fs):
@@ -29,6 +29,7 @@ import mimetypes
 import os
 import re
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 
 import six
 import xblock
@@ -61,6 +62,10 @@ log = logging.getLogger(__name__)
 
 DEFAULT_STATIC_CONTENT_SUBDIR = 'static'
 
+# How many static files are uploaded to the contentstore at once, at most,
+# each of them being read into memory whole.
+STATIC_CONTENT_IMPORT_WORKERS = 4
+
 
 class LocationMixin(XBlockMixin):
     """
@@ -84,10 +89,11 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, workers=STATIC_CONTENT_IMPORT_WORKERS):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        self.workers = workers
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -104,6 +110,7 @@ class StaticContentImporter:
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -114,15 +121,30 @@ class StaticContentImporter:
                         log.debug('skipping static content %s...', file_path)
                     continue
 
-                if verbose:
-                    log.debug('importing static content %s...', file_path)
+                file_paths.append(file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+        def import_file(file_path):
+            """
+            Imports the static file at file_path.
+            """
+            if verbose:
+                log.debug('importing static content %s...', file_path)
+            return self.import_static_file(file_path, base_dir=static_dir)
+
+        if self.workers > 1 and len(file_paths) > 1:
+            # The files are uploaded in parallel, but their results are still
+            # returned in order, so that the remapping is the same as importing
+            # them one by one.
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                all_imported_file_attrs = list(executor.map(import_file, file_paths))
+        else:
+            all_imported_file_attrs = [import_file(file_path) for file_path in file_paths]
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        for imported_file_attrs in all_imported_file_attrs:
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
         return remap_dict
 
@@ -221,6 +243,8 @@ class ImportManager(object):
         python_lib_filename: The filename of the courselike's python library. Course authors can optionally
             create this file to implement custom logic in their course.
 
+        static_content_workers: How many static files are uploaded to static_content_store at once, at most.
+
         default_class, load_error_modules: are arguments for constructing the XMLModuleStore (see its doc)
     """
     store_class = XMLModuleStore
@@ -234,6 +258,7 @@ class ImportManager(object):
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_content_workers=STATIC_CONTENT_IMPORT_WORKERS,
     ):
         self.store = store
         self.user_id = user_id
@@ -245,6 +270,7 @@ class ImportManager(object):
         self.verbose = verbose
         self.static_content_subdir = static_content_subdir
         self.python_lib_filename = python_lib_filename
+        self.static_content_workers = static_content_workers
         self.do_import_static = do_import_static
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
@@ -280,7 +306,8 @@ class ImportManager(object):
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            workers=self.static_content_workers,
         )
         if self.do_import_static:
             if self.verbose:
@@ -0,0 +1,286 @@
+"""
+An on-disk cache of the courses loaded by the XMLModuleStore, so that loading
+an unchanged course again, from another process, skips parsing its OLX.
+
+A course is cached under a digest of the path and content of each of its files
+(other than its static assets), so that changing any of them misses the cache.
+An entry also holds a digest of the source code of the XBlock classes of the
+course, of the xmodule and capa packages, and of the installed XBlock version,
+which is checked before the entry is used, so that upgrading any of them misses
+the cache too.
+
+Entries are pickled, so the cache directory is created readable by the current
+user only, and entries owned by any other user are ignored.
+
+An entry holds, for each block of the course, the JSON values of the fields
+set on the block, the settings it inherits and the defaults it read while being
+loaded, along with the errors logged while loading the course, pickled and
+compressed.  Courses with blocks which failed to load, or with asides, aren't
+cached.
+
+Loading a course from the cache skips the side effects of parsing its blocks,
+such as importing its videos into VAL, which happened when it was cached.
+"""
+
+
+import hashlib
+import inspect
+import logging
+import os
+import zlib
+
+import capa
+import six
+import xblock
+from six.moves import cPickle as pickle
+from xblock.field_data import DictFieldData
+from xblock.fields import ScopeIds
+from xblock.runtime import KvsFieldData
+
+import xmodule
+from xmodule.error_module import ErrorDescriptor
+
+from .inheritance import InheritanceKeyValueStore, InheritingFieldData, inheriting_field_data
+
+log = logging.getLogger(__name__)
+
+# Changing the format of the entries, or how they are computed, needs a new version.  So does changing how
+# blocks are parsed by code which isn't digested in the entries (see XMLParseCache._classes_digest), such
+# as helpers of XBlocks installed from other packages, outside of the modules of their classes.
+CACHE_VERSION = 1
+
+# The packages whose source is digested in each entry, since blocks are parsed with helpers from all of them.
+SOURCE_PACKAGES = (xmodule, capa)
+
+# The directories of a course which aren't read when loading it.
+IGNORED_COURSE_SUBDIRS = ('static', 'static_import')
+
+# How each kind of field data is cached, by the name of its kind.
+DICT_FIELD_DATA = 'dict'
+KVS_FIELD_DATA = 'kvs'
+INHERITING_FIELD_DATA = 'inheriting'
+
+
+class UncacheableCourse(Exception):
+    """
+    Raised when a loaded course can't be cached.
+    """
+    pass
+
+
+class XMLParseCache(object):
+    """
+    A cache of the courses loaded by the XMLModuleStore, in `directory`.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        # path -> digest of the source files of the XBlock classes, for this process.
+        self._source_digests = {}
+        # The paths of the source files of the SOURCE_PACKAGES, for this process.
+        self._package_paths = None
+
+    def course_key(self, course_path, *extra):
+        """
+        Returns the key of the course at `course_path`: the digest of the
+        relative path and content of each of its files, and of `extra`.
+        """
+        digest = hashlib.sha1()
+        digest.update(u'{}\n'.format(CACHE_VERSION).encode('utf-8'))
+        for value in (course_path,) + extra:
+            digest.update(u'{}\n'.format(value).encode('utf-8'))
+
+        for dirname, subdirs, filenames in os.walk(course_path):
+            if dirname == course_path:
+                subdirs[:] = [subdir for subdir in subdirs if subdir not in IGNORED_COURSE_SUBDIRS]
+            subdirs.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.join(dirname, filename)
+                digest.update(os.path.relpath(file_path, course_path).encode('utf-8', 'surrogateescape'))
+                digest.update(b'\0')
+                digest.update(self._file_digest(file_path))
+        return digest.hexdigest()
+
+    def load(self, key, system):
+        """
+        Returns the cached entry for `key`, as a dict with the
+        `course_location` of the course, the `errors` logged while loading
+        it, and its `blocks`, rebuilt with the runtime `system`.
+
+        Returns None when the course isn't cached, or when the XBlock classes
+        of its blocks have changed since.
+        """
+        try:
+            with open(self._path(key), 'rb') as entry_file:
+                if os.fstat(entry_file.fileno()).st_uid != os.getuid():
+                    log.warning(u"Ignoring the XML parse cache entry %s, which isn't owned by the current user", key)
+                    return None
+                entry = pickle.loads(zlib.decompress(entry_file.read()))
+        except (IOError, OSError):
+            return None
+        except Exception:  # pylint: disable=broad-except
+            log.warning(u"Ignoring the corrupted XML parse cache entry %s", key, exc_info=True)
+            return None
+
+        block_classes = {}
+        for block_type in set(block[2] for block in entry['blocks']):
+            block_classes[block_type] = system.mixologist.mix(system.load_block_type(block_type))
+        if entry['classes_digest'] != self._classes_digest(block_classes.values()):
+            return None
+
+        blocks = []
+        for usage_id, def_id, block_type, field_data_kind, fields, inherited_settings, defaults in entry['blocks']:
+            if field_data_kind == DICT_FIELD_DATA:
+                field_data = DictFieldData(fields)
+            elif field_data_kind == INHERITING_FIELD_DATA:
+                field_data = inheriting_field_data(InheritanceKeyValueStore(fields, inherited_settings))
+            else:
+                field_data = KvsFieldData(InheritanceKeyValueStore(fields, inherited_settings))
+            try:
+                block = system.construct_xblock_from_class(
+                    block_classes[block_type],
+                    ScopeIds(None, block_type, def_id, usage_id),
+                    field_data,
+                )
+            except Exception:  # pylint: disable=broad-except
+                # Parsing the course again reports the error the way it should be.
+                log.warning(u"Cannot rebuild %s from the XML parse cache entry %s", usage_id, key, exc_info=True)
+                return None
+            for name, value in six.iteritems(defaults):
+                block._field_data_cache[name] = block.fields[name].from_json(value)  # pylint: disable=protected-access
+            blocks.append(block)
+        entry['blocks'] = blocks
+        return entry
+
+    def store(self, key, course_location, errors, blocks):
+        """
+        Caches the course whose root block is at `course_location` under
+        `key`, given the errors logged while loading it, and its blocks.
+
+        Does nothing if the course can't be cached.
+        """
+        try:
+            entry = {
+                'course_location': course_location,
+                'errors': list(errors),
+                'classes_digest': self._classes_digest(set(type(block) for block in blocks)),
+                'blocks': [self._block_entry(block) for block in blocks],
+            }
+            data = zlib.compress(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        except (UncacheableCourse, pickle.PicklingError, TypeError, AttributeError) as error:
+            log.debug(u"Not caching the course %s: %s", course_location, error)
+            return
+
+        path = self._path(key)
+        partial_path = u'{}.{}.partial'.format(path, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            with os.fdopen(os.open(partial_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as partial_file:
+                partial_file.write(data)
+            os.rename(partial_path, path)
+        except (IOError, OSError) as error:
+            log.warning(u"Cannot cache the course %s in %s: %s", course_location, self.directory, error)
+            try:
+                os.remove(partial_path)
+            except OSError:
+                pass
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _block_entry(self, block):
+        """
+        Returns the cached form of `block`.
+        """
+        if isinstance(block, ErrorDescriptor):
+            raise UncacheableCourse(u"{} failed to load".format(block.scope_ids.usage_id))
+        if block.get_asides():
+            raise UncacheableCourse(u"{} has asides".format(block.scope_ids.usage_id))
+        runtime = block.runtime
+        if type(block) is not runtime.mixologist.mix(runtime.load_block_type(block.scope_ids.block_type)):
+            raise UncacheableCourse(u"{} isn't loaded from its block type".format(block.scope_ids.usage_id))
+
+        # pylint: disable=protected-access
+        field_data = block._field_data
+        if isinstance(field_data, DictFieldData):
+            field_data_kind = DICT_FIELD_DATA
+            values = field_data._data
+            inherited_settings = None
+        elif isinstance(field_data, KvsFieldData) and isinstance(field_data._kvs, InheritanceKeyValueStore):
+            field_data_kind = INHERITING_FIELD_DATA if isinstance(field_data, InheritingFieldData) else KVS_FIELD_DATA
+            values = field_data._kvs._fields
+            inherited_settings = dict(field_data._kvs.inherited_settings)
+        else:
+            raise UncacheableCourse(u"{} has unexpected field data".format(block.scope_ids.usage_id))
+
+        fields = {}
+        for name, value in six.iteritems(values):
+            if name in block.fields:
+                fields[name] = block.fields[name].read_json(block)
+            else:
+                fields[name] = value
+        # The defaults read while loading the block stay cached on it, even
+        # when the settings it inherits are computed afterwards.
+        defaults = {}
+        for name, value in six.iteritems(block._field_data_cache):
+            if name not in values and name in block.fields:
+                defaults[name] = block.fields[name].to_json(value)
+        scope_ids = block.scope_ids
+        return (
+            scope_ids.usage_id, scope_ids.def_id, scope_ids.block_type,
+            field_data_kind, fields, inherited_settings, defaults,
+        )
+
+    def _classes_digest(self, block_classes):
+        """
+        Returns the digest of the source files of `block_classes`, and of
+        their base classes, along with the source of the SOURCE_PACKAGES and
+        the installed version of XBlock.
+        """
+        paths = set(self._package_source_paths())
+        for block_class in block_classes:
+            for cls in inspect.getmro(block_class):
+                try:
+                    paths.add(inspect.getsourcefile(cls))
+                except TypeError:
+                    # Built-in classes don't have a source file.
+                    pass
+        paths.discard(None)
+
+        digest = hashlib.sha1()
+        digest.update(u'{}\n'.format(xblock.__version__).encode('utf-8'))
+        for path in sorted(paths):
+            if path not in self._source_digests:
+                self._source_digests[path] = self._file_digest(path)
+            digest.update(path.encode('utf-8'))
+            digest.update(self._source_digests[path])
+        return digest.hexdigest()
+
+    def _package_source_paths(self):
+        """
+        Returns the paths of the python source files of the SOURCE_PACKAGES,
+        other than their tests.
+        """
+        if self._package_paths is None:
+            self._package_paths = []
+            for package in SOURCE_PACKAGES:
+                for dirname, subdirs, filenames in os.walk(os.path.dirname(package.__file__)):
+                    subdirs[:] = [subdir for subdir in subdirs if subdir != 'tests']
+                    self._package_paths.extend(
+                        os.path.join(dirname, filename) for filename in filenames if filename.endswith('.py')
+                    )
+        return self._package_paths
+
+    def _file_digest(self, path):
+        """
+        Returns the digest of the content of the file at `path`.
+        """
+        digest = hashlib.sha1()
+        try:
+            with open(path, 'rb') as content_file:
+                for chunk in iter(lambda: content_file.read(64 * 1024), b''):
+                    digest.update(chunk)
+        except (IOError, OSError):
+            digest.update(b'\0missing')
+        return digest.digest()
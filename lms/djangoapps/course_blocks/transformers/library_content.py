@@ -33,6 +33,7 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -194,6 +195,7 @@ class ContentLibraryOrderTransformer(BlockStructureTransformer):
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
@@ -242,4 +244,7 @@ class ContentLibraryOrderTransformer(BlockStructureTransformer):
                     )
                 else:
                     ordering_data = {block[1]: position for position, block in enumerate(state_dict['selected'])}
-                    library_children.sort(key=lambda block, data=ordering_data: data[block.block_id])
+                    block_structure.set_children(
+                        block_key,
+                        sorted(library_children, key=lambda block, data=ordering_data: data[block.block_id]),
+                    )
@@ -29,6 +29,13 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
     WRITE_VERSION = 1
     READ_VERSION = 1
 
+    # The group access set on a split_test's children depends on the
+    # split_test's xBlock, which is always recollected along with its
+    # children (as their parent), and on the course's user_partitions,
+    # which UserPartitionTransformer.can_collect_incrementally compares
+    # with the collected ones.
+    INCREMENTAL_COLLECT = True
+
     @classmethod
     def name(cls):
         """
@@ -72,6 +79,10 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             # Set group access for each child using its group_access
             # field so the user partitions transformer enforces it.
             for child_location in xblock.children:
+                # During an incremental collection, the children that
+                # aren't recollected keep their collected group access.
+                if not block_structure.has_xblock(child_location):
+                    continue
                 child = block_structure.get_xblock(child_location)
                 group = child_to_group.get(child_location, None)
                 child.group_access[partition_for_this_block.id] = [group] if group is not None else []
@@ -84,7 +95,8 @@ class SplitTestTransformer(FilteringTransformerMixin, BlockStructureTransformer)
         # The UserPartitionTransformer will enforce group access, so
         # go ahead and remove all extraneous split_test modules.
         return [
-            block_structure.create_removal_filter(
+            block_structure.create_removal_set_filter(
+                self.name(),
                 lambda block_key: block_key.block_type == 'split_test',
                 keep_descendants=True,
             )
@@ -4,7 +4,9 @@ Tests for ContentLibraryTransformer.
 
 
 from six.moves import range
+import ddt
 import mock
+from django.conf import settings
 
 from openedx.core.djangoapps.content.block_structure.api import clear_course_from_cache
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
@@ -170,6 +172,7 @@ class ContentLibraryTransformerTestCase(CourseStructureTestCase):
             )
 
 
+@ddt.ddt
 class ContentLibraryOrderTransformerTestCase(CourseStructureTestCase):
     """
     ContentLibraryOrderTransformer Test
@@ -264,11 +267,12 @@ class ContentLibraryOrderTransformerTestCase(CourseStructureTestCase):
             ]
         }]
 
+    @ddt.data(False, True)
     @mock.patch('lms.djangoapps.course_blocks.transformers.library_content.get_student_module_as_dict')
-    def test_content_library_randomize(self, mocked):
+    def test_content_library_randomize(self, compact_relations, mocked):
         """
         Test whether the order of the children blocks matches the order of the selected blocks when
-        course has content library section
+        course has content library section, with and without compact block relations
         """
         mocked.return_value = {
             'selected': [
@@ -278,11 +282,14 @@ class ContentLibraryOrderTransformerTestCase(CourseStructureTestCase):
             ]
         }
         for i in range(5):
-            trans_block_structure = get_course_blocks(
-                self.user,
-                self.course.location,
-                self.transformers,
-            )
+            with mock.patch.dict(settings.BLOCK_STRUCTURES_SETTINGS, {'COMPACT_RELATIONS': compact_relations}):
+                trans_block_structure = get_course_blocks(
+                    self.user,
+                    self.course.location,
+                    self.transformers,
+                )
+            # pylint: disable=protected-access
+            self.assertEqual(trans_block_structure._has_compact_relations(), compact_relations)
             children = []
             for block_key in trans_block_structure.topological_traversal():
                 if block_key.block_type == 'library_content':
@@ -4,23 +4,37 @@ Tests for SplitTestTransformer.
 
 
 import ddt
+from edx_toggles.toggles.testutils import override_waffle_switch
+from mock import patch
 
 import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
+from openedx.core.djangoapps.content.block_structure.config import (
+    INCREMENTAL_COLLECT,
+    STORAGE_BACKING_FOR_CACHE,
+    waffle_switch
+)
+from openedx.core.djangoapps.content.block_structure.serialization import serialize_block_structure
+from openedx.core.djangoapps.content.block_structure.tests.helpers import clear_registered_transformers_cache
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from common.djangoapps.student.tests.factories import CourseEnrollmentFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import TEST_DATA_SPLIT_MODULESTORE
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
-from xmodule.partitions.partitions_service import get_user_partition_groups
+from xmodule.partitions.partitions_service import get_all_partitions_for_course, get_user_partition_groups
 
 from ...api import get_course_blocks
 from ..user_partitions import UserPartitionTransformer
-from .helpers import CourseStructureTestCase, create_location
+from .helpers import CourseStructureTestCase, create_location, publish_course, update_block
 
 
-@ddt.ddt
-class SplitTestTransformerTestCase(CourseStructureTestCase):
+class SplitTestCourseTestCase(CourseStructureTestCase):
     """
-    SplitTestTransformer Test
+    Helper for the tests of the SplitTestTransformer, building a course
+    with split_test blocks.
     """
     TEST_PARTITION_ID = 0
     TRANSFORMER_CLASS_TO_TEST = UserPartitionTransformer
@@ -29,7 +43,7 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
         """
         Setup course structure and create user for split test transformer test.
         """
-        super(SplitTestTransformerTestCase, self).setUp()
+        super(SplitTestCourseTestCase, self).setUp()
 
         # Set up user partitions and groups.
         self.groups = [Group(0, 'Group 0'), Group(1, 'Group 1'), Group(2, 'Group 2')]
@@ -103,7 +117,6 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
             {
                 '#type': 'split_test',
                 '#ref': 'BSplit',
-                'metadata': {'category': 'split_test'},
                 'user_partition_id': self.TEST_PARTITION_ID,
                 'group_id_to_child': {
                     '0': location('E'),
@@ -128,7 +141,6 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
             {
                 '#type': 'split_test',
                 '#ref': 'KSplit',
-                'metadata': {'category': 'split_test'},
                 'user_partition_id': self.TEST_PARTITION_ID,
                 'group_id_to_child': {
                     '1': location('M'),
@@ -143,7 +155,6 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
             {
                 '#type': 'split_test',
                 '#ref': 'CSplit',
-                'metadata': {'category': 'split_test'},
                 'user_partition_id': self.TEST_PARTITION_ID,
                 'group_id_to_child': {
                     '0': location('H'),
@@ -171,6 +182,12 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
             },
         ]
 
+
+@ddt.ddt
+class SplitTestTransformerTestCase(SplitTestCourseTestCase):
+    """
+    SplitTestTransformer Test
+    """
     @ddt.data(
         # Note: Theoretically, block E should be accessible by users
         #  not in Group 0, since there's an open path through block A.
@@ -225,3 +242,91 @@ class SplitTestTransformerTestCase(CourseStructureTestCase):
             set(block_structure1.get_block_keys()),
             set(block_structure2.get_block_keys()),
         )
+
+
+@ddt.ddt
+class SplitTestIncrementalCollectTestCase(SplitTestCourseTestCase):
+    """
+    Tests the incremental collection of a course with split_test blocks,
+    by all of the registered transformers.
+    """
+    # pylint: disable=protected-access
+    MODULESTORE = TEST_DATA_SPLIT_MODULESTORE
+
+    def setUp(self):
+        super(SplitTestIncrementalCollectTestCase, self).setUp()
+        # Use the real registry of transformers, rather than only the one under test.
+        self.patcher.stop()
+        clear_registered_transformers_cache()
+        self.manager = get_block_structure_manager(self.course.id)
+
+    def tearDown(self):
+        self.patcher.start()
+        super(SplitTestIncrementalCollectTestCase, self).tearDown()
+
+    def build_course(self, course_hierarchy):
+        # The split modulestore only adds the additional parents of blocks
+        # in its draft branch, which is then published.
+        with modulestore().branch_setting(ModuleStoreEnum.Branch.draft_preferred):
+            blocks = super(SplitTestIncrementalCollectTestCase, self).build_course(course_hierarchy)
+        publish_course(blocks['course'])
+        return blocks
+
+    def change_block(self, block_ref):
+        """
+        Changes and publishes the block with the given reference.
+        """
+        block = modulestore().get_item(self.blocks[block_ref].location)
+        block.display_name = 'Changed'
+        update_block(block)
+        publish_course(self.course)
+
+    def test_registered_transformers_support_incremental_collect(self):
+        self.assertTrue(BlockStructureTransformers.supports_incremental_collect())
+
+    @ddt.data('E', 'F', 'BSplit', 'M')
+    def test_incremental_collect(self, block_ref):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=True):
+            with override_waffle_switch(waffle_switch(INCREMENTAL_COLLECT), active=True):
+                self.manager._update_collected()
+                self.change_block(block_ref)
+
+                incremental_block_structure = self.manager._update_collected_incrementally()
+                self.assertIsNotNone(incremental_block_structure)
+                full_block_structure = self.manager._update_collected()
+
+        self.assertEqual(
+            serialize_block_structure(incremental_block_structure),
+            serialize_block_structure(full_block_structure),
+        )
+        # E is a child of both A and BSplit, which restricts it to group 0.
+        merged_group_access = incremental_block_structure.get_transformer_block_field(
+            self.blocks['E'].location, UserPartitionTransformer, 'merged_group_access'
+        )
+        self.assertEqual(merged_group_access.get_allowed_groups(), {self.TEST_PARTITION_ID: {0}})
+
+    @ddt.data(False, True)
+    def test_changed_partitions_prevent_incremental_collect(self, keep_partition):
+        with override_waffle_switch(waffle_switch(STORAGE_BACKING_FOR_CACHE), active=True):
+            with override_waffle_switch(waffle_switch(INCREMENTAL_COLLECT), active=True):
+                self.manager._update_collected()
+                self.change_block('E')
+
+                # Either the partition is removed, or one of its groups is.
+                changed_partitions = [
+                    partition for partition in get_all_partitions_for_course(modulestore().get_course(self.course.id))
+                    if partition.id != self.split_test_user_partition_id
+                ]
+                if keep_partition:
+                    changed_partitions.append(UserPartition(
+                        id=self.split_test_user_partition_id,
+                        name='Split Partition',
+                        description='This is split partition',
+                        groups=self.groups[:2],
+                        scheme=RandomUserPartitionScheme
+                    ))
+                with patch(
+                    'lms.djangoapps.course_blocks.transformers.user_partitions.get_all_partitions_for_course',
+                    return_value=changed_partitions,
+                ):
+                    self.assertIsNone(self.manager._update_collected_incrementally())
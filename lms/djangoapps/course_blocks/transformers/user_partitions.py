@@ -32,6 +32,12 @@ class UserPartitionTransformer(BlockStructureTransformer):
     WRITE_VERSION = 1
     READ_VERSION = 1
 
+    # The merged group access of a block only depends on its own
+    # group_access (as set by the SplitTestTransformer), on that of its
+    # parents, which percolates down, and on the course's partitions
+    # (see can_collect_incrementally).
+    INCREMENTAL_COLLECT = True
+
     @classmethod
     def name(cls):
         """
@@ -40,6 +46,21 @@ class UserPartitionTransformer(BlockStructureTransformer):
         """
         return "user_partitions"
 
+    @classmethod
+    def can_collect_incrementally(cls, collected_block_structure, block_structure):
+        """
+        The merged group access of the blocks that aren't recollected
+        is kept, so it must have been collected for the same partitions,
+        with the same groups.  These include dynamic partitions (such as
+        enrollment tracks), which can change without the course changing.
+        """
+        root_block = block_structure.get_xblock(block_structure.root_block_usage_key)
+        collected_partitions = collected_block_structure.get_transformer_data(cls, 'user_partitions') or []
+        return (
+            _partitions_json(get_all_partitions_for_course(root_block, active_only=True)) ==
+            _partitions_json(collected_partitions)
+        )
+
     @classmethod
     def collect(cls, block_structure):
         """
@@ -131,6 +152,14 @@ class UserPartitionTransformer(BlockStructureTransformer):
                     )
 
 
+def _partitions_json(partitions):
+    """
+    Returns the json representations of the given user partitions, by id,
+    to compare partitions (including their groups) by value.
+    """
+    return {partition.id: partition.to_json() for partition in partitions}
+
+
 class _MergedGroupAccess(object):
     """
     A class object to represent the computed access value for a block,
@@ -26,6 +26,7 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    INCREMENTAL_COLLECT = True
 
     MERGED_VISIBLE_TO_STAFF_ONLY = 'merged_visible_to_staff_only'
 
@@ -67,7 +68,8 @@ class VisibilityTransformer(FilteringTransformerMixin, BlockStructureTransformer
             return [block_structure.create_universal_filter()]
 
         return [
-            block_structure.create_removal_filter(
+            block_structure.create_removal_set_filter(
+                self.name(),
                 lambda block_key: self._get_visible_to_staff_only(block_structure, block_key),
             )
         ]
@@ -7,6 +7,8 @@ from django.shortcuts import redirect
 from django.utils.deprecation import MiddlewareMixin
 
 from lms.djangoapps.courseware.exceptions import Redirect
+from lms.djangoapps.courseware.toggles import USER_STATE_WRITE_BEHIND
+from lms.djangoapps.courseware.user_state_client import flush_pending_writes, start_write_behind
 from openedx.core.lib.request_utils import COURSE_REGEX
 
 
@@ -37,3 +39,27 @@ class CacheCourseIdMiddleware(MiddlewareMixin):
 
             if course_id and course_id != request.session.get('course_id'):
                 request.session['course_id'] = course_id
+
+
+class UserStateWriteBehindMiddleware(MiddlewareMixin):
+    """
+    Coalesces the StudentModule state written during a request, and writes it
+    when the response is returned, if the courseware.user_state_write_behind
+    switch is enabled.
+
+    Must come after RequestCacheMiddleware, which clears the coalesced state
+    when the response is returned.
+    """
+    def process_request(self, _request):
+        """
+        Start coalescing the StudentModule state written during the request.
+        """
+        if USER_STATE_WRITE_BEHIND.is_enabled():
+            start_write_behind()
+
+    def process_response(self, _request, response):
+        """
+        Write the StudentModule state coalesced during the request.
+        """
+        flush_pending_writes()
+        return response
@@ -33,13 +33,15 @@ from django.db import DatabaseError, IntegrityError, transaction
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import LearningContextKey
-from xblock.core import XBlockAside
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
-from xblock.fields import Scope, UserScope
+from xblock.fields import Scope, ScopeIds, UserScope
+from xblock.plugin import PluginMissingError
 from xblock.runtime import KeyValueStore
 
 from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.django import modulestore
+from xmodule.x_module import XModuleMixin
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
 
@@ -53,6 +55,11 @@ class InvalidWriteError(Exception):
     """
 
 
+# The parts of a descriptor which FieldDataCache reads to cache its fields, when
+# they are read from a block structure instead (see add_block_structure_descendents).
+_StructureBlock = namedtuple('_StructureBlock', 'scope_ids entry_point fields location has_score')
+
+
 def _all_usage_keys(descriptors, aside_types):
     """
     Return a set of all usage_ids for the `descriptors` and for
@@ -777,6 +784,96 @@ class FieldDataCache(object):
 
         self.add_descriptors_to_cache(descriptors)
 
+    def add_block_structure_descendents(self, block_structure, root_block_key, depth=None):
+        """
+        Add all descendants of the block at `root_block_key` to this FieldDataCache,
+        like add_descriptor_descendents, but read the usage keys and block types to
+        cache fields for from `block_structure`, so that the fields of every scope
+        are loaded in a single batched pass, without building any descriptors.
+
+        Arguments:
+            block_structure: A collected or transformed BlockStructureBlockData,
+                which includes the block at `root_block_key`.
+            root_block_key: The UsageKey of the block to add the descendants of.
+            depth: The number of levels of descendant blocks to load fields for,
+                in addition to the root block. If depth is None, load them all.
+        """
+        store = modulestore()
+        block_classes = {}
+        blocks = []
+        blocks_with_required_modules = []
+        for block_key in self._block_structure_descendents(block_structure, root_block_key, depth):
+            block_type = block_key.block_type
+            if block_type not in block_classes:
+                try:
+                    block_classes[block_type] = store.mixologist.mix(
+                        XBlock.load_class(block_type, select=store.xblock_select)
+                    )
+                except PluginMissingError:
+                    block_classes[block_type] = None
+            block_class = block_classes[block_type]
+            if block_class is None:
+                continue
+
+            blocks.append(_StructureBlock(
+                scope_ids=ScopeIds(None, block_type, None, block_key),
+                entry_point=block_class.entry_point,
+                fields=block_class.fields,
+                location=block_key,
+                has_score=block_structure.get_xblock_field(block_key, 'has_score', False),
+            ))
+            if getattr(block_class, 'get_required_module_descriptors', None) not in (
+                    None, XModuleMixin.get_required_module_descriptors,
+            ):
+                blocks_with_required_modules.append(block_key)
+
+        self.add_descriptors_to_cache(blocks)
+
+        # The modules some blocks require (e.g. the sources of conditional blocks)
+        # are not their descendants in the block structure.
+        for block_key in blocks_with_required_modules:
+            for required_descriptor in store.get_item(block_key).get_required_module_descriptors():
+                self.add_descriptor_descendents(required_descriptor)
+
+    @staticmethod
+    def _block_structure_descendents(block_structure, root_block_key, depth):
+        """
+        Return the keys of the block at `root_block_key` and of its descendants in
+        `block_structure`, down to the specified depth, or to any depth if depth is None.
+        """
+        block_keys = []
+        visited_block_keys = set()
+        level_block_keys = [root_block_key]
+        while level_block_keys:
+            level_block_keys = [
+                block_key for block_key in level_block_keys if block_key not in visited_block_keys
+            ]
+            visited_block_keys.update(level_block_keys)
+            block_keys.extend(level_block_keys)
+            if depth is not None:
+                if depth <= 0:
+                    break
+                depth -= 1
+            level_block_keys = [
+                child_key for block_key in level_block_keys for child_key in block_structure.get_children(block_key)
+            ]
+        return block_keys
+
+    @classmethod
+    def cache_for_block_structure(cls, course_id, user, block_structure, root_block_key, depth=None,
+                                  asides=None, read_only=False):
+        """
+        course_id: the course in the context of which we want StudentModules.
+        user: the django user for whom to load modules.
+        block_structure: a collected or transformed block structure of the course.
+        root_block_key: the UsageKey of the block to load the descendants of.
+        depth is the number of levels of descendant modules to load StudentModules for, in addition to
+            the root block. If depth is None, load all descendant StudentModules
+        """
+        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        cache.add_block_structure_descendents(block_structure, root_block_key, depth)
+        return cache
+
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
@@ -989,6 +1086,30 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create a ScoresClient with pre-fetched data for the given locations
+        for each of the given users, with a single query.
+
+        Returns a dict of {user_id: ScoresClient}.
+        """
+        clients = {}
+        for user_id in user_ids:
+            client = clients[user_id] = cls(course_id, user_id)
+            client._has_fetched = True  # pylint: disable=protected-access
+
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=list(clients),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        scores = scores_qset.values_list('student_id', 'module_state_key', 'grade', 'max_grade', 'created')
+        for user_id, location, correct, total, created in scores:
+            locations_to_scores = clients[user_id]._locations_to_scores  # pylint: disable=protected-access
+            locations_to_scores[location.map_into_course(course_id)] = cls.Score(correct, total, created)
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
@@ -45,6 +45,7 @@ from xblock.reference.plugins import FSService
 from xblock.runtime import KvsFieldData
 
 from common.djangoapps import static_replace
+from capa.safe_exec.result_cache import SafeExecResultCache
 from capa.xqueue_interface import XQueueInterface
 from lms.djangoapps.courseware.access import get_user_role, has_access
 from lms.djangoapps.courseware.entrance_exams import user_can_skip_entrance_exam, user_has_passed_entrance_exam
@@ -58,6 +59,7 @@ from lms.djangoapps.courseware.model_data import DjangoKeyValueStore, FieldDataC
 from common.djangoapps.edxmako.shortcuts import render_to_string
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
 from lms.djangoapps.courseware.services import UserStateService
+from lms.djangoapps.courseware import toggles
 from lms.djangoapps.grades.api import GradesUtilService
 from lms.djangoapps.grades.api import signals as grades_signals
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
@@ -79,9 +81,7 @@ from openedx.core.lib.xblock_utils import (
     get_aside_from_xblock,
     hash_resource,
     is_xblock_aside,
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls
+    replace_all_urls
 )
 from openedx.core.lib.xblock_utils import request_token as xblock_request_token
 from openedx.core.lib.xblock_utils import wrap_xblock
@@ -116,6 +116,10 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+# Caches the results of the Python code of capa problems, and keeps the hit and miss
+# counts of each problem in this process.
+SAFE_EXEC_RESULT_CACHE = SafeExecResultCache(cache)
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -707,27 +711,21 @@ def get_module_system_for_user(
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
+    # Rewrite, in a single pass:
+    # * urls beginning in /static to point to course-specific content
+    # * URLs of the form '/course/' to refer to the root of multicourse directory
     #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # * intra-courseware links (/jump_to_id/<id>). This format is an improvement
+    #   over the /course/... format for studio authored courses, because it is
+    #   agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
+        replace_all_urls,
+        getattr(descriptor, 'data_dir', None),
         course_id,
         reverse('jump_to_id', kwargs={'course_id': text_type(course_id), 'module_id': ''}),
+        static_asset_path=static_asset_path or descriptor.static_asset_path
     ))
 
     block_wrappers.append(partial(display_access_messages, user))
@@ -783,7 +781,7 @@ def get_module_system_for_user(
         hostname=settings.SITE_NAME,
         # TODO (cpennington): This should be removed when all html from
         # a module is coming through get_html and is therefore covered
-        # by the replace_static_urls code below
+        # by the replace_all_urls code below
         replace_urls=partial(
             static_replace.replace_static_urls,
             data_directory=getattr(descriptor, 'data_dir', None),
@@ -803,7 +801,7 @@ def get_module_system_for_user(
         publish=publish,
         anonymous_student_id=anonymous_student_id,
         course_id=course_id,
-        cache=cache,
+        cache=SAFE_EXEC_RESULT_CACHE if toggles.SAFE_EXEC_RESULT_CACHE.is_enabled() else cache,
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -0,0 +1,42 @@
+"""
+Asynchronous tasks for courseware.
+"""
+
+
+from celery import task
+from dateutil.parser import parse as parse_date
+from django.conf import settings
+from edx_django_utils.monitoring import set_code_owner_attribute
+
+from lms.djangoapps.courseware.models import StudentModuleHistory
+
+
+@task
+@set_code_owner_attribute
+def save_student_module_history(history_entries):
+    """
+    Saves the given history entries of StudentModules, in bulk, and in the
+    given order.  Each entry is a dict with the student_module_id, created
+    (an ISO 8601 datetime), state, grade and max_grade of the history row.
+
+    Used by DjangoXBlockUserStateClient.flush_pending_writes, which writes
+    StudentModules in bulk, without the post_save signals that save their
+    history.
+    """
+    if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+        from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+        history_model = StudentModuleHistoryExtended
+    else:
+        history_model = StudentModuleHistory
+
+    history_model.objects.bulk_create([
+        history_model(
+            student_module_id=history_entry['student_module_id'],
+            version=None,
+            created=parse_date(history_entry['created']),
+            state=history_entry['state'],
+            grade=history_entry['grade'],
+            max_grade=history_entry['max_grade'],
+        )
+        for history_entry in history_entries
+    ])
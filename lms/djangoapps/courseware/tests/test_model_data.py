@@ -24,6 +24,9 @@ from lms.djangoapps.courseware.tests.factories import StudentInfoFactory
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory as cmfStudentModuleFactory
 from lms.djangoapps.courseware.tests.factories import StudentPrefsFactory, UserStateSummaryFactory, course_id, location
 from common.djangoapps.student.tests.factories import UserFactory
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 def mock_field(scope, name):
@@ -424,3 +427,49 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+class TestCacheForBlockStructure(SharedModuleStoreTestCase):
+    """Tests for FieldDataCache.cache_for_block_structure"""
+    @classmethod
+    def setUpClass(cls):
+        super(TestCacheForBlockStructure, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        chapter = ItemFactory.create(parent=cls.course, category='chapter')
+        cls.sequential = ItemFactory.create(parent=chapter, category='sequential')
+        cls.vertical = ItemFactory.create(parent=cls.sequential, category='vertical')
+        cls.problems = [ItemFactory.create(parent=cls.vertical, category='problem') for __ in range(2)]
+
+    def setUp(self):
+        super(TestCacheForBlockStructure, self).setUp()
+        self.user = UserFactory.create()
+        for problem in self.problems:
+            cmfStudentModuleFactory.create(
+                student=self.user,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                module_type='problem',
+                state=json.dumps({'attempts': 1}),
+            )
+        self.block_structure = get_course_in_cache(self.course.id)
+
+    def _attempts_key(self, problem):
+        return DjangoKeyValueStore.Key(Scope.user_state, self.user.id, problem.location, 'attempts')
+
+    def test_same_as_descriptor_descendents(self):
+        descriptor_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.user, self.store.get_item(self.sequential.location),
+        )
+        block_structure_cache = FieldDataCache.cache_for_block_structure(
+            self.course.id, self.user, self.block_structure, self.sequential.location,
+        )
+        self.assertEqual(len(block_structure_cache), len(descriptor_cache))
+        self.assertEqual(block_structure_cache.scorable_locations, descriptor_cache.scorable_locations)
+        for problem in self.problems:
+            self.assertEqual(block_structure_cache.get(self._attempts_key(problem)), 1)
+
+    def test_depth(self):
+        block_structure_cache = FieldDataCache.cache_for_block_structure(
+            self.course.id, self.user, self.block_structure, self.sequential.location, depth=1,
+        )
+        self.assertFalse(block_structure_cache.has(self._attempts_key(self.problems[0])))
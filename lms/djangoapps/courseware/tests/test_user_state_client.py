@@ -4,14 +4,22 @@ defined in edx_user_state_client.
 """
 
 
+import json
 from collections import defaultdict
 
 from django.db import connections
-
+from edx_django_utils.cache import RequestCache
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
 
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
 from lms.djangoapps.courseware.tests.factories import UserFactory
-from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient
+from lms.djangoapps.courseware.user_state_client import (
+    DjangoXBlockUserStateClient,
+    flush_pending_writes,
+    start_write_behind
+)
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
@@ -36,3 +44,52 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
         super(TestDjangoUserStateClient, self).setUp()
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
+
+
+@patch('django.db.transaction.on_commit', lambda func, using=None: func())
+class TestDjangoUserStateClientWriteBehind(ModuleStoreTestCase):
+    """
+    Tests of the write-behind batching of DjangoUserStateClient.set_many.
+    """
+    def setUp(self):
+        super(TestDjangoUserStateClientWriteBehind, self).setUp()
+        RequestCache.clear_all_namespaces()
+        self.addCleanup(RequestCache.clear_all_namespaces)
+        self.client = DjangoXBlockUserStateClient()
+        self.user = UserFactory.create()
+        self.block_key = CourseLocator('org', 'course', 'run').make_usage_key('problem', 'problem')
+        start_write_behind()
+
+    def _student_modules(self):
+        return StudentModule.objects.filter(student=self.user, module_state_key=self.block_key)
+
+    def test_coalesced_writes(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1, 'b': 1})
+        self.client.set(self.user.username, self.block_key, {'b': 2})
+        self.assertFalse(self._student_modules().exists())
+
+        flush_pending_writes()
+        student_module = self._student_modules().get()
+        self.assertEqual(json.loads(student_module.state), {'a': 1, 'b': 2})
+        self.assertEqual(
+            [json.loads(history.state) for history in BaseStudentModuleHistory.get_history([student_module])],
+            [{'a': 1, 'b': 2}],
+        )
+
+        self.client.set(self.user.username, self.block_key, {'a': 3})
+        flush_pending_writes()
+        self.assertEqual(json.loads(self._student_modules().get().state), {'a': 3, 'b': 2})
+        self.assertEqual(
+            [json.loads(history.state) for history in BaseStudentModuleHistory.get_history([student_module])],
+            [{'a': 3, 'b': 2}, {'a': 1, 'b': 2}],
+        )
+
+    def test_reads_flush_pending_writes(self):
+        other_user = UserFactory.create()
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(other_user.username, self.block_key, {'a': 2})
+
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'a': 1})
+        self.assertFalse(
+            StudentModule.objects.filter(student=other_user, module_state_key=self.block_key).exists()
+        )
@@ -2,7 +2,7 @@
 Toggles for courseware in-course experience.
 """
 
-from edx_toggles.toggles import WaffleFlagNamespace
+from edx_toggles.toggles import WaffleFlagNamespace, WaffleSwitch, WaffleSwitchNamespace
 from lms.djangoapps.experiments.flags import ExperimentWaffleFlag
 from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag
 
@@ -101,6 +101,52 @@ COURSEWARE_PROCTORING_IMPROVEMENTS = CourseWaffleFlag(
     WAFFLE_FLAG_NAMESPACE, 'proctoring_improvements', __name__
 )
 
+# Namespace for courseware waffle switches.
+WAFFLE_SWITCH_NAMESPACE = WaffleSwitchNamespace(name='courseware')
+
+# .. toggle_name: courseware.user_state_write_behind
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the StudentModule state written during a request is coalesced per learner and
+#   block, and written with bulk queries when the response is returned, instead of with a few queries on every
+#   write. The history of the written StudentModules is then saved asynchronously.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2020-11-02
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: State written during a request is not visible to other processes until the response is
+#   returned.
+# .. toggle_tickets: None
+USER_STATE_WRITE_BEHIND = WaffleSwitch(WAFFLE_SWITCH_NAMESPACE, 'user_state_write_behind', __name__)
+
+# .. toggle_name: courseware.preload_field_data_from_block_structure
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the courseware page loads the learner's field data for the blocks of the
+#   requested sequence from the course's collected block structure, in a single batched pass, instead of from the
+#   sequence's descendant descriptors. The block structure is only used if it was collected from the current version
+#   of the course.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2020-11-02
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: None
+# .. toggle_tickets: None
+PRELOAD_FIELD_DATA_FROM_BLOCK_STRUCTURE = WaffleSwitch(
+    WAFFLE_SWITCH_NAMESPACE, 'preload_field_data_from_block_structure', __name__
+)
+
+# .. toggle_name: courseware.safe_exec_result_cache
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the results of the Python code of capa problems are cached by a
+#   SafeExecResultCache, which shares results between the learners with the same random seed, compresses them, and
+#   counts their hits and misses per problem, instead of being cached per learner in the default cache.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2020-11-02
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: Results cached before the switch is enabled are not reused.
+# .. toggle_tickets: None
+SAFE_EXEC_RESULT_CACHE = WaffleSwitch(WAFFLE_SWITCH_NAMESPACE, 'safe_exec_result_cache', __name__)
+
 
 def course_exit_page_is_active(course_key):
     return (
@@ -14,6 +14,7 @@ class OpenAssessmentDateTransformer(FilteringTransformerMixin, BlockStructureTra
     """
     WRITE_VERSION = 1
     READ_VERSION = 1
+    INCREMENTAL_COLLECT = True
 
     @classmethod
     def name(cls):
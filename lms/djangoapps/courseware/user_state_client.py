@@ -6,6 +6,7 @@ data in a Django ORM model.
 
 import itertools
 import logging
+from collections import OrderedDict
 from operator import attrgetter
 from time import time
 
@@ -15,11 +16,14 @@ from django.contrib.auth.models import User
 from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils.timezone import now
 from edx_django_utils import monitoring as monitoring_utils
+from edx_django_utils.cache import RequestCache
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
 from xblock.fields import Scope
 
 from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.tasks import save_student_module_history
 
 try:
     import simplejson as json
@@ -29,6 +33,37 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+WRITE_BEHIND_CACHE_NAMESPACE = 'courseware.user_state_client.write_behind'
+PENDING_WRITES_CACHE_KEY = 'pending_writes'
+
+
+def start_write_behind():
+    """
+    Makes DjangoXBlockUserStateClient.set_many coalesce the user state it is
+    given, for the rest of the current request, instead of writing it.  The
+    coalesced state must be written with `flush_pending_writes`, before the
+    request ends.
+    """
+    RequestCache(WRITE_BEHIND_CACHE_NAMESPACE).set(PENDING_WRITES_CACHE_KEY, OrderedDict())
+
+
+def flush_pending_writes(username=None):
+    """
+    Writes the user state coalesced since `start_write_behind` was called, or
+    only that of the given user.
+    """
+    DjangoXBlockUserStateClient().flush_pending_writes(username)
+
+
+def _get_pending_writes():
+    """
+    Returns an OrderedDict mapping (username, usage_key) to the user and the
+    state to write for the usage, if set_many coalesces user state in the
+    current request, otherwise None.
+    """
+    cached_response = RequestCache(WRITE_BEHIND_CACHE_NAMESPACE).get_cached_response(PENDING_WRITES_CACHE_KEY)
+    return cached_response.value if cached_response.is_found else None
+
 
 class DjangoXBlockUserStateClient(XBlockUserStateClient):
     """
@@ -177,6 +212,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         # keep track of blocks requested
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
+        self.flush_pending_writes(username)
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
             if module.state is None:
@@ -241,6 +277,22 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        pending_writes = _get_pending_writes()
+        if pending_writes is not None:
+            for usage_key, state in block_keys_to_state.items():
+                pending_write = pending_writes.setdefault((username, usage_key), {'user': user, 'state': {}})
+                # Copy the state as it is now, as set_many would have stored it.
+                pending_write['state'].update(json.loads(json.dumps(state)))
+            self._nr_stat_accumulate('set_many', 'blocks_coalesced', len(block_keys_to_state))
+            return
+
+        self._set_many_now(user, block_keys_to_state)
+
+    def _set_many_now(self, user, block_keys_to_state):
+        """
+        Writes the given state of the given (non-anonymous) user, as described
+        in `set_many`.
+        """
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
@@ -311,6 +363,104 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def flush_pending_writes(self, username=None):
+        """
+        Writes the user state coalesced by set_many in the current request (see
+        `start_write_behind`), or only that of the given user.  The state is
+        written with bulk queries, and the history of the written StudentModules
+        is saved asynchronously, in bulk.
+        """
+        pending_writes = _get_pending_writes()
+        if not pending_writes:
+            return
+
+        writes_by_user_and_course = OrderedDict()
+        for pending_username, usage_key in list(pending_writes):
+            if username is not None and pending_username != username:
+                continue
+            pending_write = pending_writes.pop((pending_username, usage_key))
+            user_and_course = (pending_write['user'], usage_key.context_key)
+            writes_by_user_and_course.setdefault(user_and_course, OrderedDict())[usage_key] = pending_write['state']
+
+        self._nr_stat_increment('flush_pending_writes', 'calls')
+        with transaction.atomic():
+            history_entries = []
+            for (user, course_key), block_keys_to_state in writes_by_user_and_course.items():
+                history_entries.extend(self._set_many_in_bulk(user, course_key, block_keys_to_state))
+            if history_entries:
+                transaction.on_commit(lambda: save_student_module_history.delay(history_entries))
+
+    def _set_many_in_bulk(self, user, course_key, block_keys_to_state):
+        """
+        Writes the given state of the given user, for blocks of the given
+        course, with a query to read the existing StudentModules and bulk
+        queries to update and create them.
+
+        Returns the history entries of the written StudentModules, to be saved
+        by save_student_module_history.
+        """
+        student_modules = {
+            usage_key: student_module
+            for student_module, usage_key in self._get_student_modules(user.username, list(block_keys_to_state))
+        }
+        modified = now()
+        updated_modules, created_modules = [], []
+        for usage_key, state in block_keys_to_state.items():
+            student_module = student_modules.get(usage_key)
+            if student_module is None:
+                created_modules.append(StudentModule(
+                    student=user,
+                    course_id=course_key,
+                    module_state_key=usage_key,
+                    module_type=usage_key.block_type,
+                    state=json.dumps(state),
+                ))
+                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_created')
+            else:
+                current_state = {} if student_module.state is None else json.loads(student_module.state)
+                current_state.update(state)
+                student_module.state = json.dumps(current_state)
+                student_module.modified = modified
+                updated_modules.append(student_module)
+                self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_updated')
+
+        StudentModule.objects.bulk_update(updated_modules, ['state', 'modified'])
+        if created_modules:
+            try:
+                with transaction.atomic():
+                    StudentModule.objects.bulk_create(created_modules)
+            except IntegrityError:
+                # Some of the StudentModules were created by another process since
+                # they were read: write them one at a time, as set_many would have.
+                log.warning(u"set_many: IntegrityError for student {} - course_id {} in bulk create".format(
+                    user, repr(six.text_type(course_key))
+                ))
+                self._set_many_now(user, OrderedDict(
+                    (student_module.module_state_key, block_keys_to_state[student_module.module_state_key])
+                    for student_module in created_modules
+                ))
+                created_modules = []
+            else:
+                # Not every database sets the ids of bulk created rows.
+                created_modules = [
+                    student_module
+                    for student_module, _ in self._get_student_modules(
+                        user.username, [student_module.module_state_key for student_module in created_modules],
+                    )
+                ]
+
+        return [
+            {
+                'student_module_id': student_module.id,
+                'created': student_module.modified.isoformat(),
+                'state': student_module.state,
+                'grade': student_module.grade,
+                'max_grade': student_module.max_grade,
+            }
+            for student_module in updated_modules + created_modules
+            if student_module.module_type in BaseStudentModuleHistory.HISTORY_SAVING_TYPES
+        ]
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
@@ -324,6 +474,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes(username)
         evt_time = time()
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
@@ -362,6 +513,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
+        self.flush_pending_writes(username)
         student_modules = list(
             student_module
             for student_module, usage_id
@@ -413,6 +565,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes()
         results = StudentModule.objects.order_by('id').filter(module_state_key=block_key)
         p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
 
@@ -445,6 +598,7 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        self.flush_pending_writes()
         results = StudentModule.objects.order_by('id').filter(course_id=course_key)
         if block_type:
             results = results.filter(module_type=block_type)
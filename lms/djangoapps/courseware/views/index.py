@@ -32,6 +32,7 @@ from lms.djangoapps.courseware.exceptions import CourseAccessRedirect, Redirect
 from lms.djangoapps.experiments.utils import get_experiment_user_metadata_context
 from lms.djangoapps.gating.api import get_entrance_exam_score_ratio, get_entrance_exam_usage_key
 from lms.djangoapps.grades.api import CourseGradeFactory
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.lang_pref import LANGUAGE_KEY
@@ -66,7 +67,11 @@ from ..masquerade import check_content_start_date_for_masquerade_user, setup_mas
 from ..model_data import FieldDataCache
 from ..module_render import get_module_for_descriptor, toc_for_course
 from ..permissions import MASQUERADE_AS_STUDENT
-from ..toggles import COURSEWARE_MICROFRONTEND_COURSE_TEAM_PREVIEW, REDIRECT_TO_COURSEWARE_MICROFRONTEND
+from ..toggles import (
+    COURSEWARE_MICROFRONTEND_COURSE_TEAM_PREVIEW,
+    PRELOAD_FIELD_DATA_FROM_BLOCK_STRUCTURE,
+    REDIRECT_TO_COURSEWARE_MICROFRONTEND
+)
 from ..url_helpers import get_microfrontend_url
 from .views import CourseTabView
 
@@ -389,8 +394,13 @@ class CoursewareIndex(View):
         sets up the runtime, which binds the request user to the section.
         """
         # Pre-fetch all descendant data
-        self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
-        self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
+        block_structure = self._get_preload_block_structure()
+        if block_structure is not None and self.section.location in block_structure:
+            self.field_data_cache.add_block_structure_descendents(block_structure, self.section.location)
+            self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
+        else:
+            self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
+            self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
 
         # Bind section to user
         self.section = get_module_for_descriptor(
@@ -404,6 +414,23 @@ class CoursewareIndex(View):
             will_recheck_access=True,
         )
 
+    def _get_preload_block_structure(self):
+        """
+        Returns the collected block structure of the course to preload the
+        section's field data from, if preloading is enabled and the block
+        structure was collected from the current version of the course.
+        Otherwise, returns None.
+        """
+        if not PRELOAD_FIELD_DATA_FROM_BLOCK_STRUCTURE.is_enabled():
+            return None
+
+        block_structure = get_block_structure_manager(self.course_key).get_collected()
+        for version_field in ('course_version', 'subtree_edited_on'):
+            collected_version = block_structure.get_xblock_field(self.course.location, version_field)
+            if collected_version != getattr(self.course, version_field, None):
+                return None
+        return block_structure
+
     def _save_positions(self):
         """
         Save where we are in the course and chapter.
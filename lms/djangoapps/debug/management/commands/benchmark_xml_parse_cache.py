@@ -0,0 +1,114 @@
+"""
+Django management command to benchmark the parse cache of the XMLModuleStore.
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+from textwrap import dedent
+
+import six
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from xmodule.modulestore.xml import XMLModuleStore
+
+
+class Command(BaseCommand):
+    """
+    Times the loading of the xml courses in a directory (by default, the test
+    courses in common/test/data) by the XMLModuleStore: without the parse
+    cache, then into an empty parse cache, then from the parse cache.
+
+    Also checks that the courses loaded from the parse cache have the same
+    blocks, with the same field values, as the courses loaded without it.
+
+    Example:
+        ./manage.py lms benchmark_xml_parse_cache --iterations 5
+    """
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.COMMON_ROOT, 'test', 'data'),
+            help='Directory to load the xml courses from'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5,
+            help='How many times to load the courses, with and without the parse cache'
+        )
+
+    def handle(self, *args, **options):
+        parse_cache_dir = tempfile.mkdtemp()
+        try:
+            uncached = self.time_loads(u'Without the parse cache', options, None)
+            self.time_loads(u'Into an empty parse cache', options, parse_cache_dir, clear=True)
+            cached = self.time_loads(u'From the parse cache', options, parse_cache_dir)
+        finally:
+            shutil.rmtree(parse_cache_dir)
+
+        self.check_same_courses(uncached, cached)
+        self.stdout.write(u'The courses loaded from the parse cache match the courses loaded without it.')
+
+    def time_loads(self, name, options, parse_cache_dir, clear=False):
+        """
+        Loads the courses `iterations` times, with the parse cache in
+        `parse_cache_dir`, emptied before each load if `clear`, and reports
+        the time per load.  Returns the last store loaded.
+        """
+        durations = []
+        for __ in range(options['iterations']):
+            if clear:
+                shutil.rmtree(parse_cache_dir)
+                os.mkdir(parse_cache_dir)
+            start = time.time()
+            store = XMLModuleStore(
+                data_dir=options['data_dir'],
+                default_class='xmodule.hidden_module.HiddenDescriptor',
+                load_error_modules=True,
+                xblock_mixins=settings.XBLOCK_MIXINS,
+                xblock_select=settings.XBLOCK_SELECT_FUNCTION,
+                # An empty directory disables the parse cache, whatever the settings.
+                parse_cache_dir=parse_cache_dir or '',
+            )
+            durations.append(time.time() - start)
+
+        self.stdout.write(u'{}: {} courses, {} blocks, {:.1f} ms per load (best {:.1f} ms)'.format(
+            name,
+            len(store.courses),
+            sum(len(modules) for modules in six.itervalues(store.modules)),
+            sum(durations) * 1000 / len(durations),
+            min(durations) * 1000,
+        ))
+        return store
+
+    def check_same_courses(self, expected_store, actual_store):
+        """
+        Raises a CommandError if the stores don't hold the same blocks, with
+        the same field values and errors.
+        """
+        if set(expected_store.courses) != set(actual_store.courses):
+            raise CommandError(u'The loaded courses differ')
+        for course_id, expected_modules in six.iteritems(expected_store.modules):
+            actual_modules = actual_store.modules[course_id]
+            if list(expected_modules) != list(actual_modules):
+                raise CommandError(u'The blocks of {} differ'.format(course_id))
+            for location, expected_block in six.iteritems(expected_modules):
+                actual_block = actual_modules[location]
+                if type(expected_block) is not type(actual_block):
+                    raise CommandError(u'The class of {} differs'.format(location))
+                for field_name, field in six.iteritems(expected_block.fields):
+                    expected = (field.is_set_on(expected_block), field.read_json(expected_block))
+                    actual = (field.is_set_on(actual_block), field.read_json(actual_block))
+                    if expected != actual:
+                        raise CommandError(u'The field {} of {} differs: {!r} != {!r}'.format(
+                            field_name, location, expected, actual
+                        ))
+
+            if expected_store.get_course_errors(course_id) != actual_store.get_course_errors(course_id):
+                raise CommandError(u'The errors of {} differ'.format(course_id))
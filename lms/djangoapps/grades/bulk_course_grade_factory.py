@@ -0,0 +1,162 @@
+"""
+Bulk Course Grade Factory Class
+"""
+
+
+from itertools import islice
+
+from edx_when.models import UserDate
+
+from common.djangoapps.student.models import CourseEnrollment
+from common.djangoapps.student.roles import BulkRoleCache, CourseBetaTesterRole
+from lms.djangoapps.course_blocks.api import get_course_blocks, has_individual_student_override_provider
+from lms.djangoapps.course_blocks.transformers.user_partitions import UserPartitionTransformer
+from lms.djangoapps.courseware.access import has_access
+from openedx.features.content_type_gating.models import ContentTypeGatingConfig
+from xmodule.partitions.partitions_service import get_user_partition_groups
+
+from .scores import possibly_scored
+from .subsection_grade_factory import clear_prefetched_scores, prefetch_scores
+
+
+class BulkCourseGradeFactory(object):
+    """
+    Helps compute the course grades of many users in a course, as done
+    by CourseGradeFactory.iter, with less repeated work than computing
+    each user's grade on its own:
+
+    * Users are processed in batches, and the CSM and Submissions API
+      scores of a whole batch are read with a query for each.
+    * The course structure is transformed once per distinct access
+      profile, instead of once per user.  An access profile captures
+      everything about a user that the course block access transformers
+      depend on.  Users whose transformed structure may be specific to
+      them (e.g. because of their randomized library content, or their
+      personalized due dates) have no access profile, and get their own
+      transformed structure, as before.  What the access profiles depend
+      on is read for a whole batch of users at once; only courses with
+      content type gating enabled take queries for each user.
+
+    Transformed structures are shared across users of the same access
+    profile, so they are only meant for computing grades, which does not
+    modify them.
+    """
+    BATCH_SIZE = 100
+
+    def __init__(self, course_data, batch_size=BATCH_SIZE):
+        """
+        Arguments:
+            course_data (CourseData) - The data of the course, with no
+                user, as used by CourseGradeFactory.iter.
+        """
+        self.course_data = course_data
+        self.batch_size = batch_size
+        self._structures_by_access_profile = {}
+        self._has_user_specific_structures = None
+        self._is_content_type_gating_enabled = None
+        self._users_with_date_overrides = set()
+
+    def iter_batches(self, users):
+        """
+        Yields the given users in batches, with the scores of the users
+        of each batch prefetched for the duration of the batch.
+        """
+        users = iter(users)
+        scorable_locations = [
+            block_key for block_key in self.course_data.collected_structure if possibly_scored(block_key)
+        ]
+        while True:
+            batch = list(islice(users, self.batch_size))
+            if not batch:
+                return
+            prefetch_scores(self.course_data.course_key, batch, scorable_locations)
+            self._prefetch_access_data(batch)
+            try:
+                yield batch
+            finally:
+                clear_prefetched_scores(self.course_data.course_key, batch)
+
+    def get_course_structure(self, user):
+        """
+        Returns the course structure transformed for the given user, if
+        it can be shared with other users of the same access profile.
+        Otherwise, returns None.
+
+        The user must be in the batch currently yielded by iter_batches.
+        """
+        access_profile = self._get_access_profile(user)
+        if access_profile is None:
+            return None
+
+        structure = self._structures_by_access_profile.get(access_profile)
+        if structure is None:
+            structure = self._structures_by_access_profile[access_profile] = get_course_blocks(
+                user,
+                self.course_data.location,
+                collected_block_structure=self.course_data.collected_structure,
+            )
+        return structure
+
+    def _prefetch_access_data(self, users):
+        """
+        Reads what the access profiles of the given users depend on, with a
+        query for each kind of data instead of queries for each user: their
+        course access roles, enrollments, cohorts and date overrides.
+        """
+        if self._has_user_specific_structures_in_course():
+            return
+
+        # Import is placed here to avoid a circular import with the cohorts module.
+        from openedx.core.djangoapps.course_groups.cohorts import bulk_cache_cohorts
+
+        course_key = self.course_data.course_key
+        BulkRoleCache.prefetch(users)
+        CourseEnrollment.bulk_fetch_enrollment_states(users, course_key)
+        bulk_cache_cohorts(course_key, users)
+        # The same overrides as edx_when.api.get_overrides_for_user returns.
+        self._users_with_date_overrides = set(UserDate.objects.filter(
+            content_date__course_id=course_key,
+            content_date__active=True,
+            user__in=users,
+        ).values_list('user_id', flat=True))
+
+    def _has_user_specific_structures_in_course(self):
+        """
+        Returns whether the course structures of any users of the course may
+        be specific to them.
+        """
+        if self._has_user_specific_structures is None:
+            self._has_user_specific_structures = has_individual_student_override_provider() or any(
+                block_key.block_type == 'library_content' for block_key in self.course_data.collected_structure
+            )
+        return self._has_user_specific_structures
+
+    def _get_access_profile(self, user):
+        """
+        Returns a hashable value which is equal for all users whose course
+        structures are transformed the same way by the default course block
+        access transformers (see get_course_block_access_transformers), or
+        None if the user's course structure may be specific to the user.
+        """
+        course_key = self.course_data.course_key
+        if self._has_user_specific_structures_in_course():
+            return None
+
+        if user.id in self._users_with_date_overrides:
+            return None
+
+        if self._is_content_type_gating_enabled is None:
+            self._is_content_type_gating_enabled = ContentTypeGatingConfig.enabled_for_course(course_key=course_key)
+
+        user_partitions = self.course_data.collected_structure.get_transformer_data(
+            UserPartitionTransformer, 'user_partitions', [],
+        )
+        user_groups = get_user_partition_groups(course_key, user_partitions, user, 'id')
+        return (
+            bool(has_access(user, 'staff', course_key)),
+            CourseBetaTesterRole(course_key).has_user(user),
+            self._is_content_type_gating_enabled and ContentTypeGatingConfig.enabled_for_enrollment(
+                user=user, course_key=course_key,
+            ),
+            tuple(sorted((partition_id, group.id) for partition_id, group in user_groups.items())),
+        )
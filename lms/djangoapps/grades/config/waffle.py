@@ -4,6 +4,7 @@ waffle switches for the Grades app.
 """
 
 
+from django.conf import settings
 from edx_toggles.toggles import WaffleFlagNamespace, WaffleSwitch, WaffleSwitchNamespace
 from openedx.core.djangoapps.waffle_utils import CourseWaffleFlag
 
@@ -84,6 +85,33 @@ WRITABLE_GRADEBOOK = u'writable_gradebook'
 # .. toggle_tickets: https://github.com/edx/edx-platform/pull/21389
 BULK_MANAGEMENT = u'bulk_management'
 
+# .. toggle_name: grades.bulk_grade_computation
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, CourseGradeFactory.iter computes the grades of users in batches: the course
+#   structure is transformed once per distinct access profile, and the scores of each batch of users are read with a
+#   few queries.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: This flag is only looked up when the ENABLE_BULK_GRADE_COMPUTATION feature is enabled.
+# .. toggle_tickets: None
+BULK_GRADE_COMPUTATION = u'bulk_grade_computation'
+
+# .. toggle_name: grades.coalesce_grade_recalculation
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, the subsection grade updates requested by score changes are queued, and
+#   performed together by a task per course after `GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS`, instead of by a
+#   recalculate_subsection_grade_v3 task each.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: The queued updates are kept in the grades_queuedsubsectiongradeupdate table. The default django
+#   cache, which must be shared by the LMS and its workers, records which queues have a task scheduled.
+# .. toggle_tickets: None
+COALESCE_GRADE_RECALCULATION = u'coalesce_grade_recalculation'
+
 
 def waffle():
     """
@@ -136,6 +164,16 @@ def waffle_flags():
             BULK_MANAGEMENT,
             __name__,
         ),
+        BULK_GRADE_COMPUTATION: CourseWaffleFlag(
+            namespace,
+            BULK_GRADE_COMPUTATION,
+            __name__,
+        ),
+        COALESCE_GRADE_RECALCULATION: CourseWaffleFlag(
+            namespace,
+            COALESCE_GRADE_RECALCULATION,
+            __name__,
+        ),
     }
 
 
@@ -153,3 +191,23 @@ def gradebook_can_see_bulk_management(course_key):
     (provided that course contains a masters track, as of this writing)
     """
     return waffle_flags()[BULK_MANAGEMENT].is_enabled(course_key)
+
+
+def is_bulk_grade_computation_enabled(course_key):
+    """
+    Returns whether grades of many users are computed in bulk for the given course.
+
+    The course waffle flag, which takes queries to look up, is only checked
+    when the ENABLE_BULK_GRADE_COMPUTATION feature is enabled.
+    """
+    return (
+        settings.FEATURES.get('ENABLE_BULK_GRADE_COMPUTATION', False) and
+        waffle_flags()[BULK_GRADE_COMPUTATION].is_enabled(course_key)
+    )
+
+
+def is_grade_recalculation_coalesced(course_key):
+    """
+    Returns whether the subsection grade updates of the given course are coalesced.
+    """
+    return waffle_flags()[COALESCE_GRADE_RECALCULATION].is_enabled(course_key)
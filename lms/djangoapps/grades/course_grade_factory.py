@@ -15,7 +15,9 @@ from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_NOW_PASSED
 )
 
+from .bulk_course_grade_factory import BulkCourseGradeFactory
 from .config import assume_zero_if_absent, should_persist_grades
+from .config.waffle import is_bulk_grade_computation_enabled
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade
@@ -99,6 +101,10 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If the ENABLE_BULK_GRADE_COMPUTATION feature and the
+        grades.bulk_grade_computation flag are enabled for the course, grades
+        are computed in batches of users (see BulkCourseGradeFactory).
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -109,10 +115,16 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+        if is_bulk_grade_computation_enabled(course_data.course_key):
+            bulk_factory = BulkCourseGradeFactory(course_data)
+            for batch in bulk_factory.iter_batches(users):
+                for user in batch:
+                    yield self._iter_grade_result(user, course_data, force_update, bulk_factory)
+        else:
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update)
 
-    def _iter_grade_result(self, user, course_data, force_update):
+    def _iter_grade_result(self, user, course_data, force_update, bulk_factory=None):
         try:
             kwargs = {
                 'user': user,
@@ -120,6 +132,8 @@ class CourseGradeFactory(object):
                 'collected_block_structure': course_data.collected_structure,
                 'course_key': course_data.course_key,
             }
+            if bulk_factory:
+                kwargs['course_structure'] = bulk_factory.get_course_structure(user)
             if force_update:
                 kwargs['force_update_subsections'] = True
 
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+
+from django.db import migrations, models
+from opaque_keys.edx.django.models import CourseKeyField
+
+from lms.djangoapps.courseware.fields import UnsignedBigIntAutoField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0018_add_waffle_flag_defaults'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedSubsectionGradeUpdate',
+            fields=[
+                ('id', UnsignedBigIntAutoField(primary_key=True, serialize=False)),
+                ('course_id', CourseKeyField(db_index=True, max_length=255)),
+                ('update_json', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -18,8 +18,10 @@ from hashlib import sha1
 import six
 from django.apps import apps
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models, IntegrityError, transaction
 from django.utils.encoding import python_2_unicode_compatible
+from django.utils.lru_cache import lru_cache
 from django.utils.timezone import now
 from lazy import lazy
 from model_utils.models import TimeStampedModel
@@ -37,6 +39,9 @@ log = logging.getLogger(__name__)
 
 BLOCK_RECORD_LIST_VERSION = 1
 
+# The number of distinct block record lists interned by each process.
+INTERNED_BLOCK_RECORD_LISTS_SIZE = 4096
+
 # Used to serialize information about a block at the time it was used in
 # grade calculation.
 BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'graded'])
@@ -124,8 +129,28 @@ class BlockRecordList(object):
     def from_list(cls, blocks, course_key):
         """
         Return a BlockRecordList from the given list and course_key.
+
+        The returned list is interned: the learners who saw the same blocks
+        share the same BlockRecordList, so that its json_value and hash_value
+        are only computed once per process.
         """
-        return cls(blocks, course_key)
+        return _interned_block_record_list(tuple(blocks), course_key)
+
+
+@lru_cache(maxsize=INTERNED_BLOCK_RECORD_LISTS_SIZE)
+def _interned_block_record_list(blocks, course_key):
+    """
+    Returns the BlockRecordList of the given tuple of BlockRecords, for BlockRecordList.from_list.
+    """
+    return BlockRecordList(blocks, course_key)
+
+
+@lru_cache(maxsize=INTERNED_BLOCK_RECORD_LISTS_SIZE)
+def _interned_block_record_list_from_json(blockrecord_json):
+    """
+    Returns the BlockRecordList serialized as the given json, for VisibleBlocks.blocks.
+    """
+    return BlockRecordList.from_json(blockrecord_json)
 
 
 @python_2_unicode_compatible
@@ -146,6 +171,14 @@ class VisibleBlocks(models.Model):
 
     _CACHE_NAMESPACE = u"grades.models.VisibleBlocks"
 
+    # Records which VisibleBlocks exist in the django cache, shared by all
+    # processes, so that the visible blocks shared by many learners aren't
+    # looked up for each of them.  VisibleBlocks are never modified, and
+    # their hashes are computed from their blocks, so the hashes identify
+    # the blocks of any version of the course.
+    _EXISTING_CACHE_KEY = u"grades.models.VisibleBlocks.exists.{}"
+    _EXISTING_CACHE_TIMEOUT = 24 * 60 * 60
+
     class Meta(object):
         app_label = "grades"
 
@@ -161,7 +194,7 @@ class VisibleBlocks(models.Model):
         Returns the blocks_json data stored on this model as a list of
         BlockRecords in the order they were provided.
         """
-        return BlockRecordList.from_json(self.blocks_json)
+        return _interned_block_record_list_from_json(self.blocks_json)
 
     @classmethod
     def bulk_read(cls, user_id, course_key):
@@ -202,6 +235,7 @@ class VisibleBlocks(models.Model):
                 hashed=blocks.hash_value,
                 defaults={u'blocks_json': blocks.json_value, u'course_id': blocks.course_key},
             )
+        cls.remember_existing([model.hashed])
         return model
 
     @classmethod
@@ -248,6 +282,9 @@ class VisibleBlocks(models.Model):
 
         # Update the cache with the conjunction of created and existing blocks
         cls._update_cache(user_id, course_key, existing_visual_blocks + created_visual_blocks)
+        cls.remember_existing(
+            visual_block.hashed for visual_block in existing_visual_blocks + created_visual_blocks
+        )
 
         # Return the new visual blocks
         return created_visual_blocks
@@ -259,10 +296,35 @@ class VisibleBlocks(models.Model):
         BlockRecordList objects for the given user and course_key, but
         only for those that aren't already created.
         """
+        unknown_brls = cls.filter_unknown(block_record_lists)
+        if not unknown_brls:
+            return
         cached_records = cls.bulk_read(user_id, course_key)
-        non_existent_brls = {brl for brl in block_record_lists if brl.hash_value not in cached_records}
+        non_existent_brls = {brl for brl in unknown_brls if brl.hash_value not in cached_records}
+        cls.remember_existing(brl.hash_value for brl in unknown_brls if brl.hash_value in cached_records)
         cls.bulk_create(user_id, course_key, non_existent_brls)
 
+    @classmethod
+    def filter_unknown(cls, block_record_lists):
+        """
+        Returns the set of the given BlockRecordList objects whose
+        VisibleBlocks aren't known to exist (see remember_existing).
+        """
+        brls_by_key = {cls._existing_cache_key(brl.hash_value): brl for brl in block_record_lists}
+        known = cache.get_many(list(brls_by_key))
+        return {brl for key, brl in six.iteritems(brls_by_key) if key not in known}
+
+    @classmethod
+    def remember_existing(cls, hashes):
+        """
+        Records that the VisibleBlocks with the given hashes exist, once the
+        current transaction is committed, since the VisibleBlocks created by
+        a transaction which is rolled back don't exist.
+        """
+        values = {cls._existing_cache_key(hashed): True for hashed in hashes}
+        if values:
+            transaction.on_commit(lambda: cache.set_many(values, cls._EXISTING_CACHE_TIMEOUT))
+
     @classmethod
     def _initialize_cache(cls, user_id, course_key):
         """
@@ -278,6 +340,23 @@ class VisibleBlocks(models.Model):
         get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(user_id, course_key)] = prefetched
         return prefetched
 
+    @classmethod
+    def cache_prefetched(cls, user_id, course_key, visible_blocks):
+        """
+        Caches the given visible blocks, read along with all the subsection
+        grades of the given user and course, as bulk_read would have.
+        """
+        get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(user_id, course_key)] = {
+            visible_block.hashed: visible_block for visible_block in visible_blocks
+        }
+
+    @classmethod
+    def clear_prefetched_data(cls, user_id, course_key):
+        """
+        Clears the visible blocks cached for the given user and course from the RequestCache.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop(cls._cache_key(user_id, course_key), None)
+
     @classmethod
     def _update_cache(cls, user_id, course_key, visible_blocks):
         """
@@ -292,6 +371,10 @@ class VisibleBlocks(models.Model):
     def _cache_key(cls, user_id, course_key):
         return u"visible_blocks_cache.{}.{}".format(course_key, user_id)
 
+    @classmethod
+    def _existing_cache_key(cls, hashed):
+        return cls._EXISTING_CACHE_KEY.format(hashed)
+
 
 @python_2_unicode_compatible
 class PersistentSubsectionGrade(TimeStampedModel):
@@ -399,6 +482,43 @@ class PersistentSubsectionGrade(TimeStampedModel):
         for record in queryset:
             cached_grades[record.user_id].append(record)
 
+    @classmethod
+    def bulk_prefetch(cls, course_key, users):
+        """
+        Prefetches grades for the given users in the given course, as prefetch
+        does, along with their overrides and visible blocks, which are cached
+        for PersistentSubsectionGradeOverride.get_override and
+        VisibleBlocks.bulk_read too.
+
+        Takes two queries, however many users there are: the visible blocks,
+        which are shared by the grades of many users, are read once each,
+        rather than joined to every grade.
+
+        Returns the grades, as a dict of lists by user id.
+        """
+        user_ids = [user.id for user in users]
+        grades = list(cls.objects.select_related('override').filter(
+            user_id__in=user_ids,
+            course_id=course_key,
+        ))
+        visible_blocks = VisibleBlocks.objects.in_bulk(
+            {grade.visible_blocks_id for grade in grades}, field_name='hashed',
+        ) if grades else {}
+
+        grades_by_user = defaultdict(list)
+        for grade in grades:
+            grade.visible_blocks = visible_blocks[grade.visible_blocks_id]
+            grades_by_user[grade.user_id].append(grade)
+        get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(course_key)] = grades_by_user
+
+        for user_id in user_ids:
+            user_grades = grades_by_user.get(user_id, [])
+            VisibleBlocks.cache_prefetched(user_id, course_key, [grade.visible_blocks for grade in user_grades])
+            PersistentSubsectionGradeOverride.cache_prefetched(
+                user_id, course_key, [grade.override for grade in user_grades if hasattr(grade, 'override')],
+            )
+        return grades_by_user
+
     @classmethod
     def clear_prefetched_data(cls, course_key):
         """
@@ -453,7 +573,8 @@ class PersistentSubsectionGrade(TimeStampedModel):
         Wrapper for objects.update_or_create.
         """
         cls._prepare_params(params)
-        VisibleBlocks.cached_get_or_create(params['user_id'], params['visible_blocks'])
+        if VisibleBlocks.filter_unknown([params['visible_blocks']]):
+            VisibleBlocks.cached_get_or_create(params['user_id'], params['visible_blocks'])
         cls._prepare_params_visible_blocks_id(params)
 
         # TODO: do we NEED to pop these?
@@ -729,6 +850,23 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def cache_prefetched(cls, user_id, course_key, overrides):
+        """
+        Caches the given overrides, read along with all the subsection grades
+        of the given user and course, as prefetch would have.
+        """
+        get_cache(cls._CACHE_NAMESPACE)[(user_id, str(course_key))] = {
+            override.grade.usage_key: override for override in overrides
+        }
+
+    @classmethod
+    def clear_prefetched_data(cls, user_id, course_key):
+        """
+        Clears the overrides cached for the given user and course from the RequestCache.
+        """
+        get_cache(cls._CACHE_NAMESPACE).pop((user_id, str(course_key)), None)
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -799,3 +937,31 @@ class PersistentSubsectionGradeOverride(models.Model):
                 getattr(subsection_grade_model, field_name)
             )
         return cleaned_data
+
+
+class QueuedSubsectionGradeUpdate(models.Model):
+    """
+    A subsection grade update queued for a course by
+    lms.djangoapps.grades.tasks.queue_subsection_update, until a
+    recalculate_coalesced_subsection_grades task performs it.
+
+    .. no_pii:
+    """
+    class Meta(object):
+        app_label = "grades"
+
+    # primary key will need to be large for this table, it orders the updates of a queue
+    id = UnsignedBigIntAutoField(primary_key=True)  # pylint: disable=invalid-name
+    course_id = CourseKeyField(blank=False, max_length=255, db_index=True)
+
+    # The keyword arguments of recalculate_subsection_grade_v3 for the update, as json
+    update_json = models.TextField()
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def update(self):
+        """
+        Returns the keyword arguments of recalculate_subsection_grade_v3 for the update.
+        """
+        return json.loads(self.update_json)
@@ -3,6 +3,8 @@ Provides Python APIs exposed from Grades models.
 """
 
 
+from collections import namedtuple
+
 from opaque_keys.edx.keys import CourseKey, UsageKey
 
 from lms.djangoapps.grades.models import PersistentCourseGrade as _PersistentCourseGrade
@@ -11,6 +13,10 @@ from lms.djangoapps.grades.models import PersistentSubsectionGradeOverride as _P
 from lms.djangoapps.grades.models import VisibleBlocks as _VisibleBlocks
 from lms.djangoapps.utils import _get_key
 
+# The grades of a user in a course, as read by read_grades_for_users: the user's PersistentCourseGrade
+# (or None), and a dict of the user's PersistentSubsectionGrades by subsection usage key.
+UserGradesRecord = namedtuple('UserGradesRecord', ['course_grade', 'subsection_grades'])
+
 
 def prefetch_grade_overrides_and_visible_blocks(user, course_key):
     _PersistentSubsectionGradeOverride.prefetch(user.id, course_key)
@@ -26,6 +32,46 @@ def prefetch_course_and_subsection_grades(course_key, users):
     _PersistentSubsectionGrade.prefetch(course_key, users)
 
 
+def read_grades_for_users(course_key, users):
+    """
+    Reads the course grades, subsection grades, subsection grade overrides
+    and visible blocks of the given users in the given course, with three
+    queries however many users there are.
+
+    They are also cached for the request, so that reading the grades of
+    these users (e.g. with CourseGradeFactory().read) doesn't query them
+    again, until clear_grades_read_for_users is called.
+
+    Returns a dict of UserGradesRecord by user id.
+    """
+    users = list(users)
+    _PersistentCourseGrade.prefetch(course_key, users)
+    subsection_grades = _PersistentSubsectionGrade.bulk_prefetch(course_key, users)
+
+    records = {}
+    for user in users:
+        try:
+            course_grade = _PersistentCourseGrade.read(user.id, course_key)
+        except _PersistentCourseGrade.DoesNotExist:
+            course_grade = None
+        records[user.id] = UserGradesRecord(
+            course_grade,
+            {grade.full_usage_key: grade for grade in subsection_grades.get(user.id, [])},
+        )
+    return records
+
+
+def clear_grades_read_for_users(course_key, users):
+    """
+    Clears the grades cached for the request by read_grades_for_users.
+    """
+    _PersistentCourseGrade.clear_prefetched_data(course_key)
+    _PersistentSubsectionGrade.clear_prefetched_data(course_key)
+    for user in users:
+        _PersistentSubsectionGradeOverride.clear_prefetched_data(user.id, course_key)
+        _VisibleBlocks.clear_prefetched_data(user.id, course_key)
+
+
 def clear_prefetched_course_grades(course_key):
     _PersistentCourseGrade.clear_prefetched_data(course_key)
     _PersistentSubsectionGrade.clear_prefetched_data(course_key)
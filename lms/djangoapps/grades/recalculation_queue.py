@@ -0,0 +1,110 @@
+"""
+Queues of the subsection grade updates requested for each course, which let
+all the updates requested within a short window of time be performed by a
+single task (see tasks.recalculate_coalesced_subsection_grades), instead of
+by a task each.
+
+The updates of a queue are kept in the database, as QueuedSubsectionGradeUpdate
+rows, so that none of them is lost before it is performed.  They are read in
+batches of bounded size, oldest first, and each batch is only removed from
+the queue once it has been performed, so that a task which is interrupted,
+e.g. by its time limit, leaves its batch for the next task.
+
+The django cache, shared by all the processes, only holds whether a task is
+scheduled to perform the updates of a queue, and a lock held by that task.
+Losing either of them to an eviction only causes an extra task to be
+scheduled, or a batch of updates to be performed twice, which recalculates
+the same grades again.
+"""
+
+
+import json
+
+import six
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import QueuedSubsectionGradeUpdate
+
+KEY_PREFIX = u'grades.recalculation_queue'
+
+# How long a task stays recorded as scheduled, at most.
+SCHEDULED_TIMEOUT_SECONDS = 24 * 60 * 60
+
+# How long a task may hold the lock of a queue, at most.
+LOCK_TIMEOUT_SECONDS = 20 * 60
+
+
+class SubsectionUpdateQueue(object):
+    """
+    The queue of the subsection grade updates requested for a course.
+
+    Each update is a dict of the keyword arguments that
+    recalculate_subsection_grade_v3 would be called with.
+    """
+
+    def __init__(self, course_id):
+        self.course_id = six.text_type(course_id)
+
+    def push(self, update):
+        """
+        Pushes the given update onto the queue.
+
+        Returns whether the caller needs to schedule a task to perform the
+        updates of the queue, which is the case when no task is scheduled
+        already.
+        """
+        QueuedSubsectionGradeUpdate.objects.create(course_id=self.course_id, update_json=json.dumps(update))
+        return self.schedule()
+
+    def schedule(self):
+        """
+        Records that a task is scheduled to perform the updates of the queue,
+        and returns whether the caller needs to schedule it, which is the case
+        when no task was scheduled already.
+        """
+        return cache.add(self._key(u'scheduled'), True, SCHEDULED_TIMEOUT_SECONDS)
+
+    def unschedule(self):
+        """
+        Records that the task scheduled to perform the updates of the queue is
+        running, so that the next update pushed onto the queue schedules
+        another task.
+        """
+        cache.delete(self._key(u'scheduled'))
+
+    def lock(self):
+        """
+        Acquires the lock of the queue, and returns whether it was acquired.
+        """
+        return cache.add(self._key(u'lock'), True, LOCK_TIMEOUT_SECONDS)
+
+    def unlock(self):
+        """
+        Releases the lock of the queue.
+        """
+        cache.delete(self._key(u'lock'))
+
+    def peek(self):
+        """
+        Returns the oldest updates of the queue, at most
+        GRADES_RECALCULATION_BATCH_SIZE of them, in the order they were
+        pushed, as a list of (id, update) tuples.  The lock of the queue must
+        be held.
+
+        The updates stay in the queue until they are removed.
+        """
+        queued_updates = QueuedSubsectionGradeUpdate.objects.filter(
+            course_id=self.course_id,
+        ).order_by('id')[:settings.GRADES_RECALCULATION_BATCH_SIZE]
+        return [(queued_update.id, queued_update.update) for queued_update in queued_updates]
+
+    def remove(self, update_ids):
+        """
+        Removes the updates of the given ids, returned by `peek`, from the
+        queue.  The lock of the queue must be held.
+        """
+        QueuedSubsectionGradeUpdate.objects.filter(id__in=update_ids).delete()
+
+    def _key(self, name):
+        return u'{}.{}.{}'.format(KEY_PREFIX, self.course_id, name)
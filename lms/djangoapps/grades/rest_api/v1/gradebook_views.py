@@ -23,11 +23,11 @@ from rest_framework.views import APIView
 from six import text_type
 
 from lms.djangoapps.courseware.courses import get_course_by_id
-from lms.djangoapps.grades.api import CourseGradeFactory, clear_prefetched_course_and_subsection_grades
+from lms.djangoapps.grades.api import CourseGradeFactory, clear_grades_read_for_users
 from lms.djangoapps.grades.api import constants as grades_constants
 from lms.djangoapps.grades.api import context as grades_context
 from lms.djangoapps.grades.api import events as grades_events
-from lms.djangoapps.grades.api import is_writable_gradebook_enabled, prefetch_course_and_subsection_grades
+from lms.djangoapps.grades.api import is_writable_gradebook_enabled, read_grades_for_users
 from lms.djangoapps.grades.api import gradebook_can_see_bulk_management as can_see_bulk_management
 from lms.djangoapps.grades.course_data import CourseData
 from lms.djangoapps.grades.grade_utils import are_grades_frozen
@@ -78,17 +78,18 @@ log = logging.getLogger(__name__)
 def bulk_gradebook_view_context(course_key, users):
     """
     Prefetches all course and subsection grades in the given course for the given
-    list of users, also, fetch all the score relavant data,
-    storing the result in a RequestCache and deleting grades on context exit.
+    list of users, along with their overrides and visible blocks, also, fetch all
+    the score relavant data, storing the result in a RequestCache and deleting
+    grades on context exit.
     """
-    prefetch_course_and_subsection_grades(course_key, users)
+    read_grades_for_users(course_key, users)
     CourseEnrollment.bulk_fetch_enrollment_states(users, course_key)
     cohorts.bulk_cache_cohorts(course_key, users)
     BulkRoleCache.prefetch(users)
     try:
         yield
     finally:
-        clear_prefetched_course_and_subsection_grades(course_key)
+        clear_grades_read_for_users(course_key, users)
 
 
 def verify_writable_gradebook_enabled(view_func):
@@ -618,7 +619,7 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
                 q_objects.append(q_object)
 
             entries = []
-            related_models = ['user']
+            related_models = ['user', 'user__profile']
             users = self._paginate_users(course_key, q_objects, related_models, annotations=annotations)
 
             users_counts = self._get_users_counts(course_key, q_objects, annotations=annotations)
@@ -4,3 +4,11 @@ def plugin_settings(settings):
 
     # Queue to use for updating grades due to grading policy change
     settings.POLICY_CHANGE_GRADES_ROUTING_KEY = settings.DEFAULT_PRIORITY_QUEUE
+
+    # Number of seconds over which the subsection grade updates of a course are collected, to be performed together,
+    # when the grades.coalesce_grade_recalculation waffle flag is enabled for the course
+    settings.GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS = 10
+
+    # Maximum number of the queued subsection grade updates of a course performed by each
+    # recalculate_coalesced_subsection_grades task
+    settings.GRADES_RECALCULATION_BATCH_SIZE = 500
@@ -12,3 +12,13 @@ def plugin_settings(settings):
     settings.POLICY_CHANGE_GRADES_ROUTING_KEY = settings.ENV_TOKENS.get(
         'POLICY_CHANGE_GRADES_ROUTING_KEY', settings.DEFAULT_PRIORITY_QUEUE,
     )
+
+    # Number of seconds over which the subsection grade updates of a course are collected, to be performed together
+    settings.GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS = settings.ENV_TOKENS.get(
+        'GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS', settings.GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS,
+    )
+
+    # Maximum number of the queued subsection grade updates of a course performed by each task
+    settings.GRADES_RECALCULATION_BATCH_SIZE = settings.ENV_TOKENS.get(
+        'GRADES_RECALCULATION_BATCH_SIZE', settings.GRADES_RECALCULATION_BATCH_SIZE,
+    )
@@ -21,11 +21,13 @@ from common.djangoapps.track.event_transaction_utils import get_event_transactio
 from common.djangoapps.util.date_utils import to_timestamp
 
 from .. import events
+from ..config.waffle import is_grade_recalculation_coalesced
 from ..constants import ScoreDatabaseTableEnum
 from ..course_grade_factory import CourseGradeFactory
 from ..scores import weighted_score
 from lms.djangoapps.grades.tasks import (
     RECALCULATE_GRADE_DELAY_SECONDS,
+    queue_subsection_update,
     recalculate_course_and_subsection_grades_for_user,
     recalculate_subsection_grade_v3
 )
@@ -224,22 +226,26 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     context_key = LearningContextKey.from_string(kwargs['course_id'])
     if not context_key.is_course:
         return  # If it's not a course, it has no subsections, so skip the subsection grading update
-    recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
-            user_id=kwargs['user_id'],
-            anonymous_user_id=kwargs.get('anonymous_user_id'),
-            course_id=kwargs['course_id'],
-            usage_id=kwargs['usage_id'],
-            only_if_higher=kwargs.get('only_if_higher'),
-            expected_modified_time=to_timestamp(kwargs['modified']),
-            score_deleted=kwargs.get('score_deleted', False),
-            event_transaction_id=six.text_type(get_event_transaction_id()),
-            event_transaction_type=six.text_type(get_event_transaction_type()),
-            score_db_table=kwargs['score_db_table'],
-            force_update_subsections=kwargs.get('force_update_subsections', False),
-        ),
-        countdown=RECALCULATE_GRADE_DELAY_SECONDS,
+    update_kwargs = dict(
+        user_id=kwargs['user_id'],
+        anonymous_user_id=kwargs.get('anonymous_user_id'),
+        course_id=kwargs['course_id'],
+        usage_id=kwargs['usage_id'],
+        only_if_higher=kwargs.get('only_if_higher'),
+        expected_modified_time=to_timestamp(kwargs['modified']),
+        score_deleted=kwargs.get('score_deleted', False),
+        event_transaction_id=six.text_type(get_event_transaction_id()),
+        event_transaction_type=six.text_type(get_event_transaction_type()),
+        score_db_table=kwargs['score_db_table'],
+        force_update_subsections=kwargs.get('force_update_subsections', False),
     )
+    if is_grade_recalculation_coalesced(context_key):
+        queue_subsection_update(**update_kwargs)
+    else:
+        recalculate_subsection_grade_v3.apply_async(
+            kwargs=update_kwargs,
+            countdown=RECALCULATE_GRADE_DELAY_SECONDS,
+        )
 
 
 @receiver(SUBSECTION_SCORE_CHANGED)
@@ -8,11 +8,14 @@ from logging import getLogger
 
 from lazy import lazy
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from common.djangoapps.student.models import anonymous_id_for_user
 
@@ -21,6 +24,62 @@ from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSu
 
 log = getLogger(__name__)
 
+_PREFETCHED_SCORES_CACHE_NAMESPACE = u'grades.subsection_grade_factory.prefetched_scores'
+
+
+def prefetch_scores(course_key, users, scorable_locations):
+    """
+    Prefetches the CSM and Submissions API scores of the given users in
+    the given course, with a query for each, for later use by the
+    SubsectionGradeFactory of each user.
+
+    Arguments:
+        scorable_locations: The locations of all the blocks of the course
+            which are possibly scored, for any of the users.
+    """
+    csm_scores = ScoresClient.create_for_users(course_key, [user.id for user in users], scorable_locations)
+    anonymous_user_ids = {user.id: anonymous_id_for_user(user, course_key) for user in users}
+    submissions_scores = _get_submissions_scores(course_key, list(anonymous_user_ids.values()))
+
+    cache = get_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE)
+    for user in users:
+        cache[_prefetched_scores_cache_key(user.id, course_key)] = (
+            csm_scores[user.id],
+            submissions_scores.get(anonymous_user_ids[user.id], {}),
+        )
+
+
+def clear_prefetched_scores(course_key, users):
+    """
+    Clears the scores prefetched by prefetch_scores for the given users.
+    """
+    cache = get_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE)
+    for user in users:
+        cache.pop(_prefetched_scores_cache_key(user.id, course_key), None)
+
+
+def _prefetched_scores_cache_key(user_id, course_key):
+    return user_id, str(course_key)
+
+
+def _get_submissions_scores(course_key, anonymous_user_ids):
+    """
+    Returns the scores stored by the Submissions API for the given
+    students in the given course, in the format returned by
+    submissions_api.get_scores, as a dict of {anonymous_user_id: scores}.
+    """
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=anonymous_user_ids,
+    ).select_related('latest', 'latest__submission', 'student_item')
+
+    scores = {}
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            student_scores = scores.setdefault(summary.student_item.student_id, {})
+            student_scores[summary.student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
+
 
 class SubsectionGradeFactory(object):
     """
@@ -112,6 +171,9 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched = self._get_prefetched_scores()
+        if prefetched is not None:
+            return prefetched[0]
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -121,9 +183,21 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched = self._get_prefetched_scores()
+        if prefetched is not None:
+            return prefetched[1]
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
+    def _get_prefetched_scores(self):
+        """
+        Returns the (CSM scores, Submissions API scores) prefetched for
+        the student by prefetch_scores, or None.
+        """
+        return get_cache(_PREFETCHED_SCORES_CACHE_NAMESPACE).get(
+            _prefetched_scores_cache_key(self.student.id, self.course_data.course_key)
+        )
+
     def _get_bulk_cached_grade(self, subsection):
         """
         Returns the student's SubsectionGrade for the subsection,
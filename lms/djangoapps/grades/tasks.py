@@ -3,6 +3,7 @@ This module contains tasks for asynchronous execution of grade updates.
 """
 
 
+from collections import OrderedDict
 from logging import getLogger
 
 import six
@@ -26,11 +27,14 @@ from common.djangoapps.track.event_transaction_utils import set_event_transactio
 from common.djangoapps.util.date_utils import from_timestamp
 from xmodule.modulestore.django import modulestore
 
+from .bulk_course_grade_factory import BulkCourseGradeFactory
 from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE, waffle
 from .constants import ScoreDatabaseTableEnum
+from .course_data import CourseData
 from .course_grade_factory import CourseGradeFactory
 from .exceptions import DatabaseNotReadyError
 from .grade_utils import are_grades_frozen
+from .recalculation_queue import SubsectionUpdateQueue
 from .signals.signals import SUBSECTION_SCORE_CHANGED
 from .subsection_grade_factory import SubsectionGradeFactory
 from .transformer import GradesTransformer
@@ -44,6 +48,8 @@ KNOWN_RETRY_ERRORS = (  # Errors we expect occasionally, should be resolved on r
     DatabaseNotReadyError,
 )
 RECALCULATE_GRADE_DELAY_SECONDS = 2  # to prevent excessive _has_db_updated failures. See TNL-6424.
+RECALCULATE_COALESCED_GRADES_MAX_ATTEMPTS = 3  # as many as recalculate_subsection_grade_v3, with its retries
+RECALCULATE_COALESCED_GRADES_TIMEOUT_SECONDS = 1200
 RETRY_DELAY_SECONDS = 40
 SUBSECTION_GRADE_TIMEOUT_SECONDS = 300
 
@@ -250,6 +256,214 @@ def _recalculate_subsection_grade(self, **kwargs):
         raise self.retry(kwargs=kwargs, exc=exc)
 
 
+def queue_subsection_update(**kwargs):
+    """
+    Queues a subsection grade update, given the keyword arguments of
+    recalculate_subsection_grade_v3, for the next
+    recalculate_coalesced_subsection_grades task of the course, and
+    schedules that task if it isn't scheduled yet.
+    """
+    queue = SubsectionUpdateQueue(kwargs['course_id'])
+    if queue.push(kwargs):
+        _schedule_coalesced_subsection_grades(queue)
+
+
+def _schedule_coalesced_subsection_grades(queue):
+    """
+    Schedules the recalculate_coalesced_subsection_grades task of the
+    given queue, at the end of the window over which updates are coalesced.
+    """
+    recalculate_coalesced_subsection_grades.apply_async(
+        kwargs=dict(course_id=queue.course_id),
+        countdown=max(settings.GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS, RECALCULATE_GRADE_DELAY_SECONDS),
+    )
+
+
+@task(
+    bind=True,
+    base=LoggedPersistOnFailureTask,
+    time_limit=RECALCULATE_COALESCED_GRADES_TIMEOUT_SECONDS,
+)
+@set_code_owner_attribute
+def recalculate_coalesced_subsection_grades(self, course_id):
+    """
+    Performs the subsection grade updates queued for the given course by
+    queue_subsection_update, as recalculate_subsection_grade_v3 would
+    perform each of them, except that:
+
+    * each subsection grade of a user is updated once, no matter how many
+      of its problems' scores changed,
+    * the course structure is transformed once per access profile, and the
+      scores of the users are read in batches (see BulkCourseGradeFactory).
+
+    Updates whose score isn't in the database yet, or whose subsection
+    grades failed to update, are queued again, up to
+    RECALCULATE_COALESCED_GRADES_MAX_ATTEMPTS times.
+
+    Each task performs a batch of at most GRADES_RECALCULATION_BATCH_SIZE
+    updates, and only removes them from the queue once they are performed.
+    """
+    queue = SubsectionUpdateQueue(course_id)
+    queue.unschedule()
+    if not queue.lock():
+        # Another task is performing updates of the queue, try again at the end of the next window.
+        if queue.schedule():
+            _schedule_coalesced_subsection_grades(queue)
+        return
+    try:
+        batch = queue.peek()
+        if not batch:
+            return
+
+        # Schedule the task performing the rest of the queue before performing this batch,
+        # so that the batch is performed by that task if this one is interrupted.
+        if queue.schedule():
+            _schedule_coalesced_subsection_grades(queue)
+
+        update_ids = [update_id for update_id, __ in batch]
+        updates = [update for __, update in batch]
+        try:
+            _perform_coalesced_subsection_updates(self, course_id, updates)
+        except Exception:
+            _requeue_subsection_updates(updates)
+            queue.remove(update_ids)
+            raise
+        queue.remove(update_ids)
+    finally:
+        queue.unlock()
+
+
+def _perform_coalesced_subsection_updates(self, course_id, updates):
+    """
+    A helper function to perform the given subsection grade updates of the
+    given course, for recalculate_coalesced_subsection_grades.
+    """
+    course_key = CourseKey.from_string(course_id)
+    if are_grades_frozen(course_key):
+        log.info(
+            u"Attempted recalculate_coalesced_subsection_grades for course '%s', but grades are frozen.", course_key,
+        )
+        return
+
+    set_custom_attributes_for_course_key(course_key)
+    set_custom_attribute('subsection_updates', len(updates))
+
+    # Verify the database has been updated with each score, as in _recalculate_subsection_grade.
+    ready_updates = []
+    for update in updates:
+        scored_block_usage_key = UsageKey.from_string(update['usage_id']).replace(course_key=course_key)
+        if _has_db_updated_with_new_score(self, scored_block_usage_key, **update):
+            ready_updates.append(update)
+        else:
+            _requeue_subsection_updates([update])
+
+    if ready_updates:
+        _update_coalesced_subsection_grades(course_key, ready_updates)
+
+
+def _requeue_subsection_updates(updates):
+    """
+    Queues the given updates again, unless they have been attempted too
+    many times already.
+    """
+    for update in updates:
+        attempts = update.get('attempts', 1)
+        if attempts < RECALCULATE_COALESCED_GRADES_MAX_ATTEMPTS:
+            queue_subsection_update(**dict(update, attempts=attempts + 1))
+        else:
+            log.info(u"Grades: giving up on the subsection grade update with kwargs {}".format(update))
+
+
+def _merge_subsection_updates(update, other_update):
+    """
+    Returns a single update which is equivalent to performing both of the
+    given updates of the same subsection, the latter being the most recent.
+    """
+    if update is None:
+        return other_update
+    return dict(
+        other_update,
+        only_if_higher=bool(update['only_if_higher'] and other_update['only_if_higher']),
+        score_deleted=update['score_deleted'] or other_update['score_deleted'],
+        force_update_subsections=(
+            update.get('force_update_subsections', False) or other_update.get('force_update_subsections', False)
+        ),
+    )
+
+
+def _update_coalesced_subsection_grades(course_key, updates):
+    """
+    A helper function to update, for each user, the subsection grades
+    containing the blocks of the given updates, and to signal that those
+    subsection grades were updated.
+    """
+    updates_by_user = OrderedDict()
+    for update in updates:
+        updates_by_user.setdefault(update['user_id'], []).append(update)
+
+    store = modulestore()
+    with store.bulk_operations(course_key):
+        course = store.get_course(course_key, depth=0)
+        course_data = CourseData(None, course=course)
+        bulk_grade_factory = BulkCourseGradeFactory(course_data)
+        students = User.objects.filter(id__in=list(updates_by_user))
+        for students_batch in bulk_grade_factory.iter_batches(students):
+            for student in students_batch:
+                try:
+                    course_structure = bulk_grade_factory.get_course_structure(student) or get_course_blocks(
+                        student, course_data.location, collected_block_structure=course_data.collected_structure,
+                    )
+                    _update_user_subsection_grades(
+                        student, course, course_structure, updates_by_user[student.id],
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    log.info(u"Grades: failed to update the subsection grades of user {} in {}: {}".format(
+                        student.id, course_key, repr(exc),
+                    ))
+                    _requeue_subsection_updates(updates_by_user[student.id])
+
+
+def _update_user_subsection_grades(student, course, course_structure, updates):
+    """
+    Updates the subsection grades of the given student containing the blocks
+    of the given updates, once each, and signals that they were updated.
+    """
+    updates_by_subsection = OrderedDict()
+    for update in updates:
+        scored_block_usage_key = UsageKey.from_string(update['usage_id']).replace(course_key=course.id)
+        subsections = course_structure.get_transformer_block_field(
+            scored_block_usage_key,
+            GradesTransformer,
+            'subsections',
+            set(),
+        )
+        for subsection_usage_key in subsections:
+            if subsection_usage_key in course_structure:
+                updates_by_subsection[subsection_usage_key] = _merge_subsection_updates(
+                    updates_by_subsection.get(subsection_usage_key), update,
+                )
+
+    subsection_grade_factory = SubsectionGradeFactory(student, course, course_structure)
+    for subsection_usage_key, update in six.iteritems(updates_by_subsection):
+        # Correlate the grading events with the most recent of the coalesced ones.
+        set_event_transaction_id(update.get('event_transaction_id'))
+        set_event_transaction_type(update.get('event_transaction_type'))
+
+        subsection_grade = subsection_grade_factory.update(
+            course_structure[subsection_usage_key],
+            update['only_if_higher'],
+            update['score_deleted'],
+            update.get('force_update_subsections', False),
+        )
+        SUBSECTION_SCORE_CHANGED.send(
+            sender=None,
+            course=course,
+            course_structure=course_structure,
+            user=student,
+            subsection_grade=subsection_grade,
+        )
+
+
 def _has_db_updated_with_new_score(self, scored_block_usage_key, **kwargs):
     """
     Returns whether the database has been updated with the
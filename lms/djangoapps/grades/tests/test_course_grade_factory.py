@@ -9,15 +9,18 @@ import ddt
 from django.conf import settings
 from mock import patch
 from six import text_type
-from edx_toggles.toggles.testutils import override_waffle_switch
+from edx_toggles.toggles.testutils import override_waffle_flag, override_waffle_switch
 from lms.djangoapps.courseware.access import has_access
+from lms.djangoapps.courseware.model_data import set_score
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
-from common.djangoapps.student.tests.factories import UserFactory
+from common.djangoapps.student.tests.factories import CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
 
-from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle_switch
+from ..bulk_course_grade_factory import BulkCourseGradeFactory
+from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, BULK_GRADE_COMPUTATION, waffle_flags, waffle_switch
+from ..course_data import CourseData
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
@@ -187,6 +190,29 @@ class TestCourseGradeFactory(GradeTestBase):
             ))
         self.assertEqual(mock_update.called, force_update)
 
+    @ddt.data(True, False)
+    @patch.dict(settings.FEATURES, {'ENABLE_BULK_GRADE_COMPUTATION': True})
+    def test_iter_bulk_grade_computation(self, force_update):
+        other_user = UserFactory()
+        users = [self.request.user, other_user]
+        set_score(self.request.user.id, self.problem.location, 1, 1)
+        set_score(other_user.id, self.problem2.location, 1, 2)
+
+        def _grades():
+            """
+            Returns the grade values of the users, as computed by CourseGradeFactory.iter.
+            """
+            return {
+                user: (course_grade.percent, course_grade.letter_grade, error)
+                for user, course_grade, error in CourseGradeFactory().iter(
+                    users=users, course=self.course, force_update=force_update,
+                )
+            }
+
+        expected_grades = _grades()
+        with override_waffle_flag(waffle_flags()[BULK_GRADE_COMPUTATION], active=True):
+            self.assertEqual(_grades(), expected_grades)
+
     def test_course_grade_summary(self):
         with mock_get_score(1, 2):
             self.subsection_grade_factory.update(self.course_structure[self.sequence.location])
@@ -337,6 +363,16 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
+    def test_bulk_access_profiles_read_per_batch(self):
+        for student in self.students:
+            CourseEnrollmentFactory.create(user=student, course_id=self.course.id)
+        bulk_factory = BulkCourseGradeFactory(CourseData(user=None, course=self.course))
+        for batch in bulk_factory.iter_batches(self.students):
+            bulk_factory.get_course_structure(batch[0])
+            with self.assertNumQueries(0):
+                structures = [bulk_factory.get_course_structure(student) for student in batch[1:]]
+            self.assertTrue(all(structures))
+
     def _course_grades_and_errors_for(self, course, students):
         """
         Simple helper method to iterate through student grades and give us
@@ -12,8 +12,9 @@ from hashlib import sha1
 import ddt
 import pytz
 import six
+from django.db import transaction
 from django.db.utils import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils.timezone import now
 from freezegun import freeze_time
 from mock import patch
@@ -30,6 +31,7 @@ from lms.djangoapps.grades.models import (
     PersistentSubsectionGradeOverride,
     VisibleBlocks
 )
+from openedx.core.djangolib.testing.utils import CacheIsolationMixin, CacheIsolationTestCase
 from common.djangoapps.student.tests.factories import UserFactory
 from common.djangoapps.track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
 
@@ -201,6 +203,77 @@ class VisibleBlocksTest(GradesModelTestCase):
         with self.assertRaises(AttributeError):
             visible_blocks.blocks = expected_blocks
 
+    def test_block_record_lists_interned(self):
+        block_record_list = BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+        self.assertIs(block_record_list, BlockRecordList.from_list([self.record_a, self.record_b], self.course_key))
+        self.assertIsNot(block_record_list, BlockRecordList.from_list([self.record_b, self.record_a], self.course_key))
+
+        visible_blocks = self._create_block_record_list([self.record_a, self.record_b])
+        self.assertIs(visible_blocks.blocks, VisibleBlocks.objects.get(hashed=visible_blocks.hashed).blocks)
+
+
+@patch('django.db.transaction.on_commit', lambda func, using=None: func())
+class VisibleBlocksExistingCacheTest(GradesModelTestCase, CacheIsolationTestCase):
+    """
+    Test the cache of the VisibleBlocks known to exist.
+    """
+    ENABLED_CACHES = ['default']
+
+    def test_bulk_get_or_create_known_blocks(self):
+        block_record_list = BlockRecordList.from_list([self.record_a], self.course_key)
+        VisibleBlocks.bulk_get_or_create(1, self.course_key, [block_record_list])
+        with self.assertNumQueries(0):
+            VisibleBlocks.bulk_get_or_create(2, self.course_key, [block_record_list])
+        self.assertEqual(VisibleBlocks.objects.filter(hashed=block_record_list.hash_value).count(), 1)
+
+    def test_filter_unknown(self):
+        known = BlockRecordList.from_list([self.record_a], self.course_key)
+        unknown = BlockRecordList.from_list([self.record_b], self.course_key)
+        VisibleBlocks.remember_existing([known.hash_value])
+        self.assertEqual(VisibleBlocks.filter_unknown([known, unknown]), {unknown})
+
+
+class VisibleBlocksExistingCacheRollbackTest(CacheIsolationMixin, TransactionTestCase):
+    """
+    Test the cache of the VisibleBlocks known to exist, when transactions are rolled back.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(VisibleBlocksExistingCacheRollbackTest, self).setUp()
+        self.course_key = CourseLocator(org='some_org', course='some_course', run='some_run')
+        self.user = UserFactory()
+        self.record = BlockRecord(
+            locator=self.course_key.make_usage_key('problem', 'block_id_a'), weight=1, raw_possible=10, graded=True,
+        )
+
+    def test_create_grade_after_rollback(self):
+        block_record_list = BlockRecordList.from_list([self.record], self.course_key)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                VisibleBlocks.bulk_get_or_create(self.user.id, self.course_key, [block_record_list])
+                raise IntegrityError
+        self.assertFalse(VisibleBlocks.objects.filter(hashed=block_record_list.hash_value).exists())
+        self.assertEqual(VisibleBlocks.filter_unknown([block_record_list]), {block_record_list})
+
+        VisibleBlocks.clear_prefetched_data(self.user.id, self.course_key)
+        PersistentSubsectionGrade.bulk_create_grades(
+            [{
+                "user_id": self.user.id,
+                "usage_key": self.course_key.make_usage_key('subsection', 'subsection_12345'),
+                "earned_all": 6.0,
+                "possible_all": 12.0,
+                "earned_graded": 6.0,
+                "possible_graded": 8.0,
+                "visible_blocks": [self.record],
+                "first_attempted": datetime(2000, 1, 1, 12, 30, 45, tzinfo=pytz.UTC),
+            }],
+            self.user.id,
+            self.course_key,
+        )
+        self.assertTrue(VisibleBlocks.objects.filter(hashed=block_record_list.hash_value).exists())
+        self.assertEqual(VisibleBlocks.filter_unknown([block_record_list]), set())
+
 
 @ddt.ddt
 class PersistentSubsectionGradeTest(GradesModelTestCase):
@@ -328,6 +401,34 @@ class PersistentSubsectionGradeTest(GradesModelTestCase):
         self.assertEqual(grade.possible_all, override.possible_all_override)
         self.assertEqual(grade.possible_graded, override.possible_graded_override)
 
+    def test_bulk_prefetch(self):
+        grade = PersistentSubsectionGrade.update_or_create_grade(**self.params)
+        PersistentSubsectionGradeOverride.update_or_create_override(
+            requesting_user=self.user,
+            subsection_grade_model=grade,
+            earned_graded_override=0.0,
+            feature=GradeOverrideFeatureEnum.gradebook,
+        )
+        other_user = UserFactory()
+        PersistentSubsectionGrade.update_or_create_grade(**dict(self.params, user_id=other_user.id))
+        ungraded_user = UserFactory()
+
+        with self.assertNumQueries(2):
+            grades = PersistentSubsectionGrade.bulk_prefetch(self.course_key, [self.user, other_user, ungraded_user])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(list(PersistentSubsectionGrade.bulk_read_grades(self.user.id, self.course_key)), [grade])
+            self.assertEqual(list(PersistentSubsectionGrade.bulk_read_grades(ungraded_user.id, self.course_key)), [])
+            self.assertEqual(
+                PersistentSubsectionGradeOverride.get_override(self.user.id, self.usage_key).earned_graded_override, 0,
+            )
+            self.assertIsNone(PersistentSubsectionGradeOverride.get_override(other_user.id, self.usage_key))
+            self.assertEqual(
+                list(VisibleBlocks.bulk_read(other_user.id, self.course_key)), [self.block_records.hash_value],
+            )
+            self.assertEqual(grades[other_user.id][0].visible_blocks.blocks, self.block_records)
+            self.assertIs(grades[other_user.id][0].visible_blocks, grades[self.user.id][0].visible_blocks)
+
     def _assert_tracker_emitted_event(self, tracker_mock, grade):
         """
         Helper function to ensure that the mocked event tracker
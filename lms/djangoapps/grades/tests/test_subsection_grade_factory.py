@@ -7,13 +7,14 @@ import ddt
 from django.conf import settings
 from mock import patch
 
+from lms.djangoapps.courseware.model_data import set_score
 from lms.djangoapps.courseware.tests.test_submitting_problems import ProblemSubmissionTestMixin
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from common.djangoapps.student.tests.factories import UserFactory
 
 from ..constants import GradeOverrideFeatureEnum
 from ..models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
-from ..subsection_grade_factory import ZeroSubsectionGrade
+from ..subsection_grade_factory import ZeroSubsectionGrade, clear_prefetched_scores, prefetch_scores
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -74,6 +75,19 @@ class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
         # ensure a grade has been persisted
         self.assertEqual(1, len(PersistentSubsectionGrade.objects.all()))
 
+    def test_prefetched_scores(self):
+        unscored_location = self.course.id.make_usage_key('problem', 'unscored')
+        set_score(self.request.user.id, self.problem.location, 1, 2)
+        prefetch_scores(self.course.id, [self.request.user], [self.problem.location, unscored_location])
+        self.addCleanup(clear_prefetched_scores, self.course.id, [self.request.user])
+
+        with self.assertNumQueries(0):
+            csm_scores = self.subsection_grade_factory._csm_scores  # pylint: disable=protected-access
+            submissions_scores = self.subsection_grade_factory._submissions_scores  # pylint: disable=protected-access
+        self.assertEqual(csm_scores.get(self.problem.location)[:2], (1, 2))
+        self.assertIsNone(csm_scores.get(unscored_location))
+        self.assertEqual(submissions_scores, {})
+
     def test_update_if_higher_zero_denominator(self):
         """
         Test that we get an updated score of 0, and not a ZeroDivisionError,
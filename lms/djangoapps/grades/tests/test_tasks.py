@@ -12,7 +12,9 @@ import ddt
 import pytz
 import six
 from django.conf import settings
+from django.core.cache import cache
 from django.db.utils import IntegrityError
+from django.test.utils import override_settings
 from django.utils import timezone
 from mock import MagicMock, patch
 from six.moves import range
@@ -20,9 +22,17 @@ from six.moves import range
 from edx_toggles.toggles.testutils import override_waffle_flag
 from lms.djangoapps.grades import tasks
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
-from lms.djangoapps.grades.config.waffle import ENFORCE_FREEZE_GRADE_AFTER_COURSE_END, waffle_flags
+from lms.djangoapps.grades.config.waffle import (
+    COALESCE_GRADE_RECALCULATION,
+    ENFORCE_FREEZE_GRADE_AFTER_COURSE_END,
+    waffle_flags
+)
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
-from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
+from lms.djangoapps.grades.models import (
+    PersistentCourseGrade,
+    PersistentSubsectionGrade,
+    QueuedSubsectionGradeUpdate
+)
 from lms.djangoapps.grades.services import GradesService
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
 from lms.djangoapps.grades.tasks import (
@@ -31,6 +41,8 @@ from lms.djangoapps.grades.tasks import (
     compute_all_grades_for_course,
     compute_grades_for_course,
     compute_grades_for_course_v2,
+    queue_subsection_update,
+    recalculate_coalesced_subsection_grades,
     recalculate_subsection_grade_v3
 )
 from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
@@ -494,6 +506,158 @@ class RecalculateGradesForUserTest(HasCourseWithProblemsMixin, ModuleStoreTestCa
             self.assertFalse(factory.update.called)
 
 
+class RecalculateCoalescedSubsectionGradesTest(HasCourseWithProblemsMixin, ModuleStoreTestCase):
+    """
+    Test recalculate_coalesced_subsection_grades task.
+    """
+    ENABLED_SIGNALS = ['course_published', 'pre_publish']
+
+    def setUp(self):
+        super(RecalculateCoalescedSubsectionGradesTest, self).setUp()
+        self.user = UserFactory.create()
+        self.other_user = UserFactory.create()
+        PersistentGradesEnabledFlag.objects.create(enabled_for_all_courses=True, enabled=True)
+        self.set_up_course(create_multiple_subsections=True)
+        CourseEnrollment.enroll(self.user, self.course.id)
+        CourseEnrollment.enroll(self.other_user, self.course.id)
+        self.other_problem = ItemFactory.create(parent=self.sequential, category='problem')
+
+    def _queue_update(self, user, problem, **kwargs):
+        """
+        Queues an update of the subsection grade of the given problem and user,
+        while mocking the scheduling of the task.
+        """
+        update_kwargs = dict(
+            self.recalculate_subsection_grade_kwargs,
+            user_id=user.id,
+            usage_id=six.text_type(problem.location),
+            **kwargs
+        )
+        with patch(
+            'lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades.apply_async'
+        ) as mock_task_apply:
+            queue_subsection_update(**update_kwargs)
+        return mock_task_apply
+
+    def _recalculate(self):
+        """
+        Runs the task, with the scores of all the problems found in the database,
+        while mocking the scheduling of the next task.
+        """
+        with patch("lms.djangoapps.grades.tasks.get_score", return_value=MagicMock(modified=self.frozen_now_datetime)):
+            with mock_get_score(1, 2):
+                with patch(
+                    'lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades.apply_async'
+                ) as mock_task_apply:
+                    recalculate_coalesced_subsection_grades.apply(kwargs={'course_id': six.text_type(self.course.id)})
+        return mock_task_apply
+
+    def test_triggered_by_problem_weighted_score_change(self):
+        with override_waffle_flag(waffle_flags()[COALESCE_GRADE_RECALCULATION], active=True):
+            with patch(
+                'lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades.apply_async'
+            ) as mock_task_apply:
+                with patch('lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async') as mock_v3_apply:
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **self.problem_weighted_score_changed_kwargs)
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **self.problem_weighted_score_changed_kwargs)
+
+        mock_task_apply.assert_called_once_with(
+            kwargs={'course_id': six.text_type(self.course.id)},
+            countdown=settings.GRADES_RECALCULATION_COALESCING_WINDOW_SECONDS,
+        )
+        self.assertFalse(mock_v3_apply.called)
+
+    @patch('lms.djangoapps.grades.tasks.SUBSECTION_SCORE_CHANGED.send')
+    def test_updates_each_subsection_grade_once(self, mock_subsection_signal):
+        self.assertTrue(self._queue_update(self.user, self.problem).called)
+        self.assertFalse(self._queue_update(self.user, self.other_problem).called)
+        self.assertFalse(self._queue_update(self.user, self.problem).called)
+        self.assertFalse(self._queue_update(self.other_user, self.problem).called)
+
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+
+        self.assertEqual(mock_update.call_count, 2)
+        self.assertEqual(mock_subsection_signal.call_count, 2)
+        self.assertEqual(
+            {call[1]['user'] for call in mock_subsection_signal.call_args_list},
+            {self.user, self.other_user},
+        )
+
+    def test_persists_subsection_grades(self):
+        self._queue_update(self.user, self.problem)
+        self._queue_update(self.other_user, self.other_problem)
+        self._recalculate()
+        self.assertEqual(
+            set(PersistentSubsectionGrade.objects.filter(course_id=self.course.id).values_list('user_id', flat=True)),
+            {self.user.id, self.other_user.id},
+        )
+
+    def test_merges_update_flags(self):
+        self._queue_update(self.user, self.problem, only_if_higher=True)
+        self._queue_update(self.user, self.other_problem, only_if_higher=False, score_deleted=True)
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertEqual(mock_update.call_args[0][1:], (False, True, False))
+
+    def test_queue_kept_in_database(self):
+        self._queue_update(self.user, self.problem)
+        cache.clear()
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+        self.assertTrue(mock_update.called)
+        self.assertFalse(QueuedSubsectionGradeUpdate.objects.exists())
+
+    @override_settings(GRADES_RECALCULATION_BATCH_SIZE=1)
+    def test_performs_a_batch_per_task(self):
+        self._queue_update(self.user, self.problem)
+        self._queue_update(self.other_user, self.problem)
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            mock_task_apply = self._recalculate()
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertTrue(mock_task_apply.called)
+        self.assertEqual(QueuedSubsectionGradeUpdate.objects.count(), 1)
+
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+        self.assertEqual(mock_update.call_count, 1)
+        self.assertFalse(QueuedSubsectionGradeUpdate.objects.exists())
+
+    def test_interrupted_batch_kept(self):
+        self._queue_update(self.user, self.problem)
+        with patch(
+            'lms.djangoapps.grades.tasks._update_coalesced_subsection_grades', side_effect=KeyboardInterrupt
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                with patch('lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades.apply_async'):
+                    with patch(
+                        "lms.djangoapps.grades.tasks.get_score",
+                        return_value=MagicMock(modified=self.frozen_now_datetime),
+                    ):
+                        recalculate_coalesced_subsection_grades(six.text_type(self.course.id))
+        self.assertEqual(QueuedSubsectionGradeUpdate.objects.count(), 1)
+
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+        self.assertTrue(mock_update.called)
+
+    def test_requeued_when_db_not_updated(self):
+        self._queue_update(self.user, self.problem)
+        with patch('lms.djangoapps.grades.tasks.get_score', return_value=None):
+            with patch(
+                'lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades.apply_async'
+            ) as mock_task_apply:
+                with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+                    recalculate_coalesced_subsection_grades.apply(kwargs={'course_id': six.text_type(self.course.id)})
+        self.assertFalse(mock_update.called)
+        self.assertTrue(mock_task_apply.called)
+
+        with patch('lms.djangoapps.grades.tasks.SubsectionGradeFactory.update') as mock_update:
+            self._recalculate()
+        self.assertTrue(mock_update.called)
+
+
 @ddt.ddt
 class FreezeGradingAfterCourseEndTest(HasCourseWithProblemsMixin, ModuleStoreTestCase):
     """
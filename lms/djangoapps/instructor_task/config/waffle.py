@@ -12,6 +12,9 @@ WAFFLE_SWITCHES = WaffleSwitchNamespace(name=WAFFLE_NAMESPACE)
 
 # Waffle switches
 OPTIMIZE_GET_LEARNERS_FOR_COURSE = 'optimize_get_learners_for_course'
+STREAM_COURSE_GRADE_REPORT = 'stream_course_grade_report'
+SHARD_GRADE_REPORTS = 'shard_grade_reports'
+PARTITION_RESCORE_TASKS = 'partition_rescore_tasks'
 
 # Course override flags
 GENERATE_PROBLEM_GRADE_REPORT_VERIFIED_ONLY = 'generate_problem_grade_report_verified_only'
@@ -43,6 +46,31 @@ def optimize_get_learners_switch_enabled():
     return WAFFLE_SWITCHES.is_enabled(OPTIMIZE_GET_LEARNERS_FOR_COURSE)
 
 
+def stream_course_grade_report_switch_enabled():
+    """
+    Returns True if course grade reports should be uploaded as they are
+    generated, and resumed from their last checkpoint when retried,
+    otherwise False.
+    """
+    return WAFFLE_SWITCHES.is_enabled(STREAM_COURSE_GRADE_REPORT)
+
+
+def shard_grade_reports_switch_enabled():
+    """
+    Returns True if course and problem grade reports should be generated by
+    subtasks grading shards of the enrolled learners, otherwise False.
+    """
+    return WAFFLE_SWITCHES.is_enabled(SHARD_GRADE_REPORTS)
+
+
+def partition_rescore_tasks_switch_enabled():
+    """
+    Returns True if problems should be rescored for all students by subtasks
+    rescoring partitions of their StudentModules, otherwise False.
+    """
+    return WAFFLE_SWITCHES.is_enabled(PARTITION_RESCORE_TASKS)
+
+
 def problem_grade_report_verified_only(course_id):
     """
     Returns True if problem grade reports should only
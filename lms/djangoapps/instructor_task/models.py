@@ -20,13 +20,15 @@ import hashlib
 import json
 import logging
 import os.path
+import shutil
+from tempfile import TemporaryFile
 from uuid import uuid4
 
 import six
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -152,10 +154,13 @@ class InstructorTask(models.Model):
         return json_output
 
     @staticmethod
-    def create_output_for_failure(exception, traceback_string):
+    def create_output_for_failure(exception, traceback_string, checkpoint=None):
         """
         Converts failed result information to output format.
 
+        If a checkpoint is given, it is included in the output, so that a
+        retried task can still resume from it.
+
         Traceback information is truncated or not included if it would result in an output string
         that would not fit in the database.  If the output is still too long, then the
         exception message is also truncated.
@@ -167,6 +172,8 @@ class InstructorTask(models.Model):
         if traceback_string is not None:
             # truncate any traceback that goes into the InstructorTask model:
             task_progress['traceback'] = traceback_string
+        if checkpoint is not None:
+            task_progress['checkpoint'] = checkpoint
         json_output = json.dumps(task_progress)
         # if the resulting output is too long, then first shorten the
         # traceback, and then the message, until it fits.
@@ -305,6 +312,65 @@ class DjangoStorageReportStore(ReportStore):
         output_buffer.seek(0)
         self.store(course_id, filename, output_buffer, parent_dir)
 
+    def store_segment_rows(self, course_id, filename, segment_index, rows, parent_dir=''):
+        """
+        Given a course_id, filename, segment_index and rows, write the rows
+        in csv format as the segment_index-th segment of the file named
+        `filename`, replacing any segment previously stored at that index.
+        The file itself is only written by `assemble_segments`, so that
+        large reports can be stored as their rows are generated.
+        """
+        segment_path = self.path_to(course_id, self._segment_filename(filename, segment_index), parent_dir)
+        if self.storage.exists(segment_path):
+            self.storage.delete(segment_path)
+        self.store_rows(course_id, self._segment_filename(filename, segment_index), rows, parent_dir)
+
+    def assemble_segments(self, course_id, filename, num_segments, parent_dir=''):
+        """
+        Write the file named `filename` from its first `num_segments`
+        segments, in order, then delete the segments.  The segments are
+        concatenated through a temporary file, so that the whole file is
+        never held in memory.
+        """
+        segment_paths = [
+            self.path_to(course_id, self._segment_filename(filename, segment_index), parent_dir)
+            for segment_index in range(num_segments)
+        ]
+        path = self.path_to(course_id, filename, parent_dir)
+        if segment_paths and not self.storage.exists(segment_paths[0]) and self.storage.exists(path):
+            # The segments were assembled, and are being deleted, by an
+            # earlier attempt which was interrupted.
+            self.delete_segments(course_id, filename, num_segments, parent_dir)
+            return
+
+        with TemporaryFile() as assembled_file:
+            for segment_path in segment_paths:
+                with self.storage.open(segment_path, 'rb') as segment_file:
+                    shutil.copyfileobj(segment_file, assembled_file)
+            assembled_file.seek(0)
+
+            if self.storage.exists(path):
+                self.storage.delete(path)
+            self.storage.save(path, File(assembled_file))
+
+        self.delete_segments(course_id, filename, num_segments, parent_dir)
+
+    def delete_segments(self, course_id, filename, num_segments, parent_dir=''):
+        """
+        Delete the first `num_segments` segments of the file named `filename`.
+        """
+        for segment_index in range(num_segments):
+            segment_path = self.path_to(course_id, self._segment_filename(filename, segment_index), parent_dir)
+            if self.storage.exists(segment_path):
+                self.storage.delete(segment_path)
+
+    def _segment_filename(self, filename, segment_index):
+        """
+        Return the name of a segment of the given file.  Segments are kept in
+        a directory of their own, so they are not listed by `links_for`.
+        """
+        return os.path.join(u'{}.segments'.format(filename), u'{:06d}.csv'.format(segment_index))
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples.
@@ -29,13 +29,23 @@ from django.utils.translation import ugettext_noop
 from edx_django_utils.monitoring import set_code_owner_attribute
 
 from lms.djangoapps.bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.waffle import (
+    partition_rescore_tasks_switch_enabled,
+    shard_grade_reports_switch_enabled,
+    stream_course_grade_report_switch_enabled
+)
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
     upload_may_enroll_csv,
     upload_students_csv
 )
-from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport, ProblemGradeReport, ProblemResponses
+from lms.djangoapps.instructor_task.tasks_helper.grades import (
+    CourseGradeReport,
+    ProblemGradeReport,
+    ProblemResponses,
+    ShardedGradeReport
+)
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
     upload_course_survey_report,
@@ -47,6 +57,8 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     override_score_module_state,
     perform_module_state_update,
+    perform_module_state_update_partition,
+    perform_partitioned_module_state_update,
     rescore_problem_module_state,
     reset_attempts_module_state
 )
@@ -54,6 +66,11 @@ from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Streamed course grade reports resume from their checkpoint when retried,
+# and the shards of grade reports generated by subtasks are retried alone.
+GRADE_REPORT_MAX_RETRIES = 3
+GRADE_REPORT_RETRY_DELAY_SECONDS = 60
+
 
 @task(base=BaseInstructorTask)
 def rescore_problem(entry_id, xmodule_instance_args):
@@ -78,10 +95,42 @@ def rescore_problem(entry_id, xmodule_instance_args):
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    if partition_rescore_tasks_switch_enabled():
+        visit_fcn = partial(
+            perform_partitioned_module_state_update,
+            update_fcn,
+            None,
+            partial(_create_rescore_problem_partition_subtask, xmodule_instance_args),
+        )
+    else:
+        visit_fcn = partial(perform_module_state_update, update_fcn, None)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+@task
+@set_code_owner_attribute
+def rescore_problem_partition(entry_id, xmodule_instance_args, action_name, partition, subtask_status_dict):
+    """
+    Rescores a partition of the StudentModules of a problem rescored by subtasks.
+    """
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return perform_module_state_update_partition(
+        update_fcn, None, entry_id, action_name, partition, subtask_status_dict
+    )
+
+
+def _create_rescore_problem_partition_subtask(
+    xmodule_instance_args, entry_id, action_name, partition, subtask_status_dict
+):
+    """
+    Creates the subtask rescoring the given partition of StudentModules.
+    """
+    return rescore_problem_partition.subtask(
+        (entry_id, xmodule_instance_args, action_name, partition, subtask_status_dict),
+        task_id=subtask_status_dict['task_id'],
+    )
+
+
 @task(base=BaseInstructorTask)
 def override_problem_score(entry_id, xmodule_instance_args):
     """
@@ -175,11 +224,22 @@ def calculate_problem_responses_csv(entry_id, xmodule_instance_args):
     return run_main_task(entry_id, task_fn, action_name)
 
 
-@task(base=BaseInstructorTask)
+@task(
+    bind=True,
+    base=BaseInstructorTask,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    default_retry_delay=GRADE_REPORT_RETRY_DELAY_SECONDS,
+    max_retries=GRADE_REPORT_MAX_RETRIES,
+)
 @set_code_owner_attribute
-def calculate_grades_csv(entry_id, xmodule_instance_args):
+def calculate_grades_csv(self, entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    When the report is streamed, the task is acknowledged late and retried
+    on errors, so that a redelivered or retried task resumes the report from
+    the checkpoint saved by the interrupted attempt.
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('graded')
@@ -188,8 +248,17 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
-    return run_main_task(entry_id, task_fn, action_name)
+    task_fn = _grade_report_task_fn(CourseGradeReport, xmodule_instance_args)
+    try:
+        return run_main_task(entry_id, task_fn, action_name)
+    except Exception as exc:  # pylint: disable=broad-except
+        if not stream_course_grade_report_switch_enabled() or shard_grade_reports_switch_enabled():
+            raise
+        TASK_LOG.warning(
+            u"Task: %s, InstructorTask ID: %s, Task type: %s, Retrying from checkpoint after error: %s",
+            xmodule_instance_args.get('task_id'), entry_id, action_name, exc
+        )
+        raise self.retry(exc=exc)
 
 
 @task(base=BaseInstructorTask)
@@ -206,10 +275,65 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(ProblemGradeReport.generate, xmodule_instance_args)
+    task_fn = _grade_report_task_fn(ProblemGradeReport, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(bind=True, default_retry_delay=GRADE_REPORT_RETRY_DELAY_SECONDS, max_retries=GRADE_REPORT_MAX_RETRIES)
+@set_code_owner_attribute
+def calculate_grade_report_shard(self, entry_id, xmodule_instance_args, action_name, shard, subtask_status_dict):
+    """
+    Grade a shard of the students of a course, for a grade report generated
+    by subtasks, and assemble the report if this is the last shard graded.
+
+    A shard failing to be graded is retried, with exponential backoff, before
+    its failure fails the report.
+    """
+    def _retry_shard(retry_subtask_status_dict, exc):
+        """
+        Retries the subtask of the shard, with the given status.
+        """
+        return self.retry(
+            args=[entry_id, xmodule_instance_args, action_name, shard, retry_subtask_status_dict],
+            exc=exc,
+            countdown=(2 ** self.request.retries) * GRADE_REPORT_RETRY_DELAY_SECONDS,
+        )
+
+    return ShardedGradeReport.generate_shard(
+        xmodule_instance_args,
+        entry_id,
+        action_name,
+        shard,
+        subtask_status_dict,
+        retry_shard=_retry_shard if self.request.retries < self.max_retries else None,
+    )
+
+
+def _grade_report_task_fn(report_class, xmodule_instance_args):
+    """
+    Returns the task function generating a report of the given grade report
+    class, which queues subtasks grading shards of the students when enabled.
+    """
+    if shard_grade_reports_switch_enabled():
+        return partial(
+            ShardedGradeReport.queue_shards,
+            report_class,
+            _create_grade_report_shard_subtask,
+            xmodule_instance_args,
+        )
+    return partial(report_class.generate, xmodule_instance_args)
+
+
+def _create_grade_report_shard_subtask(entry_id, xmodule_instance_args, action_name, shard, subtask_status_dict):
+    """
+    Creates the subtask grading the given shard of a grade report.
+    """
+    return calculate_grade_report_shard.subtask(
+        (entry_id, xmodule_instance_args, action_name, shard, subtask_status_dict),
+        task_id=subtask_status_dict['task_id'],
+    )
+
+
 @task(base=BaseInstructorTask)
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
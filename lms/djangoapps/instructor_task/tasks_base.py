@@ -3,6 +3,7 @@ Base class for Instructor celery tasks.
 """
 
 
+import json
 import logging
 
 from celery import Task
@@ -82,7 +83,8 @@ class BaseInstructorTask(Task):
                'traceback': traceback information (truncated if necessary)
 
         Note that there is no way to record progress made within the task (e.g. attempted,
-        succeeded, etc.) when such failures occur.
+        succeeded, etc.) when such failures occur.  However, any checkpoint saved by the
+        task in the task_output is kept, so that a redelivered task can still resume from it.
         """
         TASK_LOG.debug(u'Task %s: failure returned', task_id)
         entry_id = args[0]
@@ -94,6 +96,9 @@ class BaseInstructorTask(Task):
             TASK_LOG.error(u"Task (%s) has no InstructorTask object for id %s", task_id, entry_id)
         else:
             TASK_LOG.warning(u"Task (%s) failed", task_id, exc_info=True)
-            entry.task_output = InstructorTask.create_output_for_failure(einfo.exception, einfo.traceback)
+            checkpoint = json.loads(entry.task_output or '{}').get('checkpoint')
+            entry.task_output = InstructorTask.create_output_for_failure(
+                einfo.exception, einfo.traceback, checkpoint=checkpoint,
+            )
             entry.task_state = FAILURE
             entry.save_now()
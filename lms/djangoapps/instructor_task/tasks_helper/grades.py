@@ -2,14 +2,16 @@
 Functionality for generating grade reports.
 """
 
+import json
 import logging
 from collections import OrderedDict, defaultdict
 from datetime import datetime
-from itertools import chain
+from itertools import chain, count
 from time import time
 
 import re
 import six
+from celery.states import FAILURE, RETRY, SUCCESS
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -34,6 +36,14 @@ from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     optimize_get_learners_switch_enabled,
     problem_grade_report_verified_only,
+    stream_course_grade_report_switch_enabled,
+)
+from lms.djangoapps.instructor_task.models import PROGRESS, InstructorTask
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
 )
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
@@ -47,7 +57,7 @@ from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import SegmentedCsvReportUpload, upload_csv_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -233,6 +243,7 @@ class _CourseGradeReportContext(object):
             task_input=_task_input,
         )
         self.action_name = action_name
+        self.entry_id = _entry_id
         self.course_id = course_id
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
         self.report_for_verified_only = course_grade_report_verified_only(self.course_id)
@@ -302,6 +313,29 @@ class _CourseGradeReportContext(object):
         TASK_LOG.info(u'%s, Task type: %s, %s', self.task_info_string, self.action_name, message)
         return self.task_progress.update_task_state(extra_meta={'step': message})
 
+    @lazy
+    def checkpoint(self):
+        """
+        Returns the checkpoint saved in the InstructorTask entry by an earlier,
+        interrupted attempt of this task, or None.
+        """
+        if self.entry_id is None:
+            return None
+        task_output = InstructorTask.objects.get(pk=self.entry_id).task_output
+        return json.loads(task_output or '{}').get('checkpoint')
+
+    def save_checkpoint(self, checkpoint):
+        """
+        Saves the given checkpoint, along with the current task progress, in
+        the InstructorTask entry.
+        """
+        self.checkpoint = checkpoint
+        if self.entry_id is not None:
+            task_output = dict(self.task_progress.state, checkpoint=checkpoint)
+            InstructorTask.objects.filter(pk=self.entry_id).update(
+                task_output=InstructorTask.create_output_for_success(task_output),
+            )
+
 
 class _ProblemGradeReportContext(object):
     """
@@ -440,6 +474,10 @@ class CourseGradeReport(object):
         context.update_status(u'Starting grades')
         success_headers = self._success_headers(context)
         error_headers = self._error_headers()
+        if stream_course_grade_report_switch_enabled():
+            self._stream(context, success_headers, error_headers)
+            return context.update_status(u'Completed grades')
+
         batched_rows = self._batched_rows(context)
 
         context.update_status(u'Compiling grades')
@@ -479,6 +517,71 @@ class CourseGradeReport(object):
             users = [u for u in users if u is not None]
             yield self._rows_for_users(context, users)
 
+    def _stream(self, context, success_headers, error_headers):
+        """
+        Uploads the rows of this report in segments, one batch of users at a
+        time, instead of holding all the rows in memory.  A checkpoint is
+        saved after each batch, so that a retried task resumes after the last
+        user whose rows were uploaded.
+        """
+        checkpoint = context.checkpoint or {}
+        if checkpoint:
+            TASK_LOG.info(
+                u'%s, Task type: %s, Resuming grades after user %s',
+                context.task_info_string,
+                context.action_name,
+                checkpoint['last_user_id'],
+            )
+        timestamp = checkpoint.get('timestamp', int(time()))
+        date = datetime.fromtimestamp(timestamp, UTC)
+        success_upload = SegmentedCsvReportUpload(
+            success_headers,
+            context.upload_filename,
+            context.course_id,
+            date,
+            parent_dir=context.upload_parent_dir,
+            num_segments=checkpoint.get('success_segments', 0),
+        )
+        error_upload = SegmentedCsvReportUpload(
+            error_headers,
+            '{}_err'.format(context.upload_filename),
+            context.course_id,
+            date,
+            parent_dir=context.upload_parent_dir,
+            num_segments=checkpoint.get('error_segments', 0),
+        )
+        context.task_progress.succeeded = checkpoint.get('succeeded', 0)
+        context.task_progress.failed = checkpoint.get('failed', 0)
+        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+        context.task_progress.total = context.task_progress.attempted
+
+        context.update_status(u'Compiling grades')
+        for users in self._batch_users(context, after_user_id=checkpoint.get('last_user_id', 0)):
+            users = [u for u in users if u is not None]
+            success_rows, error_rows = self._rows_for_users(context, users)
+            if success_rows:
+                success_upload.upload_rows(success_rows)
+            if error_rows:
+                error_upload.upload_rows(error_rows)
+
+            context.task_progress.succeeded += len(success_rows)
+            context.task_progress.failed += len(error_rows)
+            context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
+            context.task_progress.total = context.task_progress.attempted
+            context.save_checkpoint({
+                'timestamp': timestamp,
+                'last_user_id': max(user.id for user in users),
+                'success_segments': success_upload.num_segments,
+                'error_segments': error_upload.num_segments,
+                'succeeded': context.task_progress.succeeded,
+                'failed': context.task_progress.failed,
+            })
+
+        context.update_status(u'Uploading grades')
+        success_upload.complete()
+        if error_upload.num_segments:
+            error_upload.complete()
+
     def _compile(self, context, batched_rows):
         """
         Compiles and returns the complete list of (success_rows, error_rows) for
@@ -529,9 +632,10 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, after_user_id=None):
         """
-        Returns a generator of batches of users.
+        Returns a generator of batches of users.  If after_user_id is given,
+        only the users with a greater id are returned, in order of id.
         """
 
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
@@ -564,6 +668,8 @@ class CourseGradeReport(object):
                 include_inactive=True,
                 verified_only=verified_only,
             )
+            if after_user_id is not None:
+                users = users.filter(id__gt=after_user_id).order_by('id')
             users = users.select_related('profile')
             return grouper(users)
 
@@ -578,6 +684,8 @@ class CourseGradeReport(object):
             }
             if verified_only:
                 filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+            if after_user_id is not None:
+                filter_kwargs['id__gt'] = after_user_id
 
             user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
             user_chunks = grouper(user_ids_list)
@@ -845,6 +953,212 @@ class ProblemGradeReport(GradeReportBase):
             get_cache(CourseEnrollment.MODE_CACHE_NAMESPACE).clear()
 
 
+class ShardedGradeReport(object):
+    """
+    Generates a CourseGradeReport or ProblemGradeReport with subtasks: the
+    enrolled users are sharded by user id range, each shard is graded by a
+    subtask which uploads the rows of its users as a segment of the report,
+    and the last subtask to complete assembles the segments, in order, into
+    the report.  Progress is tracked in the InstructorTask, as for other
+    tasks with subtasks.
+    """
+    USER_BATCH_SIZE = 100
+
+    REPORTS = {
+        'CourseGradeReport': (CourseGradeReport, _CourseGradeReportContext),
+        'ProblemGradeReport': (ProblemGradeReport, _ProblemGradeReportContext),
+    }
+
+    @classmethod
+    def queue_shards(
+        cls, report_class, create_shard_subtask, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name
+    ):
+        """
+        Queues the subtasks which generate a report of the given class.
+
+        Arguments:
+            create_shard_subtask: A function of the arguments of
+                `generate_shard`, which creates the subtask of a shard.
+        """
+        _, context_class = cls.REPORTS[report_class.__name__]
+        context = context_class(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+        users = cls._enrolled_users(context).order_by('id')
+        total_num_users = users.count()
+        if total_num_users == 0:
+            # There is nothing to shard: generate the report, with its headers only.
+            return report_class.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        shard_indexes = count()
+        timestamp = int(time())
+
+        def _create_shard_subtask(user_items, initial_subtask_status):
+            """
+            Creates the subtask of the shard of the given users.
+            """
+            shard = {
+                'report': report_class.__name__,
+                'index': next(shard_indexes),
+                'first_user_id': user_items[0]['pk'],
+                'last_user_id': user_items[-1]['pk'],
+                'num_users': len(user_items),
+                'timestamp': timestamp,
+            }
+            return create_shard_subtask(
+                _entry_id, _xmodule_instance_args, action_name, shard, initial_subtask_status.to_dict(),
+            )
+
+        return queue_subtasks_for_query(
+            InstructorTask.objects.get(pk=_entry_id),
+            action_name,
+            _create_shard_subtask,
+            [users],
+            [],
+            settings.GRADE_REPORT_USERS_PER_SHARD,
+            total_num_users,
+        )
+
+    @classmethod
+    def generate_shard(
+        cls, _xmodule_instance_args, _entry_id, action_name, shard, subtask_status_dict, retry_shard=None
+    ):
+        """
+        Uploads the rows of the users of the given shard, and assembles the
+        report if this is the last shard to complete.  Returns the status of
+        the subtask.
+
+        Arguments:
+            retry_shard: A function of the status of the subtask and of the
+                error it failed with, which retries the subtask, or None if
+                the subtask cannot be retried.  A shard whose subtask is
+                retried is only recorded as failed once it cannot be retried.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        check_subtask_is_valid(_entry_id, subtask_status.task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        report_class, context_class = cls.REPORTS[shard['report']]
+        report = report_class()
+        context = context_class(
+            _xmodule_instance_args, _entry_id, entry.course_id, json.loads(entry.task_input), action_name,
+        )
+        try:
+            with modulestore().bulk_operations(context.course_id):
+                users = list(
+                    cls._enrolled_users(context).filter(
+                        id__gte=shard['first_user_id'],
+                        id__lte=shard['last_user_id'],
+                    ).order_by('id').select_related('profile')
+                )
+                success_rows, error_rows = [], []
+                for index in range(0, len(users), cls.USER_BATCH_SIZE):
+                    batch_success_rows, batch_error_rows = report._rows_for_users(  # pylint: disable=protected-access
+                        context, users[index:index + cls.USER_BATCH_SIZE],
+                    )
+                    success_rows.extend(batch_success_rows)
+                    error_rows.extend(batch_error_rows)
+                    # Clear the CourseEnrollment caches after each batch of users has been processed
+                    get_cache('get_enrollment').clear()
+                    get_cache(CourseEnrollment.MODE_CACHE_NAMESPACE).clear()
+
+                # Segment 0 of the report holds its headers.
+                success_upload, error_upload = cls._uploads(context, shard['timestamp'])
+                success_upload.upload_segment(shard['index'] + 1, success_rows)
+                error_upload.upload_segment(shard['index'] + 1, error_rows)
+        except Exception as exc:
+            TASK_LOG.exception(u'%s, Task type: %s, Shard %s failed', context.task_info_string, action_name, shard)
+            if retry_shard is not None:
+                subtask_status.increment(retried_withmax=1, state=RETRY)
+                update_subtask_status(_entry_id, subtask_status.task_id, subtask_status, complete_task=False)
+                raise retry_shard(subtask_status.to_dict(), exc)
+            subtask_status.increment(failed=shard['num_users'], state=FAILURE)
+            cls._complete_shard(report, context, shard, subtask_status)
+            raise
+
+        subtask_status.increment(succeeded=len(success_rows), failed=len(error_rows), state=SUCCESS)
+        cls._complete_shard(report, context, shard, subtask_status)
+        return subtask_status.to_dict()
+
+    @classmethod
+    def _complete_shard(cls, report, context, shard, subtask_status):
+        """
+        Records the status of the subtask of the given shard and, if it was the
+        last shard to complete, assembles the report and completes the task.
+        The report is only assembled if all shards succeeded.
+        """
+        if not update_subtask_status(context.entry_id, subtask_status.task_id, subtask_status, complete_task=False):
+            return
+        # A redelivered subtask may also find no shard remaining: only the shard
+        # which moves the task out of progress completes it.
+        claimed = InstructorTask.objects.filter(pk=context.entry_id, task_state=PROGRESS).update(task_state=FAILURE)
+        if not claimed:
+            return
+
+        entry = InstructorTask.objects.get(pk=context.entry_id)
+        subtasks = json.loads(entry.subtasks)
+        task_progress = json.loads(entry.task_output)
+        num_segments = subtasks['total'] + 1
+        entry.task_state = FAILURE
+        try:
+            if subtasks['failed']:
+                for upload in cls._uploads(context, shard['timestamp'], num_segments):
+                    upload.discard()
+            else:
+                success_upload, error_upload = cls._uploads(
+                    context,
+                    shard['timestamp'],
+                    num_segments,
+                    report._success_headers(context),  # pylint: disable=protected-access
+                    report._error_headers(),  # pylint: disable=protected-access
+                )
+                success_upload.upload_segment(0, [])
+                success_upload.complete()
+                if task_progress['failed']:
+                    error_upload.upload_segment(0, [])
+                    error_upload.complete()
+                else:
+                    error_upload.discard()
+                entry.task_state = SUCCESS
+        finally:
+            entry.save_now()
+
+    @staticmethod
+    def _uploads(context, timestamp, num_segments=0, success_headers=None, error_headers=None):
+        """
+        Returns the SegmentedCsvReportUploads of the success and error CSVs of
+        the report.
+        """
+        date = datetime.fromtimestamp(timestamp, UTC)
+        return (
+            SegmentedCsvReportUpload(
+                success_headers,
+                context.upload_filename,
+                context.course_id,
+                date,
+                parent_dir=context.upload_parent_dir,
+                num_segments=num_segments,
+            ),
+            SegmentedCsvReportUpload(
+                error_headers,
+                '{}_err'.format(context.upload_filename),
+                context.course_id,
+                date,
+                parent_dir=context.upload_parent_dir,
+                num_segments=num_segments,
+            ),
+        )
+
+    @staticmethod
+    def _enrolled_users(context):
+        """
+        Returns a queryset of the users enrolled in the course of the report.
+        """
+        return CourseEnrollment.objects.users_enrolled_in(
+            context.course_id,
+            include_inactive=True,
+            verified_only=context.report_for_verified_only,
+        )
+
+
 class ProblemResponses(object):
     """
     Class to encapsulate functionality related to generating Problem Responses Reports.
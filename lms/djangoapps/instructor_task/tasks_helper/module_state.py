@@ -5,9 +5,12 @@ Instructor Tasks related to module state.
 
 import json
 import logging
+from itertools import count
 from time import time
 
 import six
+from celery.states import FAILURE, SUCCESS
+from django.conf import settings
 from django.utils.translation import ugettext_noop
 from opaque_keys.edx.keys import UsageKey
 from xblock.runtime import KvsFieldData
@@ -26,6 +29,8 @@ from common.djangoapps.util.db import outer_atomic
 from xmodule.modulestore.django import modulestore
 
 from ..exceptions import UpdateProblemModuleStateError
+from ..models import InstructorTask
+from ..subtasks import SubtaskStatus, check_subtask_is_valid, queue_subtasks_for_query, update_subtask_status
 from .runner import TaskProgress
 from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED, UPDATE_STATUS_SUCCEEDED
 
@@ -61,26 +66,9 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
 
     """
     start_time = time()
-    usage_keys = []
-    problem_url = task_input.get('problem_url')
-    entrance_exam_url = task_input.get('entrance_exam_url')
     student_identifier = task_input.get('student')
     override_score_task = action_name == ugettext_noop('overridden')
-    problems = {}
-
-    # if problem_url is present make a usage key from it
-    if problem_url:
-        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
-        usage_keys.append(usage_key)
-
-        # find the problem descriptor:
-        problem_descriptor = modulestore().get_item(usage_key)
-        problems[six.text_type(usage_key)] = problem_descriptor
-
-    # if entrance_exam is present grab all problems in it
-    if entrance_exam_url:
-        problems = get_problems_in_section(entrance_exam_url)
-        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
 
     modules_to_update = _get_modules_to_update(
         course_id, usage_keys, student_identifier, filter_fcn, override_score_task
@@ -109,11 +97,114 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     return task_progress.update_task_state()
 
 
+def perform_partitioned_module_state_update(
+    update_fcn, filter_fcn, create_partition_subtask, _entry_id, course_id, task_input, action_name
+):
+    """
+    Performs the update of `perform_module_state_update` with subtasks: the StudentModules to update
+    are partitioned by id range, in partitions of `settings.MODULE_STATE_UPDATES_PER_SUBTASK`, and each
+    partition is updated by a subtask calling `perform_module_state_update_partition`.  The progress
+    of the subtasks is aggregated in the InstructorTask, as for other tasks with subtasks.
+
+    `create_partition_subtask` is a function of the `_entry_id`, `action_name`, `partition` and
+    `subtask_status_dict` arguments of `perform_module_state_update_partition`, which creates the
+    subtask updating a partition.
+
+    The modules of a single student are updated by this task, as by `perform_module_state_update`.
+    """
+    if task_input.get('student'):
+        return perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name)
+
+    usage_keys, __ = _get_problems_to_update(course_id, task_input)
+    modules_to_update = _get_modules_to_update(course_id, usage_keys, None, filter_fcn).order_by('id')
+    total_num_modules = modules_to_update.count()
+    if total_num_modules == 0:
+        # There is nothing to partition.
+        return TaskProgress(action_name, 0, time()).update_task_state()
+
+    partition_indexes = count()
+
+    def _create_partition_subtask(module_items, initial_subtask_status):
+        """
+        Creates the subtask updating the partition of the given StudentModules.
+        """
+        partition = {
+            'index': next(partition_indexes),
+            'first_module_id': module_items[0]['pk'],
+            'last_module_id': module_items[-1]['pk'],
+        }
+        return create_partition_subtask(_entry_id, action_name, partition, initial_subtask_status.to_dict())
+
+    return queue_subtasks_for_query(
+        InstructorTask.objects.get(pk=_entry_id),
+        action_name,
+        _create_partition_subtask,
+        [modules_to_update],
+        [],
+        settings.MODULE_STATE_UPDATES_PER_SUBTASK,
+        total_num_modules,
+    )
+
+
+def perform_module_state_update_partition(
+    update_fcn, filter_fcn, _entry_id, action_name, partition, subtask_status_dict
+):
+    """
+    Updates the StudentModules of a partition of a task queued by `perform_partitioned_module_state_update`,
+    and records the status of the subtask in the InstructorTask.  Returns the status of the subtask.
+
+    The problem descriptors and the course are loaded once for the partition, and `update_fcn` is
+    called for each StudentModule with its problem descriptor, the StudentModule and the task input,
+    as by `perform_module_state_update`, and with the course as its `course` keyword argument.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    check_subtask_is_valid(_entry_id, subtask_status.task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=_entry_id)
+    course_id = entry.course_id
+    task_input = json.loads(entry.task_input)
+    usage_keys, problems = _get_problems_to_update(course_id, task_input)
+    modules_to_update = _get_modules_to_update(course_id, usage_keys, None, filter_fcn).filter(
+        id__gte=partition['first_module_id'],
+        id__lte=partition['last_module_id'],
+    ).order_by('id').select_related('student')
+
+    try:
+        with modulestore().bulk_operations(course_id):
+            course = get_course_by_id(course_id)
+            for module_to_update in modules_to_update:
+                module_descriptor = problems[six.text_type(module_to_update.module_state_key)]
+                update_status = update_fcn(module_descriptor, module_to_update, task_input, course=course)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    subtask_status.increment(succeeded=1)
+                elif update_status == UPDATE_STATUS_FAILED:
+                    subtask_status.increment(failed=1)
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    subtask_status.increment(skipped=1)
+                else:
+                    raise UpdateProblemModuleStateError(
+                        u"Unexpected update_status returned: {}".format(update_status)
+                    )
+    except Exception:
+        TASK_LOG.exception(
+            u"Task: %s, InstructorTask ID: %s, Course: %s, Partition %s of %s failed",
+            subtask_status.task_id, _entry_id, course_id, partition, action_name,
+        )
+        subtask_status.increment(failed=1, state=FAILURE)
+        update_subtask_status(_entry_id, subtask_status.task_id, subtask_status)
+        raise
+
+    subtask_status.increment(state=SUCCESS)
+    update_subtask_status(_entry_id, subtask_status.task_id, subtask_status)
+    return subtask_status.to_dict()
+
+
 @outer_atomic
-def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
+def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input, course=None):
     '''
     Takes an XModule descriptor and a corresponding StudentModule object, and
-    performs rescoring on the student's problem submission.
+    performs rescoring on the student's problem submission.  The course is
+    loaded unless it is given as `course`.
 
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
@@ -128,7 +219,8 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
     usage_key = student_module.module_state_key
 
     with modulestore().bulk_operations(course_id):
-        course = get_course_by_id(course_id)
+        if course is None:
+            course = get_course_by_id(course_id)
         # TODO: Here is a call site where we could pass in a loaded course.  I
         # think we certainly need it since grading is happening here, and field
         # overrides would be important in handling that correctly
@@ -388,6 +480,34 @@ def _get_task_id_from_xmodule_args(xmodule_instance_args):
         return xmodule_instance_args.get('task_id', UNKNOWN_TASK_ID)
 
 
+def _get_problems_to_update(course_id, task_input):
+    """
+    Returns the usage keys of the problems whose modules are updated by a task with the given
+    `task_input`, and their descriptors by usage key: the problem of its `problem_url`, or the
+    problems in the section of its `entrance_exam_url`.
+    """
+    usage_keys = []
+    problem_url = task_input.get('problem_url')
+    entrance_exam_url = task_input.get('entrance_exam_url')
+    problems = {}
+
+    # if problem_url is present make a usage key from it
+    if problem_url:
+        usage_key = UsageKey.from_string(problem_url).map_into_course(course_id)
+        usage_keys.append(usage_key)
+
+        # find the problem descriptor:
+        problem_descriptor = modulestore().get_item(usage_key)
+        problems[six.text_type(usage_key)] = problem_descriptor
+
+    # if entrance_exam is present grab all problems in it
+    if entrance_exam_url:
+        problems = get_problems_in_section(entrance_exam_url)
+        usage_keys = [UsageKey.from_string(location) for location in problems.keys()]
+
+    return usage_keys, problems
+
+
 def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn, override_score_task=False):
     """
     Fetches a StudentModule instances for a given `course_id`, `student` object, and `usage_keys`.
@@ -55,6 +55,74 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     return report_name
 
 
+class SegmentedCsvReportUpload(object):
+    """
+    Uploads a CSV to the ReportStore one segment of rows at a time, so that
+    the rows of large reports need not all be held in memory, then assembles
+    the uploaded segments into the report.
+
+    Arguments:
+        headers: The header row of the CSV, written before the rows of the
+            first segment.
+        csv_name, course_id, timestamp, config_name, parent_dir: As for
+            `upload_csv_to_report_store`.
+        num_segments: The number of segments already uploaded, when resuming
+            an upload which was interrupted.
+    """
+    def __init__(
+        self, headers, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD', parent_dir='', num_segments=0
+    ):
+        self.headers = headers
+        self.csv_name = csv_name
+        self.course_id = course_id
+        self.parent_dir = parent_dir
+        self.num_segments = num_segments
+        self.report_store = ReportStore.from_config(config_name)
+        self.report_name = u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
+            course_prefix=course_filename_prefix_generator(course_id),
+            csv_name=csv_name,
+            timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+        )
+
+    def upload_rows(self, rows):
+        """
+        Uploads the given rows as the next segment of the CSV.
+        """
+        self.upload_segment(self.num_segments, rows)
+
+    def upload_segment(self, segment_index, rows):
+        """
+        Uploads the given rows as the segment_index-th segment of the CSV, for
+        CSVs whose segments are uploaded by several processes.  The headers
+        are written before the rows of the segment at index 0.
+        """
+        if segment_index == 0:
+            rows = [self.headers] + rows
+            if settings.FEATURES.get("ENABLE_SENSITIVE_DATA_MSG_FOR_DOWNLOADS"):
+                rows = [get_sensitive_message()] + rows
+
+        self.report_store.store_segment_rows(self.course_id, self.report_name, segment_index, rows, self.parent_dir)
+        self.num_segments = max(self.num_segments, segment_index + 1)
+
+    def complete(self):
+        """
+        Assembles the uploaded segments into the report, and returns the name
+        of the report.  A report with no uploaded rows only holds its headers.
+        """
+        if self.num_segments == 0:
+            self.upload_rows([])
+
+        self.report_store.assemble_segments(self.course_id, self.report_name, self.num_segments, self.parent_dir)
+        tracker_emit(self.csv_name)
+        return self.report_name
+
+    def discard(self):
+        """
+        Deletes the uploaded segments, without assembling them.
+        """
+        self.report_store.delete_segments(self.course_id, self.report_name, self.num_segments, self.parent_dir)
+
+
 def upload_zip_to_report_store(file, zip_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
     """
     Upload given file buffer as a zip file using ReportStore.
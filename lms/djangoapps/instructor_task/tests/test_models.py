@@ -69,6 +69,21 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_assemble_segments(self):
+        """
+        Test that ReportStore.assemble_segments() writes the segments of a
+        file in order, and that only the assembled file is listed.
+        """
+        report_store = self.create_report_store()
+        report_store.store_segment_rows(self.course_id, 'report.csv', 0, [['header'], ['row 1']])
+        report_store.store_segment_rows(self.course_id, 'report.csv', 1, [['stale row']])
+        report_store.store_segment_rows(self.course_id, 'report.csv', 1, [['row 2']])
+        report_store.assemble_segments(self.course_id, 'report.csv', 2)
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv')) as report_file:
+            self.assertEqual(report_file.read().decode('utf-8').splitlines(), ['header', 'row 1', 'row 2'])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
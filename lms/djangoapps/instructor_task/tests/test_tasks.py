@@ -12,17 +12,21 @@ from uuid import uuid4
 
 import ddt
 from celery.states import FAILURE, SUCCESS
+from django.test.utils import override_settings
 from django.utils.translation import ugettext_noop
 from mock import MagicMock, Mock, patch
 from opaque_keys.edx.keys import i4xEncoder
 from six.moves import range
+from waffle.testutils import override_switch
 
 from common.djangoapps.course_modes.models import CourseMode
+from lms.djangoapps.courseware.courses import get_course_by_id
 from lms.djangoapps.courseware.models import StudentModule
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
 from lms.djangoapps.instructor_task.exceptions import UpdateProblemModuleStateError
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks import (
+    calculate_grades_csv,
     delete_problem_state,
     export_ora2_data,
     export_ora2_submission_files,
@@ -31,9 +35,10 @@ from lms.djangoapps.instructor_task.tasks import (
     rescore_problem,
     reset_problem_attempts
 )
+from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport
 from lms.djangoapps.instructor_task.tasks_helper.misc import upload_ora2_data
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
-from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskModuleTestCase, TestReportMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 PROBLEM_URL_NAME = "test_urlname"
@@ -492,6 +497,46 @@ class TestRescoreInstructorTask(TestInstructorTasks):
             action_name='rescored'
         )
 
+    @override_switch('instructor_task.partition_rescore_tasks', True)
+    @override_settings(MODULE_STATE_UPDATES_PER_SUBTASK=4)
+    def test_rescoring_success_with_subtasks(self):
+        """
+        Tests rescores a problem in a course, for all students, with subtasks each
+        rescoring a partition of the students' modules.
+        """
+        mock_instance = MagicMock()
+        getattr(mock_instance, 'rescore').return_value = None
+        mock_instance.has_submitted_answer.return_value = True
+
+        num_students = 10
+        self._create_students_with_state(num_students)
+        task_entry = self._create_input_entry()
+        with patch(
+                'lms.djangoapps.instructor_task.tasks_helper.module_state.get_module_for_descriptor_internal'
+        ) as mock_get_module:
+            mock_get_module.return_value = mock_instance
+            with patch(
+                    'lms.djangoapps.instructor_task.tasks_helper.module_state.get_course_by_id',
+                    wraps=get_course_by_id,
+            ) as mock_get_course:
+                self._run_task_with_mock_celery(rescore_problem, task_entry.id, task_entry.task_id)
+
+        # The course is loaded once per partition.
+        self.assertEqual(mock_get_course.call_count, 3)
+        self.assertEqual(mock_instance.rescore.call_count, num_students)
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 3)
+        self.assert_task_output(
+            output=self.get_task_output(task_entry.id),
+            total=num_students,
+            attempted=num_students,
+            succeeded=num_students,
+            skipped=0,
+            failed=0,
+            action_name='rescored'
+        )
+
 
 class TestResetAttemptsInstructorTask(TestInstructorTasks):
     """Tests instructor task that resets problem attempts."""
@@ -715,3 +760,61 @@ class TestOra2ExportSubmissionFilesInstructorTask(TestInstructorTasks):
             assert args[0] == task_entry.id
             assert callable(args[1])
             assert args[2] == action_name
+
+
+@patch.object(CourseGradeReport, 'USER_BATCH_SIZE', 1)
+@override_switch('instructor_task.stream_course_grade_report', True)
+class TestCalculateGradesCsvInstructorTask(TestReportMixin, TestInstructorTasks):
+    """Tests instructor task that generates a streamed course grade report."""
+
+    def setUp(self):
+        super(TestCalculateGradesCsvInstructorTask, self).setUp()
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(3)]
+
+    def _interrupt_on_last_student(self, times):
+        """
+        Returns a side effect for CourseGradeReport._rows_for_users which
+        fails the given number of times on the batch of the last student.
+        """
+        rows_for_users = CourseGradeReport._rows_for_users  # pylint: disable=protected-access
+        failures = []
+
+        def interrupt_on_last_student(report, context, batch_users):
+            if batch_users == [self.students[-1]] and len(failures) < times:
+                failures.append(batch_users)
+                raise TestTaskFailure(u'Interrupted')
+            return rows_for_users(report, context, batch_users)
+        return interrupt_on_last_student
+
+    def test_retry_resumes_from_checkpoint(self):
+        task_entry = self._create_input_entry(use_problem_url=False)
+        with patch.object(
+            CourseGradeReport, '_rows_for_users', autospec=True, side_effect=self._interrupt_on_last_student(1),
+        ) as mock_rows_for_users:
+            self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        # the retried task only grades the batch which failed
+        batches = [call_args[0][2] for call_args in mock_rows_for_users.call_args_list]
+        self.assertEqual(batches[batches.index([self.students[-1]]) + 1:], [[self.students[-1]]])
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        output = json.loads(entry.task_output)
+        self.assertEqual(output['succeeded'], len(batches) - 1)
+        self.assertEqual(output['total'], len(batches) - 1)
+
+    def test_failure_keeps_checkpoint(self):
+        task_entry = self._create_input_entry(use_problem_url=False)
+        with patch.object(calculate_grades_csv, 'max_retries', 0):
+            with patch.object(
+                CourseGradeReport, '_rows_for_users', autospec=True, side_effect=self._interrupt_on_last_student(2),
+            ):
+                with self.assertRaises(TestTaskFailure):
+                    self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        output = json.loads(entry.task_output)
+        self.assertEqual(output['exception'], 'TestTaskFailure')
+        self.assertGreater(output['checkpoint']['last_user_id'], 0)
+        self.assertLess(output['checkpoint']['last_user_id'], self.students[-1].id)
@@ -9,16 +9,20 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
 from contextlib import contextmanager, ExitStack
 from datetime import datetime, timedelta
+from functools import partial
 from io import BytesIO
+from uuid import uuid4
 from zipfile import ZipFile
 
 import ddt
 import unicodecsv
+from celery.states import FAILURE, RETRY, SUCCESS
 from django.conf import settings
 from django.test.utils import override_settings
 from django.urls import reverse
@@ -54,7 +58,9 @@ from lms.djangoapps.instructor_task.tasks_helper.grades import (
     NOT_ENROLLED_IN_COURSE,
     CourseGradeReport,
     ProblemGradeReport,
-    ProblemResponses
+    ProblemResponses,
+    ShardedGradeReport,
+    _CourseGradeReportContext
 )
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
@@ -62,6 +68,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_data,
     upload_ora2_submission_files
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -83,8 +90,9 @@ from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 from xmodule.partitions.partitions import Group, UserPartition
 
-from ..models import ReportStore
-from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
+from ..models import PROGRESS, InstructorTask, ReportStore
+from ..subtasks import SubtaskStatus
+from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED, SegmentedCsvReportUpload
 
 _TEAMS_CONFIG = TeamsConfig({
     'max_size': 2,
@@ -411,7 +419,7 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
 
         RequestCache.clear_all_namespaces()
 
-        expected_query_count = 46
+        expected_query_count = 47
         with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
             with check_mongo_calls(mongo_count):
                 with self.assertNumQueries(expected_query_count):
@@ -439,6 +447,139 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
             {'attempted': expected_students, 'succeeded': expected_students, 'failed': 0}, result
         )
 
+    @patch.object(CourseGradeReport, 'USER_BATCH_SIZE', 1)
+    @override_switch('instructor_task.stream_course_grade_report', True)
+    def test_streamed_report_resumes_from_checkpoint(self):
+        """
+        Test that a streamed grade report which is interrupted resumes after
+        the last user whose rows were uploaded, when its task is retried.
+        """
+        users = [self.create_student(u'student{}'.format(i), u'student{}@example.com'.format(i)) for i in range(3)]
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_id=str(uuid4()), task_key='grade_course', task_type='grade_course',
+        )
+        rows_for_users = CourseGradeReport._rows_for_users  # pylint: disable=protected-access
+
+        def interrupt_on_last_user(report, context, batch_users):
+            if batch_users == [users[-1]]:
+                raise ValueError('Interrupted')
+            return rows_for_users(report, context, batch_users)
+
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            with patch.object(CourseGradeReport, '_rows_for_users', autospec=True, side_effect=interrupt_on_last_user):
+                with self.assertRaises(ValueError):
+                    CourseGradeReport.generate(None, entry.id, self.course.id, {}, 'graded')
+            report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+            self.assertEqual(report_store.links_for(self.course.id), [])
+
+            with patch.object(CourseGradeReport, '_rows_for_users', autospec=True, side_effect=rows_for_users) as mock:
+                result = CourseGradeReport.generate(None, entry.id, self.course.id, {}, 'graded')
+
+        mock.assert_called_once_with(ANY, ANY, [users[-1]])
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, result)
+        self.verify_rows_in_csv([{u'Username': user.username} for user in users], ignore_other_columns=True)
+
+    def _generate_sharded_report(self, retry_shard=None):
+        """
+        Generates a CourseGradeReport with subtasks, which are run as soon as
+        they are queued, and returns the InstructorTask of the report.
+        """
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id, task_type='grade_course', task_id=str(uuid4()), task_key='grade_course',
+        )
+
+        def create_shard_subtask(entry_id, xmodule_instance_args, action_name, shard, subtask_status_dict):
+            return Mock(apply_async=partial(
+                ShardedGradeReport.generate_shard,
+                xmodule_instance_args,
+                entry_id,
+                action_name,
+                shard,
+                subtask_status_dict,
+                retry_shard=retry_shard,
+            ))
+
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+            ShardedGradeReport.queue_shards(
+                CourseGradeReport, create_shard_subtask, None, entry.id, self.course.id, {}, 'graded',
+            )
+        entry.refresh_from_db()
+        return entry
+
+    @override_settings(GRADE_REPORT_USERS_PER_SHARD=2)
+    def test_sharded_report(self):
+        """
+        Test that a report generated by subtasks grading shards of the students
+        holds the rows of all students, in order, and completes its task.
+        """
+        users = [self.create_student(u'student{}'.format(i), u'student{}@example.com'.format(i)) for i in range(5)]
+
+        entry = self._generate_sharded_report()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['succeeded'], 3)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+        self.verify_rows_in_csv([{u'Username': user.username} for user in users], ignore_other_columns=True)
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+
+    @patch.object(CourseGradeReport, '_rows_for_users', side_effect=ValueError('Cannot grade students'))
+    def test_sharded_report_failure(self, _mock_rows_for_users):
+        """
+        Test that the task of a report generated by subtasks fails, without
+        uploading the report, if grading a shard fails.
+        """
+        self.create_student('student', 'student@example.com')
+
+        with self.assertRaises(ValueError):
+            self._generate_sharded_report()
+
+        entry = InstructorTask.objects.get(course_id=self.course.id, task_type='grade_course')
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertDictContainsSubset({'attempted': 1, 'succeeded': 0, 'failed': 1}, json.loads(entry.task_output))
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(report_store.links_for(self.course.id), [])
+
+    @patch.object(CourseGradeReport, '_rows_for_users', side_effect=ValueError('Cannot grade students'))
+    def test_sharded_report_retry(self, _mock_rows_for_users):
+        """
+        Test that a shard which fails to be graded is retried, and recorded as
+        retried rather than failed, while it can be retried.
+        """
+        self.create_student('student', 'student@example.com')
+        retry_shard = Mock(return_value=RuntimeError('Retry'))
+
+        with self.assertRaisesRegex(RuntimeError, 'Retry'):
+            self._generate_sharded_report(retry_shard=retry_shard)
+
+        entry = InstructorTask.objects.get(course_id=self.course.id, task_type='grade_course')
+        subtasks = json.loads(entry.subtasks)
+        retried_status = list(subtasks['status'].values())[0]
+        retry_shard.assert_called_once_with(retried_status, _mock_rows_for_users.side_effect)
+        self.assertEqual(entry.task_state, PROGRESS)
+        self.assertEqual((subtasks['succeeded'], subtasks['failed']), (0, 0))
+        self.assertDictContainsSubset({'state': RETRY, 'retried_withmax': 1, 'failed': 0}, retried_status)
+
+    @override_settings(GRADE_REPORT_USERS_PER_SHARD=2)
+    def test_sharded_report_completed_once(self):
+        """
+        Test that a redelivered shard completing after the report was
+        assembled does not assemble the report again.
+        """
+        self.create_student('student', 'student@example.com')
+        entry = self._generate_sharded_report()
+        subtask_status = SubtaskStatus.from_dict(list(json.loads(entry.subtasks)['status'].values())[0])
+        context = _CourseGradeReportContext(None, entry.id, self.course.id, {}, 'graded')
+
+        with patch.object(SegmentedCsvReportUpload, 'complete') as mock_complete:
+            ShardedGradeReport._complete_shard(  # pylint: disable=protected-access
+                CourseGradeReport(), context, {'timestamp': 0}, subtask_status,
+            )
+
+        mock_complete.assert_not_called()
+        entry.refresh_from_db()
+        self.assertEqual(entry.task_state, SUCCESS)
+
 
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
@@ -3,17 +3,25 @@ Module implementing `xblock.runtime.Runtime` functionality for the LMS
 """
 
 
+import hashlib
+import json
+
 import six
 import xblock.reference.plugins
 from completion.services import CompletionService
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
+from django.utils.translation import get_language
 from edx_django_utils.cache import DEFAULT_REQUEST_CACHE
+from web_fragments.fragment import Fragment
 
 from lms.djangoapps.badges.service import BadgingService
 from lms.djangoapps.badges.utils import badges_enabled
 from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
+from lms.djangoapps.lms_xblock.toggles import CACHE_ANONYMOUS_FRAGMENTS
 from lms.djangoapps.teams.services import TeamsService
+from openedx.core.djangoapps.theming.helpers import get_current_theme
 from openedx.core.djangoapps.user_api.course_tag import api as user_course_tag_api
 from openedx.core.lib.url_utils import quote_slashes
 from openedx.core.lib.xblock_services.call_to_action import CallToActionService
@@ -139,6 +147,14 @@ class UserTagsService(object):
         )
 
 
+# The functionality supported by the views of XBlocks (see XBlock.supports)
+# whose fragments depend neither on the user nor on the user's state, and can
+# thus be cached for anonymous users.
+USER_STATE_INDEPENDENT = 'user_state_independent'
+
+FRAGMENT_CACHE_KEY_PREFIX = 'lms_xblock.fragment'
+
+
 class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
     """
     ModuleSystem specialized to the LMS
@@ -163,6 +179,7 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
         if badges_enabled():
             services['badging'] = BadgingService(course_id=kwargs.get('course_id'), modulestore=store)
         self.request_token = kwargs.pop('request_token', None)
+        self.user_is_anonymous = user is not None and not user.is_authenticated
         services['teams'] = TeamsService()
         services['teams_configuration'] = TeamsConfigurationService()
         services['call_to_action'] = CallToActionService()
@@ -192,6 +209,73 @@ class LmsModuleSystem(ModuleSystem):  # pylint: disable=abstract-method
     def local_resource_url(self, *args, **kwargs):
         return local_resource_url(*args, **kwargs)
 
+    def render(self, block, view_name, context=None):
+        """
+        Render a block by invoking its view, as Runtime.render does.
+
+        If the view supports the USER_STATE_INDEPENDENT functionality and the
+        user is anonymous, the fragment it returns is cached, and reused for
+        other anonymous users, until the block's course is edited.  The
+        fragment is wrapped on every render, since wrappers add request
+        specific data to it.
+
+        See :method:`xblock.runtime:Runtime.render`
+        """
+        fragment_cache_key = self._fragment_cache_key(block, view_name, context)
+        if fragment_cache_key is None:
+            return super(LmsModuleSystem, self).render(block, view_name, context)
+
+        # Set the active view, as Runtime.render does, for render_child.
+        old_view_name = self._view_name
+        self._view_name = view_name
+        try:
+            fragment_dict = cache.get(fragment_cache_key)
+            if fragment_dict is None:
+                fragment = getattr(block, view_name)(context)
+                cache.set(fragment_cache_key, fragment.to_dict(), settings.XBLOCK_FRAGMENT_CACHE_TIMEOUT)
+            else:
+                fragment = Fragment.from_dict(fragment_dict)
+            fragment = self.wrap_xblock(block, view_name, fragment, context)
+            return self.render_asides(block, view_name, fragment, context)
+        finally:
+            self._view_name = old_view_name
+
+    def _fragment_cache_key(self, block, view_name, context):
+        """
+        Returns the key to cache the fragment of the given view of the given
+        block with, in the given context, or None if it must not be cached.
+
+        The key covers the version of the block's course, and the language
+        and the theme the fragment is rendered with.  Fragments of blocks
+        which are restricted to some groups of user partitions are not
+        cached.
+        """
+        if not self.user_is_anonymous or not CACHE_ANONYMOUS_FRAGMENTS.is_enabled():
+            return None
+
+        view = getattr(block, view_name, None)
+        if view is None or not block.has_support(view, USER_STATE_INDEPENDENT):
+            return None
+        if getattr(block, 'merged_group_access', None):
+            return None
+
+        try:
+            serialized_context = json.dumps(context or {}, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+        theme = get_current_theme()
+        key_data = json.dumps([
+            six.text_type(block.scope_ids.usage_id),
+            six.text_type(getattr(block, 'course_version', None)),
+            six.text_type(getattr(block, 'subtree_edited_on', None)),
+            view_name,
+            get_language(),
+            theme.theme_dir_name if theme else None,
+            serialized_context,
+        ])
+        return u'{}.{}'.format(FRAGMENT_CACHE_KEY_PREFIX, hashlib.sha1(key_data.encode('utf-8')).hexdigest())
+
     def wrap_aside(self, block, aside, view, frag, context):
         """
         Creates a div which identifies the aside, points to the original block,
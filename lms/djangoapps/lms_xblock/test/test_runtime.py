@@ -5,11 +5,14 @@ Tests of the LMS XBlock Runtime and associated utilities
 
 from ddt import data, ddt
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
 from mock import Mock, patch
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locations import BlockUsageLocator, CourseLocator
 from six.moves.urllib.parse import urlparse
+from waffle.testutils import override_switch
+from web_fragments.fragment import Fragment
 from xblock.exceptions import NoSuchServiceError
 from xblock.fields import ScopeIds
 
@@ -17,6 +20,7 @@ from lms.djangoapps.badges.tests.factories import BadgeClassFactory
 from lms.djangoapps.badges.tests.test_models import get_image
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem
 from common.djangoapps.student.tests.factories import UserFactory
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 from xmodule.modulestore.django import ModuleI18nService
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -286,3 +290,51 @@ class TestI18nService(ModuleStoreTestCase):
         Test: i18n service should not be callable in LMS after initialization.
         """
         self.assertFalse(callable(self.runtime.service(self.mock_block, 'i18n')))
+
+
+@override_switch('lms_xblock.cache_anonymous_fragments', active=True)
+class TestFragmentCache(CacheIsolationTestCase):
+    """ Test the caching of the fragments rendered for anonymous users """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super(TestFragmentCache, self).setUp()
+        self.block = Mock(merged_group_access={})
+        self.block.has_support.return_value = True
+        self.block.student_view.return_value = Fragment(u'<p>Anonymous content</p>')
+
+    def _render_twice(self, user):
+        """
+        Renders the student_view of the block twice, for the given user.
+        """
+        runtime = LmsModuleSystem(
+            static_url='/static',
+            track_function=Mock(),
+            get_module=Mock(),
+            render_template=Mock(),
+            replace_urls=str,
+            course_id=CourseLocator('org', 'course', 'run'),
+            user=user,
+            descriptor_runtime=Mock(),
+        )
+        for __ in range(2):
+            fragment = runtime.render(self.block, 'student_view')
+            self.assertEqual(fragment.content, u'<p>Anonymous content</p>')
+
+    def test_anonymous_user(self):
+        self._render_twice(AnonymousUser())
+        self.assertEqual(self.block.student_view.call_count, 1)
+
+    def test_authenticated_user(self):
+        self._render_twice(UserFactory.create())
+        self.assertEqual(self.block.student_view.call_count, 2)
+
+    def test_user_state_dependent_view(self):
+        self.block.has_support.return_value = False
+        self._render_twice(AnonymousUser())
+        self.assertEqual(self.block.student_view.call_count, 2)
+
+    def test_group_access(self):
+        self.block.merged_group_access = {50: [1]}
+        self._render_twice(AnonymousUser())
+        self.assertEqual(self.block.student_view.call_count, 2)
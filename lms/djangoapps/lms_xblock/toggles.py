@@ -0,0 +1,22 @@
+"""
+Toggles for the LMS XBlock runtime.
+"""
+
+from edx_toggles.toggles import WaffleSwitch, WaffleSwitchNamespace
+
+# Namespace for lms_xblock waffle switches.
+WAFFLE_SWITCH_NAMESPACE = WaffleSwitchNamespace(name='lms_xblock')
+
+# .. toggle_name: lms_xblock.cache_anonymous_fragments
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, the fragments rendered for anonymous users by the XBlock views which support the
+#   "user_state_independent" functionality (e.g. the student_view of HTML blocks) are cached, for
+#   settings.XBLOCK_FRAGMENT_CACHE_TIMEOUT seconds, or until the block's course is edited.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2020-11-02
+# .. toggle_target_removal_date: None
+# .. toggle_warnings: Only mark views as "user_state_independent" if their fragments depend on nothing but the
+#   block's content, settings, language and theme.
+# .. toggle_tickets: None
+CACHE_ANONYMOUS_FRAGMENTS = WaffleSwitch(WAFFLE_SWITCH_NAMESPACE, 'cache_anonymous_fragments', __name__)
@@ -709,6 +709,18 @@ FEATURES = {
     # .. toggle_tickets: https://openedx.atlassian.net/browse/TNL-7273
     # .. toggle_warnings: This temporary feature toggle does not have a target removal date.
     'ENABLE_ORA_USERNAMES_ON_DATA_EXPORT': False,
+
+    # .. toggle_name: ENABLE_BULK_GRADE_COMPUTATION
+    # .. toggle_implementation: DjangoSetting
+    # .. toggle_default: False
+    # .. toggle_description: Set to True to let the grades.bulk_grade_computation course waffle flag be enabled. When
+    #   False, CourseGradeFactory.iter computes grades user by user, without looking up the flag.
+    # .. toggle_use_cases: open_edx
+    # .. toggle_creation_date: 2026-10-18
+    # .. toggle_target_removal_date: None
+    # .. toggle_tickets: None
+    # .. toggle_warnings: The grades.bulk_grade_computation course waffle flag must also be enabled.
+    'ENABLE_BULK_GRADE_COMPUTATION': False,
 }
 
 # Specifies extra XBlock fields that should available when requested via the Course Blocks API
@@ -854,6 +866,13 @@ CACHES = {
     },
 }
 
+# .. setting_name: COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES
+# .. setting_default: 128 * 1024 * 1024
+# .. setting_description: Byte budget of the process-local LRU that sits in front of the
+#   'course_structure_cache' and holds deserialized split modulestore structures, keyed by
+#   structure version. Set to 0 to disable the local tier.
+COURSE_STRUCTURE_LOCAL_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -1220,6 +1239,10 @@ XBLOCK_FS_STORAGE_BUCKET = None
 XBLOCK_FS_STORAGE_PREFIX = None
 XBLOCK_SETTINGS = {}
 
+# How long, in seconds, to cache the fragments rendered for anonymous users by the XBlock views which support the
+# "user_state_independent" functionality, when the lms_xblock.cache_anonymous_fragments switch is enabled.
+XBLOCK_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
@@ -1260,6 +1283,20 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# The local disk cache of the course assets served by the contentserver which are too large for the
+# content cache, see openedx.core.djangoapps.contentserver.disk_cache.  It is disabled unless DIRECTORY
+# is set, to a directory shared by all of the processes of the node.
+CONTENTSERVER_DISK_CACHE = {
+    'DIRECTORY': None,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+    'MIN_ASSET_SIZE': 1024 * 1024,
+}
+
+# The directory of the on-disk cache of the courses loaded by the XMLModuleStore, so that the processes
+# loading an unchanged xml course skip parsing it, see xmodule.modulestore.xml_parse_cache.  It is disabled
+# unless set.
+XML_MODULESTORE_PARSE_CACHE_DIR = None
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1353,6 +1390,18 @@ CODE_JAIL = {
     # on the /debug/run_python page, the key is 'debug_run_python').
     # Values should be dictionaries that look like 'limits'.
     "limit_overrides": {},
+
+    # Pool of warm sandboxes used by capa's safe_exec (see capa.safe_exec.pool).
+    'pool': {
+        # How many sandbox workers each process keeps.  0 disables the pool.
+        'size': 0,
+        # After how many executions a worker is replaced.
+        'max_executions': 100,
+        # The sandbox users which workers run as, set up like the sandbox user above, each used by one worker at a
+        # time across all of the processes of the host.  When codejail uses a sandbox user, the pool is only used
+        # with users of its own.
+        'users': [],
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1766,6 +1815,7 @@ MIDDLEWARE = [
 
     'lms.djangoapps.discussion.django_comment_client.utils.ViewNameMiddleware',
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'capa.safe_exec.django_integration.ConfigureSandboxPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -1780,6 +1830,9 @@ MIDDLEWARE = [
     'lms.djangoapps.courseware.middleware.CacheCourseIdMiddleware',
     'lms.djangoapps.courseware.middleware.RedirectMiddleware',
 
+    # Writes the StudentModule state coalesced during the request. Must come after RequestCacheMiddleware.
+    'lms.djangoapps.courseware.middleware.UserStateWriteBehindMiddleware',
+
     'lms.djangoapps.course_wiki.middleware.WikiAccessMiddleware',
 
     'openedx.core.djangoapps.theming.middleware.CurrentSiteThemeMiddleware',
@@ -2400,6 +2453,22 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Compression codec for serialized block structures: 'zlib', 'lz4'
+    # or 'zstd'. Falls back to 'zlib' if the codec's library (lz4 or
+    # zstandard) is not installed.
+    COMPRESSION='zlib',
+
+    # Names of the registered transformers from other packages that don't
+    # declare INCREMENTAL_COLLECT, but whose collected data only depends on
+    # each block's own xBlock.  See BlockStructureTransformer.INCREMENTAL_COLLECT.
+    INCREMENTAL_COLLECT_TRANSFORMERS=['load_date_data'],
+
+    # Whether collected block structures keep their relations compact
+    # (as integer block indexes), which makes traversals and filtering
+    # of each per-user copy cheaper.  Relations are compacted once, when
+    # the structure is collected or read from the store.
+    COMPACT_RELATIONS=False,
 )
 
 ################################ Bulk Email ###################################
@@ -3088,6 +3157,16 @@ BADGR_TIMEOUT = 10
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Number of learners graded by each subtask of a grade report, when grade
+# reports are generated by subtasks (see the instructor_task.shard_grade_reports
+# waffle switch).
+GRADE_REPORT_USERS_PER_SHARD = 1000
+
+# Number of StudentModules updated by each subtask of a task rescoring a problem
+# for all students, when such tasks are performed by subtasks (see the
+# instructor_task.partition_rescore_tasks waffle switch).
+MODULE_STATE_UPDATES_PER_SUBTASK = 500
+
 POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
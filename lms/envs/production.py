@@ -300,6 +300,8 @@ for app in ENV_TOKENS.get('ADDL_INSTALLED_APPS', []):
 local_loglevel = ENV_TOKENS.get('LOCAL_LOGLEVEL', 'INFO')
 LOG_DIR = ENV_TOKENS['LOG_DIR']
 DATA_DIR = path(ENV_TOKENS.get('DATA_DIR', DATA_DIR))
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
+XML_MODULESTORE_PARSE_CACHE_DIR = ENV_TOKENS.get('XML_MODULESTORE_PARSE_CACHE_DIR', XML_MODULESTORE_PARSE_CACHE_DIR)
 
 LOGGING = get_logger_config(LOG_DIR,
                             logging_env=ENV_TOKENS['LOGGING_ENV'],
@@ -560,6 +562,8 @@ DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH = ENV_TOKENS.get(
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADE_REPORT_USERS_PER_SHARD = ENV_TOKENS.get('GRADE_REPORT_USERS_PER_SHARD', GRADE_REPORT_USERS_PER_SHARD)
+MODULE_STATE_UPDATES_PER_SUBTASK = ENV_TOKENS.get('MODULE_STATE_UPDATES_PER_SUBTASK', MODULE_STATE_UPDATES_PER_SUBTASK)
 
 # Rate limit for regrading tasks that a grading policy change can kick off
 
@@ -709,6 +713,7 @@ FACEBOOK_API_VERSION = AUTH_TOKENS.get("FACEBOOK_API_VERSION")
 FACEBOOK_APP_SECRET = AUTH_TOKENS.get("FACEBOOK_APP_SECRET")
 FACEBOOK_APP_ID = AUTH_TOKENS.get("FACEBOOK_APP_ID")
 
+XBLOCK_FRAGMENT_CACHE_TIMEOUT = ENV_TOKENS.get('XBLOCK_FRAGMENT_CACHE_TIMEOUT', XBLOCK_FRAGMENT_CACHE_TIMEOUT)
 XBLOCK_SETTINGS = ENV_TOKENS.get('XBLOCK_SETTINGS', {})
 XBLOCK_SETTINGS.setdefault("VideoBlock", {})["licensing_enabled"] = FEATURES.get("LICENSING", False)
 XBLOCK_SETTINGS.setdefault("VideoBlock", {})['YOUTUBE_API_KEY'] = AUTH_TOKENS.get('YOUTUBE_API_KEY', YOUTUBE_API_KEY)
@@ -976,6 +981,8 @@ EXPLICIT_QUEUES = {
         'queue': GRADES_DOWNLOAD_ROUTING_KEY},
     'lms.djangoapps.instructor_task.tasks.calculate_problem_grade_report': {
         'queue': GRADES_DOWNLOAD_ROUTING_KEY},
+    'lms.djangoapps.instructor_task.tasks.calculate_grade_report_shard': {
+        'queue': GRADES_DOWNLOAD_ROUTING_KEY},
     'lms.djangoapps.instructor_task.tasks.generate_certificates': {
         'queue': GRADES_DOWNLOAD_ROUTING_KEY},
     'lms.djangoapps.email_marketing.tasks.get_email_cookies_via_sailthru': {
@@ -1006,6 +1013,8 @@ EXPLICIT_QUEUES = {
         'queue': POLICY_CHANGE_GRADES_ROUTING_KEY},
     'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3': {
         'queue': RECALCULATE_GRADES_ROUTING_KEY},
+    'lms.djangoapps.grades.tasks.recalculate_coalesced_subsection_grades': {
+        'queue': RECALCULATE_GRADES_ROUTING_KEY},
     'openedx.core.djangoapps.programs.tasks.v1.tasks.award_program_certificates': {
         'queue': PROGRAM_CERTIFICATES_ROUTING_KEY},
     'openedx.core.djangoapps.programs.tasks.v1.tasks.revoke_program_certificates': {
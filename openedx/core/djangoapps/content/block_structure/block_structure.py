@@ -3,13 +3,20 @@ Module with family of classes for block structures.
     BlockStructure - responsible for block existence and relations.
     BlockStructureBlockData - responsible for block & transformer data.
     BlockStructureModulestoreData - responsible for xBlock data.
+    BlockStructureIncrementalData - responsible for recollecting xBlock data
+        of only some blocks.
 
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
+    _CompactBlockRelations - Data structure for the relations of all
+        blocks, keyed by integer block indexes.
+    RemovalSetFilter - Filter function for removing a precomputed set
+        of blocks.
     _BlockData - Data structure for a single block's data.
 """
 
 
+from array import array
 from copy import deepcopy
 from functools import partial
 from logging import getLogger
@@ -43,6 +50,357 @@ class _BlockRelations(object):
         self.children = []
 
 
+class _CompactBlockRelations(object):
+    """
+    Data structure to encapsulate the relationships of all the blocks in
+    a block structure, as an alternative to a dict of _BlockRelations.
+
+    Each usage key is interned to an integer block index, and the
+    parents and children of all blocks are kept in compressed sparse
+    row (CSR) arrays of block indexes.  Traversals and block removals
+    then work on integers instead of hashing usage keys.
+
+    The CSR arrays are never modified.  Relations that change after the
+    relations are built are kept in per-block lists which take
+    precedence over the arrays, and removed blocks are only marked as
+    such.
+    """
+    def __init__(self, block_relations=None):
+
+        # List of usage keys, indexed by block index.
+        # list [UsageKey]
+        self.usage_keys = []
+
+        # Map of a block's usage key to its block index.
+        # dict {UsageKey: int}
+        self.block_indexes = {}
+
+        # Whether the block at each block index is in the structure.
+        # bytearray
+        self.present = bytearray()
+
+        # CSR arrays of the children and parents of each block.  The
+        # children of block i are children[child_offsets[i]:child_offsets[i + 1]].
+        # array [int]
+        self.child_offsets = array('l', [0])
+        self.children = array('l')
+        self.parent_offsets = array('l', [0])
+        self.parents = array('l')
+
+        # Maps of a block index to its changed children and parents.
+        # dict {int: [int]}
+        self.changed_children = {}
+        self.changed_parents = {}
+
+        self._num_blocks = 0
+
+        if block_relations:
+            self._build(
+                list(block_relations),
+                lambda usage_key: block_relations[usage_key].children,
+                lambda usage_key: block_relations[usage_key].parents,
+            )
+
+    @classmethod
+    def from_indexes(cls, usage_keys, relations):
+        """
+        Returns the relations of the given usage keys, given the
+        (children, parents) block indexes of each of them, as they are
+        serialized, without building _BlockRelations first.
+        """
+        block_relations = cls()
+        block_relations.usage_keys = usage_keys
+        block_relations.block_indexes = {usage_key: index for index, usage_key in enumerate(usage_keys)}
+        block_relations.present = bytearray(b'\x01') * len(usage_keys)
+        block_relations._num_blocks = len(usage_keys)  # pylint: disable=protected-access
+        for children, parents in relations:
+            block_relations.children.extend(children)
+            block_relations.child_offsets.append(len(block_relations.children))
+            block_relations.parents.extend(parents)
+            block_relations.parent_offsets.append(len(block_relations.parents))
+        return block_relations
+
+    def _build(self, usage_keys, get_children, get_parents):
+        """
+        Interns the given usage keys and fills the CSR arrays with the
+        relations returned by the given accessors.
+        """
+        self.usage_keys = usage_keys
+        self.block_indexes = {usage_key: index for index, usage_key in enumerate(usage_keys)}
+        self.present = bytearray(b'\x01') * len(usage_keys)
+        self._num_blocks = len(usage_keys)
+        block_indexes = self.block_indexes
+        for usage_key in usage_keys:
+            self.children.extend(block_indexes[child] for child in get_children(usage_key))
+            self.child_offsets.append(len(self.children))
+            self.parents.extend(block_indexes[parent] for parent in get_parents(usage_key))
+            self.parent_offsets.append(len(self.parents))
+
+    def __len__(self):
+        return self._num_blocks
+
+    def __contains__(self, usage_key):
+        index = self.block_indexes.get(usage_key)
+        return index is not None and self.present[index] == 1
+
+    def __iter__(self):
+        present = self.present
+        return (usage_key for index, usage_key in enumerate(self.usage_keys) if present[index])
+
+    def keys(self):
+        """
+        Returns an iterator of the usage keys of all blocks.
+        """
+        return iter(self)
+
+    def __getitem__(self, usage_key):
+        """
+        Returns a _BlockRelations copy of the relations of the given
+        block, for code which expects a dict of _BlockRelations.
+        """
+        if usage_key not in self:
+            raise KeyError(usage_key)
+        relations = _BlockRelations()
+        relations.parents = self.get_parents(usage_key)
+        relations.children = self.get_children(usage_key)
+        return relations
+
+    def __deepcopy__(self, memo):
+        # Usage keys are immutable, so they are shared with the copy.
+        other = _CompactBlockRelations()
+        other.usage_keys = list(self.usage_keys)
+        other.block_indexes = dict(self.block_indexes)
+        other.present = bytearray(self.present)
+        other.child_offsets = array('l', self.child_offsets)
+        other.children = array('l', self.children)
+        other.parent_offsets = array('l', self.parent_offsets)
+        other.parents = array('l', self.parents)
+        other.changed_children = {index: list(value) for index, value in six.iteritems(self.changed_children)}
+        other.changed_parents = {index: list(value) for index, value in six.iteritems(self.changed_parents)}
+        other._num_blocks = self._num_blocks  # pylint: disable=protected-access
+        return other
+
+    #--- Usage key methods ---#
+
+    def get_parents(self, usage_key):
+        """
+        Returns the usage keys of the parents of the given block.
+        """
+        index = self.block_indexes.get(usage_key)
+        if index is None:
+            return []
+        usage_keys = self.usage_keys
+        return [usage_keys[parent] for parent in self.parent_indexes(index)]
+
+    def get_children(self, usage_key):
+        """
+        Returns the usage keys of the children of the given block.
+        """
+        index = self.block_indexes.get(usage_key)
+        if index is None:
+            return []
+        usage_keys = self.usage_keys
+        return [usage_keys[child] for child in self.child_indexes(index)]
+
+    def set_parents(self, usage_key, parents):
+        """
+        Replaces the parents of the given block.
+        """
+        self.changed_parents[self.block_indexes[usage_key]] = [self.block_indexes[parent] for parent in parents]
+
+    def set_children(self, usage_key, children):
+        """
+        Replaces the children of the given block.
+        """
+        self.changed_children[self.block_indexes[usage_key]] = [self.block_indexes[child] for child in children]
+
+    def add_relation(self, parent_key, child_key):
+        """
+        Adds a parent to child relationship, adding either block if
+        it isn't present yet.
+        """
+        parent = self.add_block(parent_key)
+        child = self.add_block(child_key)
+        self._changed_parents(child).append(parent)
+        self._changed_children(parent).append(child)
+
+    def add_block(self, usage_key):
+        """
+        Adds the given block, if it isn't present yet, and returns its
+        block index.
+        """
+        index = self.block_indexes.get(usage_key)
+        if index is None:
+            index = self.block_indexes[usage_key] = len(self.usage_keys)
+            self.usage_keys.append(usage_key)
+            self.present.append(1)
+            self.child_offsets.append(len(self.children))
+            self.parent_offsets.append(len(self.parents))
+            self._num_blocks += 1
+        elif not self.present[index]:
+            self.present[index] = 1
+            self.changed_children[index] = []
+            self.changed_parents[index] = []
+            self._num_blocks += 1
+        return index
+
+    def remove_block(self, usage_key, keep_descendants):
+        """
+        Removes the given block from the relations.  See
+        BlockStructureBlockData.remove_block.
+        """
+        if usage_key not in self:
+            raise KeyError(usage_key)
+        index = self.block_indexes[usage_key]
+        children = list(self.child_indexes(index))
+        parents = list(self.parent_indexes(index))
+
+        for child in children:
+            self._changed_parents(child).remove(index)
+        for parent in parents:
+            self._changed_children(parent).remove(index)
+
+        self.present[index] = 0
+        self._num_blocks -= 1
+        self.changed_children.pop(index, None)
+        self.changed_parents.pop(index, None)
+
+        if keep_descendants:
+            for child in children:
+                for parent in parents:
+                    self._changed_parents(child).append(parent)
+                    self._changed_children(parent).append(child)
+
+    #--- Block index methods ---#
+
+    def child_indexes(self, index):
+        """
+        Returns the block indexes of the children of the block with the
+        given block index.
+        """
+        if not self.present[index]:
+            return ()
+        changed = self.changed_children.get(index)
+        if changed is not None:
+            return changed
+        return self.children[self.child_offsets[index]:self.child_offsets[index + 1]]
+
+    def parent_indexes(self, index):
+        """
+        Returns the block indexes of the parents of the block with the
+        given block index.
+        """
+        if not self.present[index]:
+            return ()
+        changed = self.changed_parents.get(index)
+        if changed is not None:
+            return changed
+        return self.parents[self.parent_offsets[index]:self.parent_offsets[index + 1]]
+
+    def _changed_children(self, index):
+        """
+        Returns the mutable list of children of the given block index.
+        """
+        changed = self.changed_children.get(index)
+        if changed is None:
+            changed = self.changed_children[index] = list(self.child_indexes(index))
+        return changed
+
+    def _changed_parents(self, index):
+        """
+        Returns the mutable list of parents of the given block index.
+        """
+        changed = self.changed_parents.get(index)
+        if changed is None:
+            changed = self.changed_parents[index] = list(self.parent_indexes(index))
+        return changed
+
+    #--- Traversal methods ---#
+
+    def topological_traversal(self, start_node, filter_func=None, yield_descendants_of_unyielded=False):
+        """
+        Same as BlockStructure.topological_traversal, but traverses
+        block indexes.
+        """
+        if start_node not in self:
+            # Like the usage key traversal, yield a missing start node by itself.
+            return traverse_topologically(
+                start_node=start_node,
+                get_parents=self.get_parents,
+                get_children=self.get_children,
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
+        usage_keys = self.usage_keys
+        return (
+            usage_keys[index] for index in traverse_topologically(
+                start_node=self.block_indexes[start_node],
+                get_parents=self.parent_indexes,
+                get_children=self.child_indexes,
+                filter_func=self._index_filter(filter_func),
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
+        )
+
+    def post_order_traversal(self, start_node, filter_func=None):
+        """
+        Same as BlockStructure.post_order_traversal, but traverses
+        block indexes.
+        """
+        if start_node not in self:
+            return traverse_post_order(
+                start_node=start_node,
+                get_children=self.get_children,
+                filter_func=filter_func,
+            )
+        usage_keys = self.usage_keys
+        return (
+            usage_keys[index] for index in traverse_post_order(
+                start_node=self.block_indexes[start_node],
+                get_children=self.child_indexes,
+                filter_func=self._index_filter(filter_func),
+            )
+        )
+
+    def pruned(self, root_block_usage_key):
+        """
+        Returns new relations with only the blocks that are reachable
+        from the given root block.  Blocks are ordered and related the
+        same way BlockStructure._prune_unreachable orders and relates
+        them.
+        """
+        reachable = []
+        if root_block_usage_key in self:
+            reachable = list(traverse_post_order(self.block_indexes[root_block_usage_key], self.child_indexes))
+        reachable_set = set(reachable)
+        children = {
+            index: [child for child in self.child_indexes(index) if child in reachable_set]
+            for index in reachable
+        }
+        parents = {index: [] for index in reachable}
+        for index in reachable:
+            for child in children[index]:
+                parents[child].append(index)
+
+        usage_keys = self.usage_keys
+        pruned_relations = _CompactBlockRelations()
+        pruned_relations._build(  # pylint: disable=protected-access
+            [usage_keys[index] for index in reachable],
+            lambda usage_key: [usage_keys[child] for child in children[self.block_indexes[usage_key]]],
+            lambda usage_key: [usage_keys[parent] for parent in parents[self.block_indexes[usage_key]]],
+        )
+        return pruned_relations
+
+    def _index_filter(self, filter_func):
+        """
+        Returns the given usage key filter as a block index filter.
+        """
+        if filter_func is None:
+            return None
+        usage_keys = self.usage_keys
+        return lambda index: filter_func(usage_keys[index])
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -61,7 +419,8 @@ class BlockStructure(object):
 
         # Map of a block's usage key to its block relations. The
         # existence of a block in the structure is determined by its
-        # presence in this map.
+        # presence in this map.  Replaced by _CompactBlockRelations
+        # once _compact_relations is called.
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
@@ -94,6 +453,8 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
+        if self._has_compact_relations():
+            return self._block_relations.get_parents(usage_key)
         return self._block_relations[usage_key].parents if usage_key in self else []
 
     def get_children(self, usage_key):
@@ -108,8 +469,35 @@ class BlockStructure(object):
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
+        if self._has_compact_relations():
+            return self._block_relations.get_children(usage_key)
         return self._block_relations[usage_key].children if usage_key in self else []
 
+    def set_children(self, usage_key, children):
+        """
+        Reorders the children of the block identified by the given
+        usage_key.  Since get_children may return a copy of the
+        children, reordering its result in place has no effect.
+
+        Arguments:
+            usage_key - The usage key of the block whose children
+                are to be reordered.
+
+            children ([UsageKey]) - The usage keys of the block's
+                current children, in their new order.
+
+        Raises:
+            ValueError - if the given children aren't the block's
+                current children.
+        """
+        current_children = self.get_children(usage_key)
+        if len(children) != len(current_children) or set(children) != set(current_children):
+            raise ValueError(u"Only the order of the children of {} can be set".format(usage_key))
+        if self._has_compact_relations():
+            self._block_relations.set_children(usage_key, children)
+        else:
+            self._block_relations[usage_key].children[:] = children
+
     def set_root_block(self, usage_key):
         """
         Sets the given usage key as the new root of the block structure.
@@ -123,7 +511,10 @@ class BlockStructure(object):
                 new root of the block structure.
         """
         self.root_block_usage_key = usage_key
-        self._block_relations[usage_key].parents = []
+        if self._has_compact_relations():
+            self._block_relations.set_parents(usage_key, [])
+        else:
+            self._block_relations[usage_key].parents = []
 
     def __contains__(self, usage_key):
         """
@@ -170,6 +561,12 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_topologically method.
         """
+        if self._has_compact_relations():
+            return self._block_relations.topological_traversal(
+                start_node=start_node or self.root_block_usage_key,
+                filter_func=filter_func,
+                yield_descendants_of_unyielded=yield_descendants_of_unyielded,
+            )
         return traverse_topologically(
             start_node=start_node or self.root_block_usage_key,
             get_parents=self.get_parents,
@@ -195,6 +592,11 @@ class BlockStructure(object):
             generator - A generator object created from the
                 traverse_post_order method.
         """
+        if self._has_compact_relations():
+            return self._block_relations.post_order_traversal(
+                start_node=start_node or self.root_block_usage_key,
+                filter_func=filter_func,
+            )
         return traverse_post_order(
             start_node=start_node or self.root_block_usage_key,
             get_children=self.get_children,
@@ -208,6 +610,9 @@ class BlockStructure(object):
         """
         Mutates this block structure by removing any unreachable blocks.
         """
+        if self._has_compact_relations():
+            self._block_relations = self._block_relations.pruned(self.root_block_usage_key)
+            return
 
         # Create a new block relations map to store only those blocks
         # that are still linked
@@ -240,7 +645,26 @@ class BlockStructure(object):
             parent_key (UsageKey) - Usage key of the parent block.
             child_key (UsageKey) - Usage key of the child block.
         """
-        self._add_to_relations(self._block_relations, parent_key, child_key)
+        if self._has_compact_relations():
+            self._block_relations.add_relation(parent_key, child_key)
+        else:
+            self._add_to_relations(self._block_relations, parent_key, child_key)
+
+    def _compact_relations(self):
+        """
+        Replaces this block structure's relations with the equivalent
+        _CompactBlockRelations, so traversals and block removals work on
+        integer block indexes.  The structure's public interface, which
+        uses usage keys, is unchanged.
+        """
+        if not self._has_compact_relations():
+            self._block_relations = _CompactBlockRelations(self._block_relations)
+
+    def _has_compact_relations(self):
+        """
+        Returns whether this block structure's relations are compact.
+        """
+        return isinstance(self._block_relations, _CompactBlockRelations)
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -395,6 +819,47 @@ class BlockData(FieldData):
         self.transformer_data = TransformerDataMap()
 
 
+class RemovalSetFilter(object):
+    """
+    A filter function, as returned by
+    BlockStructureBlockData.create_removal_set_filter, which removes the
+    blocks in a precomputed set of usage keys.
+
+    Unlike the filters returned by create_removal_filter, filters of
+    this type can be merged with one another (see merge), so that
+    several of them cost a single set lookup per block.
+    """
+    def __init__(self, block_structure, removed_block_keys, keep_descendants=False):
+        self.block_structure = block_structure
+        self.removed_block_keys = removed_block_keys
+        self.keep_descendants = keep_descendants
+
+    def __call__(self, block_key):
+        if block_key in self.removed_block_keys:
+            self.block_structure.remove_block(block_key, self.keep_descendants)
+            return False
+        return True
+
+    @classmethod
+    def merge(cls, filters):
+        """
+        Returns a list of RemovalSetFilters equivalent to the given ones,
+        with a single filter per value of keep_descendants.
+        """
+        merged_filters = {}
+        for removal_set_filter in filters:
+            merged_filter = merged_filters.get(removal_set_filter.keep_descendants)
+            if merged_filter is None:
+                merged_filters[removal_set_filter.keep_descendants] = removal_set_filter
+            else:
+                merged_filters[removal_set_filter.keep_descendants] = cls(
+                    removal_set_filter.block_structure,
+                    merged_filter.removed_block_keys | removal_set_filter.removed_block_keys,
+                    removal_set_filter.keep_descendants,
+                )
+        return list(merged_filters.values())
+
+
 class BlockStructureBlockData(BlockStructure):
     """
     Subclass of BlockStructure that is responsible for managing block
@@ -404,7 +869,7 @@ class BlockStructureBlockData(BlockStructure):
     # update this value whenever the data structure changes. Dependent storage
     # layers can then use this value when serializing/deserializing block
     # structures, and invalidating any previously cached/stored data.
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
@@ -417,18 +882,27 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Map of a cache key to the set of usage keys of blocks removed
+        # by a removal set filter (see create_removal_set_filter).  The
+        # map is shared with all copies of this block structure, until
+        # the block structure is modified.
+        # dict {hashable: frozenset(UsageKey)}
+        self._removal_sets = {}
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        block_structure._removal_sets = self._get_removal_sets()  # pylint: disable=protected-access
+        return block_structure
 
     def iteritems(self):
         """
@@ -482,6 +956,7 @@ class BlockStructureBlockData(BlockStructure):
 
             override_data (object) - The data you want to set
         """
+        self._detach_removal_sets()
         block_data = self._get_or_create_block(usage_key)
         setattr(block_data, field_name, override_data)
 
@@ -577,6 +1052,7 @@ class BlockStructureBlockData(BlockStructure):
                 given key for the given transformer's data for the
                 requested block.
         """
+        self._detach_removal_sets()
         setattr(
             self._get_or_create_block(usage_key).transformer_data.get_or_create(transformer),
             key,
@@ -595,6 +1071,7 @@ class BlockStructureBlockData(BlockStructure):
             transformer (BlockStructureTransformer) - The transformer
                 whose data entry is to be deleted.
         """
+        self._detach_removal_sets()
         try:
             transformer_block_data = self.get_transformer_block_data(usage_key, transformer)
             delattr(transformer_block_data, key)
@@ -621,6 +1098,12 @@ class BlockStructureBlockData(BlockStructure):
                 removed block's children become children of the
                 removed block's parents.
         """
+        self._detach_removal_sets()
+        if self._has_compact_relations():
+            self._block_relations.remove_block(usage_key, keep_descendants)
+            self._block_data_map.pop(usage_key, None)
+            return
+
         children = self._block_relations[usage_key].children
         parents = self._block_relations[usage_key].parents
 
@@ -667,6 +1150,42 @@ class BlockStructureBlockData(BlockStructure):
             keep_descendants=keep_descendants,
         )
 
+    def create_removal_set_filter(self, cache_key, removal_condition, keep_descendants=False):
+        """
+        Returns a filter function that removes blocks that satisfy the
+        removal_condition, similar to create_removal_filter.
+
+        The removal_condition is evaluated for all blocks at once, and
+        the resulting set of blocks to remove is cached under the given
+        cache_key for this block structure and all of its copies.  Thus,
+        filtering the copies of a collected block structure, as done for
+        each user by BlockStructureManager.get_transformed, evaluates the
+        condition only once per block.  Removal set filters are also
+        merged into a single set lookup per block when combined.
+
+        The removal_condition must only depend on collected data and on
+        the parts of the usage_info that are part of the cache_key.
+
+        Arguments:
+            cache_key (hashable) - Identifies the removal_condition,
+                e.g. the transformer's name and any usage_info values
+                the condition depends on.
+
+            removal_condition ((usage_key)->bool) - A function that
+                takes a block's usage key as input and returns whether
+                or not to remove that block from the block structure.
+
+            keep_descendants (bool) - See the description in
+                remove_block.
+        """
+        removal_sets = self._get_removal_sets()
+        removed_block_keys = removal_sets.get(cache_key)
+        if removed_block_keys is None:
+            removed_block_keys = removal_sets[cache_key] = frozenset(
+                block_key for block_key in self.get_block_keys() if removal_condition(block_key)
+            )
+        return RemovalSetFilter(self, removed_block_keys, keep_descendants)
+
     def retain_or_remove(self, block_key, removal_condition, keep_descendants=False):
         """
         Removes the given block if it satisfies the removal_condition.
@@ -753,6 +1272,31 @@ class BlockStructureBlockData(BlockStructure):
             raise TransformerException(u'Version attributes are not set on transformer {0}.', transformer.name())
         self.set_transformer_data(transformer, TRANSFORMER_VERSION_KEY, transformer.WRITE_VERSION)
 
+    def _prune_unreachable(self):
+        self._detach_removal_sets()
+        super(BlockStructureBlockData, self)._prune_unreachable()
+
+    def _detach_removal_sets(self):
+        """
+        Stops sharing the cache of removal sets with the copies of this
+        block structure, since the cached sets may no longer be correct
+        for this block structure once it is modified.  A new cache is
+        used even if the current one is empty, since the copies would
+        otherwise see the sets computed for the modified structure.
+        """
+        self._removal_sets = {}
+
+    def _get_removal_sets(self):
+        """
+        Returns the cache of removal sets of this block structure,
+        creating it for block structures unpickled from older versions.
+        """
+        try:
+            return self._removal_sets
+        except AttributeError:
+            self._removal_sets = {}
+            return self._removal_sets
+
     def _get_or_create_block(self, usage_key):
         """
         Returns the BlockData associated with the given usage_key.
@@ -815,6 +1359,18 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         return self._xblock_map[usage_key]
 
+    def has_xblock(self, usage_key):
+        """
+        Returns whether the xBlock for the given usage key is
+        instantiated, which is the case for all blocks except during an
+        incremental collection (see BlockStructureIncrementalData).
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block whose
+                xBlock object is checked.
+        """
+        return usage_key in self._xblock_map
+
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
@@ -861,3 +1417,71 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         if hasattr(xblock, field_name):
             setattr(block_data, field_name, getattr(xblock, field_name))
+
+
+class BlockStructureIncrementalData(BlockStructureModulestoreData):
+    """
+    Subclass of BlockStructureModulestoreData that is responsible for
+    recollecting the data of only some of its blocks, while all other
+    blocks keep their previously collected data.
+
+    Only the xBlocks of the recollected blocks are instantiated, so
+    traversals and iteration of the block structure only yield those
+    blocks. See BlockStructureTransformer.INCREMENTAL_COLLECT.
+    """
+    def __init__(self, root_block_usage_key, recollected_block_keys=()):
+        super(BlockStructureIncrementalData, self).__init__(root_block_usage_key)
+
+        # Set of usage keys of the blocks whose data is recollected.
+        # set(UsageKey)
+        self.recollected_block_keys = set(recollected_block_keys)
+
+    def get_block_keys(self):
+        """
+        Returns the block keys of the recollected blocks.
+        """
+        return (
+            block_key for block_key in super(BlockStructureIncrementalData, self).get_block_keys()
+            if block_key in self.recollected_block_keys
+        )
+
+    def topological_traversal(self, filter_func=None, **kwargs):
+        """
+        Performs a topological traversal of the whole block structure,
+        yielding only the recollected blocks.  The filter_func is only
+        called for the recollected blocks; all other blocks are treated
+        as passing it.
+        """
+        return self._recollected_only(
+            super(BlockStructureIncrementalData, self).topological_traversal,
+            filter_func,
+            **kwargs
+        )
+
+    def post_order_traversal(self, filter_func=None, **kwargs):
+        """
+        Performs a post-order traversal of the whole block structure,
+        yielding only the recollected blocks.  The filter_func is only
+        called for the recollected blocks; all other blocks are treated
+        as passing it.
+        """
+        return self._recollected_only(
+            super(BlockStructureIncrementalData, self).post_order_traversal,
+            filter_func,
+            **kwargs
+        )
+
+    def _recollected_only(self, traversal, filter_func, **kwargs):
+        """
+        Returns a generator of the recollected blocks yielded by the
+        given traversal.
+        """
+        recollected_block_keys = self.recollected_block_keys
+
+        def _filter(block_key):
+            return block_key not in recollected_block_keys or filter_func is None or filter_func(block_key)
+
+        return (
+            block_key for block_key in traversal(filter_func=_filter, **kwargs)
+            if block_key in recollected_block_keys
+        )
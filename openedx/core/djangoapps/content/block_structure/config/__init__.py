@@ -4,6 +4,7 @@ waffle switches for the Block Structure framework.
 """
 
 
+from django.conf import settings
 from edx_toggles.toggles import WaffleSwitch, WaffleSwitchNamespace
 from openedx.core.lib.cache_utils import request_cached
 
@@ -16,6 +17,7 @@ WAFFLE_NAMESPACE = u'block_structure'
 INVALIDATE_CACHE_ON_PUBLISH = u'invalidate_cache_on_publish'
 STORAGE_BACKING_FOR_CACHE = u'storage_backing_for_cache'
 RAISE_ERROR_WHEN_NOT_FOUND = u'raise_error_when_not_found'
+INCREMENTAL_COLLECT = u'incremental_collect'
 
 
 def waffle():
@@ -49,3 +51,11 @@ def cache_timeout_in_seconds():
     Returns and caches the current setting for cache_timeout_in_seconds.
     """
     return BlockStructureConfiguration.current().cache_timeout_in_seconds
+
+
+def compact_relations():
+    """
+    Returns whether collected block structures keep their relations as
+    _CompactBlockRelations, per BLOCK_STRUCTURES_SETTINGS['COMPACT_RELATIONS'].
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get('COMPACT_RELATIONS', False)
@@ -1,7 +1,7 @@
 """
 Module for factory class for BlockStructure objects.
 """
-from .block_structure import BlockStructureBlockData, BlockStructureModulestoreData
+from .block_structure import BlockStructureBlockData, BlockStructureIncrementalData, BlockStructureModulestoreData
 
 
 class BlockStructureFactory(object):
@@ -57,6 +57,114 @@ class BlockStructureFactory(object):
         build_block_structure(root_xblock)
         return block_structure
 
+    @classmethod
+    def create_for_incremental_collect(cls, collected_block_structure, modulestore, changed_block_keys):
+        """
+        Creates and returns a block structure for recollecting the data of
+        a previously collected block structure, after some of its blocks
+        changed in the modulestore.
+
+        The relations of the returned block structure are those of the
+        current version of the blocks in the modulestore, built in the
+        same order as by create_from_modulestore.  The blocks that
+        changed, along with their ancestors and descendants, the parents
+        of all of those, and always the root block, are to be
+        recollected, so their xBlocks are instantiated.  All other
+        blocks keep their collected data.
+
+        Arguments:
+            collected_block_structure (BlockStructureBlockData) - The
+                previously collected block structure.
+
+            modulestore (ModuleStoreRead) - The modulestore that
+                contains the current data for the xBlocks within the
+                block structure.
+
+            changed_block_keys (set(UsageKey)) - The usage keys of the
+                blocks that changed or were added in the modulestore
+                since collected_block_structure was collected.
+
+        Returns:
+            BlockStructureIncrementalData - The block structure, whose
+                recollected_block_keys are the blocks to recollect.
+        """
+        root_block_usage_key = collected_block_structure.root_block_usage_key
+        block_structure = BlockStructureIncrementalData(root_block_usage_key)
+        changed_block_keys = set(changed_block_keys)
+        xblocks = {}
+        blocks_visited = set()
+
+        def get_xblock(usage_key):
+            """
+            Returns the (cached) xBlock for the given usage_key.
+            """
+            if usage_key not in xblocks:
+                xblocks[usage_key] = modulestore.get_item(usage_key)
+            return xblocks[usage_key]
+
+        def get_children(usage_key):
+            """
+            Returns the current children of the given block, only
+            instantiating its xBlock if the block changed or is new.
+            """
+            if usage_key not in collected_block_structure:
+                changed_block_keys.add(usage_key)
+            if usage_key in changed_block_keys:
+                return [child.location for child in get_xblock(usage_key).get_children()]
+            return collected_block_structure.get_children(usage_key)
+
+        def build_block_structure(usage_key):
+            """
+            Recursively update the block structure with the given block
+            and its descendants.
+            """
+            if usage_key in blocks_visited:
+                return
+
+            blocks_visited.add(usage_key)
+            for child_key in get_children(usage_key):
+                block_structure._add_relation(usage_key, child_key)  # pylint: disable=protected-access
+                build_block_structure(child_key)
+
+        def closure(usage_keys, get_related):
+            """
+            Returns the given usage_keys along with all the blocks
+            transitively related to them through get_related.
+            """
+            related_keys = set(usage_keys)
+            pending_keys = list(usage_keys)
+            while pending_keys:
+                for related_key in get_related(pending_keys.pop()):
+                    if related_key not in related_keys:
+                        related_keys.add(related_key)
+                        pending_keys.append(related_key)
+            return related_keys
+
+        build_block_structure(root_block_usage_key)
+
+        changed_block_keys &= blocks_visited
+        recollected_block_keys = (
+            closure(changed_block_keys, block_structure.get_children) |
+            closure(changed_block_keys, block_structure.get_parents) |
+            {root_block_usage_key}
+        )
+        # The collected data of a block may depend on the xBlocks of all
+        # of its parents (e.g., of split_test blocks).
+        for usage_key in list(recollected_block_keys):
+            recollected_block_keys.update(block_structure.get_parents(usage_key))
+        block_structure.recollected_block_keys = recollected_block_keys
+
+        for usage_key in block_structure._block_relations:  # pylint: disable=protected-access
+            if usage_key in recollected_block_keys:
+                block_structure._add_xblock(usage_key, get_xblock(usage_key))  # pylint: disable=protected-access
+
+        removed_block_keys = set(collected_block_structure.get_block_keys()) - blocks_visited
+        for usage_key, block_data in collected_block_structure.iteritems():
+            if usage_key not in recollected_block_keys and usage_key not in removed_block_keys:
+                block_structure._block_data_map[usage_key] = block_data  # pylint: disable=protected-access
+
+        return block_structure
+
     @classmethod
     def create_from_store(cls, root_block_usage_key, block_structure_store):
         """
@@ -0,0 +1,144 @@
+"""
+Django management command to benchmark the filtering of per-user copies of
+a collected block structure.
+"""
+
+
+import timeit
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand
+from opaque_keys.edx.locator import CourseLocator
+
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
+from openedx.core.djangoapps.content.block_structure.transformer import combine_filters
+
+BLOCK_TYPES = ['course', 'chapter', 'sequential', 'vertical', 'problem']
+
+
+class Command(BaseCommand):
+    """
+    Builds a synthetic collected block structure and times the filter stage
+    of BlockStructureTransformers.transform on per-user copies of it, as done
+    by BlockStructureManager.get_transformed for each request, with three
+    filters like those of the visibility, split_test and start_date
+    transformers: once with predicate filters only
+    (create_removal_filter), and once with removal set filters
+    (create_removal_set_filter) for the two filters that only depend on
+    collected data.
+
+    Example:
+        ./manage.py lms benchmark_block_filters --blocks 5000 --users 50
+    """
+    help = dedent(__doc__).strip()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blocks',
+            type=int,
+            default=5000,
+            help='Approximate number of blocks in the block structure'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=50,
+            help='How many per-user copies of the block structure to filter'
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Use compact block relations, as with the COMPACT_RELATIONS block structures setting'
+        )
+
+    def handle(self, *args, **options):
+        collected_block_structure = self._create_block_structure(options['blocks'])
+        if options['compact']:
+            # Like the block structure manager, compact once; copies stay compact.
+            collected_block_structure._compact_relations()  # pylint: disable=protected-access
+        block_count = len(list(collected_block_structure.get_block_keys()))
+
+        def staff_only_condition(block_structure):
+            return lambda block_key: block_structure.get_transformer_block_field(
+                block_key, 'visibility', 'merged_visible_to_staff_only', False
+            )
+
+        def split_test_condition(block_key):
+            return block_key.block_type == 'split_test'
+
+        def start_date_condition(block_structure):
+            return lambda block_key: block_structure.get_xblock_field(block_key, 'start', 0) > 1
+
+        def predicate_filters(block_structure):
+            return [
+                block_structure.create_removal_filter(staff_only_condition(block_structure)),
+                block_structure.create_removal_filter(split_test_condition, keep_descendants=True),
+                block_structure.create_removal_filter(start_date_condition(block_structure)),
+            ]
+
+        def removal_set_filters(block_structure):
+            return [
+                block_structure.create_removal_set_filter('visibility', staff_only_condition(block_structure)),
+                block_structure.create_removal_set_filter('split_test', split_test_condition, keep_descendants=True),
+                block_structure.create_removal_filter(start_date_condition(block_structure)),
+            ]
+
+        self.stdout.write(u'Filtering {} copies of a block structure of {} blocks.'.format(
+            options['users'], block_count,
+        ))
+        durations = {}
+        filter_stages = [('Predicate filters', predicate_filters), ('Removal set filters', removal_set_filters)]
+        for name, create_filters in filter_stages:
+            copy_duration = filter_duration = 0
+            # Filter one more copy than timed, to warm up the removal set cache.
+            for user_index in range(options['users'] + 1):
+                start = timeit.default_timer()
+                block_structure = collected_block_structure.copy()
+                copied = timeit.default_timer()
+                block_structure.filter_topological_traversal(
+                    combine_filters(block_structure, create_filters(block_structure))
+                )
+                filtered = timeit.default_timer()
+                if user_index:
+                    copy_duration += copied - start
+                    filter_duration += filtered - copied
+            durations[name] = filter_duration
+            self.stdout.write(u'{}: {:.2f} ms per user to copy, {:.2f} ms per user to filter'.format(
+                name, copy_duration * 1000 / options['users'], filter_duration * 1000 / options['users'],
+            ))
+        self.stdout.write(u'Filter stage speedup: {:.1f}x'.format(
+            durations['Predicate filters'] / durations['Removal set filters'],
+        ))
+
+    def _create_block_structure(self, block_count):
+        """
+        Returns a collected block structure of about block_count blocks,
+        with 10 children per block down to the problems, some of them
+        visible to staff only, split_test or starting in the future.
+        """
+        course_key = CourseLocator('edX', 'Benchmark', 'run')
+        block_structure = BlockStructureBlockData(course_key.make_usage_key('course', 'course'))
+        level = [block_structure.root_block_usage_key]
+        block_index = 0
+        for block_type in BLOCK_TYPES[1:]:
+            next_level = []
+            for parent_key in level:
+                for __ in range(10):
+                    block_index += 1
+                    if block_index >= block_count:
+                        break
+                    if block_type == 'vertical' and block_index % 37 == 0:
+                        block_type_of_child = 'split_test'
+                    else:
+                        block_type_of_child = block_type
+                    child_key = course_key.make_usage_key(block_type_of_child, 'block_{}'.format(block_index))
+                    block_structure._add_relation(parent_key, child_key)  # pylint: disable=protected-access
+                    next_level.append(child_key)
+            level = next_level
+
+        for index, block_key in enumerate(block_structure.topological_traversal(), 1):
+            block_structure.set_transformer_block_field(
+                block_key, 'visibility', 'merged_visible_to_staff_only', index % 50 == 0
+            )
+            block_structure.override_xblock_field(block_key, 'start', 2 if index % 70 == 0 else 0)
+        return block_structure
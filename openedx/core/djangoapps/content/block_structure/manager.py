@@ -116,7 +116,8 @@ class BlockStructureManager(object):
         """
         with self._bulk_operations():
             if not self.store.is_up_to_date(self.root_block_usage_key, self.modulestore):
-                self._update_collected()
+                if self._update_collected_incrementally() is None:
+                    self._update_collected()
 
     def _update_collected(self):
         """
@@ -130,6 +131,50 @@ class BlockStructureManager(object):
             )
             BlockStructureTransformers.collect(block_structure)
             self.store.add(block_structure)
+            if config.compact_relations():
+                block_structure._compact_relations()  # pylint: disable=protected-access
+            return block_structure
+
+    def _update_collected_incrementally(self):
+        """
+        The store is updated with transformers data recollected for only
+        the blocks that changed in the modulestore since the stored block
+        structure was collected, along with their ancestors and descendants.
+
+        Returns the updated block structure, or None if the stored block
+        structure can't be updated incrementally and needs a full update.
+        """
+        if not config.waffle().is_enabled(config.INCREMENTAL_COLLECT):
+            return None
+        if not BlockStructureTransformers.supports_incremental_collect():
+            return None
+
+        collected_data_version = self.store.get_collected_data_version(self.root_block_usage_key)
+        if collected_data_version is None:
+            return None
+
+        get_changed_blocks = getattr(self.modulestore, 'get_changed_blocks', None)
+        if get_changed_blocks is None:
+            return None
+        changed_block_keys = get_changed_blocks(self.root_block_usage_key.course_key, collected_data_version)
+        if changed_block_keys is None:
+            return None
+
+        try:
+            collected_block_structure = self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
+        with self._bulk_operations():
+            block_structure = BlockStructureFactory.create_for_incremental_collect(
+                collected_block_structure,
+                self.modulestore,
+                changed_block_keys,
+            )
+            if not BlockStructureTransformers.can_collect_incrementally(collected_block_structure, block_structure):
+                return None
+            BlockStructureTransformers.collect(block_structure)
+            self.store.add(block_structure)
             return block_structure
 
     def clear(self):
@@ -0,0 +1,511 @@
+"""
+Binary, versioned serialization of collected block structures.
+
+Previously, the whole BlockStructureBlockData (relations, xBlock fields and
+every transformer's collected data) was pickled and compressed as a single
+blob, so every read had to unpickle all of it, even the data of transformers
+the caller never runs.
+
+The format implemented here splits the data into independently compressed
+sections:
+
+    header:   MAGIC | format version (uint8) | codec id (uint8) | section count (uint16)
+    table:    for each section: name length (uint16) | name (utf-8) | data length (uint32)
+    sections: the compressed data of each section, in table order
+
+with the following sections:
+
+    keys          - the list of usage keys, which the other sections refer to by index
+    relations     - the children and parents (as key indexes) of each block
+    blocks        - the collected xBlock fields of each block
+    transformers  - the structure-wide data of each transformer (including its version)
+    transformer:* - one section per transformer, with its block-specific data
+
+The block-specific transformer sections are only decompressed and unpickled
+the first time data of that transformer is read from the block structure, so
+a caller that only runs a few transformers only pays for those.
+"""
+
+
+import struct
+import zlib
+from logging import getLogger
+from numbers import Number
+
+import six
+from django.conf import settings
+from opaque_keys import OpaqueKey
+from six.moves import cPickle as pickle
+
+from .block_structure import (
+    BlockData,
+    BlockStructureBlockData,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+    _CompactBlockRelations
+)
+from .exceptions import BlockStructureException
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+
+MAGIC = b'\x93BSDAT'
+
+# Incrementally update this value whenever the layout of the serialized data changes.
+FORMAT_VERSION = 1
+
+DEFAULT_CODEC = 'zlib'
+
+_HEADER = struct.Struct('!{}sBBH'.format(len(MAGIC)))
+_SECTION_NAME_LENGTH = struct.Struct('!H')
+_SECTION_DATA_LENGTH = struct.Struct('!I')
+
+KEYS_SECTION = 'keys'
+RELATIONS_SECTION = 'relations'
+BLOCKS_SECTION = 'blocks'
+TRANSFORMERS_SECTION = 'transformers'
+TRANSFORMER_SECTION_PREFIX = 'transformer:'
+
+
+class SerializationError(BlockStructureException):
+    """
+    Exception class for data that cannot be serialized or deserialized
+    in the binary block structure format.
+    """
+    pass
+
+
+class _Codec(object):
+    """
+    A compression codec usable for the sections of serialized data.
+    """
+    def __init__(self, codec_id, name, compress, decompress):
+        self.codec_id = codec_id
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+
+
+def _available_codecs():
+    """
+    Returns a list of the codecs whose libraries are installed.
+    """
+    codecs = [_Codec(1, 'zlib', zlib.compress, zlib.decompress)]
+    if lz4_frame is not None:
+        codecs.append(_Codec(2, 'lz4', lz4_frame.compress, lz4_frame.decompress))
+    if zstandard is not None:
+        codecs.append(_Codec(
+            3,
+            'zstd',
+            lambda data: zstandard.ZstdCompressor().compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompress(data),
+        ))
+    return codecs
+
+
+CODECS_BY_NAME = {codec.name: codec for codec in _available_codecs()}
+CODECS_BY_ID = {codec.codec_id: codec for codec in six.itervalues(CODECS_BY_NAME)}
+
+
+def get_codec(name=None):
+    """
+    Returns the codec with the given name, defaulting to the one
+    configured in BLOCK_STRUCTURES_SETTINGS['COMPRESSION'].
+
+    Falls back to zlib if the requested codec's library is not installed.
+    """
+    if name is None:
+        name = settings.BLOCK_STRUCTURES_SETTINGS.get('COMPRESSION', DEFAULT_CODEC)
+    try:
+        return CODECS_BY_NAME[name]
+    except KeyError:
+        logger.warning(
+            u"BlockStructure: compression codec %s is not available, falling back to %s.", name, DEFAULT_CODEC,
+        )
+        return CODECS_BY_NAME[DEFAULT_CODEC]
+
+
+def is_serialized_block_structure(serialized_data):
+    """
+    Returns whether the given data was written by serialize_block_structure,
+    as opposed to the legacy, pickled format.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize_block_structure(block_structure, codec_name=None):
+    """
+    Serializes the collected data of the given BlockStructureBlockData.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure to serialize.
+        codec_name (str) - The name of the compression codec to use. Defaults to
+            the configured one.
+
+    Returns:
+        bytes
+    """
+    codec = get_codec(codec_name)
+    block_relations = block_structure._block_relations  # pylint: disable=protected-access
+    block_data_map = block_structure._block_data_map  # pylint: disable=protected-access
+
+    # Everything is written in a canonical order, independent of the order in
+    # which the data was collected, so that equal block structures serialize
+    # to equal bytes (see BlockStructureIncrementalData).
+    interned = {}
+    keys = list(block_relations)
+    keys.extend(sorted((key for key in block_data_map if key not in block_relations), key=six.text_type))
+    key_indexes = {key: index for index, key in enumerate(keys)}
+
+    relations = [
+        (
+            [key_indexes[child] for child in relations.children],
+            [key_indexes[parent] for parent in relations.parents],
+        )
+        for relations in (block_relations[key] for key in keys[:len(block_relations)])
+    ]
+
+    blocks = []
+    transformer_blocks = {}
+    for key_index, key in enumerate(keys):
+        block_data = block_data_map.get(key)
+        if block_data is None:
+            continue
+        blocks.append((key_index, _canonical(block_data.fields, interned)))
+        for transformer_name, transformer_data in six.iteritems(block_data.transformer_data):
+            transformer_blocks.setdefault(transformer_name, []).append(
+                (key_index, _canonical(transformer_data.fields, interned))
+            )
+
+    sections = [
+        (KEYS_SECTION, _canonical(keys, interned)),
+        (RELATIONS_SECTION, relations),
+        (BLOCKS_SECTION, blocks),
+        (TRANSFORMERS_SECTION, [
+            (transformer_name, _canonical(block_structure.transformer_data[transformer_name].fields, interned))
+            for transformer_name in sorted(block_structure.transformer_data)
+        ]),
+    ]
+    sections.extend(
+        (TRANSFORMER_SECTION_PREFIX + transformer_name, transformer_blocks[transformer_name])
+        for transformer_name in sorted(transformer_blocks)
+    )
+
+    encoded_sections = [(name.encode('utf-8'), codec.compress(_dumps(value))) for name, value in sections]
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, codec.codec_id, len(encoded_sections))]
+    for name, data in encoded_sections:
+        parts.append(_SECTION_NAME_LENGTH.pack(len(name)))
+        parts.append(name)
+        parts.append(_SECTION_DATA_LENGTH.pack(len(data)))
+    parts.extend(data for _, data in encoded_sections)
+    return b''.join(parts)
+
+
+def _canonical(value, interned):
+    """
+    Returns a copy of the given value whose pickled bytes only depend on
+    its contents, at any depth: dict entries and set items are ordered,
+    and equal hashable values (such as strings and opaque keys, down to
+    their fields) are replaced by a single instance, so the pickle memo
+    does not depend on which objects happen to be shared.  Unhashable
+    objects other than dicts, lists and sets are returned as is.
+
+    Arguments:
+        value - The value to canonicalize.
+        interned (dict) - The instances already used, by type and value.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        items = [(_canonical(key, interned), _canonical(item, interned)) for key, item in six.iteritems(value)]
+        return dict(_sorted(items, sort_key=lambda item: item[0]))
+    if value_type in (list, tuple):
+        return value_type(_canonical(item, interned) for item in value)
+    if value_type in (set, frozenset):
+        return _SortedSet(value_type, _sorted(_canonical(item, interned) for item in value))
+    if isinstance(value, OpaqueKey):
+        # Rebuild the key the way it is unpickled, from its canonical fields.
+        key = value_type.__new__(value_type)
+        key.__setstate__(_canonical(value.__getstate__(), interned))
+        return interned.setdefault((value_type, key), key)
+    if isinstance(value, Number):
+        # Numbers are not memoized, and equal ones may differ (e.g. 0.0 and -0.0).
+        return value
+    try:
+        return interned.setdefault((value_type, value), value)
+    except TypeError:
+        # Unhashable objects are pickled as is.
+        return value
+
+
+def _sorted(items, sort_key=lambda item: item):
+    """
+    Returns the given canonical items in a deterministic order: their
+    natural order if they have one, or else the order of their pickles.
+    """
+    items = list(items)
+    try:
+        return sorted(items, key=sort_key)
+    except TypeError:
+        return sorted(items, key=lambda item: _dumps(sort_key(item)))
+
+
+class _SortedSet(object):
+    """
+    A canonical set or frozenset, which is pickled with its items in order.
+    """
+    __slots__ = ('set_type', 'items')
+
+    def __init__(self, set_type, items):
+        self.set_type = set_type
+        self.items = items
+
+    def __reduce__(self):
+        return self.set_type, (self.items,)
+
+
+def _dumps(value):
+    """
+    Pickles the given value.
+    """
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize_block_structure(serialized_data, root_block_usage_key, lazy=True, compact_relations=False):
+    """
+    Returns the BlockStructureBlockData serialized in the given data.
+
+    Arguments:
+        serialized_data (bytes) - Data returned by serialize_block_structure.
+        root_block_usage_key (UsageKey) - The usage key of the structure's root.
+        lazy (bool) - Whether to defer decoding the block-specific data of each
+            transformer until it is first accessed.
+        compact_relations (bool) - Whether to read the relations straight
+            into _CompactBlockRelations, as serialized block indexes.
+
+    Raises:
+        SerializationError - If the data is not in a supported format.
+    """
+    codec, sections = _read_sections(serialized_data)
+
+    def _decode(name):
+        return pickle.loads(codec.decompress(sections.pop(name)))
+
+    keys = _decode(KEYS_SECTION)
+
+    relations_by_index = _decode(RELATIONS_SECTION)
+    if compact_relations:
+        # Only the first len(relations_by_index) keys are blocks of the structure.
+        block_relations = _CompactBlockRelations.from_indexes(keys[:len(relations_by_index)], relations_by_index)
+    else:
+        block_relations = {}
+        for key, (children, parents) in zip(keys, relations_by_index):
+            relations = block_relations[key] = _BlockRelations()
+            relations.children = [keys[index] for index in children]
+            relations.parents = [keys[index] for index in parents]
+
+    block_data_map = {}
+    for key_index, fields in _decode(BLOCKS_SECTION):
+        block_data = block_data_map[keys[key_index]] = _LazyBlockData(keys[key_index])
+        block_data.fields = fields
+
+    transformer_data = TransformerDataMap()
+    for transformer_name, fields in _decode(TRANSFORMERS_SECTION):
+        transformer_data[transformer_name] = _transformer_data(fields)
+
+    block_structure = BlockStructureBlockData(root_block_usage_key)
+    block_structure._block_relations = block_relations  # pylint: disable=protected-access
+    block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
+    block_structure.transformer_data = transformer_data
+
+    loader = _TransformerSectionLoader(codec, sections, keys, block_data_map)
+    if not lazy:
+        loader.load_all()
+    return block_structure
+
+
+def _read_sections(serialized_data):
+    """
+    Returns the codec and a dict of section name to compressed data
+    of the given serialized data.
+    """
+    try:
+        magic, format_version, codec_id, section_count = _HEADER.unpack_from(serialized_data)
+    except struct.error:
+        raise SerializationError(u"Truncated block structure data.")
+    if magic != MAGIC:
+        raise SerializationError(u"Data is not a serialized block structure.")
+    if format_version != FORMAT_VERSION:
+        raise SerializationError(u"Unsupported block structure format version {}.".format(format_version))
+    try:
+        codec = CODECS_BY_ID[codec_id]
+    except KeyError:
+        raise SerializationError(u"Block structure codec {} is not available.".format(codec_id))
+
+    try:
+        offset = _HEADER.size
+        table = []
+        for _ in range(section_count):
+            name_length, = _SECTION_NAME_LENGTH.unpack_from(serialized_data, offset)
+            offset += _SECTION_NAME_LENGTH.size
+            name = serialized_data[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            data_length, = _SECTION_DATA_LENGTH.unpack_from(serialized_data, offset)
+            offset += _SECTION_DATA_LENGTH.size
+            table.append((name, data_length))
+    except struct.error:
+        raise SerializationError(u"Truncated block structure section table.")
+
+    sections = {}
+    for name, data_length in table:
+        sections[name] = serialized_data[offset:offset + data_length]
+        offset += data_length
+    if offset != len(serialized_data):
+        raise SerializationError(u"Block structure data does not match its section table.")
+    return codec, sections
+
+
+def _transformer_data(fields):
+    """
+    Returns a TransformerData with the given fields.
+    """
+    transformer_data = TransformerData()
+    transformer_data.fields = fields
+    return transformer_data
+
+
+class _TransformerSectionLoader(object):
+    """
+    Decodes the block-specific data of transformers, one section
+    (i.e. one transformer) at a time, into the blocks' TransformerDataMaps.
+    """
+    def __init__(self, codec, sections, keys, block_data_map):
+        self._codec = codec
+        self._pending = {
+            name[len(TRANSFORMER_SECTION_PREFIX):]: data
+            for name, data in six.iteritems(sections)
+            if name.startswith(TRANSFORMER_SECTION_PREFIX)
+        }
+        self._keys = keys
+        self._block_data_map = block_data_map
+        for block_data in six.itervalues(block_data_map):
+            block_data.transformer_data.loader = self
+
+    @property
+    def pending_transformer_names(self):
+        """
+        The names of the transformers whose block data has not been decoded yet.
+        """
+        return set(self._pending)
+
+    def load(self, transformer_name):
+        """
+        Decodes the block data of the given transformer, if still pending.
+        Returns whether any data was decoded.
+        """
+        data = self._pending.pop(transformer_name, None)
+        if data is None:
+            return False
+        for key_index, fields in pickle.loads(self._codec.decompress(data)):
+            # Blocks may have been removed from the structure since it was deserialized.
+            block_data = self._block_data_map.get(self._keys[key_index])
+            if block_data is not None:
+                dict.setdefault(block_data.transformer_data, transformer_name, _transformer_data(fields))
+        return True
+
+    def load_all(self):
+        """
+        Decodes all pending sections and detaches the loader from the blocks,
+        leaving a plain, fully decoded block structure.
+        """
+        for transformer_name in list(self._pending):
+            self.load(transformer_name)
+        for block_data in six.itervalues(self._block_data_map):
+            block_data.transformer_data.loader = None
+
+
+class _LazyTransformerDataMap(TransformerDataMap):
+    """
+    A block's TransformerDataMap whose entries are decoded from
+    their serialized section on first access.
+    """
+    loader = None
+
+    def __missing__(self, key):
+        if self.loader is not None and self.loader.load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        key = self._translate_key(key)
+        return dict.__contains__(self, key) or (self.loader is not None and self.loader.load(key))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def _materialize(self):
+        """
+        Decodes all of the pending sections, before the map is iterated.
+        """
+        if self.loader is not None:
+            self.loader.load_all()
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._materialize()
+        return dict.__len__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def __reduce_ex__(self, protocol):
+        self._materialize()
+        return TransformerDataMap, (), None, None, six.iteritems(dict(self))
+
+
+class _LazyBlockData(BlockData):
+    """
+    BlockData of a deserialized block, whose transformer data is decoded on first access.
+    """
+    def __init__(self, usage_key):
+        super(_LazyBlockData, self).__init__(usage_key)
+        self.transformer_data = _LazyTransformerDataMap()
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are plain BlockData objects.
+        return _block_data, (self.location, self.fields, self.transformer_data)
+
+
+def _block_data(usage_key, fields, transformer_data):
+    """
+    Returns a BlockData with the given contents.
+    """
+    block_data = BlockData(usage_key)
+    block_data.fields = fields
+    block_data.transformer_data = transformer_data
+    return block_data
@@ -9,13 +9,14 @@ from logging import getLogger
 import six
 
 from django.utils.encoding import python_2_unicode_compatible
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.cache_utils import zunpickle
 
 from . import config
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .models import BlockStructureModel
+from .serialization import deserialize_block_structure, is_serialized_block_structure, serialize_block_structure
 from .transformer_registry import TransformerRegistry
 
 logger = getLogger(__name__)  # pylint: disable=C0103
@@ -131,6 +132,29 @@ class BlockStructureStore(object):
 
         return False
 
+    def get_collected_data_version(self, root_block_usage_key):
+        """
+        Returns the version of the modulestore data from which the
+        stored block structure for the given key was collected, provided
+        it was collected with the current schema versions of the
+        Transformers and BlockStructure classes.  Otherwise, or if the
+        block structure isn't in storage, returns None.
+        """
+        if not _is_storage_backing_enabled():
+            return None
+        try:
+            bs_model = self._get_model(root_block_usage_key)
+        except BlockStructureNotFound:
+            return None
+
+        model_version_data = self._version_data_of_model(bs_model)
+        if (
+            model_version_data['transformers_schema_version'] != TransformerRegistry.get_write_version_hash() or
+            model_version_data['block_structure_schema_version'] != six.text_type(BlockStructureBlockData.VERSION)
+        ):
+            return None
+        return model_version_data['data_version']
+
     def _get_model(self, root_block_usage_key):
         """
         Returns the model associated with the given key.
@@ -196,19 +220,22 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        return zpickle(data_to_cache)
+        return serialize_block_structure(block_structure)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Data in the legacy, pickled format (written before the binary
+        format was introduced) is still readable; it is rewritten in the
+        binary format when the stored block structure is next updated.
         """
 
         try:
+            if is_serialized_block_structure(serialized_data):
+                return deserialize_block_structure(
+                    serialized_data, root_block_usage_key, compact_relations=config.compact_relations(),
+                )
             block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
@@ -216,12 +243,15 @@ class BlockStructureStore(object):
             logger.exception(u"BlockStructure: Failed to load data from cache for %s", bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)
 
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
             transformer_data,
             block_data_map,
         )
+        if config.compact_relations():
+            block_structure._compact_relations()
+        return block_structure
 
     @staticmethod
     def _encode_root_cache_key(bs_model):
@@ -12,12 +12,14 @@ from unittest import TestCase
 
 import ddt
 import six
+from mock import MagicMock
 from six.moves import range
 
 from openedx.core.lib.graph_traversals import traverse_post_order
 
 from ..block_structure import BlockStructure, BlockStructureModulestoreData
 from ..exceptions import TransformerException
+from ..transformer import combine_filters
 from .helpers import ChildrenMapTestMixin, MockTransformer, MockXBlock
 
 
@@ -49,6 +51,66 @@ class TestBlockStructure(TestCase, ChildrenMapTestMixin):
             self.assertIn(node, block_structure)
         self.assertNotIn(len(children_map) + 1, block_structure)
 
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_compact_relations(self, children_map):
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        compact_block_structure = self.create_block_structure(children_map, BlockStructure)
+        compact_block_structure._compact_relations()
+
+        self.assertEqual(len(compact_block_structure), len(block_structure))
+        self.assertEqual(list(compact_block_structure), list(block_structure))
+        for node in range(len(children_map)):
+            self.assertIn(node, compact_block_structure)
+            self.assertEqual(compact_block_structure.get_children(node), block_structure.get_children(node))
+            self.assertEqual(compact_block_structure.get_parents(node), block_structure.get_parents(node))
+        self.assertNotIn(len(children_map) + 1, compact_block_structure)
+        self.assertEqual(compact_block_structure.get_children(len(children_map) + 1), [])
+
+        def _filter(block):
+            return block != 1
+
+        for kwargs in [{}, {'filter_func': _filter}, {'start_node': 1}]:
+            self.assertEqual(
+                list(compact_block_structure.topological_traversal(**kwargs)),
+                list(block_structure.topological_traversal(**kwargs)),
+            )
+            self.assertEqual(
+                list(compact_block_structure.post_order_traversal(**kwargs)),
+                list(block_structure.post_order_traversal(**kwargs)),
+            )
+
+    @ddt.data(False, True)
+    def test_traversal_from_missing_start_node(self, compact):
+        block_structure = self.create_block_structure(
+            ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, BlockStructureModulestoreData,
+        )
+        if compact:
+            block_structure._compact_relations()  # pylint: disable=protected-access
+        block_structure.remove_block(1, keep_descendants=False)
+
+        # Like a start node without children, a missing start node is traversed by itself.
+        for missing_node in [1, 10]:
+            self.assertEqual(list(block_structure.topological_traversal(start_node=missing_node)), [missing_node])
+            self.assertEqual(list(block_structure.post_order_traversal(start_node=missing_node)), [missing_node])
+
+    @ddt.data(False, True)
+    def test_set_children(self, compact):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, BlockStructure)
+        if compact:
+            block_structure._compact_relations()  # pylint: disable=protected-access
+
+        block_structure.set_children(0, [2, 1])
+        self.assertEqual(block_structure.get_children(0), [2, 1])
+        self.assertEqual(list(block_structure.topological_traversal()), [0, 2, 1, 3, 4])
+        with self.assertRaises(ValueError):
+            block_structure.set_children(0, [2])
+        with self.assertRaises(ValueError):
+            block_structure.set_children(0, [2, 3])
+
 
 @ddt.ddt
 class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
@@ -209,16 +271,19 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
                 ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
                 ChildrenMapTestMixin.DAG_CHILDREN_MAP,
             ],
+            [True, False],
         )
     )
     @ddt.unpack
-    def test_remove_block(self, keep_descendants, block_to_remove, children_map):
+    def test_remove_block(self, keep_descendants, block_to_remove, children_map, compact):
         ### skip test if invalid
         if (block_to_remove >= len(children_map)) or (keep_descendants and block_to_remove == 0):
             return
 
         ### create structure
         block_structure = self.create_block_structure(children_map)
+        if compact:
+            block_structure._compact_relations()
         parents_map = self.get_parents_map(children_map)
 
         ### verify blocks pre-exist
@@ -263,12 +328,71 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
 
         self.assert_block_structure(block_structure, pruned_children_map, missing_blocks)
 
-    def test_remove_block_traversal(self):
+    @ddt.data(True, False)
+    def test_remove_block_traversal(self, compact):
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        if compact:
+            block_structure._compact_relations()
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
-    def test_copy(self):
+    @ddt.data(True, False)
+    def test_removal_set_filter(self, keep_descendants):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        removal_condition = MagicMock(side_effect=lambda block: block in (2, 3))
+
+        # the removal condition is only evaluated once per block, for all copies
+        for _ in range(3):
+            new_copy = block_structure.copy()
+            new_copy.filter_topological_traversal(
+                new_copy.create_removal_set_filter('test', removal_condition, keep_descendants)
+            )
+            new_copy._prune_unreachable()
+            if keep_descendants:
+                self.assert_block_structure(
+                    new_copy, [[1, 5, 6, 4], [5, 6], [], [], [], [], []], missing_blocks=[2, 3],
+                )
+            else:
+                self.assert_block_structure(new_copy, [[1], [], [], [], [], [], []], missing_blocks=[2, 3, 4, 5, 6])
+        self.assertEqual(removal_condition.call_count, len(ChildrenMapTestMixin.DAG_CHILDREN_MAP))
+
+        # modified block structures no longer share their removal sets
+        new_copy = block_structure.copy()
+        new_copy.remove_block(4, keep_descendants=False)
+        new_copy.create_removal_set_filter('test', removal_condition)
+        self.assertEqual(removal_condition.call_count, 2 * len(ChildrenMapTestMixin.DAG_CHILDREN_MAP) - 1)
+
+    def test_removal_set_filter_of_modified_copy(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        removal_condition = lambda block: block in (1, 4)
+
+        # a copy modified before any removal set is computed does not
+        # share the sets computed for it with the other copies
+        modified_copy = block_structure.copy()
+        modified_copy.remove_block(4, keep_descendants=False)
+        modified_copy.create_removal_set_filter('test', removal_condition)
+
+        new_copy = block_structure.copy()
+        new_copy.filter_topological_traversal(new_copy.create_removal_set_filter('test', removal_condition))
+        self.assertNotIn(1, new_copy)
+        self.assertNotIn(4, new_copy)
+
+    def test_combined_removal_set_filters(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        filters = [
+            block_structure.create_removal_filter(lambda block: block == 5),
+            block_structure.create_removal_set_filter('first', lambda block: block == 1),
+            block_structure.create_removal_set_filter('second', lambda block: block == 4),
+        ]
+        combined_filters = combine_filters(block_structure, filters)
+        block_structure.filter_topological_traversal(combined_filters)
+        block_structure._prune_unreachable()
+        self.assert_block_structure(
+            block_structure, [[2], [], [3], [6], [], [], []], missing_blocks=[1, 4, 5],
+        )
+
+    @ddt.data(True, False)
+    def test_copy(self, compact):
         def _set_value(structure, value):
             """
             Sets a test transformer block field to the given value in the given structure.
@@ -283,6 +407,8 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
 
         # create block structure and verify blocks pre-exist
         block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        if compact:
+            block_structure._compact_relations()
         self.assert_block_structure(block_structure, [[1], [2], [3], []])
         _set_value(block_structure, 'original_value')
 
@@ -9,8 +9,37 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from ..exceptions import BlockStructureNotFound
 from ..factory import BlockStructureFactory
+from ..serialization import deserialize_block_structure, serialize_block_structure
 from ..store import BlockStructureStore
-from .helpers import ChildrenMapTestMixin, MockCache, MockModulestoreFactory
+from ..transformers import BlockStructureTransformers
+from .helpers import (
+    ChildrenMapTestMixin,
+    MockCache,
+    MockModulestoreFactory,
+    MockTransformer,
+    MockXBlock,
+    mock_registered_transformers
+)
+
+
+class MergedStartTransformer(MockTransformer):
+    """
+    A transformer that supports incremental collection, percolating a
+    value down from each block's parents.
+    """
+    INCREMENTAL_COLLECT = True
+
+    @classmethod
+    def collect(cls, block_structure):
+        block_structure.request_xblock_fields('start')
+        for block_key in block_structure.topological_traversal():
+            merged_start = max(
+                [block_structure.get_xblock(block_key).start] + [
+                    block_structure.get_transformer_block_field(parent_key, cls, 'merged_start')
+                    for parent_key in block_structure.get_parents(block_key)
+                ]
+            )
+            block_structure.set_transformer_block_field(block_key, cls, 'merged_start', merged_start)
 
 
 class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
@@ -65,3 +94,41 @@ class TestBlockStructureFactory(TestCase, ChildrenMapTestMixin):
             block_structure._block_data_map,  # pylint: disable=protected-access
         )
         self.assert_block_structure(new_structure, self.children_map)
+
+    def _collect(self, block_structure):
+        """
+        Collects the data of MergedStartTransformer for the given block structure,
+        returning its serialized data.
+        """
+        with mock_registered_transformers([MergedStartTransformer]):
+            BlockStructureTransformers.collect(block_structure)
+        return serialize_block_structure(block_structure, codec_name='zlib')
+
+    def test_for_incremental_collect(self):
+        for block_key, xblock in self.modulestore.blocks.items():
+            xblock.field_map['start'] = block_key
+        collected_block_structure = deserialize_block_structure(
+            self._collect(BlockStructureFactory.create_from_modulestore(0, self.modulestore)),
+            root_block_usage_key=0,
+        )
+
+        # Change the start of block 2, and add a new child (5) to it.
+        self.modulestore.blocks[2].field_map['start'] = 10
+        self.modulestore.blocks[5] = MockXBlock(5, {'start': 1}, modulestore=self.modulestore)
+        self.modulestore.blocks[2].children.append(5)
+        self.children_map = [[1, 2], [3, 4], [5], [], [], []]
+
+        block_structure = BlockStructureFactory.create_for_incremental_collect(
+            collected_block_structure, self.modulestore, {2, 5},
+        )
+        self.assert_block_structure(block_structure, self.children_map)
+        self.assertEqual(block_structure.recollected_block_keys, {0, 2, 5})
+        self.assertEqual(set(block_structure.topological_traversal()), {0, 2, 5})
+        self.assertEqual(set(block_structure._xblock_map), {0, 2, 5})  # pylint: disable=protected-access
+
+        self.assertEqual(
+            self._collect(block_structure),
+            self._collect(BlockStructureFactory.create_from_modulestore(0, self.modulestore)),
+        )
+        self.assertEqual(block_structure.get_transformer_block_field(5, MergedStartTransformer, 'merged_start'), 10)
+        self.assertEqual(block_structure.get_transformer_block_field(3, MergedStartTransformer, 'merged_start'), 3)
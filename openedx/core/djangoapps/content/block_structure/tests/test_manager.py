@@ -5,8 +5,10 @@ Tests for manager.py
 
 import ddt
 import six
+from django.conf import settings
 from django.test import TestCase
 from edx_toggles.toggles.testutils import override_waffle_switch
+from mock import patch
 
 from ..block_structure import BlockStructureBlockData
 from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle_switch
@@ -168,6 +170,25 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
             )
             self.assert_block_structure(block_structure, expected_structure, missing_blocks=expected_missing_blocks)
 
+    @patch.dict(settings.BLOCK_STRUCTURES_SETTINGS, {'COMPACT_RELATIONS': True})
+    def test_get_transformed_with_compact_relations(self):
+        with mock_registered_transformers(self.registered_transformers):
+            # Compacted when collected ...
+            collected_block_structure = self.bs_manager.get_collected()
+            self.assertTrue(collected_block_structure._has_compact_relations())  # pylint: disable=protected-access
+            # ... and when read from the store, but not again for each transformed copy.
+            with patch.object(BlockStructureBlockData, '_compact_relations') as mock_compact:
+                block_structure = self.bs_manager.get_transformed(
+                    self.transformers,
+                    starting_block_usage_key=self.block_key_factory(1),
+                )
+            mock_compact.assert_not_called()
+        self.assertTrue(block_structure._has_compact_relations())  # pylint: disable=protected-access
+        substructure_of_children_map = [[], [3, 4], [], [], []]
+        self.assert_block_structure(block_structure, substructure_of_children_map, missing_blocks=[0, 2])
+        TestTransformer1.assert_collected(block_structure)
+        TestTransformer1.assert_transformed(block_structure)
+
     def test_get_transformed_with_nonexistent_starting_block(self):
         with mock_registered_transformers(self.registered_transformers):
             with self.assertRaises(UsageKeyNotInBlockStructure):
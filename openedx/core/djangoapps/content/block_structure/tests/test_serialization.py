@@ -0,0 +1,187 @@
+"""
+Tests for serialization.py
+"""
+
+
+from copy import deepcopy
+from unittest import TestCase
+
+import ddt
+from six.moves import cPickle as pickle
+
+from ..serialization import (
+    MAGIC,
+    SerializationError,
+    deserialize_block_structure,
+    get_codec,
+    is_serialized_block_structure,
+    serialize_block_structure
+)
+from .helpers import ChildrenMapTestMixin, MockFilteringTransformer, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the binary serialization of block structures.
+    """
+    def setUp(self):
+        super(TestSerialization, self).setUp()
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        for transformer in [MockTransformer, MockFilteringTransformer]:
+            self.block_structure._add_transformer(transformer)  # pylint: disable=protected-access
+            self.block_structure.set_transformer_data(transformer, 'structure_field', transformer.name())
+        for block_id in range(len(self.children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_data = self.block_structure._get_or_create_block(block_key)  # pylint: disable=protected-access
+            block_data.display_name = block_id
+            self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'value', block_id * 2)
+            if block_id % 2:
+                self.block_structure.set_transformer_block_field(block_key, MockFilteringTransformer, 'odd', True)
+
+    def _round_trip(self, **kwargs):
+        """
+        Returns the block structure after serializing and deserializing it.
+        """
+        serialized_data = serialize_block_structure(self.block_structure, **kwargs)
+        self.assertTrue(is_serialized_block_structure(serialized_data))
+        return deserialize_block_structure(serialized_data, self.block_structure.root_block_usage_key)
+
+    def assert_same_data(self, block_structure):
+        """
+        Verifies that the given block structure holds the same data as self.block_structure.
+        """
+        self.assert_block_structure(block_structure, self.children_map)
+        self.assertEqual(
+            {name: data.fields for name, data in block_structure.transformer_data.items()},
+            {name: data.fields for name, data in self.block_structure.transformer_data.items()},
+        )
+        for block_key, block_data in self.block_structure.iteritems():
+            self.assertEqual(block_structure[block_key].fields, block_data.fields)
+            for transformer in [MockTransformer, MockFilteringTransformer]:
+                for field in ['value', 'odd']:
+                    self.assertEqual(
+                        block_structure.get_transformer_block_field(block_key, transformer, field),
+                        self.block_structure.get_transformer_block_field(block_key, transformer, field),
+                    )
+
+    @ddt.data(None, 'zlib', 'lz4', 'zstd', 'unknown')
+    def test_round_trip(self, codec_name):
+        self.assert_same_data(self._round_trip(codec_name=codec_name))
+
+    def test_relations_order(self):
+        block_structure = self._round_trip()
+        for block_key in self.block_structure:
+            self.assertEqual(block_structure.get_children(block_key), self.block_structure.get_children(block_key))
+            self.assertEqual(block_structure.get_parents(block_key), self.block_structure.get_parents(block_key))
+
+    def test_compact_relations(self):
+        serialized_data = serialize_block_structure(self.block_structure)
+        block_structure = deserialize_block_structure(
+            serialized_data, self.block_structure.root_block_usage_key, compact_relations=True,
+        )
+        self.assertTrue(block_structure._has_compact_relations())  # pylint: disable=protected-access
+        self.assert_same_data(block_structure)
+        for block_key in self.block_structure:
+            self.assertEqual(block_structure.get_children(block_key), self.block_structure.get_children(block_key))
+            self.assertEqual(block_structure.get_parents(block_key), self.block_structure.get_parents(block_key))
+        self.assertEqual(serialize_block_structure(block_structure), serialized_data)
+
+    def test_transformer_sections_are_lazy(self):
+        block_structure = self._round_trip()
+        loader = block_structure[self.block_key_factory(0)].transformer_data.loader
+        self.assertEqual(
+            loader.pending_transformer_names,
+            {MockTransformer.name(), MockFilteringTransformer.name()},
+        )
+
+        self.assertEqual(
+            block_structure.get_transformer_block_field(self.block_key_factory(3), MockTransformer, 'value'), 6,
+        )
+        self.assertEqual(loader.pending_transformer_names, {MockFilteringTransformer.name()})
+
+        # Reading a block without data for a transformer still decodes that transformer's section.
+        self.assertIsNone(
+            block_structure.get_transformer_block_field(self.block_key_factory(0), MockFilteringTransformer, 'odd')
+        )
+        self.assertEqual(loader.pending_transformer_names, set())
+
+    def test_lazy_read_after_remove_block(self):
+        block_structure = self._round_trip()
+        block_structure.remove_block(self.block_key_factory(1), keep_descendants=True)
+        for block_key in block_structure:
+            self.assertEqual(
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'value'),
+                self.block_structure.get_transformer_block_field(block_key, MockTransformer, 'value'),
+            )
+
+    def test_copy_and_pickle(self):
+        block_structure = self._round_trip()
+        self.assert_same_data(block_structure.copy())
+        self.assert_same_data(deepcopy(block_structure))
+
+        unpickled = pickle.loads(pickle.dumps(block_structure))
+        self.assert_same_data(unpickled)
+
+    def test_reserialize(self):
+        self.block_structure = self._round_trip()
+        self.assert_same_data(self._round_trip())
+
+    def _set_nested_field(self, block_key, value):
+        """
+        Sets a field holding the given value on the given block, for both transformers.
+        """
+        self.block_structure._get_or_create_block(block_key).nested = value  # pylint: disable=protected-access
+        for transformer in [MockTransformer, MockFilteringTransformer]:
+            self.block_structure.set_transformer_block_field(block_key, transformer, 'nested', value)
+
+    def test_nested_values_are_canonical(self):
+        block_key = self.block_key_factory(1)
+        other_block_key = self.block_key_factory(2)
+        self._set_nested_field(block_key, {
+            'keys': {block_key, other_block_key},
+            'dict': {'b': [block_key], 'a': {'d': 1, 'c': (2, other_block_key)}},
+        })
+        serialized_data = serialize_block_structure(self.block_structure)
+
+        # Equal values, ordered differently and not sharing any objects.
+        def copy_key(key):
+            return pickle.loads(pickle.dumps(key))
+
+        self._set_nested_field(block_key, {
+            'dict': {'a': {'c': (2, copy_key(other_block_key)), 'd': 1}, 'b': [copy_key(block_key)]},
+            'keys': {copy_key(other_block_key), copy_key(block_key)},
+        })
+        self.assertEqual(serialize_block_structure(self.block_structure), serialized_data)
+
+        block_structure = deserialize_block_structure(serialized_data, self.block_structure.root_block_usage_key)
+        nested = block_structure.get_transformer_block_field(block_key, MockTransformer, 'nested')
+        self.assertEqual(nested['keys'], {block_key, other_block_key})
+        self.assertEqual(list(nested['dict']), ['a', 'b'])
+        self.assertEqual(list(nested['dict']['a']), ['c', 'd'])
+
+    def test_eager(self):
+        serialized_data = serialize_block_structure(self.block_structure)
+        block_structure = deserialize_block_structure(
+            serialized_data, self.block_structure.root_block_usage_key, lazy=False,
+        )
+        self.assertIsNone(block_structure[self.block_key_factory(0)].transformer_data.loader)
+        self.assert_same_data(block_structure)
+
+    def test_unknown_codec_falls_back(self):
+        self.assertEqual(get_codec('unknown').name, 'zlib')
+
+    @ddt.data(
+        b'',
+        b'not a block structure',
+        MAGIC + b'\x63',
+    )
+    def test_invalid_data(self, serialized_data):
+        with self.assertRaises(SerializationError):
+            deserialize_block_structure(serialized_data, self.block_structure.root_block_usage_key)
+
+    def test_truncated_data(self):
+        serialized_data = serialize_block_structure(self.block_structure)
+        with self.assertRaises(SerializationError):
+            deserialize_block_structure(serialized_data[:-1], self.block_structure.root_block_usage_key)
@@ -8,6 +8,8 @@ from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
+from openedx.core.lib.cache_utils import zpickle
+
 from ..config import STORAGE_BACKING_FOR_CACHE, waffle_switch
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
@@ -81,6 +83,23 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             stored_value = self.store.get(self.block_structure.root_block_usage_key)
             self.assert_block_structure(stored_value, self.children_map)
 
+    def test_legacy_serialized_data(self):
+        self.store.add(self.block_structure)
+        legacy_data = zpickle((
+            self.block_structure._block_relations,  # pylint: disable=protected-access
+            self.block_structure.transformer_data,
+            self.block_structure._block_data_map,  # pylint: disable=protected-access
+        ))
+        for cache_key in self.mock_cache.map:
+            self.mock_cache.map[cache_key] = legacy_data
+
+        stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+        self.assertEqual(
+            stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+            u'{} val'.format(MockTransformer.name()),
+        )
+
     @ddt.data(1, 5, None)
     def test_cache_timeout(self, timeout):
         if timeout is not None:
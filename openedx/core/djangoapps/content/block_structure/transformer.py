@@ -7,6 +7,8 @@ Transformers.
 from abc import abstractmethod
 import functools
 
+from .block_structure import RemovalSetFilter
+
 
 class BlockStructureTransformer(object):
     """
@@ -58,6 +60,31 @@ class BlockStructureTransformer(object):
     WRITE_VERSION = 0
     READ_VERSION = 0
 
+    # Whether the transformer's collect method supports incremental
+    # collection, where only the data of the blocks that changed since
+    # the last collection, along with their ancestors, descendants and
+    # the parents of all of those, is recollected. In that case, the
+    # given block_structure's traversals and iteration only yield
+    # those blocks, only their xBlocks are available (see has_xblock),
+    # and all other blocks keep their previously collected data.
+    #
+    # A transformer can only set this to True if the data it collects
+    # for a block depends solely on:
+    # 1. the block's own xBlock, and the xBlocks of its parents,
+    # 2. the collected data of the block's parents, if percolated
+    #    down (e.g., in a topological traversal), or of the block's
+    #    children, if percolated up (e.g., in a post-order traversal),
+    #    but not both, and
+    # 3. for non-block-specific data, the root block's xBlock.
+    #
+    # A transformer whose collected data also depends on data outside
+    # of the course can override can_collect_incrementally.
+    #
+    # If any registered transformer doesn't support incremental
+    # collection, block structures are always fully recollected.
+    #
+    INCREMENTAL_COLLECT = False
+
     @classmethod
     def name(cls):
         """
@@ -73,6 +100,23 @@ class BlockStructureTransformer(object):
         """
         raise NotImplementedError
 
+    @classmethod
+    def can_collect_incrementally(cls, collected_block_structure, block_structure):  # pylint: disable=unused-argument
+        """
+        Returns whether the data previously collected by the transformer
+        in collected_block_structure can be updated by an incremental
+        collection of block_structure. Only called for transformers
+        whose INCREMENTAL_COLLECT is True, before their collect method.
+
+        Arguments:
+            collected_block_structure (BlockStructureBlockData) - The
+                previously collected block structure.
+
+            block_structure (BlockStructureIncrementalData) - The block
+                structure that is to be collected incrementally.
+        """
+        return True
+
     @classmethod
     def collect(cls, block_structure):
         """
@@ -214,9 +258,20 @@ class FilteringTransformerMixin(BlockStructureTransformer):
 
 
 def combine_filters(block_structure, filters):
+    """
+    Given a list of filter functions, returns a single filter function
+    that 'ands' them together.  All RemovalSetFilters among them are
+    merged and applied first, since they cost a single set lookup.
+    """
+    removal_set_filters = [
+        block_filter for block_filter in filters if isinstance(block_filter, RemovalSetFilter)
+    ]
+    other_filters = [
+        block_filter for block_filter in filters if not isinstance(block_filter, RemovalSetFilter)
+    ]
     return functools.reduce(
         _filter_chain,
-        filters,
+        RemovalSetFilter.merge(removal_set_filters) + other_filters,
         block_structure.create_universal_filter()
     )
 
@@ -6,6 +6,8 @@ Module for a collection of BlockStructureTransformers.
 import functools
 from logging import getLogger
 
+from django.conf import settings
+
 from .exceptions import TransformerDataIncompatible, TransformerException
 from .transformer import FilteringTransformerMixin, combine_filters
 from .transformer_registry import TransformerRegistry
@@ -83,6 +85,36 @@ class BlockStructureTransformers(object):
         # Collect all fields that were requested by the transformers.
         block_structure._collect_requested_xblock_fields()  # pylint: disable=protected-access
 
+    @classmethod
+    def supports_incremental_collect(cls):
+        """
+        Returns whether all registered transformers support incremental collection.
+
+        Transformers of other packages that don't declare INCREMENTAL_COLLECT
+        support it if they are listed in
+        BLOCK_STRUCTURES_SETTINGS['INCREMENTAL_COLLECT_TRANSFORMERS'].
+        """
+        incremental_collect_transformers = settings.BLOCK_STRUCTURES_SETTINGS.get(
+            'INCREMENTAL_COLLECT_TRANSFORMERS', ()
+        )
+        return all(
+            getattr(transformer, 'INCREMENTAL_COLLECT', transformer.name() in incremental_collect_transformers)
+            for transformer in TransformerRegistry.get_registered_transformers()
+        )
+
+    @classmethod
+    def can_collect_incrementally(cls, collected_block_structure, block_structure):
+        """
+        Returns whether all registered transformers can update their data
+        in collected_block_structure by an incremental collection of
+        block_structure.
+        """
+        return all(
+            transformer.can_collect_incrementally(collected_block_structure, block_structure)
+            for transformer in TransformerRegistry.get_registered_transformers()
+            if hasattr(transformer, 'can_collect_incrementally')
+        )
+
     @classmethod
     def verify_versions(cls, block_structure):
         """
@@ -0,0 +1,282 @@
+"""
+A cache of course assets on the local disk, shared by all of the processes of
+a node, for the assets too large for the content cache (see caching.py).
+
+Assets are stored under the digest of their content, so that each version of
+an asset is read from the contentstore once per node, and so that a new
+version of an asset doesn't need to invalidate the previous one, which ends up
+evicted instead.
+
+No lock is held while serving an asset:
+
+* An asset is written to a partial file, which is created exclusively so that
+  a single process writes it, while it is served from the contentstore (or,
+  for a range of the asset, before the range is served from the file), and
+  then renamed into place atomically once it is fully written.  The partial
+  file is removed if serving the asset stops before that, and a partial file
+  left by a process that died is replaced once stale.
+* A cached asset is opened before it is served, so that evicting it doesn't
+  affect the responses serving it already.
+* The least recently used assets are evicted, as ordered by the modification
+  time of their files, by a single process at a time.
+"""
+
+
+import errno
+import fcntl
+import logging
+import os
+import re
+import time
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r'^[0-9a-f]{32,128}$')
+
+PARTIAL_SUFFIX = '.partial'
+
+EVICTION_LOCK_NAME = '.eviction.lock'
+
+# A partial file which hasn't been written for this long was left by a process that died.
+STALE_PARTIAL_SECONDS = 10 * 60
+
+# How often the use of a cached asset is recorded, at most.
+TOUCH_INTERVAL_SECONDS = 60 * 60
+
+
+def get_asset_disk_cache():
+    """
+    Returns the AssetDiskCache configured by the CONTENTSERVER_DISK_CACHE
+    setting, or None if it isn't enabled.
+    """
+    config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', None) or {}
+    if not config.get('DIRECTORY'):
+        return None
+    return AssetDiskCache(config['DIRECTORY'], config['MAX_SIZE'], config.get('MIN_ASSET_SIZE', 0))
+
+
+class AssetDiskCache(object):
+    """
+    A cache of assets in `directory`, of at most `max_size` bytes, for the
+    assets of at least `min_asset_size` bytes.
+    """
+
+    def __init__(self, directory, max_size, min_asset_size=0):
+        self.directory = directory
+        self.max_size = max_size
+        self.min_asset_size = min_asset_size
+
+    def accepts(self, digest, length):
+        """
+        Returns whether the asset with the given digest and length in bytes
+        can be cached.
+        """
+        return (
+            digest is not None and DIGEST_RE.match(digest) is not None and
+            length is not None and self.min_asset_size <= length <= self.max_size
+        )
+
+    def open(self, digest):
+        """
+        Returns the cached asset with the given digest opened for reading, or
+        None if it isn't cached.
+        """
+        path = self._path(digest)
+        try:
+            asset_file = open(path, 'rb')
+        except (IOError, OSError) as error:
+            if error.errno != errno.ENOENT:
+                log.warning(u"Cannot open cached asset %s: %s", path, error)
+            return None
+
+        try:
+            if time.time() - os.fstat(asset_file.fileno()).st_mtime > TOUCH_INTERVAL_SECONDS:
+                os.utime(path, None)
+        except OSError:
+            # The asset was just evicted, which doesn't matter to the open file.
+            pass
+        return asset_file
+
+    def fill(self, digest, chunks):
+        """
+        Returns an iterable of the given iterable `chunks` of bytes, the
+        content of the asset with the given digest, which stores the asset as
+        the chunks are read, so that the asset can be served while it is
+        stored.
+
+        The asset is only stored once all the chunks are read: it isn't
+        stored if the iterable is closed before, e.g. because the client
+        disconnected, or if a chunk can't be read or written.  `chunks` is
+        returned as is if another process is storing the asset already.
+        """
+        path = self._path(digest)
+        partial_path = path + PARTIAL_SUFFIX
+        partial_fd = self._create_partial(partial_path)
+        if partial_fd is None:
+            return chunks
+        return self._fill(path, partial_path, os.fdopen(partial_fd, 'wb'), chunks)
+
+    def store(self, digest, chunks):
+        """
+        Stores the asset with the given digest, by reading all of the given
+        iterable `chunks` of bytes, its content, and returns the asset opened
+        for reading.
+
+        Returns None, without reading the chunks, if another process is
+        storing the asset already, or if the asset can't be stored.
+        """
+        path = self._path(digest)
+        partial_path = path + PARTIAL_SUFFIX
+        partial_fd = self._create_partial(partial_path)
+        if partial_fd is None:
+            return None
+        for __ in self._fill(path, partial_path, os.fdopen(partial_fd, 'wb'), chunks):
+            pass
+        return self.open(digest)
+
+    def _fill(self, path, partial_path, partial_file, chunks):
+        """
+        Yields the given chunks, while writing them to `partial_file`, which is
+        renamed to `path` once all of them are written.
+        """
+        stored = False
+        try:
+            for chunk in chunks:
+                if partial_file is not None:
+                    try:
+                        partial_file.write(chunk)
+                    except (IOError, OSError) as error:
+                        log.warning(u"Cannot cache asset %s: %s", path, error)
+                        partial_file.close()
+                        partial_file = None
+                        self._remove(partial_path)
+                yield chunk
+            if partial_file is not None:
+                try:
+                    partial_file.close()
+                    os.rename(partial_path, path)
+                    stored = True
+                except (IOError, OSError) as error:
+                    log.warning(u"Cannot cache asset %s: %s", path, error)
+        finally:
+            if not stored and partial_file is not None:
+                partial_file.close()
+                self._remove(partial_path)
+        if stored:
+            self.evict()
+
+    def evict(self):
+        """
+        Evicts the least recently used assets until the cache fits in its
+        maximum size.  Does nothing if another process is evicting assets.
+        """
+        try:
+            lock_file = open(os.path.join(self.directory, EVICTION_LOCK_NAME), 'a')
+        except (IOError, OSError) as error:
+            log.warning(u"Cannot evict cached assets from %s: %s", self.directory, error)
+            return
+
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except (IOError, OSError) as error:
+                if error.errno in (errno.EAGAIN, errno.EACCES):
+                    return
+                raise
+
+            now = time.time()
+            entries = sorted(self._scan())
+            total_size = sum(size for __, size, __ in entries)
+            for modified_at, size, path in entries:
+                if total_size <= self.max_size:
+                    break
+                if path.endswith(PARTIAL_SUFFIX) and now - modified_at < STALE_PARTIAL_SECONDS:
+                    continue
+                self._remove(path)
+                total_size -= size
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _create_partial(self, partial_path):
+        """
+        Creates the partial file at `partial_path`, replacing it if stale, and
+        returns its descriptor, or None if another process is writing it.
+        """
+        for __ in range(3):
+            try:
+                return os.open(partial_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except OSError as error:
+                if error.errno == errno.ENOENT:
+                    try:
+                        os.makedirs(os.path.dirname(partial_path))
+                    except OSError as makedirs_error:
+                        if makedirs_error.errno != errno.EEXIST:
+                            raise
+                elif error.errno == errno.EEXIST:
+                    try:
+                        modified_at = os.stat(partial_path).st_mtime
+                    except OSError:
+                        continue
+                    if time.time() - modified_at < STALE_PARTIAL_SECONDS:
+                        return None
+                    self._remove(partial_path)
+                else:
+                    log.warning(u"Cannot cache asset %s: %s", partial_path, error)
+                    return None
+        return None
+
+    def _scan(self):
+        """
+        Returns the (modification time, size, path) of each file of the cache.
+        """
+        entries = []
+        for shard in os.listdir(self.directory):
+            shard_path = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                path = os.path.join(shard_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class FileRange(object):
+    """
+    A file-like object reading the bytes `first` to `last` (included) of
+    `asset_file`.
+
+    It exposes the descriptor of the file, positioned at `first`, so that the
+    WSGI server can send the range with sendfile (see wsgi.file_wrapper), for
+    the Content-Length of the response.
+    """
+
+    def __init__(self, asset_file, first, last):
+        asset_file.seek(first)
+        self._file = asset_file
+        self._remaining = last - first + 1
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size) if size else b''
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
@@ -8,12 +8,14 @@ import logging
 
 import six
 from django.http import (
+    FileResponse,
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseNotModified,
-    HttpResponsePermanentRedirect
+    HttpResponsePermanentRedirect,
+    StreamingHttpResponse
 )
 from django.utils.deprecation import MiddlewareMixin
 from opaque_keys import InvalidKeyError
@@ -23,12 +25,13 @@ from six import text_type
 from openedx.core.djangoapps.header_control import force_header_for_response
 from common.djangoapps.student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from .caching import get_cached_content, set_cached_content
+from .disk_cache import FileRange, get_asset_disk_cache
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -119,13 +122,27 @@ class StaticContentServer(MiddlewareMixin):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
-            # if this asset has changed since then.
+            # if this asset has changed since then.  An If-None-Match header takes
+            # precedence over an If-Modified-Since header.
+            etag = u'"{}"'.format(actual_digest) if actual_digest else None
+            if 'HTTP_IF_NONE_MATCH' in request.META:
+                if etag is not None and is_etag_matched(request.META['HTTP_IF_NONE_MATCH'], etag):
+                    response = HttpResponseNotModified()
+                    response['ETag'] = etag
+                    return response
             last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
             if 'HTTP_IF_MODIFIED_SINCE' in request.META:
                 if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
+                if if_modified_since == last_modified_at_str and 'HTTP_IF_NONE_MATCH' not in request.META:
                     return HttpResponseNotModified()
 
+            # Serve the assets too large for the content cache from the local disk cache, if
+            # it is enabled, so that each version of an asset is read once on this node.
+            disk_cache = self.get_asset_disk_cache(content)
+            asset_file = disk_cache.open(content.content_digest) if disk_cache is not None else None
+            if newrelic and disk_cache is not None:
+                newrelic.agent.add_custom_parameter('contentserver.disk_cached', asset_file is not None)
+
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
@@ -135,7 +152,7 @@ class StaticContentServer(MiddlewareMixin):
             response = None
             if request.META.get('HTTP_RANGE'):
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
+                if asset_file is None and not isinstance(content, StaticContentStream):
                     content = AssetManager.find(loc, as_stream=True)
 
                 header_value = request.META['HTTP_RANGE']
@@ -163,7 +180,19 @@ class StaticContentServer(MiddlewareMixin):
 
                         if 0 <= first <= last < content.length:
                             # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
+                            whole_asset = first == 0 and last == content.length - 1
+                            if asset_file is None and disk_cache is not None and not whole_asset:
+                                # Store the whole asset first, then serve the range from the disk cache.
+                                asset_file = disk_cache.store(content.content_digest, content.stream_data())
+                            if asset_file is not None:
+                                response = FileResponse(FileRange(asset_file, first, last))
+                            elif disk_cache is not None and whole_asset:
+                                # Store the asset in the disk cache while it is streamed from the contentstore.
+                                response = StreamingHttpResponse(
+                                    disk_cache.fill(content.content_digest, content.stream_data())
+                                )
+                            else:
+                                response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
@@ -177,11 +206,19 @@ class StaticContentServer(MiddlewareMixin):
                                 u"Cannot satisfy ranges in Range header: %s for content: %s",
                                 header_value, text_type(loc)
                             )
+                            if asset_file is not None:
+                                asset_file.close()
                             return HttpResponse(status=416)  # Requested Range Not Satisfiable
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if asset_file is not None:
+                    response = FileResponse(FileRange(asset_file, 0, content.length - 1))
+                elif disk_cache is not None:
+                    # Store the asset in the disk cache while it is streamed from the contentstore.
+                    response = StreamingHttpResponse(disk_cache.fill(content.content_digest, content.stream_data()))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -192,6 +229,8 @@ class StaticContentServer(MiddlewareMixin):
             response['Accept-Ranges'] = 'bytes'
             response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
+            if etag is not None:
+                response['ETag'] = etag
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
@@ -280,6 +319,22 @@ class StaticContentServer(MiddlewareMixin):
 
         return True
 
+    def get_asset_disk_cache(self, content):
+        """
+        Returns the local disk cache serving the given asset, or None if it isn't served
+        from the disk cache.
+
+        An asset which isn't cached yet is stored in the disk cache as it is served,
+        if the whole asset is requested, or else before the requested range is served
+        from the disk cache.
+        """
+        if not isinstance(content, StaticContentStream):
+            return None
+        disk_cache = get_asset_disk_cache()
+        if disk_cache is None or not disk_cache.accepts(content.content_digest, content.length):
+            return None
+        return disk_cache
+
     def load_asset_from_location(self, location):
         """
         Loads an asset based on its location, either retrieving it from a cache
@@ -305,6 +360,23 @@ class StaticContentServer(MiddlewareMixin):
         return content
 
 
+def is_etag_matched(header_value, etag):
+    """
+    Returns whether the value of an If-None-Match header matches the given entity tag.
+
+    See spec for details: https://tools.ietf.org/html/rfc7232#section-3.2
+    """
+    if header_value.strip() == '*':
+        return True
+    for tag in header_value.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -8,7 +8,10 @@ import copy
 import datetime
 import ddt
 import logging
+import os
+import shutil
 import six
+import tempfile
 import unittest
 from uuid import uuid4
 
@@ -30,6 +33,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.tests.factories import UserFactory, AdminFactory
 
+from ..disk_cache import AssetDiskCache
 from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
@@ -284,6 +288,140 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
 
+    def test_etag_sent(self):
+        """
+        Tests that the digest of the asset is sent as its entity tag.
+        """
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['ETag'], u'"{}"'.format(digest))
+
+    @ddt.data(
+        (u'"{digest}"', 304),
+        (u'W/"{digest}"', 304),
+        (u'"other", "{digest}"', 304),
+        (u'*', 304),
+        (u'"other"', 200),
+    )
+    @ddt.unpack
+    def test_if_none_match(self, header_value, expected_status_code):
+        """
+        Tests that a request with a matching If-None-Match header gets a 304 Not Modified response.
+        """
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=header_value.format(digest=digest))
+        self.assertEqual(resp.status_code, expected_status_code)
+        self.assertEqual(resp['ETag'], u'"{}"'.format(digest))
+
+    def test_if_none_match_takes_precedence(self):
+        """
+        Tests that an If-Modified-Since header is ignored when there is an If-None-Match header.
+        """
+        content = self.contentstore.find(self.unlocked_asset)
+        resp = self.client.get(
+            self.url_unlocked,
+            HTTP_IF_NONE_MATCH='"other"',
+            HTTP_IF_MODIFIED_SINCE=content.last_modified_at.strftime(HTTP_DATE_FORMAT),
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def _serve_from_disk_cache(self, **headers):
+        """
+        Requests the unlocked asset, loaded as a stream as large assets are, with the disk cache
+        enabled.  Returns the response and the content of the response.
+        """
+        disk_cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk_cache_directory)
+        disk_cache = {'DIRECTORY': disk_cache_directory, 'MAX_SIZE': 1048576, 'MIN_ASSET_SIZE': 0}
+        with override_settings(CONTENTSERVER_DISK_CACHE=disk_cache):
+            with patch.object(StaticContentServer, 'load_asset_from_location') as mock_load_asset:
+                mock_load_asset.side_effect = lambda loc: AssetManager.find(loc, as_stream=True)
+                b''.join(self.client.get(self.url_unlocked).streaming_content)
+                with patch('xmodule.contentstore.content.StaticContentStream.stream_data') as mock_stream_data:
+                    resp = self.client.get(self.url_unlocked, **headers)
+                    self.assertFalse(mock_stream_data.called)
+        return resp, b''.join(resp.streaming_content)
+
+    def test_disk_cached_asset(self):
+        """
+        Tests that large assets are served from the disk cache once cached.
+        """
+        data = self.contentstore.find(self.unlocked_asset).data
+        resp, content = self._serve_from_disk_cache()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertEqual(content, data)
+
+    def test_disk_cached_asset_range(self):
+        """
+        Tests that range requests of large assets are served from the disk cache once cached.
+        """
+        data = self.contentstore.find(self.unlocked_asset).data
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
+        resp, content = self._serve_from_disk_cache(
+            HTTP_RANGE='bytes={first}-{last}'.format(first=first_byte, last=last_byte)
+        )
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], u'bytes {first}-{last}/{length}'.format(
+            first=first_byte, last=last_byte, length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], str(last_byte - first_byte + 1))
+        self.assertEqual(content, data[first_byte:last_byte + 1])
+
+    def _serve_disk_cache_miss(self, **headers):
+        """
+        Requests the unlocked asset, loaded as a stream as large assets are, with the disk cache
+        enabled and empty.  Returns the response, the content of the response, the asset and
+        the path where the disk cache stores it.
+        """
+        content = self.contentstore.find(self.unlocked_asset)
+        disk_cache_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, disk_cache_directory)
+        cached_path = os.path.join(disk_cache_directory, content.content_digest[:2], content.content_digest)
+        disk_cache = {'DIRECTORY': disk_cache_directory, 'MAX_SIZE': 1048576, 'MIN_ASSET_SIZE': 0}
+        with override_settings(CONTENTSERVER_DISK_CACHE=disk_cache):
+            with patch.object(StaticContentServer, 'load_asset_from_location') as mock_load_asset:
+                mock_load_asset.side_effect = lambda loc: AssetManager.find(loc, as_stream=True)
+                resp = self.client.get(self.url_unlocked, **headers)
+                data = b''.join(resp.streaming_content) if resp.streaming else resp.content
+                return resp, data, content, cached_path
+
+    def test_disk_cache_miss_range(self):
+        """
+        Tests that a range of a large asset which isn't in the disk cache is served from the
+        disk cache, once the whole asset is stored.
+        """
+        resp, data, content, cached_path = self._serve_disk_cache_miss(HTTP_RANGE='bytes=1-2')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], u'bytes 1-2/{}'.format(self.length_unlocked))
+        self.assertEqual(data, content.data[1:3])
+        with open(cached_path, 'rb') as cached_file:
+            self.assertEqual(cached_file.read(), content.data)
+
+    def test_disk_cache_miss_whole_range(self):
+        """
+        Tests that a range of a large asset which isn't in the disk cache and spans the whole
+        asset is stored in the disk cache as it is served.
+        """
+        resp, data, content, cached_path = self._serve_disk_cache_miss(HTTP_RANGE='bytes=0-')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertEqual(data, content.data)
+        self.assertTrue(os.path.exists(cached_path))
+
+    def test_disk_cache_miss_range_while_stored(self):
+        """
+        Tests that a range of a large asset which another process is storing in the disk cache
+        is served from the contentstore.
+        """
+        with patch.object(AssetDiskCache, 'store', return_value=None) as mock_store:
+            resp, data, content, cached_path = self._serve_disk_cache_miss(HTTP_RANGE='bytes=1-2')
+        self.assertTrue(mock_store.called)
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(data, content.data[1:3])
+        self.assertFalse(os.path.exists(cached_path))
+
     def test_vary_header_sent(self):
         """
         Tests that we're properly setting the Vary header to ensure browser requests don't get
@@ -0,0 +1,150 @@
+"""
+Tests for the local disk cache of assets
+"""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from ..disk_cache import PARTIAL_SUFFIX, STALE_PARTIAL_SECONDS, AssetDiskCache, FileRange
+
+DIGEST_A = 'a' * 32
+DIGEST_B = 'b' * 32
+DIGEST_C = 'c' * 32
+
+
+class AssetDiskCacheTest(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+
+    def setUp(self):
+        super(AssetDiskCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = AssetDiskCache(self.directory, max_size=10)
+
+    def read(self, asset_file):
+        with asset_file:
+            return asset_file.read()
+
+    def store(self, digest, chunks):
+        """
+        Stores the asset with the given digest and chunks, by reading all of them
+        as they are served, and returns it opened for reading.
+        """
+        b''.join(self.cache.fill(digest, chunks))
+        return self.cache.open(digest)
+
+    def test_store_and_open(self):
+        self.assertIsNone(self.cache.open(DIGEST_A))
+        self.assertEqual(self.read(self.store(DIGEST_A, [b'abc', b'def'])), b'abcdef')
+        self.assertEqual(self.read(self.cache.open(DIGEST_A)), b'abcdef')
+
+    def test_store_before_served(self):
+        asset_file = self.cache.store(DIGEST_A, iter([b'abc', b'def']))
+        self.assertEqual(self.read(asset_file), b'abcdef')
+        self.assertEqual(self.read(self.cache.open(DIGEST_A)), b'abcdef')
+
+    def test_fill_while_served(self):
+        chunks = self.cache.fill(DIGEST_A, [b'abc', b'def'])
+        self.assertEqual(next(chunks), b'abc')
+        self.assertIsNone(self.cache.open(DIGEST_A))
+        self.assertEqual(b''.join(chunks), b'def')
+        self.assertEqual(self.read(self.cache.open(DIGEST_A)), b'abcdef')
+
+    def test_fill_closed_removes_partial(self):
+        chunks = self.cache.fill(DIGEST_A, [b'abc', b'def'])
+        self.assertEqual(next(chunks), b'abc')
+        chunks.close()
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'aa')), [])
+        self.assertIsNone(self.cache.open(DIGEST_A))
+
+    def test_accepts(self):
+        cache = AssetDiskCache(self.directory, max_size=10, min_asset_size=2)
+        self.assertTrue(cache.accepts(DIGEST_A, 2))
+        self.assertTrue(cache.accepts(DIGEST_A, 10))
+        self.assertFalse(cache.accepts(DIGEST_A, 1))
+        self.assertFalse(cache.accepts(DIGEST_A, 11))
+        self.assertFalse(cache.accepts(DIGEST_A, None))
+        self.assertFalse(cache.accepts(None, 5))
+        self.assertFalse(cache.accepts('../' + DIGEST_A, 5))
+
+    def test_store_while_another_process_stores(self):
+        os.makedirs(os.path.join(self.directory, 'aa'))
+        open(os.path.join(self.directory, 'aa', DIGEST_A + PARTIAL_SUFFIX), 'w').close()
+
+        def chunks():
+            raise AssertionError('The chunks should not be read')
+            yield  # pylint: disable=unreachable
+
+        asset_chunks = chunks()
+        self.assertIs(self.cache.fill(DIGEST_A, asset_chunks), asset_chunks)
+        self.assertIsNone(self.cache.store(DIGEST_A, asset_chunks))
+        self.assertIsNone(self.cache.open(DIGEST_A))
+
+    def test_store_replaces_stale_partial(self):
+        partial_path = os.path.join(self.directory, 'aa', DIGEST_A + PARTIAL_SUFFIX)
+        os.makedirs(os.path.dirname(partial_path))
+        open(partial_path, 'w').close()
+        stale_time = time.time() - STALE_PARTIAL_SECONDS - 1
+        os.utime(partial_path, (stale_time, stale_time))
+
+        self.assertEqual(self.read(self.store(DIGEST_A, [b'abc'])), b'abc')
+        self.assertFalse(os.path.exists(partial_path))
+
+    def test_store_failure_removes_partial(self):
+        def chunks():
+            yield b'abc'
+            raise ValueError('Cannot read the asset')
+
+        with self.assertRaises(ValueError):
+            self.store(DIGEST_A, chunks())
+        self.assertEqual(os.listdir(os.path.join(self.directory, 'aa')), [])
+
+    def test_evicts_least_recently_used(self):
+        self.read(self.store(DIGEST_A, [b'aaaa']))
+        self.read(self.store(DIGEST_B, [b'bbbb']))
+        old_time = time.time() - 2 * 60 * 60
+        os.utime(os.path.join(self.directory, 'aa', DIGEST_A), (old_time, old_time))
+        os.utime(os.path.join(self.directory, 'bb', DIGEST_B), (old_time - 1, old_time - 1))
+
+        # Opening A records its use, so B is now the least recently used.
+        self.read(self.cache.open(DIGEST_A))
+        self.read(self.store(DIGEST_C, [b'cccc']))
+
+        self.assertIsNotNone(self.cache.open(DIGEST_A))
+        self.assertIsNone(self.cache.open(DIGEST_B))
+        self.assertIsNotNone(self.cache.open(DIGEST_C))
+
+    def test_evicted_asset_stays_readable(self):
+        asset_file = self.store(DIGEST_A, [b'aaaaaaaa'])
+        self.read(self.store(DIGEST_B, [b'bbbbbbbb']))
+        self.assertEqual(self.read(asset_file), b'aaaaaaaa')
+
+
+class FileRangeTest(unittest.TestCase):
+    """
+    Tests for FileRange.
+    """
+
+    def setUp(self):
+        super(FileRangeTest, self).setUp()
+        asset_file = tempfile.TemporaryFile()
+        asset_file.write(b'0123456789')
+        self.file_range = FileRange(asset_file, 2, 7)
+        self.addCleanup(self.file_range.close)
+
+    def test_read(self):
+        self.assertEqual(self.file_range.read(4), b'2345')
+        self.assertEqual(self.file_range.read(4), b'67')
+        self.assertEqual(self.file_range.read(4), b'')
+
+    def test_read_all(self):
+        self.assertEqual(self.file_range.read(), b'234567')
+
+    def test_fileno_positioned_at_first_byte(self):
+        self.assertEqual(os.lseek(self.file_range.fileno(), 0, os.SEEK_CUR), 2)
@@ -272,6 +272,22 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_all_urls(data_dir, course_id, jump_to_id_base_url, block, view, frag, context,
+                     static_asset_path=''):  # pylint: disable=unused-argument
+    """
+    Substitutes the urls of the supplied fragment, as replace_static_urls,
+    replace_course_urls and replace_jump_to_id_urls would in turn, but in a
+    single scan of its content.
+    """
+    return wrap_fragment(frag, static_replace.replace_all_urls(
+        frag.content,
+        course_id,
+        data_dir,
+        static_asset_path=static_asset_path,
+        jump_to_id_base_url=jump_to_id_base_url,
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.